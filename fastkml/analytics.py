@@ -0,0 +1,417 @@
+# Copyright (C) 2024 Christian Ledermann
+#
+# This library is free software; you can redistribute it and/or modify it under
+# the terms of the GNU Lesser General Public License as published by the Free
+# Software Foundation; either version 2.1 of the License, or (at your option)
+# any later version.
+#
+# This library is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU Lesser General Public License for more
+# details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this library; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301 USA
+"""
+Vectorized analytics for ``gx:Track`` and ``gx:MultiTrack``.
+
+The metrics are computed with numpy directly on the columns of a track
+(``Track.epoch_micros`` and ``Track.coord_array``), no ``TrackItem``,
+``KmlDateTime`` or ``Point`` objects are created.
+Coordinates are longitude and latitude in degrees on the WGS84 ellipsoid.
+
+This module requires numpy, install it with ``pip install fastkml[numpy]``.
+"""
+
+import copy
+from dataclasses import dataclass
+from typing import Callable
+from typing import List
+from typing import Optional
+from typing import Tuple
+from typing import Union
+
+import numpy as np
+import numpy.typing as npt
+
+from fastkml.gx import MultiTrack
+from fastkml.gx import Track
+from fastkml.types import EARTH_RADIUS
+
+__all__ = [
+    "EARTH_RADIUS",
+    "TrackMetrics",
+    "gap_indices",
+    "haversine",
+    "initial_bearing",
+    "split_on_gaps",
+    "stops",
+    "track_arrays",
+    "track_metrics",
+    "vincenty",
+]
+
+FloatArray = npt.NDArray[np.float64]
+IntArray = npt.NDArray[np.int64]
+DistanceFunction = Callable[
+    [FloatArray, FloatArray, FloatArray, FloatArray],
+    FloatArray,
+]
+
+WGS84_A = 6_378_137.0
+WGS84_F = 1 / 298.257223563
+WGS84_B = WGS84_A * (1 - WGS84_F)
+_WGS84_SECOND_ECCENTRICITY_SQ = (WGS84_A**2 - WGS84_B**2) / WGS84_B**2
+
+VINCENTY_MAX_ITERATIONS = 200
+VINCENTY_TOLERANCE = 1e-12
+
+
+@dataclass(frozen=True)
+class TrackMetrics:
+    """
+    The metrics of the segments of a track or multi track.
+
+    The segment arrays have one value for each pair of consecutive track items.
+    For a multi track the segments of all tracks are concatenated, segments
+    between the end of one track and the start of the next one are not included.
+    The segments of track ``i`` are ``offsets[i]:offsets[i + 1]``.
+    """
+
+    distances: FloatArray
+    """The length of each segment in meters."""
+    durations: FloatArray
+    """The duration of each segment in seconds."""
+    speeds: FloatArray
+    """The speed for each segment in meters per second, ``NaN`` for 0 durations."""
+    bearings: FloatArray
+    """The initial bearing of each segment in degrees clockwise from north."""
+    offsets: IntArray
+    """The start of the segments of each track, and the total number of segments."""
+
+    @property
+    def length(self) -> float:
+        """Get the total length in meters."""
+        return float(self.distances.sum())
+
+    @property
+    def duration(self) -> float:
+        """Get the total duration of the segments in seconds."""
+        return float(self.durations.sum())
+
+
+def haversine(
+    lon1: FloatArray,
+    lat1: FloatArray,
+    lon2: FloatArray,
+    lat2: FloatArray,
+    radius: float = EARTH_RADIUS,
+) -> FloatArray:
+    """
+    Calculate the great circle distance between points on a sphere.
+
+    Args:
+    ----
+        lon1: The longitudes of the start points in degrees.
+        lat1: The latitudes of the start points in degrees.
+        lon2: The longitudes of the end points in degrees.
+        lat2: The latitudes of the end points in degrees.
+        radius: The radius of the sphere, defaults to the mean earth radius.
+
+    Returns:
+    -------
+        The distances in the unit of ``radius``.
+
+    """
+    phi1 = np.radians(lat1)
+    phi2 = np.radians(lat2)
+    sin_dphi = np.sin((phi2 - phi1) / 2)
+    sin_dlambda = np.sin(np.radians(lon2 - lon1) / 2)
+    a = sin_dphi**2 + np.cos(phi1) * np.cos(phi2) * sin_dlambda**2
+    central_angle = 2 * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+    return radius * central_angle  # type: ignore[no-any-return]
+
+
+def vincenty(
+    lon1: FloatArray,
+    lat1: FloatArray,
+    lon2: FloatArray,
+    lat2: FloatArray,
+) -> FloatArray:
+    """
+    Calculate the geodesic distance on the WGS84 ellipsoid with Vincenty's formula.
+
+    The inverse formula is iterated for all points at once, until all of them
+    have converged.
+    For nearly antipodal points, where the formula does not converge, the value
+    of the last iteration is returned.
+
+    Args:
+    ----
+        lon1: The longitudes of the start points in degrees.
+        lat1: The latitudes of the start points in degrees.
+        lon2: The longitudes of the end points in degrees.
+        lat2: The latitudes of the end points in degrees.
+
+    Returns:
+    -------
+        The distances in meters.
+
+    """
+    big_l = np.radians(np.asarray(lon2, dtype=np.float64) - lon1)
+    u1 = np.arctan((1 - WGS84_F) * np.tan(np.radians(lat1)))
+    u2 = np.arctan((1 - WGS84_F) * np.tan(np.radians(lat2)))
+    sin_u1, cos_u1 = np.sin(u1), np.cos(u1)
+    sin_u2, cos_u2 = np.sin(u2), np.cos(u2)
+    lam = big_l
+    with np.errstate(invalid="ignore", divide="ignore"):
+        for _ in range(VINCENTY_MAX_ITERATIONS):
+            sin_lam, cos_lam = np.sin(lam), np.cos(lam)
+            sin_sigma = np.hypot(
+                cos_u2 * sin_lam,
+                cos_u1 * sin_u2 - sin_u1 * cos_u2 * cos_lam,
+            )
+            cos_sigma = sin_u1 * sin_u2 + cos_u1 * cos_u2 * cos_lam
+            sigma = np.arctan2(sin_sigma, cos_sigma)
+            sin_alpha = np.where(
+                sin_sigma == 0,
+                0.0,
+                cos_u1 * cos_u2 * sin_lam / sin_sigma,
+            )
+            cos2_alpha = 1 - sin_alpha**2
+            cos_2sigma_m = np.where(
+                cos2_alpha == 0,
+                0.0,
+                cos_sigma - 2 * sin_u1 * sin_u2 / cos2_alpha,
+            )
+            c = WGS84_F / 16 * cos2_alpha * (4 + WGS84_F * (4 - 3 * cos2_alpha))
+            previous = lam
+            inner = cos_2sigma_m + c * cos_sigma * (2 * cos_2sigma_m**2 - 1)
+            correction = sigma + c * sin_sigma * inner
+            lam = big_l + (1 - c) * WGS84_F * sin_alpha * correction
+            if np.all(np.abs(lam - previous) < VINCENTY_TOLERANCE):
+                break
+    u_sq = cos2_alpha * _WGS84_SECOND_ECCENTRICITY_SQ
+    a = 1 + u_sq / 16384 * np.polyval((-175, 320, -768, 4096), u_sq)
+    b = u_sq / 1024 * np.polyval((-47, 74, -128, 256), u_sq)
+    cos2_2sigma_m = cos_2sigma_m**2
+    first = cos_sigma * (2 * cos2_2sigma_m - 1)
+    second = b / 6 * cos_2sigma_m * (4 * sin_sigma**2 - 3) * (4 * cos2_2sigma_m - 3)
+    delta_sigma = b * sin_sigma * (cos_2sigma_m + b / 4 * (first - second))
+    return WGS84_B * a * (sigma - delta_sigma)  # type: ignore[no-any-return]
+
+
+def initial_bearing(
+    lon1: FloatArray,
+    lat1: FloatArray,
+    lon2: FloatArray,
+    lat2: FloatArray,
+) -> FloatArray:
+    """
+    Calculate the initial bearing of the great circles between points.
+
+    Returns
+    -------
+        The bearings in degrees clockwise from north, in the range ``[0, 360)``.
+
+    """
+    phi1 = np.radians(lat1)
+    phi2 = np.radians(lat2)
+    dlambda = np.radians(np.asarray(lon2, dtype=np.float64) - lon1)
+    theta = np.arctan2(
+        np.sin(dlambda) * np.cos(phi2),
+        np.cos(phi1) * np.sin(phi2) - np.sin(phi1) * np.cos(phi2) * np.cos(dlambda),
+    )
+    return np.degrees(theta) % 360  # type: ignore[no-any-return]
+
+
+def track_arrays(track: Track) -> Tuple[IntArray, FloatArray]:
+    """
+    Get the times and coordinates of a track as numpy arrays.
+
+    The coordinates are a read only view of the track column, they are not copied.
+
+    Args:
+    ----
+        track: The track.
+
+    Returns:
+    -------
+        The microseconds since the epoch with the shape ``(n,)`` and the
+        coordinates with the shape ``(n, 3)``, ``z`` is ``NaN`` for 2D coordinates.
+
+    """
+    times = np.frombuffer(track.epoch_micros, dtype=np.int64)
+    coords = np.frombuffer(track.coord_array, dtype=np.float64).reshape(-1, 3)
+    return times, coords
+
+
+def _segments(
+    track: Track,
+    distance: DistanceFunction,
+) -> Tuple[FloatArray, FloatArray, FloatArray]:
+    times, coords = track_arrays(track)
+    lon, lat = coords[:, 0], coords[:, 1]
+    return (
+        distance(lon[:-1], lat[:-1], lon[1:], lat[1:]),
+        np.diff(times) / 1_000_000,
+        initial_bearing(lon[:-1], lat[:-1], lon[1:], lat[1:]),
+    )
+
+
+def _tracks(track: Union[Track, MultiTrack]) -> List[Track]:
+    return track.tracks if isinstance(track, MultiTrack) else [track]
+
+
+def track_metrics(
+    track: Union[Track, MultiTrack],
+    distance: DistanceFunction = haversine,
+) -> TrackMetrics:
+    """
+    Calculate the segment distances, durations, speeds and bearings.
+
+    Args:
+    ----
+        track: The track or multi track, the track items are expected to be in
+            chronological order.
+        distance: The distance function, ``haversine`` (the default) or
+            ``vincenty``.
+
+    Returns:
+    -------
+        The metrics of all segments.
+
+    """
+    segments = [_segments(t, distance) for t in _tracks(track)]
+    sizes = [len(s[0]) for s in segments]
+    distances, durations, bearings = (
+        np.concatenate([s[i] for s in segments]) if segments else np.empty(0)
+        for i in range(3)
+    )
+    with np.errstate(invalid="ignore", divide="ignore"):
+        speeds = np.where(durations > 0, distances / durations, np.nan)
+    return TrackMetrics(
+        distances=distances,
+        durations=durations,
+        speeds=speeds,
+        bearings=bearings,
+        offsets=np.concatenate(([0], np.cumsum(sizes, dtype=np.int64))),
+    )
+
+
+def stops(
+    track: Track,
+    max_speed: float = 0.5,
+    min_duration: float = 300,
+    distance: DistanceFunction = haversine,
+) -> IntArray:
+    """
+    Find the periods in which the tracked object did not move.
+
+    A stop is a run of consecutive segments with a speed of at most
+    ``max_speed``, that lasts at least ``min_duration`` seconds.
+
+    Args:
+    ----
+        track: The track, the track items are expected to be in chronological
+            order.
+        max_speed: The maximum speed in meters per second to be considered
+            stationary.
+        min_duration: The minimum duration of a stop in seconds.
+        distance: The distance function.
+
+    Returns:
+    -------
+        An array with the shape ``(k, 2)`` of the first and last track item index
+        of each stop.
+
+    """
+    metrics = track_metrics(track, distance)
+    slow = np.concatenate(
+        ([False], (metrics.speeds <= max_speed) | (metrics.distances == 0), [False]),
+    )
+    edges = np.flatnonzero(np.diff(slow.astype(np.int8)))
+    starts, ends = edges[0::2], edges[1::2]
+    elapsed = np.concatenate(([0.0], np.cumsum(metrics.durations)))
+    keep = elapsed[ends] - elapsed[starts] >= min_duration
+    return np.column_stack((starts[keep], ends[keep])).astype(np.int64)
+
+
+def gap_indices(
+    track: Track,
+    max_time_gap: Optional[float] = None,
+    max_distance_gap: Optional[float] = None,
+    distance: DistanceFunction = haversine,
+) -> IntArray:
+    """
+    Find the track items that start a new part of the track after a gap.
+
+    Args:
+    ----
+        track: The track, the track items are expected to be in chronological
+            order.
+        max_time_gap: The maximum time between two track items in seconds.
+        max_distance_gap: The maximum distance between two track items in meters.
+        distance: The distance function.
+
+    Returns:
+    -------
+        The indices of the track items that follow a gap.
+
+    """
+    distances, durations, _ = _segments(track, distance)
+    gaps = np.zeros(len(durations), dtype=bool)
+    if max_time_gap is not None:
+        gaps |= durations > max_time_gap
+    if max_distance_gap is not None:
+        gaps |= distances > max_distance_gap
+    return np.flatnonzero(gaps) + 1
+
+
+def split_on_gaps(
+    track: Union[Track, MultiTrack],
+    max_time_gap: Optional[float] = None,
+    max_distance_gap: Optional[float] = None,
+    distance: DistanceFunction = haversine,
+) -> MultiTrack:
+    """
+    Split a track or the tracks of a multi track where there are gaps.
+
+    Args:
+    ----
+        track: The track or multi track.
+        max_time_gap: The maximum time between two track items in seconds.
+        max_distance_gap: The maximum distance between two track items in meters.
+        distance: The distance function.
+
+    Returns:
+    -------
+        A multi track with a track for each part.
+
+    """
+    parts: List[Track] = []
+    for t in _tracks(track):
+        bounds = [
+            0,
+            *gap_indices(t, max_time_gap, max_distance_gap, distance).tolist(),
+            len(t.columns),
+        ]
+        columns = t.columns
+        parts.extend(
+            Track(
+                ns=t.ns,
+                name_spaces=dict(t.name_spaces),
+                altitude_mode=t.altitude_mode,
+                columns=columns.take(range(start, end)),
+                extended_data=copy.deepcopy(t.extended_data),
+            )
+            for start, end in zip(bounds, bounds[1:])
+        )
+    return MultiTrack(
+        ns=track.ns,
+        name_spaces=track.name_spaces,
+        altitude_mode=track.altitude_mode,
+        tracks=parts,
+        interpolate=track.interpolate if isinstance(track, MultiTrack) else None,
+    )
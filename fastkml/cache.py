@@ -0,0 +1,268 @@
+# Copyright (C) 2024 Christian Ledermann
+#
+# This library is free software; you can redistribute it and/or modify it under
+# the terms of the GNU Lesser General Public License as published by the Free
+# Software Foundation; either version 2.1 of the License, or (at your option)
+# any later version.
+#
+# This library is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU Lesser General Public License for more
+# details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this library; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301 USA
+"""
+A persistent cache of parsed KML files.
+
+Parsing a large KML file again on every start of a service or in every worker
+costs as much as the first time.
+The :class:`ParseCache` stores the parsed ``KML`` objects in a directory,
+pickled and compressed with ``zlib``, and loads them instead of parsing the XML
+when the same file is parsed again.
+Loading a cached file is several times faster than parsing it.
+
+An entry is found by a key built from the content of the file, the fastkml
+version, the fingerprint of the registry and the parse options.
+Instead of hashing the content, the path, size and modification time of the
+file can be used, which avoids reading the file for a cache hit.
+
+The total size of the entries is capped, when it is exceeded the least recently
+used entries are removed.
+The cache directory can be shared by several processes, the entries are written
+atomically.
+
+The entries are pickles, only use a cache directory that cannot be written by
+untrusted users.
+
+Example::
+
+    cache = ParseCache(Path("~/.cache/fastkml").expanduser(), max_size=2**30)
+    boundaries = cache.parse(Path("admin_boundaries.kml"))
+"""
+
+import contextlib
+import hashlib
+import os
+import pickle
+import tempfile
+import zlib
+from pathlib import Path
+from typing import List
+from typing import Optional
+from typing import Tuple
+from typing import Union
+
+from fastkml.about import __version__
+from fastkml.kml import KML
+from fastkml.registry import registry
+
+__all__ = ["ParseCache"]
+
+SUFFIX = ".kmlcache"
+"""The file name suffix of the cache entries."""
+
+COMPRESSION_LEVEL = 1
+"""The ``zlib`` level, the lowest level halves the size of a pickle at speed."""
+
+_CHUNK_SIZE = 1 << 20
+
+
+def _file_hash(path: Path) -> str:
+    """Get the SHA-256 hash of the content of a file."""
+    digest = hashlib.sha256()
+    with path.open("rb") as file:
+        while chunk := file.read(_CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ParseCache:
+    """
+    A directory of parsed KML files with a size limit and LRU eviction.
+
+    Use ``cache.parse(path)`` instead of ``KML.parse(path)`` to opt in.
+    """
+
+    def __init__(
+        self,
+        directory: Path,
+        *,
+        max_size: int = 1 << 30,
+        use_mtime: bool = False,
+    ) -> None:
+        """
+        Create a parse cache, the directory is created when it does not exist.
+
+        Args:
+        ----
+            directory: The directory of the cache entries.
+            max_size: The maximum total size of the entries in bytes.
+            use_mtime: Key the entries by the path, size and modification time
+                of the files instead of the hash of their content.
+
+        """
+        self.directory = directory
+        self.max_size = max_size
+        self.use_mtime = use_mtime
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def __repr__(self) -> str:
+        """Create a string (c)representation for ParseCache."""
+        return (
+            f"{self.__class__.__module__}.{self.__class__.__name__}("
+            f"directory={self.directory!r}, "
+            f"max_size={self.max_size!r}, "
+            f"use_mtime={self.use_mtime!r}"
+            ")"
+        )
+
+    def __len__(self) -> int:
+        """Return the number of entries in the cache."""
+        return len(self._entries())
+
+    @property
+    def size(self) -> int:
+        """Get the total size of the entries in bytes."""
+        return sum(size for _, _, size in self._entries())
+
+    def key(self, path: Path, *, strict: bool = True) -> str:
+        """
+        Get the key of the cache entry for a file.
+
+        Args:
+        ----
+            path: The path of the KML file.
+            strict: The ``strict`` option of the parser.
+
+        Returns:
+        -------
+            A hex digest that changes with the file, the fastkml version, the
+            registry and the parse options.
+
+        """
+        if self.use_mtime:
+            stat = path.stat()
+            source = f"{path.resolve()}:{stat.st_size}:{stat.st_mtime_ns}"
+        else:
+            source = _file_hash(path)
+        parts = (source, __version__, registry.fingerprint(), str(strict))
+        return hashlib.sha256("\0".join(parts).encode()).hexdigest()
+
+    def _entry(self, key: str) -> Path:
+        return self.directory / f"{key}{SUFFIX}"
+
+    def _entries(self) -> List[Tuple[int, Path, int]]:
+        """Get the last use, path and size of the entries."""
+        entries = []
+        for path in self.directory.glob(f"*{SUFFIX}"):
+            with contextlib.suppress(FileNotFoundError):
+                stat = path.stat()
+                entries.append((stat.st_mtime_ns, path, stat.st_size))
+        return entries
+
+    def _load(self, entry: Path) -> Optional[KML]:
+        """Load an entry, ``None`` when it is missing or cannot be read."""
+        try:
+            data = entry.read_bytes()
+        except FileNotFoundError:
+            return None
+        try:
+            kml = pickle.loads(zlib.decompress(data))  # noqa: S301
+        except (
+            zlib.error,
+            pickle.UnpicklingError,
+            EOFError,
+            AttributeError,
+            ImportError,
+            TypeError,
+            ValueError,
+            KeyError,
+        ):
+            kml = None
+        if not isinstance(kml, KML):
+            entry.unlink(missing_ok=True)
+            return None
+        with contextlib.suppress(FileNotFoundError):
+            os.utime(entry)
+        return kml
+
+    def _store(self, entry: Path, kml: KML) -> None:
+        """Write an entry atomically and evict the least recently used entries."""
+        data = zlib.compress(
+            pickle.dumps(kml, protocol=pickle.HIGHEST_PROTOCOL),
+            COMPRESSION_LEVEL,
+        )
+        if len(data) > self.max_size:
+            return
+        fd, temp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as file:
+                file.write(data)
+            Path(temp).replace(entry)
+        except BaseException:
+            Path(temp).unlink(missing_ok=True)
+            raise
+        self.evict(keep=entry)
+
+    def evict(self, *, keep: Optional[Path] = None) -> int:
+        """
+        Remove the least recently used entries until the size limit is met.
+
+        Args:
+        ----
+            keep: An entry that is not removed.
+
+        Returns:
+        -------
+            The number of removed entries.
+
+        """
+        entries = sorted(self._entries())
+        total = sum(size for _, _, size in entries)
+        removed = 0
+        for _, path, size in entries:
+            if total <= self.max_size:
+                break
+            if path == keep:
+                continue
+            path.unlink(missing_ok=True)
+            total -= size
+            removed += 1
+        return removed
+
+    def clear(self) -> None:
+        """Remove all entries."""
+        for _, path, _ in self._entries():
+            path.unlink(missing_ok=True)
+
+    def parse(
+        self,
+        file: Union[Path, str],
+        *,
+        strict: bool = True,
+        validate: Optional[bool] = None,
+    ) -> KML:
+        """
+        Parse a KML file, or load it from the cache.
+
+        Args:
+        ----
+            file: The path of the KML file.
+            strict: Whether to enforce strict parsing rules.
+            validate: Whether to validate the file against the schema, only
+                when the file is not in the cache.
+
+        Returns:
+        -------
+            The parsed KML object.
+
+        """
+        path = Path(file)
+        entry = self._entry(self.key(path, strict=strict))
+        kml = self._load(entry)
+        if kml is None:
+            kml = KML.parse(path, strict=strict, validate=validate)
+            self._store(entry, kml)
+        return kml
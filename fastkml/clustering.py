@@ -0,0 +1,283 @@
+# Copyright (C) 2024 Christian Ledermann
+#
+# This library is free software; you can redistribute it and/or modify it under
+# the terms of the GNU Lesser General Public License as published by the Free
+# Software Foundation; either version 2.1 of the License, or (at your option)
+# any later version.
+#
+# This library is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU Lesser General Public License for more
+# details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this library; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301 USA
+"""
+Cluster dense layers of point Placemarks for each level of detail.
+
+The points are aggregated into the cells of a regular longitude/latitude grid.
+The cell size is halved for each level, and each cluster is a Placemark at the
+centroid of its points, with a ``Region`` of its cell.
+
+The ``Lod`` of the regions switches from one level to the next, when the cell of
+a cluster grows beyond ``2 * min_lod_pixels`` on screen, the clusters of the next
+level, with cells of half the size, become active at ``min_lod_pixels``.
+The original Placemarks are only revealed below the deepest cluster level.
+
+The clustering is vectorized with numpy, install it with
+``pip install fastkml[numpy]``.
+
+Example::
+
+    document = cluster_placemarks(placemarks, levels=5, cell_size=8.0)
+    KML(features=[document]).write(Path("clusters.kml"))
+"""
+
+from dataclasses import dataclass
+from typing import List
+from typing import Sequence
+from typing import Tuple
+
+import numpy as np
+import numpy.typing as npt
+import pygeoif.geometry as geo
+
+from fastkml.containers import Document
+from fastkml.containers import Folder
+from fastkml.data import Data
+from fastkml.data import ExtendedData
+from fastkml.features import Placemark
+from fastkml.geometry import Point
+from fastkml.views import LatLonAltBox
+from fastkml.views import Lod
+from fastkml.views import Region
+
+__all__ = ["Clusters", "cluster_placemarks", "grid_clusters", "point_coordinates"]
+
+FloatArray = npt.NDArray[np.float64]
+IntArray = npt.NDArray[np.int64]
+
+ORIGIN = (-180.0, -90.0)
+
+
+@dataclass(frozen=True)
+class Clusters:
+    """The clusters of points in a grid."""
+
+    labels: IntArray
+    """The cluster of each point, with the shape ``(n,)``."""
+    cells: IntArray
+    """The column and row of the grid cell of each cluster, ``(k, 2)``."""
+    counts: IntArray
+    """The number of points in each cluster, ``(k,)``."""
+    centroids: FloatArray
+    """The mean longitude and latitude of the points of each cluster, ``(k, 2)``."""
+    extents: FloatArray
+    """The ``west, south, east, north`` bounds of the points of each cluster."""
+    cell_size: float
+    """The size of the grid cells in degrees."""
+    origin: Tuple[float, float]
+    """The south west corner of the grid cell ``(0, 0)``."""
+
+    def __len__(self) -> int:
+        """Return the number of clusters."""
+        return len(self.counts)
+
+    def cell_bounds(self) -> FloatArray:
+        """Get the ``west, south, east, north`` bounds of the cell of each cluster."""
+        south_west = self.cells * self.cell_size + np.asarray(self.origin)
+        return np.hstack((south_west, south_west + self.cell_size))
+
+
+def _point_coordinate(placemark: Placemark) -> Tuple[float, float]:
+    """Get the longitude and latitude of a point Placemark."""
+    point = placemark.kml_geometry
+    coordinates = point.kml_coordinates if isinstance(point, Point) else None
+    if not (coordinates and coordinates.coords):
+        msg = f"Only point Placemarks can be clustered, got {placemark!r}"
+        raise ValueError(msg)
+    x, y = coordinates.coords[0][:2]
+    return x, y
+
+
+def point_coordinates(placemarks: Sequence[Placemark]) -> FloatArray:
+    """
+    Get the coordinates of point Placemarks as an array.
+
+    The coordinates are read from the ``kml_coordinates`` of the KML geometry,
+    without creating a pygeoif geometry for each placemark.
+
+    Returns
+    -------
+        The longitude and latitude of each placemark, with the shape ``(n, 2)``.
+
+    Raises
+    ------
+        ValueError: When a placemark does not have a Point geometry.
+
+    """
+    return np.array(
+        [_point_coordinate(placemark) for placemark in placemarks],
+        dtype=np.float64,
+    ).reshape(-1, 2)
+
+
+def grid_clusters(
+    coords: FloatArray,
+    cell_size: float,
+    origin: Tuple[float, float] = ORIGIN,
+) -> Clusters:
+    """
+    Cluster points into the cells of a regular grid.
+
+    Args:
+    ----
+        coords: The longitude and latitude of the points, with the shape ``(n, 2)``.
+        cell_size: The size of the grid cells in degrees.
+        origin: The south west corner of the grid.
+
+    Returns:
+    -------
+        The clusters, ordered by column and row of their cell.
+
+    """
+    coords = np.asarray(coords, dtype=np.float64).reshape(-1, 2)
+    grid = np.floor((coords - np.asarray(origin)) / cell_size).astype(np.int64)
+    keys = (grid[:, 0] << 32) | (grid[:, 1] & 0xFFFFFFFF)
+    order = np.argsort(keys, kind="stable")
+    sorted_keys = keys[order]
+    new_cluster = np.ones(len(keys), dtype=bool)
+    new_cluster[1:] = sorted_keys[1:] != sorted_keys[:-1]
+    starts = np.flatnonzero(new_cluster)
+    counts = np.diff(np.append(starts, len(keys)))
+    labels = np.empty(len(keys), dtype=np.int64)
+    labels[order] = np.cumsum(new_cluster) - 1
+    sorted_coords = coords[order]
+    if len(starts):
+        extents = np.hstack(
+            (
+                np.minimum.reduceat(sorted_coords, starts),
+                np.maximum.reduceat(sorted_coords, starts),
+            ),
+        )
+        sums = np.add.reduceat(sorted_coords, starts)
+    else:
+        extents = np.empty((0, 4))
+        sums = np.empty((0, 2))
+    return Clusters(
+        labels=labels,
+        cells=grid[order[starts]],
+        counts=counts.astype(np.int64),
+        centroids=sums / counts[:, np.newaxis],
+        extents=extents,
+        cell_size=cell_size,
+        origin=origin,
+    )
+
+
+def _region(
+    bounds: Sequence[float],
+    min_lod_pixels: int,
+    max_lod_pixels: int,
+) -> Region:
+    west, south, east, north = (float(b) for b in bounds)
+    return Region(
+        lat_lon_alt_box=LatLonAltBox(north=north, south=south, east=east, west=west),
+        lod=Lod(min_lod_pixels=min_lod_pixels, max_lod_pixels=max_lod_pixels),
+    )
+
+
+def _cluster_placemark(
+    clusters: Clusters,
+    index: int,
+    region: Region,
+    level: int,
+) -> Placemark:
+    count = int(clusters.counts[index])
+    west, south, east, north = (str(float(v)) for v in clusters.extents[index])
+    return Placemark(
+        id=f"cluster-{level}-{index}",
+        name=str(count),
+        geometry=geo.Point(*(float(c) for c in clusters.centroids[index])),
+        region=region,
+        extended_data=ExtendedData(
+            elements=[
+                Data(name="count", value=str(count)),
+                Data(name="level", value=str(level)),
+                Data(name="west", value=west),
+                Data(name="south", value=south),
+                Data(name="east", value=east),
+                Data(name="north", value=north),
+            ],
+        ),
+    )
+
+
+def cluster_placemarks(
+    placemarks: Sequence[Placemark],
+    levels: int = 4,
+    cell_size: float = 10.0,
+    min_lod_pixels: int = 128,
+    origin: Tuple[float, float] = ORIGIN,
+) -> Document:
+    """
+    Create the cluster levels of point Placemarks.
+
+    Args:
+    ----
+        placemarks: The point Placemarks.
+        levels: The number of cluster levels.
+        cell_size: The size of the grid cells of the first level in degrees,
+            the size is halved for each following level.
+        min_lod_pixels: The ``minLodPixels`` at which a level becomes active.
+        origin: The south west corner of the grid.
+
+    Returns:
+    -------
+        A Document with a Folder of cluster Placemarks for each level, and a
+        Folder with the original Placemarks, grouped in Folders by the cells of
+        the deepest level.
+        The original Placemarks are not modified.
+
+    """
+    coords = point_coordinates(placemarks)
+    max_lod_pixels = 2 * min_lod_pixels
+    folders: List[Folder] = []
+    clusters = None
+    for level in range(levels):
+        clusters = grid_clusters(coords, cell_size / 2**level, origin)
+        cells = clusters.cell_bounds()
+        folders.append(
+            Folder(
+                name=f"Level {level}",
+                features=[
+                    _cluster_placemark(
+                        clusters,
+                        i,
+                        _region(
+                            cells[i],
+                            min_lod_pixels if level else 0,
+                            max_lod_pixels,
+                        ),
+                        level,
+                    )
+                    for i in range(len(clusters))
+                ],
+            ),
+        )
+    points = Folder(name="Points")
+    if clusters is None:
+        points.features = list(placemarks)
+    else:
+        cells = clusters.cell_bounds()
+        order = np.argsort(clusters.labels, kind="stable")
+        starts = [0, *np.cumsum(clusters.counts).tolist()]
+        points.features = [
+            Folder(
+                region=_region(cells[i], max_lod_pixels, -1),
+                features=[placemarks[j] for j in order[start:stop]],
+            )
+            for i, (start, stop) in enumerate(zip(starts, starts[1:]))
+        ]
+    return Document(name="Clusters", features=[*folders, points])
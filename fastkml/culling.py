@@ -0,0 +1,472 @@
+# Copyright (C) 2024 Christian Ledermann
+#
+# This library is free software; you can redistribute it and/or modify it under
+# the terms of the GNU Lesser General Public License as published by the Free
+# Software Foundation; either version 2.1 of the License, or (at your option)
+# any later version.
+#
+# This library is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU Lesser General Public License for more
+# details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this library; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301 USA
+"""
+Evaluate which ``Region`` elements of a document are active for a view.
+
+A NetworkLink server receives the view of the client, e.g. the ``BBOX`` of the
+default ``viewFormat`` or a ``Camera``.
+A ``Region`` is active when its ``LatLonAltBox`` intersects the view and the
+size of the box projected on the screen is within its ``Lod``.
+The projected size is the square root of the projected area of the box in
+pixels, as described in the KML reference.
+A Region nested in a feature with a Region is only active, when the Region of
+its ancestor is active.
+
+For a bounding box the projected size is the size of the box relative to the
+viewport.
+For a ``Camera`` or ``LookAt`` the size is scaled by the distance between the
+eye and the nearest point of the box, the view is approximated by a bounding
+box around the area on the ground that can be seen with the field of view.
+``minFadeExtent`` and ``maxFadeExtent`` only change the opacity of active
+Regions and are ignored.
+
+The regions are kept in a packed R-tree, and the projected sizes are computed
+with numpy for all candidate regions at once.
+Install numpy with ``pip install fastkml[numpy]``.
+
+Example::
+
+    index = RegionIndex.from_kml(k)
+    viewport = Viewport.from_view(camera, width=1024, height=768)
+    features = index.active(viewport)
+"""
+
+import math
+from dataclasses import dataclass
+from typing import Iterable
+from typing import List
+from typing import Optional
+from typing import Tuple
+from typing import Union
+
+import numpy as np
+import numpy.typing as npt
+
+from fastkml.enums import AltitudeMode
+from fastkml.features import _Feature
+from fastkml.types import EARTH_RADIUS
+from fastkml.types import Bounds
+from fastkml.views import Camera
+from fastkml.views import LookAt
+from fastkml.views import Region
+
+__all__ = ["RegionIndex", "Viewport"]
+
+BoolArray = npt.NDArray[np.bool_]
+FloatArray = npt.NDArray[np.float64]
+IntArray = npt.NDArray[np.int64]
+
+DEFAULT_FOV = 60.0
+"""The default horizontal field of view in degrees."""
+
+METERS_PER_DEGREE = math.pi / 180 * EARTH_RADIUS
+"""The length of a degree of latitude in meters."""
+
+NODE_SIZE = 64
+"""The number of regions in a leaf node of the R-tree."""
+
+MIN_DISTANCE = 1.0
+"""The minimum distance in meters between the eye and a region."""
+
+MIN_COS_TILT = 0.1
+"""The cosine of the steepest tilt for which the visible area is estimated."""
+
+
+def _degrees(meters: float, latitude: float) -> Tuple[float, float]:
+    """Convert a distance in meters into degrees of longitude and latitude."""
+    cos_latitude = max(math.cos(math.radians(latitude)), 1e-6)
+    return (
+        meters / (METERS_PER_DEGREE * cos_latitude),
+        meters / METERS_PER_DEGREE,
+    )
+
+
+def _offset(
+    longitude: float,
+    latitude: float,
+    meters: float,
+    heading: float,
+) -> Tuple[float, float]:
+    """Move a point a distance in meters in the direction of heading."""
+    d_lon, d_lat = _degrees(meters, latitude)
+    return (
+        longitude + d_lon * math.sin(math.radians(heading)),
+        max(-90.0, min(90.0, latitude + d_lat * math.cos(math.radians(heading)))),
+    )
+
+
+@dataclass(frozen=True)
+class Viewport:
+    """The view of a client, a bounding box with an optional eye position."""
+
+    bbox: Bounds
+    """The ``west, south, east, north`` bounds of the visible area."""
+    width: int
+    """The width of the viewport in pixels."""
+    height: int
+    """The height of the viewport in pixels."""
+    eye: Optional[Tuple[float, float, float]] = None
+    """The longitude, latitude and altitude in meters of the eye."""
+    fov: float = DEFAULT_FOV
+    """The horizontal field of view in degrees."""
+
+    @classmethod
+    def from_view(
+        cls,
+        view: Union[Camera, LookAt],
+        width: int,
+        height: int,
+        *,
+        fov: float = DEFAULT_FOV,
+    ) -> "Viewport":
+        """
+        Create a viewport for a ``Camera`` or ``LookAt``.
+
+        The bounding box contains the circle on the ground that is covered by
+        the diagonal of the viewport, widened for tilted views.
+
+        Args:
+        ----
+            view: The Camera or LookAt of the client.
+            width: The width of the viewport in pixels.
+            height: The height of the viewport in pixels.
+            fov: The horizontal field of view in degrees.
+
+        Returns:
+        -------
+            The viewport.
+
+        """
+        tilt = math.radians(view.tilt or 0.0)
+        if isinstance(view, LookAt):
+            distance, center, eye = _look_at_eye(view, tilt)
+        else:
+            distance, center, eye = _camera_eye(view, tilt)
+        half_width = distance * math.tan(math.radians(fov) / 2)
+        radius = math.hypot(half_width, half_width * height / width) / max(
+            math.cos(tilt),
+            MIN_COS_TILT,
+        )
+        return cls(
+            bbox=_around(center, radius),
+            width=width,
+            height=height,
+            eye=eye,
+            fov=fov,
+        )
+
+
+Eye = Tuple[float, Tuple[float, float], Tuple[float, float, float]]
+"""The distance to the center of the view, the center and the eye position."""
+
+
+def _look_at_eye(view: LookAt, tilt: float) -> Eye:
+    """Place the eye of a LookAt at its range from the looked at point."""
+    longitude = view.longitude or 0.0
+    latitude = view.latitude or 0.0
+    distance = view.range or 0.0
+    eye_longitude, eye_latitude = _offset(
+        longitude,
+        latitude,
+        distance * math.sin(tilt),
+        (view.heading or 0.0) + 180,
+    )
+    eye_altitude = (view.altitude or 0.0) + distance * math.cos(tilt)
+    return distance, (longitude, latitude), (eye_longitude, eye_latitude, eye_altitude)
+
+
+def _camera_eye(view: Camera, tilt: float) -> Eye:
+    """Find the point on the ground a Camera looks at, up to the horizon."""
+    longitude = view.longitude or 0.0
+    latitude = view.latitude or 0.0
+    altitude = view.altitude or 0.0
+    horizon = math.sqrt(max(altitude, 0.0) * (2 * EARTH_RADIUS + altitude))
+    distance = min(altitude / max(math.cos(tilt), MIN_COS_TILT), horizon)
+    ground_distance = math.sqrt(max(distance**2 - altitude**2, 0.0))
+    center = _offset(longitude, latitude, ground_distance, view.heading or 0.0)
+    return distance, center, (longitude, latitude, altitude)
+
+
+def _around(center: Tuple[float, float], radius: float) -> Bounds:
+    """Return the bounding box of a circle with a radius in meters."""
+    longitude, latitude = center
+    d_lon, d_lat = _degrees(radius, latitude)
+    if d_lon >= 180:  # noqa: PLR2004
+        west, east = -180.0, 180.0
+    else:
+        west, east = longitude - d_lon, longitude + d_lon
+    return (west, max(-90.0, latitude - d_lat), east, min(90.0, latitude + d_lat))
+
+
+def _unwrap(bounds: FloatArray) -> FloatArray:
+    """Move the east bound of boxes crossing the antimeridian beyond 180."""
+    bounds = bounds.copy()
+    crossing = bounds[:, 2] < bounds[:, 0]
+    bounds[crossing, 2] += 360
+    return bounds
+
+
+def _intersects(boxes: FloatArray, bbox: FloatArray) -> BoolArray:
+    """Test which boxes intersect an unwrapped bbox, on either side of 180."""
+    latitude = (boxes[:, 1] <= bbox[3]) & (boxes[:, 3] >= bbox[1])
+    longitude = np.zeros(len(boxes), dtype=bool)
+    for shift in (-360, 0, 360):
+        west_of_east = boxes[:, 0] <= bbox[2] + shift
+        longitude |= west_of_east & (boxes[:, 2] >= bbox[0] + shift)
+    return latitude & longitude  # type: ignore[no-any-return]
+
+
+def _pack(boxes: FloatArray) -> Tuple[IntArray, FloatArray]:
+    """Sort boxes into the leaves of a sort tile recursive R-tree."""
+    count = len(boxes)
+    leaves = -(-count // NODE_SIZE)
+    slice_size = NODE_SIZE * math.ceil(math.sqrt(leaves))
+    slices = np.empty(count, dtype=np.int64)
+    by_longitude = np.argsort(boxes[:, 0] + boxes[:, 2], kind="stable")
+    slices[by_longitude] = np.arange(count) // slice_size
+    latitudes = boxes[:, 1] + boxes[:, 3]
+    order = np.lexsort((latitudes, slices)).astype(np.int64)
+    starts = np.arange(0, count, NODE_SIZE)
+    sorted_boxes = boxes[order]
+    nodes = np.column_stack(
+        [
+            np.minimum.reduceat(sorted_boxes[:, 0], starts),
+            np.minimum.reduceat(sorted_boxes[:, 1], starts),
+            np.maximum.reduceat(sorted_boxes[:, 2], starts),
+            np.maximum.reduceat(sorted_boxes[:, 3], starts),
+        ],
+    )
+    return order, nodes
+
+
+def _region_row(region: Region) -> Tuple[Optional[float], ...]:
+    """Return the bounds, altitudes and level of detail of a Region."""
+    box, lod = region.lat_lon_alt_box, region.lod
+    assert box is not None  # noqa: S101
+    altitudes = (0.0, 0.0)
+    if box.altitude_mode not in (None, AltitudeMode.clamp_to_ground):
+        altitudes = (box.min_altitude or 0.0, box.max_altitude or 0.0)
+    lods = (0.0, -1.0)
+    if lod:
+        lods = (lod.min_lod_pixels or 0.0, lod.max_lod_pixels or -1.0)
+    return (box.west, box.south, box.east, box.north, *altitudes, *lods)
+
+
+def _depths(parents: List[int]) -> IntArray:
+    """Return the number of ancestors with a Region of each entry."""
+    depths = np.zeros(len(parents), dtype=np.int64)
+    for i, parent in enumerate(parents):
+        if parent >= 0:
+            depths[i] = depths[parent] + 1
+    return depths
+
+
+def _bbox_pixel_sizes(boxes: FloatArray, viewport: Viewport) -> FloatArray:
+    """Scale the boxes by the size of the viewport relative to its bbox."""
+    west, south, east, north = _unwrap(np.array([viewport.bbox], dtype=np.float64))[0]
+    x_scale = viewport.width / max(east - west, 1e-9)
+    y_scale = viewport.height / max(north - south, 1e-9)
+    widths = (boxes[:, 2] - boxes[:, 0]) * x_scale
+    heights = (boxes[:, 3] - boxes[:, 1]) * y_scale
+    return np.sqrt(widths * heights)  # type: ignore[no-any-return]
+
+
+def _eye_pixel_sizes(
+    boxes: FloatArray,
+    altitudes: FloatArray,
+    viewport: Viewport,
+) -> FloatArray:
+    """Scale the boxes by their distance from the eye."""
+    assert viewport.eye is not None  # noqa: S101
+    longitude, latitude, altitude = viewport.eye
+    centers = (boxes[:, 0] + boxes[:, 2]) / 2
+    longitudes = longitude + 360 * np.round((centers - longitude) / 360)
+    cos_latitudes = np.cos(np.radians((boxes[:, 1] + boxes[:, 3]) / 2))
+    widths = (boxes[:, 2] - boxes[:, 0]) * METERS_PER_DEGREE * cos_latitudes
+    heights = (boxes[:, 3] - boxes[:, 1]) * METERS_PER_DEGREE
+    nearest_longitudes = np.clip(longitudes, boxes[:, 0], boxes[:, 2])
+    dx = (nearest_longitudes - longitudes) * _degrees_x(latitude)
+    dy = (np.clip(latitude, boxes[:, 1], boxes[:, 3]) - latitude) * METERS_PER_DEGREE
+    dz = np.clip(altitude, altitudes[:, 0], altitudes[:, 1]) - altitude
+    distances = np.maximum(np.sqrt(dx**2 + dy**2 + dz**2), MIN_DISTANCE)
+    view_width = 2 * distances * math.tan(math.radians(viewport.fov) / 2)
+    pixels_per_meter = viewport.width / view_width
+    return np.sqrt(widths * heights) * pixels_per_meter  # type: ignore[no-any-return]
+
+
+def _degrees_x(latitude: float) -> float:
+    """Return the length of a degree of longitude in meters at a latitude."""
+    return METERS_PER_DEGREE * math.cos(math.radians(latitude))
+
+
+class RegionIndex:
+    """
+    An index over the Regions of the features of a KML document.
+
+    Build the index once for a parsed document with :meth:`from_kml`.
+    Queries return the features with an active Region, in the order they were
+    added.
+    """
+
+    def __init__(
+        self,
+        entries: Optional[Iterable[Tuple[_Feature, Region, int]]] = None,
+    ) -> None:
+        """
+        Build the index.
+
+        Args:
+        ----
+            entries: An iterable of ``(feature, region, parent)`` tuples, where
+                ``parent`` is the position of the entry of the nearest ancestor
+                with a Region or ``-1``.
+                Parents have to be added before their descendants.
+                The ``LatLonAltBox`` of the regions must have all four bounds.
+
+        """
+        self.features: List[_Feature] = []
+        self.regions: List[Region] = []
+        parents: List[int] = []
+        for feature, region, parent in entries or ():
+            self.features.append(feature)
+            self.regions.append(region)
+            parents.append(parent)
+        values = np.array(
+            [_region_row(region) for region in self.regions],
+            dtype=np.float64,
+        ).reshape(-1, 8)
+        self._boxes = _unwrap(values[:, :4])
+        self._altitudes = values[:, 4:6]
+        self._min_lod = values[:, 6]
+        self._max_lod = np.where(values[:, 7] < 0, np.inf, values[:, 7])
+        self._parents = np.array(parents, dtype=np.int64)
+        self._depths = _depths(parents)
+        self._order, self._nodes = _pack(self._boxes)
+
+    def __repr__(self) -> str:
+        """Create a string (c)representation for RegionIndex."""
+        return f"{self.__class__.__module__}.{self.__class__.__name__}(<{len(self)}>)"
+
+    def __len__(self) -> int:
+        """Return the number of regions in the index."""
+        return len(self.features)
+
+    @classmethod
+    def from_kml(cls, obj: object) -> "RegionIndex":
+        """
+        Build an index over the Regions of all features of a KML object.
+
+        Regions without a complete ``LatLonAltBox`` are ignored.
+
+        Args:
+        ----
+            obj: A ``KML`` object, a container or a single feature.
+
+        Returns:
+        -------
+            The region index.
+
+        """
+        entries: List[Tuple[_Feature, Region, int]] = []
+
+        def collect(obj: object, parent: int) -> None:
+            if isinstance(obj, _Feature) and obj.region and obj.region.lat_lon_alt_box:
+                entries.append((obj, obj.region, parent))
+                parent = len(entries) - 1
+            for feature in getattr(obj, "features", None) or ():
+                collect(feature, parent)
+
+        collect(obj, -1)
+        return cls(entries)
+
+    def _candidates(self, bbox: FloatArray) -> IntArray:
+        """Return the positions of the regions intersecting the bbox."""
+        nodes = np.flatnonzero(_intersects(self._nodes, bbox))
+        if not len(nodes):
+            return np.zeros(0, dtype=np.int64)
+        firsts = nodes[:, np.newaxis] * NODE_SIZE
+        members = (firsts + np.arange(NODE_SIZE)).ravel()
+        members = self._order[members[members < len(self._order)]]
+        return members[  # type: ignore[no-any-return]
+            _intersects(self._boxes[members], bbox)
+        ]
+
+    def _pixel_sizes(self, viewport: Viewport, positions: IntArray) -> FloatArray:
+        if viewport.eye is None:
+            return _bbox_pixel_sizes(self._boxes[positions], viewport)
+        return _eye_pixel_sizes(
+            self._boxes[positions],
+            self._altitudes[positions],
+            viewport,
+        )
+
+    def pixel_sizes(self, viewport: Viewport) -> FloatArray:
+        """
+        Compute the projected size in pixels of the regions.
+
+        Args:
+        ----
+            viewport: The view of the client.
+
+        Returns:
+        -------
+            The square root of the projected area of each region in pixels.
+
+        """
+        return self._pixel_sizes(viewport, np.arange(len(self), dtype=np.int64))
+
+    def active_mask(self, viewport: Viewport) -> BoolArray:
+        """
+        Evaluate which regions are active.
+
+        Args:
+        ----
+            viewport: The view of the client.
+
+        Returns:
+        -------
+            A boolean array with ``True`` for each active region.
+
+        """
+        active = np.zeros(len(self), dtype=bool)
+        if not len(self):
+            return active
+        bbox = _unwrap(np.array([viewport.bbox], dtype=np.float64))[0]
+        candidates = self._candidates(bbox)
+        sizes = self._pixel_sizes(viewport, candidates)
+        active[candidates] = (sizes >= self._min_lod[candidates]) & (
+            sizes <= self._max_lod[candidates]
+        )
+        for depth in range(1, int(self._depths.max()) + 1):
+            nested = np.flatnonzero(self._depths == depth)
+            active[nested] &= active[self._parents[nested]]
+        return active
+
+    def active(self, viewport: Viewport) -> List[_Feature]:
+        """
+        Get the features with an active Region.
+
+        Args:
+        ----
+            viewport: The view of the client.
+
+        Returns:
+        -------
+            The features whose Region and the Regions of all their ancestors are
+            active.
+
+        """
+        return [self.features[i] for i in np.flatnonzero(self.active_mask(viewport))]
@@ -21,10 +21,13 @@ https://developers.google.com/kml/documentation/extendeddata
 
 import logging
 from typing import Any
+from typing import Callable
 from typing import Dict
 from typing import Iterable
+from typing import Iterator
 from typing import List
 from typing import Optional
+from typing import Tuple
 from typing import Union
 
 from fastkml.base import _XMLObject
@@ -46,12 +49,14 @@ from fastkml.registry import RegistryItem
 from fastkml.registry import registry
 
 __all__ = [
+    "PARSERS",
     "Data",
     "ExtendedData",
     "Schema",
     "SchemaData",
     "SimpleData",
     "SimpleField",
+    "extended_data_values",
 ]
 
 logger = logging.getLogger(__name__)
@@ -736,3 +741,69 @@ registry.register(
         set_element=xml_subelement_list,
     ),
 )
+
+
+def _parse_bool(text: str) -> bool:
+    value = text.strip().lower()
+    if value in {"1", "true"}:
+        return True
+    if value in {"0", "false"}:
+        return False
+    msg = f"Invalid boolean value {text!r}"
+    raise ValueError(msg)
+
+
+PARSERS: Dict[Optional[DataType], Callable[[str], Any]] = {
+    None: str,
+    DataType.string: str,
+    DataType.int_: int,
+    DataType.uint: int,
+    DataType.short: int,
+    DataType.ushort: int,
+    DataType.float_: float,
+    DataType.double: float,
+    DataType.bool_: _parse_bool,
+}
+"""The conversion of the text of a ``SimpleData`` to Python for each type."""
+
+
+def extended_data_values(
+    extended_data: Optional[ExtendedData],
+    field_types: Dict[Optional[str], Dict[Optional[str], Optional[DataType]]],
+) -> Iterator[Tuple[str, Optional[str], Optional[DataType]]]:
+    """
+    Iterate over the names, values and types of the data of a feature.
+
+    The ``schemaUrl`` of ``SchemaData`` is resolved by its fragment, untyped
+    ``Data`` values and the fields of unknown schemas have no type.
+
+    Args:
+    ----
+        extended_data: The ``ExtendedData`` of a feature.
+        field_types: The types of the fields, keyed by the id of their schema
+            and the name of the field.
+
+    Returns:
+    -------
+        An iterator over the named values with their type.
+
+    """
+    if not extended_data:
+        return
+    for element in extended_data.elements:
+        yield from _element_values(element, field_types)
+
+
+def _element_values(
+    element: Union[Data, SchemaData],
+    field_types: Dict[Optional[str], Dict[Optional[str], Optional[DataType]]],
+) -> List[Tuple[str, Optional[str], Optional[DataType]]]:
+    if isinstance(element, Data):
+        return [(element.name, element.value, None)] if element.name else []
+    url = element.schema_url or ""
+    schema_types = field_types.get(url.rpartition("#")[2], {})
+    return [
+        (data.name, data.value, schema_types.get(data.name))
+        for data in element.data
+        if data.name
+    ]
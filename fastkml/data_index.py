@@ -0,0 +1,308 @@
+# Copyright (C) 2024 Christian Ledermann
+#
+# This library is free software; you can redistribute it and/or modify it under
+# the terms of the GNU Lesser General Public License as published by the Free
+# Software Foundation; either version 2.1 of the License, or (at your option)
+# any later version.
+#
+# This library is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU Lesser General Public License for more
+# details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this library; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301 USA
+"""
+Secondary indexes over the ``ExtendedData`` values of KML features.
+
+Filtering features by their data, e.g. ``status == "active"`` or
+``population > 1e6``, otherwise walks every feature and every ``Data`` and
+``SimpleData`` element of the document for each query.
+
+A :class:`DataIndex` is declared per field name: hash indexes answer equality
+queries, sorted indexes answer range queries in ``O(log n + m)``.
+The index is built in one pass over the document and is maintained when
+features are appended through :meth:`DataIndex.append`, the sorted indexes
+are sorted once on the first range query after features were added.
+
+Example::
+
+    index = DataIndex.from_kml(k, hashed=["status"], ordered=["population"])
+    active = index.equal("status", "active")
+    large = index.range("population", minimum=1_000_000, include_minimum=False)
+"""
+
+import bisect
+from operator import itemgetter
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import Iterable
+from typing import List
+from typing import Mapping
+from typing import Optional
+from typing import Tuple
+
+from fastkml.containers import _Container
+from fastkml.data import PARSERS
+from fastkml.data import Schema
+from fastkml.data import extended_data_values
+from fastkml.enums import DataType
+from fastkml.features import _Feature
+from fastkml.utils import iter_features
+
+__all__ = ["DataIndex"]
+
+Parser = Callable[[str], Any]
+FieldTypes = Dict[Optional[str], Optional[DataType]]
+
+_NOT_INDEXED = object()
+
+
+class DataIndex:
+    """
+    Hash and sorted indexes over the ``ExtendedData`` fields of KML features.
+
+    The values of a field are converted with the parser given in ``types``,
+    otherwise with the type of the ``SimpleField`` of the first occurrence of
+    the field, untyped ``Data`` values are strings.
+    Values that cannot be converted are not indexed.
+    Queries return the matching features in the order they were added, without
+    duplicates.
+    """
+
+    def __init__(
+        self,
+        hashed: Iterable[str] = (),
+        ordered: Iterable[str] = (),
+        *,
+        types: Optional[Mapping[str, Parser]] = None,
+    ) -> None:
+        """
+        Create an empty index.
+
+        Args:
+        ----
+            hashed: The names of the fields with an index for equality queries.
+            ordered: The names of the fields with an index for range queries.
+            types: The functions converting the text of a field into its key,
+                e.g. ``{"population": int}``.
+
+        """
+        self._hashed: Dict[str, Dict[Any, List[_Feature]]] = {
+            name: {} for name in hashed
+        }
+        self._ordered: Dict[str, List[Tuple[Any, _Feature]]] = {
+            name: [] for name in ordered
+        }
+        self._sorted: Dict[str, Tuple[List[Any], List[_Feature]]] = {}
+        self._parsers: Dict[str, Parser] = dict(types or {})
+        self._field_types: Dict[Optional[str], FieldTypes] = {}
+        self._positions: Dict[int, int] = {}
+        self._count = 0
+
+    def __repr__(self) -> str:
+        """Create a string (c)representation for DataIndex."""
+        return f"{self.__class__.__module__}.{self.__class__.__name__}(<{len(self)}>)"
+
+    def __len__(self) -> int:
+        """Return the number of indexed features."""
+        return len(self._positions)
+
+    @classmethod
+    def from_kml(
+        cls,
+        obj: object,
+        *,
+        hashed: Iterable[str] = (),
+        ordered: Iterable[str] = (),
+        types: Optional[Mapping[str, Parser]] = None,
+    ) -> "DataIndex":
+        """
+        Build an index over all features of a KML object in a single pass.
+
+        Args:
+        ----
+            obj: A ``KML`` object, a container or a single feature.
+            hashed: The names of the fields with an index for equality queries.
+            ordered: The names of the fields with an index for range queries.
+            types: The functions converting the text of a field into its key.
+
+        Returns:
+        -------
+            The index.
+
+        """
+        index = cls(hashed, ordered, types=types)
+        index.add(obj)
+        return index
+
+    def _add_schemata(self, schemata: Iterable[Schema]) -> None:
+        for schema in schemata:
+            self._field_types.setdefault(
+                schema.id,
+                {field.name: field.type_ for field in schema.fields},
+            )
+
+    def _key(self, name: str, value: str, type_: Optional[DataType]) -> Any:
+        return self._parsers.setdefault(name, PARSERS.get(type_, str))(value)
+
+    def add(self, obj: object) -> None:
+        """
+        Index a feature and all features it contains.
+
+        Features that are already indexed are skipped, the ``Schema`` elements
+        of added documents are used to convert the values of ``SimpleData``.
+
+        Args:
+        ----
+            obj: A ``KML`` object, a container or a single feature.
+
+        """
+        for feature in iter_features(obj):
+            self._add_schemata(getattr(feature, "schemata", None) or ())
+            if id(feature) not in self._positions and self._add_feature(feature):
+                self._positions[id(feature)] = self._count
+                self._count += 1
+
+    def _add_feature(self, feature: _Feature) -> bool:
+        """Add the values of a feature, return whether any value was indexed."""
+        indexed = False
+        for name, value, type_ in extended_data_values(
+            feature.extended_data,
+            self._field_types,
+        ):
+            key = self._field_key(name, value, type_)
+            if key is _NOT_INDEXED:
+                continue
+            self._add_hashed(name, key, feature)
+            self._add_ordered(name, key, feature)
+            indexed = True
+        return indexed
+
+    def _field_key(
+        self,
+        name: str,
+        value: Optional[str],
+        type_: Optional[DataType],
+    ) -> Any:
+        if value is None or (name not in self._hashed and name not in self._ordered):
+            return _NOT_INDEXED
+        try:
+            return self._key(name, value, type_)
+        except ValueError:
+            return _NOT_INDEXED
+
+    def _add_hashed(self, name: str, key: Any, feature: _Feature) -> None:
+        index = self._hashed.get(name)
+        if index is not None:
+            index.setdefault(key, []).append(feature)
+
+    def _add_ordered(self, name: str, key: Any, feature: _Feature) -> None:
+        entries = self._ordered.get(name)
+        if entries is not None:
+            entries.append((key, feature))
+            self._sorted.pop(name, None)
+
+    def _sorted_index(self, name: str) -> Tuple[List[Any], List[_Feature]]:
+        """Sort the entries of a field, equal keys stay in the order added."""
+        index = self._sorted.get(name)
+        if index is None:
+            entries = self._ordered[name]
+            entries.sort(key=itemgetter(0))
+            index = ([key for key, _ in entries], [feature for _, feature in entries])
+            self._sorted[name] = index
+        return index
+
+    def append(self, container: _Container, feature: _Feature) -> None:
+        """
+        Append a feature to a container and add it to the index.
+
+        Args:
+        ----
+            container: The container the feature is appended to.
+            feature: The feature to append.
+
+        """
+        container.append(feature)
+        self.add(feature)
+
+    def _query_key(self, name: str, value: Any) -> Any:
+        parse = self._parsers.get(name)
+        if parse is not None and isinstance(value, str):
+            return parse(value)
+        return value
+
+    def _unique(self, features: Iterable[_Feature]) -> List[_Feature]:
+        unique = {id(feature): feature for feature in features}
+        return sorted(
+            unique.values(),
+            key=lambda feature: self._positions[id(feature)],
+        )
+
+    def equal(self, name: str, value: Any) -> List[_Feature]:
+        """
+        Get the features with a value of a hashed field equal to ``value``.
+
+        Args:
+        ----
+            name: The name of the field.
+            value: The value to look up, strings are converted like the values
+                of the field.
+
+        Returns:
+        -------
+            The matching features.
+
+        Raises:
+        ------
+            KeyError: When there is no hash index for the field.
+
+        """
+        try:
+            key = self._query_key(name, value)
+        except ValueError:
+            return []
+        return self._unique(self._hashed[name].get(key, ()))
+
+    def range(
+        self,
+        name: str,
+        minimum: Any = None,
+        maximum: Any = None,
+        *,
+        include_minimum: bool = True,
+        include_maximum: bool = True,
+    ) -> List[_Feature]:
+        """
+        Get the features with a value of an ordered field within a range.
+
+        Args:
+        ----
+            name: The name of the field.
+            minimum: The lower bound, ``None`` for no lower bound.
+            maximum: The upper bound, ``None`` for no upper bound.
+            include_minimum: Whether values equal to the minimum match.
+            include_maximum: Whether values equal to the maximum match.
+
+        Returns:
+        -------
+            The matching features.
+
+        Raises:
+        ------
+            KeyError: When there is no sorted index for the field.
+
+        """
+        keys, features = self._sorted_index(name)
+        low, high = 0, len(keys)
+        if minimum is not None:
+            minimum = self._query_key(name, minimum)
+            bisect_low = bisect.bisect_left if include_minimum else bisect.bisect_right
+            low = bisect_low(keys, minimum)
+        if maximum is not None:
+            maximum = self._query_key(name, maximum)
+            bisect_high = bisect.bisect_right if include_maximum else bisect.bisect_left
+            high = bisect_high(keys, maximum)
+        return self._unique(features[low:high])
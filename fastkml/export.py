@@ -0,0 +1,403 @@
+# Copyright (C) 2024 Christian Ledermann
+#
+# This library is free software; you can redistribute it and/or modify it under
+# the terms of the GNU Lesser General Public License as published by the Free
+# Software Foundation; either version 2.1 of the License, or (at your option)
+# any later version.
+#
+# This library is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU Lesser General Public License for more
+# details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this library; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301 USA
+"""
+Streaming export of the Placemarks of KML documents.
+
+The Placemarks are read from the XML event stream with ``iterparse``, each one
+is parsed on its own and its element is removed from the tree once the record
+has been written, as are all the other elements of the containers.
+The memory use does not depend on the size of the document.
+
+The properties of a record are the name, the description, the time and the
+``ExtendedData`` of the Placemark, the ``SimpleData`` values are converted to
+the types of the fields of their ``Schema``.
+
+Example::
+
+    with Path("out.geojsons").open("w", encoding="utf-8") as target:
+        write_geojson_seq(Path("huge.kmz"), target)
+"""
+
+import csv
+import json
+from dataclasses import dataclass
+from dataclasses import field
+from itertools import chain
+from pathlib import Path
+from typing import IO
+from typing import Any
+from typing import Dict
+from typing import Iterator
+from typing import List
+from typing import Optional
+from typing import Sequence
+from typing import Union
+
+from fastkml import config
+from fastkml.data import PARSERS
+from fastkml.data import Schema
+from fastkml.data import extended_data_values
+from fastkml.enums import DataType
+from fastkml.features import Placemark
+from fastkml.geometry import LineString
+from fastkml.geometry import MultiGeometry
+from fastkml.geometry import Point
+from fastkml.geometry import Polygon
+from fastkml.times import TimeSpan
+from fastkml.times import TimeStamp
+from fastkml.types import Element
+from fastkml.utils import iter_elements
+from fastkml.utils import open_kml
+
+__all__ = [
+    "DATA_PREFIX",
+    "PROPERTIES",
+    "Record",
+    "iter_records",
+    "write_csv",
+    "write_geojson_seq",
+]
+
+PROPERTIES = ("name", "description", "when", "begin", "end")
+"""The properties of every record, before the ``ExtendedData`` values."""
+
+DATA_PREFIX = "data_"
+"""The prefix of the ``ExtendedData`` names that are also :data:`PROPERTIES`."""
+
+FieldTypes = Dict[Optional[str], Dict[Optional[str], Optional[DataType]]]
+
+
+@dataclass(frozen=True)
+class Record:
+    """The id, geometry and properties of a Placemark."""
+
+    id: str
+    geometry: Optional[Dict[str, Any]]
+    """The GeoJSON geometry."""
+    properties: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def __geo_interface__(self) -> Dict[str, Any]:
+        """Get the record as a GeoJSON Feature."""
+        feature: Dict[str, Any] = {"type": "Feature"}
+        if self.id:
+            feature["id"] = self.id
+        feature["geometry"] = self.geometry
+        feature["properties"] = self.properties
+        return feature
+
+    @property
+    def wkt(self) -> Optional[str]:
+        """Get the geometry as Well Known Text."""
+        return _wkt(self.geometry) if self.geometry else None
+
+
+def _coords(geometry: Union[Point, LineString]) -> List[Any]:
+    coordinates = geometry.kml_coordinates
+    return [tuple(coord) for coord in coordinates.coords] if coordinates else []
+
+
+def _simple_mapping(geometry: Union[Point, LineString]) -> Optional[Dict[str, Any]]:
+    coords = _coords(geometry)
+    if not coords:
+        return None
+    if isinstance(geometry, Point):
+        return {"type": "Point", "coordinates": coords[0]}
+    return {"type": "LineString", "coordinates": coords}
+
+
+def _polygon_mapping(geometry: Polygon) -> Optional[Dict[str, Any]]:
+    boundaries = [geometry.outer_boundary, *geometry.inner_boundaries]
+    rings = [
+        _coords(boundary.kml_geometry)
+        for boundary in boundaries
+        if boundary is not None and boundary.kml_geometry is not None
+    ]
+    return {"type": "Polygon", "coordinates": rings} if rings else None
+
+
+def _multi_mapping(geometry: MultiGeometry) -> Optional[Dict[str, Any]]:
+    parts = [
+        part for part in map(_mapping, geometry.kml_geometries) if part is not None
+    ]
+    if not parts:
+        return None
+    types = {part["type"] for part in parts}
+    if len(types) == 1 and types & {"Point", "LineString", "Polygon"}:
+        return {
+            "type": f"Multi{types.pop()}",
+            "coordinates": [part["coordinates"] for part in parts],
+        }
+    return {"type": "GeometryCollection", "geometries": parts}
+
+
+def _mapping(geometry: Any) -> Optional[Dict[str, Any]]:
+    """
+    Convert a KML geometry to a GeoJSON geometry.
+
+    The coordinates are taken from the KML geometry without creating the
+    ``pygeoif`` geometry, ``LinearRing`` becomes a ``LineString``.
+    """
+    if isinstance(geometry, (Point, LineString)):
+        return _simple_mapping(geometry)
+    if isinstance(geometry, Polygon):
+        return _polygon_mapping(geometry)
+    if isinstance(geometry, MultiGeometry):
+        return _multi_mapping(geometry)
+    pygeoif_geometry = getattr(geometry, "geometry", None)
+    return pygeoif_geometry.__geo_interface__ if pygeoif_geometry else None
+
+
+# The nesting of the coordinates in the Well Known Text of each type.
+_WKT_DEPTH = {
+    "Point": 1,
+    "LineString": 1,
+    "LinearRing": 1,
+    "Polygon": 2,
+    "MultiPoint": 1,
+    "MultiLineString": 2,
+    "MultiPolygon": 3,
+}
+
+
+def _wkt_text(coordinates: Any, depth: int) -> str:
+    if depth == 0:
+        return " ".join(map(str, coordinates))
+    return f"({', '.join(_wkt_text(part, depth - 1) for part in coordinates)})"
+
+
+def _wkt(mapping: Dict[str, Any]) -> str:
+    """Convert a GeoJSON geometry to Well Known Text."""
+    geom_type = mapping["type"]
+    if geom_type == "GeometryCollection":
+        geometries = ", ".join(_wkt(geometry) for geometry in mapping["geometries"])
+        return f"GEOMETRYCOLLECTION ({geometries})"
+    coordinates = mapping["coordinates"]
+    if geom_type == "Point":
+        coordinates = [coordinates]
+    return f"{geom_type.upper()} {_wkt_text(coordinates, _WKT_DEPTH[geom_type])}"
+
+
+def _typed(value: Optional[str], type_: Optional[DataType]) -> Any:
+    """Convert a data value to its type, keep values that do not match as text."""
+    if value is None or type_ is None:
+        return value
+    try:
+        return PARSERS[type_](value)
+    except ValueError:
+        return value
+
+
+def _data_name(name: str) -> str:
+    """Prefix the data names that would replace one of the :data:`PROPERTIES`."""
+    return f"{DATA_PREFIX}{name}" if name in PROPERTIES else name
+
+
+def _time_properties(times: Union[TimeSpan, TimeStamp, None]) -> Dict[str, str]:
+    if isinstance(times, TimeStamp):
+        return {"when": str(times.timestamp)} if times.timestamp else {}
+    if not isinstance(times, TimeSpan):
+        return {}
+    properties = {}
+    if times.begin:
+        properties["begin"] = str(times.begin)
+    if times.end:
+        properties["end"] = str(times.end)
+    return properties
+
+
+def _record(placemark: Placemark, field_types: FieldTypes) -> Record:
+    """Create the record of a Placemark."""
+    properties: Dict[str, Any] = dict.fromkeys(PROPERTIES)
+    properties["name"] = placemark.name
+    properties["description"] = placemark.description
+    properties.update(_time_properties(placemark.times))
+    for name, value, type_ in extended_data_values(
+        placemark.extended_data,
+        field_types,
+    ):
+        properties[_data_name(name)] = _typed(value, type_)
+    return Record(
+        id=placemark.id or "",
+        geometry=_mapping(placemark.kml_geometry),
+        properties=properties,
+    )
+
+
+def _add_field_types(element: Element, ns: str, field_types: FieldTypes) -> None:
+    schema = Schema.class_from_element(
+        ns=ns,
+        name_spaces={**config.NAME_SPACES, "kml": ns},
+        element=element,
+        strict=False,
+    )
+    field_types.setdefault(
+        schema.id,
+        {simple_field.name: simple_field.type_ for simple_field in schema.fields},
+    )
+
+
+def _read(
+    element: Element,
+    field_types: FieldTypes,
+    *,
+    is_feature: bool,
+) -> Optional[Record]:
+    """Read the field types of a Schema or the record of a Placemark."""
+    ns, _, name = element.tag.rpartition("}")
+    ns = f"{ns}}}" if ns else ""
+    if name == "Schema":
+        _add_field_types(element, ns, field_types)
+    elif is_feature and name == "Placemark":
+        placemark = Placemark.class_from_element(
+            ns=ns,
+            name_spaces={**config.NAME_SPACES, "kml": ns},
+            element=element,
+            strict=False,
+        )
+        return _record(placemark, field_types)
+    return None
+
+
+def _iter_records(stream: IO[bytes], field_types: FieldTypes) -> Iterator[Record]:
+    """
+    Stream the records of a KML document.
+
+    Only the Placemarks in the root element or in its containers are read,
+    not those of a ``NetworkLinkControl`` or its ``Update``.
+    The field types of the ``Schema`` elements are collected into
+    ``field_types``.
+    """
+    for element, is_feature in iter_elements(stream):
+        record = _read(element, field_types, is_feature=is_feature)
+        if record is not None:
+            yield record
+
+
+def iter_records(source: Union[Path, IO[bytes]]) -> Iterator[Record]:
+    """
+    Stream the records of the Placemarks of a KML document.
+
+    Args:
+    ----
+        source: The path of a KML or KMZ file, or a binary file object with
+            the KML document.
+
+    Yields:
+    ------
+        The records in the order of the document.
+
+    """
+    stream = open_kml(source) if isinstance(source, Path) else source
+    try:
+        yield from _iter_records(stream, {})
+    finally:
+        if stream is not source:
+            stream.close()
+
+
+def write_geojson_seq(
+    source: Union[Path, IO[bytes]],
+    target: IO[str],
+    *,
+    record_separator: bool = False,
+) -> int:
+    """
+    Write the Placemarks of a KML document as newline delimited GeoJSON.
+
+    Args:
+    ----
+        source: The path of a KML or KMZ file, or a binary file object with
+            the KML document.
+        target: The text file to write to, one GeoJSON Feature per line.
+        record_separator: Whether to start each line with the ASCII record
+            separator, as in RFC 8142 GeoJSON text sequences.
+
+    Returns:
+    -------
+        The number of features written.
+
+    """
+    prefix = "\x1e" if record_separator else ""
+    count = 0
+    for record in iter_records(source):
+        target.write(prefix)
+        target.write(json.dumps(record.__geo_interface__, ensure_ascii=False))
+        target.write("\n")
+        count += 1
+    return count
+
+
+def write_csv(
+    source: Union[Path, IO[bytes]],
+    target: IO[str],
+    *,
+    columns: Optional[Sequence[str]] = None,
+) -> int:
+    """
+    Write the Placemarks of a KML document as CSV with WKT geometries.
+
+    The columns are the id, the :data:`PROPERTIES`, the data columns and the
+    ``wkt`` of the geometry.
+    Without ``columns`` the data columns are the fields of the schemas that
+    precede the first Placemark and the data names of the first Placemark,
+    values of other data are not written.
+
+    Args:
+    ----
+        source: The path of a KML or KMZ file, or a binary file object with
+            the KML document.
+        target: The text file to write to, opened with ``newline=""``.
+        columns: The names of the data columns.
+
+    Returns:
+    -------
+        The number of rows written.
+
+    """
+    stream = open_kml(source) if isinstance(source, Path) else source
+    field_types: FieldTypes = {}
+    count = 0
+    try:
+        records = _iter_records(stream, field_types)
+        first = next(records, None)
+        if columns is None:
+            names = {
+                _data_name(name): None
+                for types in field_types.values()
+                for name in types
+                if name
+            }
+            names.update(dict.fromkeys(first.properties if first else ()))
+            columns = [name for name in names if name not in PROPERTIES]
+        writer = csv.writer(target)
+        writer.writerow(["id", *PROPERTIES, *columns, "wkt"])
+        if first is None:
+            return 0
+        for record in chain((first,), records):
+            writer.writerow(
+                [
+                    record.id,
+                    *(record.properties.get(name) for name in PROPERTIES),
+                    *(record.properties.get(name) for name in columns),
+                    record.wkt,
+                ],
+            )
+            count += 1
+    finally:
+        if stream is not source:
+            stream.close()
+    return count
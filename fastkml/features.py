@@ -601,7 +601,7 @@ class Placemark(_Feature):
             extended_data=extended_data,
             **kwargs,
         )
-        if kml_geometry and geometry:
+        if geometry and kml_geometry:
             msg = "You can only specify one of kml_geometry or geometry"
             raise ValueError(msg)
         if geometry:
@@ -78,30 +78,48 @@ The complete XML schema for elements in this extension namespace is
 located at http://developers.google.com/kml/schema/kml22gx.xsd.
 """
 
+import copy
 import logging
+from array import array
+from bisect import bisect_left
+from bisect import bisect_right
 from dataclasses import dataclass
-from itertools import zip_longest
+from datetime import date
+from datetime import datetime
+from datetime import timedelta
+from datetime import timezone
+from math import isnan
 from typing import Any
+from typing import Callable
 from typing import Dict
+from typing import Final
 from typing import Iterable
 from typing import List
 from typing import Optional
+from typing import Sequence
 from typing import Tuple
-from typing import cast
-
+from typing import Type
+from typing import TypeVar
+from typing import Union
+from typing import overload
+
+try:  # pragma: no cover
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None  # type: ignore[assignment]
 import pygeoif.geometry as geo
 from pygeoif.types import PointType
 
 from fastkml import config
 from fastkml.data import ExtendedData
 from fastkml.enums import AltitudeMode
+from fastkml.enums import DateTimeResolution
 from fastkml.geometry import _Geometry
 from fastkml.helpers import bool_subelement
 from fastkml.helpers import coords_subelement_list
-from fastkml.helpers import coords_subelement_list_kwarg
 from fastkml.helpers import datetime_subelement_list
-from fastkml.helpers import datetime_subelement_list_kwarg
 from fastkml.helpers import enum_subelement
+from fastkml.helpers import handle_error
 from fastkml.helpers import subelement_bool_kwarg
 from fastkml.helpers import subelement_enum_kwarg
 from fastkml.helpers import xml_subelement
@@ -111,12 +129,16 @@ from fastkml.helpers import xml_subelement_list_kwarg
 from fastkml.registry import RegistryItem
 from fastkml.registry import registry
 from fastkml.times import KmlDateTime
+from fastkml.times import _parse_kml_datetime
+from fastkml.types import Element
 
 __all__ = [
     "Angle",
     "MultiTrack",
     "Track",
+    "TrackColumns",
     "TrackItem",
+    "TrackItems",
     "track_items_to_geometry",
     "tracks_to_geometry",
 ]
@@ -181,6 +203,252 @@ def track_items_to_geometry(track_items: Iterable[TrackItem]) -> geo.LineString:
     )
 
 
+_EPOCH = datetime(1970, 1, 1)  # noqa: DTZ001
+_NAIVE: Final = -(2**63)
+_RESOLUTIONS: Final = tuple(DateTimeResolution)
+_NAN: Final = float("nan")
+_HAS_NUMPY: Final = np is not None
+
+TimeValue = Union[KmlDateTime, datetime, date]
+AnyArray = TypeVar("AnyArray", "array[int]", "array[float]")
+
+
+def _pack_when(when: KmlDateTime) -> Tuple[int, int, int]:
+    """
+    Pack a KmlDateTime into integers.
+
+    The integers are the microseconds since the epoch (UTC for timezone aware
+    values, wall time for naive values and dates), the UTC offset in microseconds
+    or ``_NAIVE``, and the index of the resolution.
+    """
+    dt = when.dt
+    offset = _NAIVE
+    if isinstance(dt, datetime):
+        utc_offset = dt.utcoffset()
+        if utc_offset is not None:
+            offset = utc_offset // timedelta(microseconds=1)
+            dt = dt.replace(tzinfo=None) - utc_offset
+    else:
+        dt = datetime(dt.year, dt.month, dt.day)  # noqa: DTZ001
+    return (
+        (dt - _EPOCH) // timedelta(microseconds=1),
+        offset,
+        _RESOLUTIONS.index(when.resolution),
+    )
+
+
+def _unpack_when(micros: int, offset: int, resolution: int) -> KmlDateTime:
+    """Create a KmlDateTime from the integers created by ``_pack_when``."""
+    dt = _EPOCH + timedelta(microseconds=micros)
+    kml_resolution = _RESOLUTIONS[resolution]
+    if kml_resolution != DateTimeResolution.datetime:
+        return KmlDateTime(dt.date(), kml_resolution)
+    if offset != _NAIVE:
+        utc_offset = timedelta(microseconds=offset)
+        dt = (dt + utc_offset).replace(
+            tzinfo=timezone(utc_offset) if offset else timezone.utc,
+        )
+    return KmlDateTime(dt, kml_resolution)
+
+
+def _as_kml_datetime(value: TimeValue) -> KmlDateTime:
+    return value if isinstance(value, KmlDateTime) else KmlDateTime(value)
+
+
+def _lerp(start: float, end: float, fraction: float) -> float:
+    return start + (end - start) * fraction
+
+
+def _lerp_heading(start: float, end: float, fraction: float) -> float:
+    """Interpolate a heading in degrees along the shortest arc."""
+    return start + ((end - start + 180) % 360 - 180) * fraction
+
+
+def _coord_values(coord: Sequence[float]) -> Tuple[float, ...]:
+    """Pad a 2D or 3D coordinate to the stride of 3 of the coordinate column."""
+    if len(coord) == 2:  # noqa: PLR2004
+        return (coord[0], coord[1], _NAN)
+    if len(coord) == 3:  # noqa: PLR2004
+        return tuple(coord)
+    msg = f"Coordinates must be 2D or 3D, got {coord!r}"
+    raise ValueError(msg)
+
+
+def _angle_values(angle: Optional[Sequence[float]]) -> Tuple[float, ...]:
+    """Pad heading, tilt and roll to the stride of 3 of the angle column."""
+    if angle is None:
+        return (_NAN, _NAN, _NAN)
+    if len(angle) > 3:  # noqa: PLR2004
+        msg = f"Angles must have at most 3 values, got {angle!r}"
+        raise ValueError(msg)
+    return (*angle, *(0.0,) * (3 - len(angle)))
+
+
+def _append_values(
+    column: "array[float]",
+    ints: "array[int]",
+    values: Tuple[float, ...],
+) -> None:
+    """Append values to a column and flag the values that were given as int."""
+    column.extend(values)
+    ints.extend(isinstance(value, int) for value in values)
+
+
+def _restore(value: float, is_int: int) -> float:
+    return int(value) if is_int else value
+
+
+def _item_values(
+    column: "array[float]",
+    ints: "array[int]",
+    index: int,
+) -> Tuple[float, float, float]:
+    """Get the 3 values of an item, values that were given as int are restored."""
+    i = 3 * index
+    return (
+        _restore(column[i], ints[i]),
+        _restore(column[i + 1], ints[i + 1]),
+        _restore(column[i + 2], ints[i + 2]),
+    )
+
+
+def _value_columns(
+    values: Iterable[Sequence[float]],
+    pad: Callable[[Sequence[float]], Tuple[float, ...]],
+) -> Tuple["array[float]", "array[int]"]:
+    """Create a flat value column and its int flags from coordinates or angles."""
+    if isinstance(values, array):
+        return array("d", values), array("b", bytes(len(values)))
+    column: array[float] = array("d")
+    ints: array[int] = array("b")
+    for value in values:
+        _append_values(column, ints, pad(value))
+    return column, ints
+
+
+def _columns_equal(
+    first: Tuple["array[Any]", ...],
+    second: Tuple["array[Any]", ...],
+) -> bool:
+    """Compare columns bitwise, so that missing values (NaN) compare equal."""
+    return [c.tobytes() for c in first] == [c.tobytes() for c in second]
+
+
+def _take(column: AnyArray, indices: Iterable[int]) -> AnyArray:
+    return array(column.typecode, (column[i] for i in indices))
+
+
+def _search_sorted(sorted_times: "array[int]", values: List[int]) -> List[int]:
+    """
+    Find the leftmost insertion points of the values in the sorted times.
+
+    All values are searched with a single ``numpy.searchsorted`` when numpy is
+    installed, and with a binary search per value otherwise.
+    """
+    if not _HAS_NUMPY:
+        return [bisect_left(sorted_times, value) for value in values]
+    return np.searchsorted(  # type: ignore[no-any-return]
+        np.frombuffer(sorted_times, dtype=np.int64),
+        values,
+    ).tolist()
+
+
+@dataclass(frozen=True)
+class TrackColumns:
+    """
+    The columns of a track.
+
+    ``times``, ``offsets`` and ``resolutions`` hold one value per track item,
+    ``coords`` and ``angles`` and their int flags ``coord_ints`` and
+    ``angle_ints`` hold 3 values per track item, see ``Track``.
+    """
+
+    times: "array[int]"
+    offsets: "array[int]"
+    resolutions: "array[int]"
+    coords: "array[float]"
+    angles: "array[float]"
+    coord_ints: "array[int]"
+    angle_ints: "array[int]"
+
+    def __len__(self) -> int:
+        """Return the number of track items."""
+        return len(self.times)
+
+    def take(self, indices: Sequence[int]) -> "TrackColumns":
+        """
+        Get new columns with the track items at ``indices``.
+
+        A ``range`` with a step of 1 is sliced from the columns directly.
+        """
+        if isinstance(indices, range) and indices.step == 1:
+            items = slice(indices.start, indices.stop)
+            values = slice(3 * indices.start, 3 * indices.stop)
+            return TrackColumns(
+                times=self.times[items],
+                offsets=self.offsets[items],
+                resolutions=self.resolutions[items],
+                coords=self.coords[values],
+                angles=self.angles[values],
+                coord_ints=self.coord_ints[values],
+                angle_ints=self.angle_ints[values],
+            )
+        value_indices = [j for i in indices for j in range(3 * i, 3 * i + 3)]
+        return TrackColumns(
+            times=_take(self.times, indices),
+            offsets=_take(self.offsets, indices),
+            resolutions=_take(self.resolutions, indices),
+            coords=_take(self.coords, value_indices),
+            angles=_take(self.angles, value_indices),
+            coord_ints=_take(self.coord_ints, value_indices),
+            angle_ints=_take(self.angle_ints, value_indices),
+        )
+
+
+class TrackItems(Sequence[TrackItem]):
+    """
+    A lazy, read only view of the track items of a track.
+
+    The items are created from the columns of the track on access.
+    """
+
+    def __init__(self, track: "Track") -> None:
+        """Create a view of the track items of ``track``."""
+        self._track = track
+
+    def __len__(self) -> int:
+        """Return the number of track items."""
+        return len(self._track._times)  # noqa: SLF001
+
+    @overload
+    def __getitem__(self, index: int) -> TrackItem: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> List[TrackItem]: ...
+
+    def __getitem__(
+        self,
+        index: Union[int, slice],
+    ) -> Union[TrackItem, List[TrackItem]]:
+        """Get a track item or a list of track items."""
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        return self._track._track_item(index)  # noqa: SLF001
+
+    def __eq__(self, other: object) -> bool:
+        """Compare the track items with another sequence."""
+        if isinstance(other, TrackItems):
+            return _columns_equal(
+                self._track._columns(),
+                other._track._columns(),
+            )
+        return list(self) == other if isinstance(other, (list, tuple)) else False
+
+    def __repr__(self) -> str:
+        """Represent the track items as a list."""
+        return repr(list(self))
+
+
 class Track(_Geometry):
     """
     A track describes how an object moves through the world over a given time period.
@@ -194,11 +462,26 @@ class Track(_Geometry):
     Features, since you create only one Feature, which can be associated with multiple
     time elements as the object moves through space.
 
+    The ``<when>``, ``<gx:coord>`` and ``<gx:angles>`` values are stored in
+    columns of ``array.array`` rather than one object per item:
+
+    - ``epoch_micros``: microseconds since the epoch, in UTC for timezone aware
+      values.
+    - ``coord_array``: a flat array of ``x, y, z`` values, ``z`` is ``NaN``
+      for 2D coordinates.
+    - ``angle_array``: a flat array of ``heading, tilt, roll`` values, they are
+      ``NaN`` when the item has no angle.
+
+    Values that were given as ``int`` are flagged, so that they are returned and
+    serialized as integers, like they were given.
+
+    ``track_items``, ``whens``, ``coords`` and ``angles`` create the python objects
+    from these columns on access.
+
     https://developers.google.com/kml/documentation/kmlreference#gxtrack
     """
 
     _default_nsid = config.GX
-    track_items: List[TrackItem]
     extended_data: Optional[ExtendedData]
 
     def __init__(
@@ -214,6 +497,7 @@ class Track(_Geometry):
         coords: Optional[Iterable[PointType]] = None,
         angles: Optional[Iterable[PointType]] = None,
         extended_data: Optional[ExtendedData] = None,
+        columns: Optional[TrackColumns] = None,
         **kwargs: Any,
     ) -> None:
         """
@@ -234,13 +518,21 @@ class Track(_Geometry):
         track_items : Optional[Iterable[TrackItem]], optional
             The track items of the GX object, by default None
         whens : Optional[Iterable[KmlDateTime]], optional
-            The timestamps of the track items, by default None
+            The timestamps of the track items, by default None.
+            An ``array.array('q')`` of packed ``(microseconds, offset, resolution)``
+            values, as created by the parser, is accepted as well.
         coords : Optional[Iterable[PointType]], optional
-            The coordinates of the track items, by default None
+            The coordinates of the track items, by default None.
+            A flat ``array.array('d')`` of ``x, y, z`` values is accepted as well.
         angles : Optional[Iterable[PointType]], optional
-            The angles of the track items, by default None
+            The angles of the track items, by default None.
+            A flat ``array.array('d')`` of ``heading, tilt, roll`` values is
+            accepted as well.
         extended_data : Optional[ExtendedData], optional
             The extended data of the GX object, by default None
+        columns : Optional[TrackColumns], optional
+            The columns of the track items, by default None.
+            The arrays are used as they are, without copying them.
         **kwargs : Any, optional
             Additional keyword arguments.
 
@@ -250,25 +542,28 @@ class Track(_Geometry):
             If both `geometry` and `track_items` are specified.
 
         """
-        angles = list(angles) if angles else []
         if (whens or coords) and track_items:
             msg = "Cannot specify both geometry and track_items"
             raise ValueError(msg)
-        if not track_items and whens and coords:
-            track_items = [
-                TrackItem(
-                    when=cast(KmlDateTime, when),
-                    coord=geo.Point(*coord),
-                    angle=Angle(*angle),
-                )
-                for when, coord, angle in zip_longest(
-                    whens,
-                    coords,
-                    angles,
-                    fillvalue=(),
-                )
-            ]
-        self.track_items = list(track_items) if track_items else []
+        self._times: array[int] = array("q")
+        self._offsets: array[int] = array("q")
+        self._resolutions: array[int] = array("b")
+        self._coords: array[float] = array("d")
+        self._angles: array[float] = array("d")
+        self._coord_ints: array[int] = array("b")
+        self._angle_ints: array[int] = array("b")
+        if track_items:
+            self.track_items = track_items
+        elif whens and coords:
+            self._set_columns(whens, coords, angles)
+        elif columns:
+            self._times = columns.times
+            self._offsets = columns.offsets
+            self._resolutions = columns.resolutions
+            self._coords = columns.coords
+            self._angles = columns.angles
+            self._coord_ints = columns.coord_ints
+            self._angle_ints = columns.angle_ints
         self.extended_data = extended_data
         super().__init__(
             ns=ns,
@@ -279,6 +574,80 @@ class Track(_Geometry):
             **kwargs,
         )
 
+    def _set_columns(
+        self,
+        whens: Iterable[KmlDateTime],
+        coords: Iterable[PointType],
+        angles: Optional[Iterable[PointType]],
+    ) -> None:
+        """Fill the columns from whens, coords and angles."""
+        if isinstance(whens, array):
+            self._times = whens[0::3]
+            self._offsets = whens[1::3]
+            self._resolutions = array("b", whens[2::3])
+        else:
+            for when in whens:
+                self._append_when(when)
+        self._coords, self._coord_ints = _value_columns(coords, _coord_values)
+        self._angles, self._angle_ints = _value_columns(angles or (), _angle_values)
+        size = len(self._times)
+        if len(self._coords) != 3 * size:
+            logger.warning(
+                "Track has %d whens but %d coords",
+                size,
+                len(self._coords) // 3,
+            )
+            size = min(size, len(self._coords) // 3)
+            del self._times[size:]
+            del self._offsets[size:]
+            del self._resolutions[size:]
+        stop = 3 * size
+        del self._coords[stop:]
+        del self._coord_ints[stop:]
+        del self._angles[stop:]
+        del self._angle_ints[stop:]
+        missing = stop - len(self._angles)
+        self._angles.extend((0.0,) * missing)
+        self._angle_ints.extend(bytes(missing))
+
+    def _append_when(self, when: KmlDateTime) -> None:
+        micros, offset, resolution = _pack_when(when)
+        self._times.append(micros)
+        self._offsets.append(offset)
+        self._resolutions.append(resolution)
+
+    def _columns(self) -> Tuple["array[Any]", ...]:
+        return (
+            self._times,
+            self._offsets,
+            self._resolutions,
+            self._coords,
+            self._angles,
+        )
+
+    def _when(self, index: int) -> KmlDateTime:
+        return _unpack_when(
+            self._times[index],
+            self._offsets[index],
+            self._resolutions[index],
+        )
+
+    def _coord(self, index: int) -> PointType:
+        x, y, z = _item_values(self._coords, self._coord_ints, index)
+        return (x, y) if isnan(z) else (x, y, z)
+
+    def _angle(self, index: int) -> Optional[Angle]:
+        heading, tilt, roll = _item_values(self._angles, self._angle_ints, index)
+        return None if isnan(heading) else Angle(heading, tilt, roll)
+
+    def _track_item(self, index: int) -> TrackItem:
+        index = range(len(self._times))[index]
+        return TrackItem(
+            when=self._when(index),
+            coord=geo.Point(*self._coord(index)),
+            angle=self._angle(index),
+        )
+
     def __repr__(self) -> str:
         """
         Create a string representation for Track.
@@ -302,6 +671,145 @@ class Track(_Geometry):
             ")"
         )
 
+    def __eq__(self, other: object) -> bool:
+        """
+        Compare two tracks for equality.
+
+        The columns are compared bitwise, so that missing values compare equal.
+        """
+        if type(self) is not type(other):
+            return False
+        assert isinstance(other, Track)  # noqa: S101
+        columns = {
+            "_times",
+            "_offsets",
+            "_resolutions",
+            "_coords",
+            "_angles",
+            "_coord_ints",
+            "_angle_ints",
+        }
+        return _columns_equal(self._columns(), other._columns()) and {
+            k: v for k, v in self.__dict__.items() if k not in columns
+        } == {k: v for k, v in other.__dict__.items() if k not in columns}
+
+    @property
+    def track_items(self) -> TrackItems:
+        """
+        Get a lazy view of the track items.
+
+        Returns
+        -------
+        TrackItems
+            A sequence of TrackItems that are created on access.
+
+        """
+        return TrackItems(self)
+
+    @track_items.setter
+    def track_items(self, track_items: Iterable[TrackItem]) -> None:
+        self._times = array("q")
+        self._offsets = array("q")
+        self._resolutions = array("b")
+        self._coords = array("d")
+        self._angles = array("d")
+        self._coord_ints = array("b")
+        self._angle_ints = array("b")
+        for item in track_items:
+            self.append(item)
+
+    def append(self, track_item: TrackItem) -> None:
+        """
+        Append a track item to the track.
+
+        Parameters
+        ----------
+        track_item : TrackItem
+            The track item to append.
+
+        """
+        _append_values(
+            self._coords,
+            self._coord_ints,
+            _coord_values(track_item.coord.coords[0]),  # type: ignore[misc]
+        )
+        self._append_when(track_item.when)
+        _append_values(
+            self._angles,
+            self._angle_ints,
+            _angle_values(track_item.angle.coords if track_item.angle else None),
+        )
+
+    @property
+    def epoch_micros(self) -> "array[int]":
+        """
+        Get the timestamps as microseconds since the epoch.
+
+        Timezone aware values are converted to UTC, naive values and dates
+        are taken as they are.
+
+        Returns
+        -------
+        array[int]
+            The microseconds since the epoch for each track item.
+
+        """
+        return array("q", self._times)
+
+    @property
+    def coord_array(self) -> memoryview:
+        """
+        Get a read only view of the flat ``x, y, z`` coordinate column.
+
+        The view can be passed to ``numpy.asarray`` without copying the data.
+
+        Returns
+        -------
+        memoryview
+            The coordinates, 3 values per track item, ``z`` is ``NaN`` when
+            the coordinate is 2D.
+
+        """
+        return memoryview(self._coords).toreadonly()
+
+    @property
+    def angle_array(self) -> memoryview:
+        """
+        Get a read only view of the flat ``heading, tilt, roll`` column.
+
+        Returns
+        -------
+        memoryview
+            The angles, 3 values per track item, ``NaN`` when the item has no
+            angle.
+
+        """
+        return memoryview(self._angles).toreadonly()
+
+    @property
+    def columns(self) -> TrackColumns:
+        """
+        Get the columns of the track.
+
+        The arrays are shared with the track and must not be modified, use
+        ``TrackColumns.take`` to get a copy of some or all of the track items.
+
+        Returns
+        -------
+        TrackColumns
+            The columns of the track items.
+
+        """
+        return TrackColumns(
+            self._times,
+            self._offsets,
+            self._resolutions,
+            self._coords,
+            self._angles,
+            self._coord_ints,
+            self._angle_ints,
+        )
+
     @property
     def geometry(self) -> Optional[geo.LineString]:
         """
@@ -313,7 +821,7 @@ class Track(_Geometry):
             The geometry of the track.
 
         """
-        return track_items_to_geometry(self.track_items)
+        return geo.LineString(self.coords)  # type: ignore[arg-type]
 
     @property
     def whens(self) -> Tuple[KmlDateTime, ...]:
@@ -326,7 +834,10 @@ class Track(_Geometry):
             The timestamps of the track items.
 
         """
-        return tuple(item.when for item in self.track_items)
+        return tuple(
+            _unpack_when(*packed)
+            for packed in zip(self._times, self._offsets, self._resolutions)
+        )
 
     @property
     def coords(self) -> Tuple[PointType, ...]:
@@ -339,11 +850,7 @@ class Track(_Geometry):
             The coordinates of the track items.
 
         """
-        return tuple(
-            item.coord.coords[0]  # type: ignore[misc]
-            for item in self.track_items
-            if item.coord
-        )
+        return tuple(self._coord(i) for i in range(len(self._times)))
 
     @property
     def angles(self) -> Tuple[PointType, ...]:
@@ -356,7 +863,158 @@ class Track(_Geometry):
             The angles of the track items.
 
         """
-        return tuple(item.angle.coords for item in self.track_items if item.angle)
+        return tuple(
+            angle
+            for angle in (
+                _item_values(self._angles, self._angle_ints, i)
+                for i in range(len(self._times))
+            )
+            if not isnan(angle[0])
+        )
+
+    def _time_order(self) -> Tuple[Sequence[int], "array[int]"]:
+        """Return the item indices ordered by time, and their sorted times."""
+        times = self._times
+        if not _HAS_NUMPY:
+            if all(times[i] <= times[i + 1] for i in range(len(times) - 1)):
+                return range(len(times)), times
+            order = sorted(range(len(times)), key=times.__getitem__)
+        else:
+            values = np.frombuffer(times, dtype=np.int64)
+            if np.all(values[:-1] <= values[1:]):
+                return range(len(times)), times
+            order = np.argsort(values, kind="stable").tolist()
+        return order, array("q", (times[i] for i in order))
+
+    def _interpolate(
+        self,
+        when: KmlDateTime,
+        first: int,
+        second: int,
+        fraction: float,
+    ) -> TrackItem:
+        """Interpolate linearly between the track items ``first`` and ``second``."""
+        coord = tuple(
+            _lerp(start, end, fraction)
+            for start, end in zip(
+                _item_values(self._coords, self._coord_ints, first),
+                _item_values(self._coords, self._coord_ints, second),
+            )
+        )
+        h0, t0, r0 = _item_values(self._angles, self._angle_ints, first)
+        h1, t1, r1 = _item_values(self._angles, self._angle_ints, second)
+        angle = (
+            None
+            if isnan(h0) or isnan(h1)
+            else Angle(
+                _lerp_heading(h0, h1, fraction),
+                _lerp(t0, t1, fraction),
+                _lerp(r0, r1, fraction),
+            )
+        )
+        return TrackItem(
+            when=when,
+            coord=geo.Point(*(coord[:2] if isnan(coord[2]) else coord)),
+            angle=angle,
+        )
+
+    def _position(
+        self,
+        when: KmlDateTime,
+        index: int,
+        order: Sequence[int],
+        sorted_times: "array[int]",
+    ) -> Optional[TrackItem]:
+        """Get the position at ``when``, ``index`` is its place in the sorted times."""
+        micros = _pack_when(when)[0]
+        size = len(sorted_times)
+        if index < size and sorted_times[index] == micros:
+            return self._track_item(order[index])
+        if index in {0, size}:
+            return None
+        start = sorted_times[index - 1]
+        return self._interpolate(
+            when,
+            order[index - 1],
+            order[index],
+            (micros - start) / (sorted_times[index] - start),
+        )
+
+    def position_at(self, times: Iterable[TimeValue]) -> List[Optional[TrackItem]]:
+        """
+        Get the interpolated positions of the track at the given times.
+
+        The track items of all times are located with a single
+        ``numpy.searchsorted`` over the sorted timestamps, or a binary search per
+        time when numpy is not installed.
+        Coordinates and tilt and roll are interpolated linearly, the heading
+        along the shortest arc.
+        A 3D coordinate is only returned when both neighbouring items are 3D,
+        and an angle only when both neighbouring items have one.
+        Naive datetimes and dates are compared as UTC, a ``KmlDateTime`` with a
+        coarser resolution than ``dateTime`` is taken as the start of its period.
+
+        Parameters
+        ----------
+        times : Iterable[TimeValue]
+            The times to get the positions for.
+
+        Returns
+        -------
+        List[Optional[TrackItem]]
+            A track item for each time, ``None`` when the time is outside of
+            the track.
+
+        """
+        whens = [_as_kml_datetime(value) for value in times]
+        order, sorted_times = self._time_order()
+        indices = _search_sorted(sorted_times, [_pack_when(when)[0] for when in whens])
+        return [
+            self._position(when, index, order, sorted_times)
+            for when, index in zip(whens, indices)
+        ]
+
+    def slice(
+        self,
+        begin: Optional[TimeValue] = None,
+        end: Optional[TimeValue] = None,
+    ) -> "Track":
+        """
+        Get the part of the track between ``begin`` and ``end``.
+
+        Parameters
+        ----------
+        begin : Optional[TimeValue], optional
+            The start of the time period, inclusive, by default the start of the
+            track.
+        end : Optional[TimeValue], optional
+            The end of the time period, inclusive, by default the end of the track.
+
+        Returns
+        -------
+        Track
+            A new track with the track items inside the time period, sorted by
+            time.
+
+        """
+        order, sorted_times = self._time_order()
+        low = (
+            0
+            if begin is None
+            else bisect_left(sorted_times, _pack_when(_as_kml_datetime(begin))[0])
+        )
+        high = (
+            len(sorted_times)
+            if end is None
+            else bisect_right(sorted_times, _pack_when(_as_kml_datetime(end))[0])
+        )
+        return Track(
+            ns=self.ns,
+            name_spaces=dict(self.name_spaces),
+            altitude_mode=self.altitude_mode,
+            extended_data=copy.deepcopy(self.extended_data),
+            columns=self.columns.take(order[low:high]),
+        )
 
     def __bool__(self) -> bool:
         """
@@ -368,7 +1026,64 @@ class Track(_Geometry):
             True if the track has track items, False otherwise.
 
         """
-        return bool(self.track_items)
+        return bool(self._times)
+
+
+def subelement_whens_kwarg(
+    *,
+    element: Element,
+    ns: str,
+    name_spaces: Dict[str, str],  # noqa: ARG001
+    node_name: str,
+    kwarg: str,
+    classes: Tuple[Type[object], ...],  # noqa: ARG001
+    strict: bool,
+) -> Dict[str, "array[int]"]:
+    """Extract the ``<when>`` values of a track into a packed integer column."""
+    column: array[int] = array("q")
+    for subelement in element.findall(f"{ns}{node_name}"):
+        try:
+            column.extend(
+                _pack_when(KmlDateTime(*_parse_kml_datetime(subelement.text))),
+            )
+        except (ValueError, TypeError) as exc:  # noqa: PERF203
+            handle_error(
+                error=exc,
+                strict=strict,
+                element=element,
+                node=subelement,
+                expected="DateTime",
+            )
+    return {kwarg: column} if column else {}
+
+
+def subelement_coords_column_kwarg(
+    *,
+    element: Element,
+    ns: str,
+    name_spaces: Dict[str, str],  # noqa: ARG001
+    node_name: str,
+    kwarg: str,
+    classes: Tuple[Type[object], ...],  # noqa: ARG001
+    strict: bool,
+) -> Dict[str, "array[float]"]:
+    """Extract ``<gx:coord>`` or ``<gx:angles>`` values into a flat float column."""
+    column: array[float] = array("d")
+    pad = _angle_values if node_name == "angles" else _coord_values
+    for subelement in element.findall(f"{ns}{node_name}"):
+        if not subelement.text:
+            continue
+        try:
+            column.extend(pad([float(c) for c in subelement.text.split()]))
+        except ValueError as exc:
+            handle_error(
+                error=exc,
+                strict=strict,
+                element=element,
+                node=subelement,
+                expected="Coordinates",
+            )
+    return {kwarg: column} if column else {}
 
 
 registry.register(
@@ -390,7 +1105,7 @@ registry.register(
         classes=(KmlDateTime,),
         attr_name="whens",
         node_name="when",
-        get_kwarg=datetime_subelement_list_kwarg,
+        get_kwarg=subelement_whens_kwarg,
         set_element=datetime_subelement_list,
     ),
 )
@@ -401,7 +1116,7 @@ registry.register(
         classes=(tuple,),
         attr_name="coords",
         node_name="coord",
-        get_kwarg=coords_subelement_list_kwarg,
+        get_kwarg=subelement_coords_column_kwarg,
         set_element=coords_subelement_list,
     ),
 )
@@ -412,7 +1127,7 @@ registry.register(
         classes=(tuple,),
         attr_name="angles",
         node_name="angles",
-        get_kwarg=coords_subelement_list_kwarg,
+        get_kwarg=subelement_coords_column_kwarg,
         set_element=coords_subelement_list,
         default=(0.0, 0.0, 0.0),
     ),
@@ -542,6 +1257,62 @@ class MultiTrack(_Geometry):
         """
         return tracks_to_geometry(self.tracks)
 
+    def position_at(self, times: Iterable[TimeValue]) -> List[Optional[TrackItem]]:
+        """
+        Get the interpolated positions of the multi track at the given times.
+
+        Each time is looked up in the tracks in their order, the first track
+        that covers the time provides the position, see ``Track.position_at``.
+
+        Parameters
+        ----------
+        times : Iterable[TimeValue]
+            The times to get the positions for.
+
+        Returns
+        -------
+        List[Optional[TrackItem]]
+            A track item for each time, ``None`` when no track covers the time.
+
+        """
+        whens = [_as_kml_datetime(value) for value in times]
+        positions: List[Optional[TrackItem]] = [None] * len(whens)
+        for track in self.tracks:
+            missing = [i for i, position in enumerate(positions) if position is None]
+            found = track.position_at([whens[i] for i in missing])
+            for i, position in zip(missing, found):
+                positions[i] = position
+        return positions
+
+    def slice(
+        self,
+        begin: Optional[TimeValue] = None,
+        end: Optional[TimeValue] = None,
+    ) -> "MultiTrack":
+        """
+        Get the parts of the tracks between ``begin`` and ``end``.
+
+        Parameters
+        ----------
+        begin : Optional[TimeValue], optional
+            The start of the time period, inclusive, by default unbounded.
+        end : Optional[TimeValue], optional
+            The end of the time period, inclusive, by default unbounded.
+
+        Returns
+        -------
+        MultiTrack
+            A new multi track, tracks outside of the time period are dropped.
+
+        """
+        return MultiTrack(
+            ns=self.ns,
+            name_spaces=dict(self.name_spaces),
+            altitude_mode=self.altitude_mode,
+            tracks=[track.slice(begin, end) for track in self.tracks],
+            interpolate=self.interpolate,
+        )
+
     def __bool__(self) -> bool:
         """
         Check if the object has any tracks.
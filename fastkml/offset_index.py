@@ -0,0 +1,524 @@
+# Copyright (C) 2024 Christian Ledermann
+#
+# This library is free software; you can redistribute it and/or modify it under
+# the terms of the GNU Lesser General Public License as published by the Free
+# Software Foundation; either version 2.1 of the License, or (at your option)
+# any later version.
+#
+# This library is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU Lesser General Public License for more
+# details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this library; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301 USA
+"""
+Random access to the features of large KML files by their byte offsets.
+
+:meth:`OffsetIndex.build` reads a KML file once with the ``expat`` parser and
+records the byte offset and length of each feature that is not a container,
+together with the ``Document`` and ``Folder`` elements it is nested in.
+With the index a single feature or a page of features is parsed from its byte
+range alone, the file is read through ``mmap``, so only the pages of the
+requested features are loaded.
+
+The index can be saved next to the file and loaded again, it records the size
+and modification time of the file it was built for.
+Compressed KMZ files cannot be indexed, extract the KML document first.
+
+Example::
+
+    index = OffsetIndex.build(Path("huge.kml"))
+    index.save(Path("huge.kml.idx"))
+
+    index = OffsetIndex.load(Path("huge.kml.idx"))
+    placemarks = index.page(2_000_000, 50)
+"""
+
+import json
+import mmap
+import re
+from array import array
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Tuple
+from typing import Type
+from xml.parsers import expat
+
+from fastkml import config
+from fastkml.features import NetworkLink
+from fastkml.features import Placemark
+from fastkml.features import _Feature
+from fastkml.overlays import GroundOverlay
+from fastkml.overlays import PhotoOverlay
+from fastkml.overlays import ScreenOverlay
+
+__all__ = ["FEATURES", "ContainerEntry", "FeatureEntry", "OffsetIndex"]
+
+CONTAINERS = frozenset(("Document", "Folder"))
+FEATURES: Dict[str, Type[_Feature]] = {
+    "Placemark": Placemark,
+    "NetworkLink": NetworkLink,
+    "GroundOverlay": GroundOverlay,
+    "ScreenOverlay": ScreenOverlay,
+    "PhotoOverlay": PhotoOverlay,
+}
+"""The indexed features, the index stores the position of their name."""
+_TAGS = list(FEATURES)
+VERSION = 1
+_CHUNK_SIZE = 1 << 20
+_QNAME = re.compile(rb"<([^\s/>]+)")
+
+
+@dataclass(frozen=True)
+class ContainerEntry:
+    """A ``Document`` or ``Folder`` element of an indexed file."""
+
+    tag: str
+    """The name of the element."""
+    id: str
+    """The ``id`` attribute of the element."""
+    name: Optional[str]
+    """The text of the ``name`` of the container."""
+    offset: int
+    """The byte offset of the start tag."""
+    parent: int
+    """The position of the enclosing container, ``-1`` for none."""
+
+
+@dataclass(frozen=True)
+class FeatureEntry:
+    """A feature of an indexed file."""
+
+    tag: str
+    """The name of the element, e.g. ``Placemark``."""
+    id: str
+    """The ``id`` attribute of the element."""
+    offset: int
+    """The byte offset of the start tag."""
+    length: int
+    """The number of bytes up to the end of the end tag."""
+    path: Tuple[ContainerEntry, ...]
+    """The containers of the feature, from the outermost to the innermost."""
+
+
+def _local(tag: str) -> str:
+    return tag.rpartition(" ")[2]
+
+
+def _end_of_element(data: mmap.mmap, offset: int, end: int) -> int:
+    """
+    Find the end of an element from the byte index of its end event.
+
+    The end event of an element is reported at the start of its end tag, the
+    end event of an empty element ``<Placemark/>`` after the element.
+    """
+    match = _QNAME.match(data, offset)
+    end_tag = b"</" + match.group(1) if match else b"</"
+    tag_end = end + len(end_tag)
+    if data[end:tag_end] == end_tag:
+        return data.find(b">", end) + 1
+    return end
+
+
+class _Indexer:
+    """The expat handlers recording the features and containers."""
+
+    def __init__(self, parser: Any) -> None:
+        self.parser = parser
+        self.containers: List[ContainerEntry] = []
+        self.names: Dict[int, List[str]] = {}
+        self.offsets = array("q")
+        self.ends = array("q")
+        self.parents = array("q")
+        self.tags = array("B")
+        self.ids: List[str] = []
+        self.namespaces: Dict[str, str] = {}
+        self.encoding = "utf-8"
+        self.stack: List[int] = []
+        self.depths: List[int] = []
+        self.levels: List[int] = []
+        """The depths of the root and of the open containers."""
+        self.feature_depth = 0
+        self.depth = 0
+        self.capture: Optional[List[str]] = None
+
+    def xml_declaration(
+        self,
+        version: Optional[str],  # noqa: ARG002
+        encoding: Optional[str],
+        standalone: int,  # noqa: ARG002
+    ) -> None:
+        if encoding:
+            self.encoding = encoding
+
+    def namespace(self, prefix: Optional[str], uri: str) -> None:
+        if not self.feature_depth:
+            self.namespaces.setdefault(prefix or "", uri)
+
+    def start(self, tag: str, attributes: Dict[str, str]) -> None:
+        """
+        Record the children of the root and of the open containers.
+
+        Other elements, like the features in the ``Update`` of a
+        ``NetworkLinkControl``, are skipped with their content.
+        """
+        self.depth += 1
+        if self.levels and self.depth != self.levels[-1] + 1:
+            return
+        name = _local(tag)
+        if self.depth == 1 or name in CONTAINERS:
+            self.levels.append(self.depth)
+        if name in CONTAINERS:
+            self._open_container(name, attributes)
+        elif name in FEATURES:
+            self._open_feature(name, attributes)
+        elif name == "name":
+            self._capture_name()
+
+    def _open_container(self, name: str, attributes: Dict[str, str]) -> None:
+        self.containers.append(
+            ContainerEntry(
+                tag=name,
+                id=attributes.get("id", ""),
+                name=None,
+                offset=self.parser.CurrentByteIndex,
+                parent=self.stack[-1] if self.stack else -1,
+            ),
+        )
+        self.stack.append(len(self.containers) - 1)
+        self.depths.append(self.depth)
+
+    def _open_feature(self, name: str, attributes: Dict[str, str]) -> None:
+        self.feature_depth = self.depth
+        self.offsets.append(self.parser.CurrentByteIndex)
+        self.parents.append(self.stack[-1] if self.stack else -1)
+        self.tags.append(_TAGS.index(name))
+        self.ids.append(attributes.get("id", ""))
+
+    def _capture_name(self) -> None:
+        """Capture the name of the innermost container, if it is the parent."""
+        if (
+            self.depths
+            and self.depths[-1] == self.levels[-1]
+            and self.stack[-1] not in self.names
+        ):
+            self.capture = self.names.setdefault(self.stack[-1], [])
+
+    def text(self, data: str) -> None:
+        if self.capture is not None:
+            self.capture.append(data)
+
+    def end(self, tag: str) -> None:
+        if self.feature_depth == self.depth:
+            self.feature_depth = 0
+            self.ends.append(self.parser.CurrentByteIndex)
+        elif not self.feature_depth:
+            self.capture = None
+            if self.levels and self.levels[-1] == self.depth:
+                self.levels.pop()
+                self._close_container(tag)
+        self.depth -= 1
+
+    def _close_container(self, tag: str) -> None:
+        if _local(tag) in CONTAINERS:
+            self.stack.pop()
+            self.depths.pop()
+
+
+class OffsetIndex:
+    """The byte ranges of the features of a KML file."""
+
+    def __init__(
+        self,
+        path: Path,
+        *,
+        containers: List[ContainerEntry],
+        offsets: "array[int]",
+        lengths: "array[int]",
+        parents: "array[int]",
+        tags: "array[int]",
+        ids: List[str],
+        namespaces: Dict[str, str],
+        encoding: str = "utf-8",
+    ) -> None:
+        """
+        Create an index, use :meth:`build` or :meth:`load` instead.
+
+        Args:
+        ----
+            path: The path of the KML file.
+            containers: The containers of the file.
+            offsets: The byte offset of each feature.
+            lengths: The byte length of each feature.
+            parents: The position of the innermost container of each feature.
+            tags: The position of the element name of each feature in
+                ``FEATURES``.
+            ids: The ``id`` attribute of each feature.
+            namespaces: The namespace declarations outside of the features.
+            encoding: The encoding of the file.
+
+        """
+        self.path = path
+        self.containers = containers
+        self.offsets = offsets
+        self.lengths = lengths
+        self.parents = parents
+        self.tags = tags
+        self.ids = ids
+        self.namespaces = namespaces
+        self.encoding = encoding
+        self._mmap: Optional[mmap.mmap] = None
+
+    def __repr__(self) -> str:
+        """Create a string (c)representation for OffsetIndex."""
+        return f"{self.__class__.__module__}.{self.__class__.__name__}(<{len(self)}>)"
+
+    def __len__(self) -> int:
+        """Return the number of features."""
+        return len(self.offsets)
+
+    def __getitem__(self, position: int) -> FeatureEntry:
+        """Get the entry of the feature at a position."""
+        return FeatureEntry(
+            tag=_TAGS[self.tags[position]],
+            id=self.ids[position],
+            offset=self.offsets[position],
+            length=self.lengths[position],
+            path=self.path_of(self.parents[position]),
+        )
+
+    def path_of(self, container: int) -> Tuple[ContainerEntry, ...]:
+        """Get a container and the containers it is nested in, outermost first."""
+        path = []
+        while container >= 0:
+            path.append(self.containers[container])
+            container = self.containers[container].parent
+        return tuple(reversed(path))
+
+    @classmethod
+    def build(cls, path: Path) -> "OffsetIndex":
+        """
+        Index the features of a KML file.
+
+        Args:
+        ----
+            path: The path of the KML file.
+
+        Returns:
+        -------
+            The index of the features.
+
+        """
+        parser = expat.ParserCreate(namespace_separator=" ")
+        parser.buffer_text = True
+        indexer = _Indexer(parser)
+        parser.XmlDeclHandler = indexer.xml_declaration
+        parser.StartNamespaceDeclHandler = indexer.namespace
+        parser.StartElementHandler = indexer.start
+        parser.EndElementHandler = indexer.end
+        parser.CharacterDataHandler = indexer.text
+        with path.open("rb") as file, mmap.mmap(
+            file.fileno(),
+            0,
+            access=mmap.ACCESS_READ,
+        ) as data:
+            for start in range(0, len(data), _CHUNK_SIZE):
+                stop = start + _CHUNK_SIZE
+                parser.Parse(data[start:stop], False)  # noqa: FBT003
+            parser.Parse(b"", True)  # noqa: FBT003
+            lengths = array(
+                "q",
+                (
+                    _end_of_element(data, offset, end) - offset
+                    for offset, end in zip(indexer.offsets, indexer.ends)
+                ),
+            )
+        containers = [
+            ContainerEntry(
+                tag=container.tag,
+                id=container.id,
+                name="".join(indexer.names[i]).strip() if i in indexer.names else None,
+                offset=container.offset,
+                parent=container.parent,
+            )
+            for i, container in enumerate(indexer.containers)
+        ]
+        return cls(
+            path,
+            containers=containers,
+            offsets=indexer.offsets,
+            lengths=lengths,
+            parents=indexer.parents,
+            tags=indexer.tags,
+            ids=indexer.ids,
+            namespaces=indexer.namespaces,
+            encoding=indexer.encoding,
+        )
+
+    def save(self, index_path: Path) -> None:
+        """
+        Save the index as JSON.
+
+        Args:
+        ----
+            index_path: The path of the index file.
+
+        """
+        stat = self.path.stat()
+        data = {
+            "version": VERSION,
+            "path": str(self.path),
+            "size": stat.st_size,
+            "mtime": stat.st_mtime_ns,
+            "encoding": self.encoding,
+            "namespaces": self.namespaces,
+            "containers": [
+                [c.tag, c.id, c.name, c.offset, c.parent] for c in self.containers
+            ],
+            "offsets": self.offsets.tolist(),
+            "lengths": self.lengths.tolist(),
+            "parents": self.parents.tolist(),
+            "tags": self.tags.tolist(),
+            "ids": self.ids,
+        }
+        with index_path.open("w", encoding="utf-8") as file:
+            json.dump(data, file, separators=(",", ":"))
+
+    @classmethod
+    def load(cls, index_path: Path, path: Optional[Path] = None) -> "OffsetIndex":
+        """
+        Load a saved index.
+
+        Args:
+        ----
+            index_path: The path of the index file.
+            path: The path of the KML file, by default the path it was built for.
+
+        Returns:
+        -------
+            The index of the features.
+
+        Raises:
+        ------
+            ValueError: When the KML file changed since the index was built.
+
+        """
+        with index_path.open(encoding="utf-8") as file:
+            data = json.load(file)
+        if data.get("version") != VERSION:
+            msg = f"{index_path} is not a feature offset index of version {VERSION}"
+            raise ValueError(msg)
+        path = path or Path(data["path"])
+        stat = path.stat()
+        if (stat.st_size, stat.st_mtime_ns) != (data["size"], data["mtime"]):
+            msg = f"{path} changed since the index was built"
+            raise ValueError(msg)
+        return cls(
+            path,
+            containers=[ContainerEntry(*row) for row in data["containers"]],
+            offsets=array("q", data["offsets"]),
+            lengths=array("q", data["lengths"]),
+            parents=array("q", data["parents"]),
+            tags=array("B", data["tags"]),
+            ids=data["ids"],
+            namespaces=data["namespaces"],
+            encoding=data["encoding"],
+        )
+
+    def close(self) -> None:
+        """Unmap the KML file, it is mapped again when features are read."""
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+
+    def _data(self) -> mmap.mmap:
+        if self._mmap is None:
+            with self.path.open("rb") as file:
+                self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        return self._mmap
+
+    def raw(self, position: int) -> bytes:
+        """
+        Read the bytes of the feature at a position.
+
+        Args:
+        ----
+            position: The position of the feature in the index.
+
+        Returns:
+        -------
+            The bytes of the element, in the encoding of the file.
+
+        """
+        offset = self.offsets[position]
+        stop = offset + self.lengths[position]
+        return self._data()[offset:stop]
+
+    def page(self, start: int, size: int, *, strict: bool = True) -> List[_Feature]:
+        """
+        Parse the features of a range of positions.
+
+        The elements are parsed together, wrapped in a root element declaring
+        the namespaces of the file.
+
+        Args:
+        ----
+            start: The position of the first feature.
+            size: The maximum number of features.
+            strict: Whether to enforce strict parsing rules.
+
+        Returns:
+        -------
+            The features, in the order of the file.
+
+        """
+        positions = range(len(self))[slice(start, start + size)]
+        if not positions:
+            return []
+        declarations = " ".join(
+            f'xmlns:{prefix}="{uri}"' if prefix else f'xmlns="{uri}"'
+            for prefix, uri in self.namespaces.items()
+        )
+        document = b"".join(
+            (
+                f'<?xml version="1.0" encoding="{self.encoding}"?>'
+                f"<fastkml-page {declarations}>".encode(self.encoding),
+                *(self.raw(position) for position in positions),
+                b"</fastkml-page>",
+            ),
+        )
+        root = config.etree.fromstring(document)
+        features = []
+        for element, position in zip(root, positions):
+            ns = element.tag.rpartition("}")[0] + "}"
+            features.append(
+                FEATURES[_TAGS[self.tags[position]]].class_from_element(
+                    ns=ns,
+                    name_spaces={**config.NAME_SPACES, "kml": ns},
+                    element=element,
+                    strict=strict,
+                ),
+            )
+        return features
+
+    def feature(self, position: int, *, strict: bool = True) -> _Feature:
+        """
+        Parse the feature at a position.
+
+        Args:
+        ----
+            position: The position of the feature in the index.
+            strict: Whether to enforce strict parsing rules.
+
+        Returns:
+        -------
+            The feature.
+
+        """
+        return self.page(position, 1, strict=strict)[0]
@@ -0,0 +1,457 @@
+# Copyright (C) 2024 Christian Ledermann
+#
+# This library is free software; you can redistribute it and/or modify it under
+# the terms of the GNU Lesser General Public License as published by the Free
+# Software Foundation; either version 2.1 of the License, or (at your option)
+# any later version.
+#
+# This library is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU Lesser General Public License for more
+# details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this library; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301 USA
+"""
+Bulk conversion between KML geometries and ragged coordinate arrays.
+
+The arrays follow the native GeoArrow layout: all coordinates of a column of
+geometries of the same type are stored in one ``(n, 2)`` or ``(n, 3)`` array,
+and the nesting into rings, parts and geometries is described by offset arrays.
+The ``i``-th element of a level spans ``offsets[i]:offsets[i + 1]`` of the next
+level.
+
+================  ============================================================
+geometry type     offsets
+================  ============================================================
+point             none, one coordinate per geometry
+linestring        geometries into coordinates
+polygon           geometries into rings, rings into coordinates
+multipoint        geometries into coordinates
+multilinestring   geometries into parts, parts into coordinates
+multipolygon      geometries into polygons, polygons into rings,
+                  rings into coordinates
+================  ============================================================
+
+The KML geometries are created directly from slices of the coordinate array,
+without intermediate ``pygeoif`` geometries, and the export reads the
+coordinates of the KML geometries in one pass over the features.
+Coordinates without an altitude are padded with ``NaN`` when a column mixes
+2D and 3D geometries, rings with only ``NaN`` altitudes are imported as 2D.
+
+The arrays are numpy arrays, install numpy with ``pip install fastkml[numpy]``.
+
+Example::
+
+    ragged = to_ragged(k)
+    ragged.coords[:, :2] += offset
+    placemarks = placemarks_from_ragged(ragged)
+"""
+
+import math
+from dataclasses import dataclass
+from dataclasses import field
+from typing import Any
+from typing import Iterable
+from typing import Iterator
+from typing import List
+from typing import Optional
+from typing import Sequence
+from typing import Set
+from typing import Tuple
+from typing import Union
+
+import numpy as np
+import numpy.typing as npt
+from pygeoif.types import LineType
+from pygeoif.types import PointType
+
+from fastkml.features import Placemark
+from fastkml.geometry import Coordinates
+from fastkml.geometry import InnerBoundaryIs
+from fastkml.geometry import KMLGeometryType
+from fastkml.geometry import LinearRing
+from fastkml.geometry import LineString
+from fastkml.geometry import MultiGeometry
+from fastkml.geometry import OuterBoundaryIs
+from fastkml.geometry import Point
+from fastkml.geometry import Polygon
+
+__all__ = [
+    "GEOMETRY_TYPES",
+    "RaggedArray",
+    "from_ragged",
+    "geometry_coords",
+    "placemarks_from_geometries",
+    "placemarks_from_ragged",
+    "to_ragged",
+]
+
+FloatArray = npt.NDArray[np.float64]
+IntArray = npt.NDArray[np.int64]
+
+GEOMETRY_TYPES = {
+    "point": 0,
+    "linestring": 1,
+    "polygon": 2,
+    "multipoint": 1,
+    "multilinestring": 2,
+    "multipolygon": 3,
+}
+"""The geometry types and the number of their offset arrays."""
+
+# A geometry as a list of parts, each part is a list of rings of coordinates.
+_Parts = List[List[Sequence[PointType]]]
+
+
+@dataclass(frozen=True)
+class RaggedArray:
+    """A column of geometries of the same type in the GeoArrow layout."""
+
+    geometry_type: str
+    """One of the keys of ``GEOMETRY_TYPES``."""
+    coords: FloatArray
+    """The coordinates, with the shape ``(n, 2)`` or ``(n, 3)``."""
+    offsets: Tuple[IntArray, ...] = ()
+    """The offset arrays, from the geometries down to the coordinates."""
+
+    def __post_init__(self) -> None:
+        """Validate the geometry type and the number of offset arrays."""
+        if GEOMETRY_TYPES.get(self.geometry_type) != len(self.offsets):
+            msg = (
+                f"Invalid number of offset arrays {len(self.offsets)} "
+                f"for geometry type {self.geometry_type!r}"
+            )
+            raise ValueError(msg)
+
+    def __len__(self) -> int:
+        """Return the number of geometries."""
+        if self.offsets:
+            return len(self.offsets[0]) - 1
+        return len(self.coords)
+
+
+def _check_offsets(ragged: RaggedArray) -> None:
+    """Check that each array of offsets ends at the length of the next level."""
+    lengths = [len(offsets) - 1 for offsets in ragged.offsets[1:]]
+    for offsets, length in zip(ragged.offsets, [*lengths, len(ragged.coords)]):
+        if not len(offsets) or offsets[-1] != length:
+            msg = (
+                f"Invalid offsets {np.asarray(offsets).tolist()!r}, "
+                f"the last offset must be {length}"
+            )
+            raise ValueError(msg)
+
+
+def _counts(ragged: RaggedArray) -> Tuple[IntArray, IntArray, IntArray]:
+    """Get the number of parts, rings of each part and coordinates of each ring."""
+    family = ragged.geometry_type.replace("multi", "")
+    sizes: List[IntArray] = [
+        np.diff(np.asarray(offsets, dtype=np.int64)).astype(np.int64)
+        for offsets in ragged.offsets
+    ]
+    multi = ragged.geometry_type.startswith("multi")
+    n_coords = len(ragged.coords)
+    ring_coords = sizes.pop() if family != "point" else np.ones(n_coords, np.int64)
+    part_rings = (
+        sizes.pop() if family == "polygon" else np.ones(len(ring_coords), np.int64)
+    )
+    geom_parts = sizes.pop() if multi else np.ones(len(part_rings), np.int64)
+    return geom_parts, part_rings, ring_coords
+
+
+def _rings(ragged: RaggedArray, ring_coords: IntArray) -> List[LineType]:
+    """Split the coordinates into the rings."""
+    coords = np.asarray(ragged.coords, dtype=np.float64)
+    rows: List[Any] = list(map(tuple, coords.tolist()))
+    stops = np.cumsum(ring_coords).tolist()
+    starts = [0, *stops[:-1]]
+    rings: List[LineType] = [rows[start:stop] for start, stop in zip(starts, stops)]
+    if coords.shape[1] == 3 and len(ring_coords):  # noqa: PLR2004
+        missing = np.isnan(coords[:, 2])
+        non_empty = np.flatnonzero(ring_coords)
+        flat = np.zeros(len(ring_coords), dtype=bool)
+        flat[non_empty] = np.logical_and.reduceat(
+            missing,
+            np.asarray(starts)[non_empty],
+        )
+        for i in np.flatnonzero(flat).tolist():
+            rings[i] = [coord[:2] for coord in rings[i]]
+    return rings
+
+
+def _line(coords: LineType) -> LineString:
+    return LineString(kml_coordinates=Coordinates(coords=coords))
+
+
+def _ring(coords: LineType) -> LinearRing:
+    return LinearRing(kml_coordinates=Coordinates(coords=coords))
+
+
+def _polygon(rings: List[LineType]) -> Polygon:
+    return Polygon(
+        outer_boundary=OuterBoundaryIs(kml_geometry=_ring(rings[0])),
+        inner_boundaries=[
+            InnerBoundaryIs(kml_geometry=_ring(ring)) for ring in rings[1:]
+        ],
+    )
+
+
+def from_ragged(ragged: RaggedArray) -> List[KMLGeometryType]:
+    """
+    Create KML geometries from a ragged array.
+
+    Args:
+    ----
+        ragged: The geometries in the GeoArrow layout.
+
+    Returns:
+    -------
+        A ``Point``, ``LineString``, ``Polygon`` or, for the multi geometry types,
+        a ``MultiGeometry`` for each geometry.
+
+    Raises:
+    ------
+        ValueError: If the offsets do not match the number of coordinates.
+
+    """
+    _check_offsets(ragged)
+    geom_parts, part_rings, ring_coords = _counts(ragged)
+    rings = iter(_rings(ragged, ring_coords))
+    family = ragged.geometry_type.replace("multi", "")
+    parts: List[Union[Point, LineString, Polygon]] = []
+    for n_rings in part_rings.tolist():
+        part_rings_coords = [next(rings) for _ in range(n_rings)]
+        if family == "point":
+            parts.append(
+                Point(kml_coordinates=Coordinates(coords=part_rings_coords[0])),
+            )
+        elif family == "linestring":
+            parts.append(_line(part_rings_coords[0]))
+        else:
+            parts.append(_polygon(part_rings_coords))
+    if not ragged.geometry_type.startswith("multi"):
+        return parts  # type: ignore[return-value]
+    stops = np.cumsum(geom_parts).tolist()
+    return [
+        MultiGeometry(kml_geometries=parts[start:stop])
+        for start, stop in zip([0, *stops[:-1]], stops)
+    ]
+
+
+def placemarks_from_geometries(
+    geometries: Sequence[Optional[KMLGeometryType]],
+    ids: Optional[Sequence[str]] = None,
+    names: Optional[Sequence[str]] = None,
+) -> List[Placemark]:
+    """
+    Create a Placemark for each geometry.
+
+    Args:
+    ----
+        geometries: The geometries, ``None`` for a placemark without one.
+        ids: The ids of the placemarks.
+        names: The names of the placemarks.
+
+    Returns:
+    -------
+        The placemarks, in the order of the geometries.
+
+    """
+    missing: List[Optional[str]] = [None] * len(geometries)
+    return [
+        Placemark(id=id_, name=name, kml_geometry=geometry)
+        for geometry, id_, name in zip(
+            geometries,
+            ids if ids is not None else missing,
+            names if names is not None else missing,
+        )
+    ]
+
+
+def placemarks_from_ragged(
+    ragged: RaggedArray,
+    ids: Optional[Sequence[str]] = None,
+    names: Optional[Sequence[str]] = None,
+) -> List[Placemark]:
+    """
+    Create a Placemark for each geometry of a ragged array.
+
+    Args:
+    ----
+        ragged: The geometries in the GeoArrow layout.
+        ids: The ids of the placemarks.
+        names: The names of the placemarks.
+
+    Returns:
+    -------
+        The placemarks, in the order of the geometries.
+
+    """
+    return placemarks_from_geometries(from_ragged(ragged), ids, names)
+
+
+def _geometries(obj: object) -> Iterator[KMLGeometryType]:
+    """Iterate over the geometries of the Placemarks, in document order."""
+    if isinstance(obj, Placemark):
+        obj = obj.kml_geometry
+    if isinstance(obj, (Point, LineString, Polygon, MultiGeometry)):
+        yield obj
+        return
+    for child in _children(obj):
+        yield from _geometries(child)
+
+
+def _children(obj: object) -> Iterable[object]:
+    """Get the features of a container or the items of an iterable."""
+    if hasattr(obj, "features"):
+        return getattr(obj, "features", None) or ()
+    return obj if isinstance(obj, Iterable) else ()
+
+
+def geometry_coords(geometry: Union[Point, LineString]) -> Sequence[PointType]:
+    """
+    Get the coordinates of a point, line or ring.
+
+    Args:
+    ----
+        geometry: The KML geometry.
+
+    Returns:
+    -------
+        The coordinates, empty when the geometry has no coordinates element.
+
+    """
+    coordinates = geometry.kml_coordinates
+    return coordinates.coords if coordinates is not None else []
+
+
+def _parts(geometry: KMLGeometryType) -> Tuple[str, _Parts]:
+    """Get the family and the parts of a geometry."""
+    if isinstance(geometry, Point):
+        return "point", [[geometry_coords(geometry)]]
+    if isinstance(geometry, LineString):
+        return "linestring", [[geometry_coords(geometry)]]
+    if isinstance(geometry, Polygon):
+        boundaries = [geometry.outer_boundary, *geometry.inner_boundaries]
+        return "polygon", [
+            [
+                geometry_coords(boundary.kml_geometry)
+                for boundary in boundaries
+                if boundary is not None and boundary.kml_geometry is not None
+            ],
+        ]
+    return _multi_parts(geometry)
+
+
+def _multi_parts(geometry: MultiGeometry) -> Tuple[str, _Parts]:
+    """Get the family and the parts of the geometries of a MultiGeometry."""
+    families = set()
+    parts: _Parts = []
+    for kml_geometry in geometry.kml_geometries:
+        family, geometry_parts = _parts(kml_geometry)
+        families.add(family)
+        parts.extend(geometry_parts)
+    if len(families) > 1:
+        msg = f"Cannot convert a MultiGeometry of {sorted(families)} to a ragged array"
+        raise ValueError(msg)
+    return families.pop() if families else "", parts
+
+
+@dataclass
+class _Collector:
+    """Collect the counts and coordinates of geometries in one pass."""
+
+    families: Set[str] = field(default_factory=set)
+    multi: bool = False
+    geom_parts: List[int] = field(default_factory=list)
+    part_rings: List[int] = field(default_factory=list)
+    ring_coords: List[int] = field(default_factory=list)
+    flat: List[PointType] = field(default_factory=list)
+    dims: Set[int] = field(default_factory=set)
+
+    def add(self, geometry: KMLGeometryType) -> None:
+        family, parts = _parts(geometry)
+        if not family:
+            return
+        self.families.add(family)
+        self.multi = self.multi or isinstance(geometry, MultiGeometry)
+        self.geom_parts.append(len(parts))
+        for rings in parts:
+            self.part_rings.append(len(rings))
+            self.ring_coords.extend(map(len, rings))
+            for ring in rings:
+                self.dims.update(map(len, ring))
+                self.flat.extend(ring)
+
+    def coords(self) -> FloatArray:
+        """
+        Get the coordinates as an array.
+
+        When 2D and 3D coordinates are mixed, also within a ring, the 2D
+        coordinates are padded with a ``NaN`` altitude.
+        """
+        if not self.dims <= {2, 3}:
+            msg = f"Coordinates must be 2D or 3D, got {sorted(self.dims)} dimensions"
+            raise ValueError(msg)
+        flat = self.flat
+        if len(self.dims) > 1:
+            flat = [(*coord, math.nan)[:3] for coord in flat]
+        return np.array(flat, dtype=np.float64).reshape(-1, max(self.dims, default=2))
+
+
+def to_ragged(obj: object) -> RaggedArray:
+    """
+    Export the geometries of Placemarks into a ragged array.
+
+    The geometries of the Placemarks of a ``KML`` document or a container, or of
+    a sequence of Placemarks or KML geometries, are collected in one pass.
+    Placemarks without a geometry are skipped.
+    When single and multi geometries of the same type are mixed, the multi
+    geometry type is used, e.g. ``Point`` and ``MultiGeometry`` of points become
+    ``multipoint``.
+
+    Args:
+    ----
+        obj: The object to export the geometries from.
+
+    Returns:
+    -------
+        The geometries in the GeoArrow layout, an empty ``point`` array when there
+        are no geometries.
+
+    Raises:
+    ------
+        ValueError: When the geometries are not all points, lines or polygons,
+            or when coordinates are neither 2D nor 3D.
+
+    """
+    collector = _Collector()
+    for geometry in _geometries(obj):
+        collector.add(geometry)
+    if len(collector.families) > 1:
+        msg = f"Cannot convert a mix of {sorted(collector.families)} to a ragged array"
+        raise ValueError(msg)
+    family = collector.families.pop() if collector.families else "point"
+    geom_parts = collector.geom_parts
+    part_rings = collector.part_rings
+    ring_coords = collector.ring_coords
+
+    def offsets(counts: List[int]) -> IntArray:
+        return np.concatenate(([0], np.cumsum(counts, dtype=np.int64)))
+
+    levels = {
+        "point": (),
+        "linestring": (ring_coords,),
+        "polygon": (part_rings, ring_coords),
+        "multipoint": (geom_parts,),
+        "multilinestring": (geom_parts, ring_coords),
+        "multipolygon": (geom_parts, part_rings, ring_coords),
+    }
+    geometry_type = f"multi{family}" if collector.multi else family
+    return RaggedArray(
+        geometry_type=geometry_type,
+        coords=collector.coords(),
+        offsets=tuple(offsets(counts) for counts in levels[geometry_type]),
+    )
@@ -0,0 +1,498 @@
+# Copyright (C) 2024 Christian Ledermann
+#
+# This library is free software; you can redistribute it and/or modify it under
+# the terms of the GNU Lesser General Public License as published by the Free
+# Software Foundation; either version 2.1 of the License, or (at your option)
+# any later version.
+#
+# This library is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU Lesser General Public License for more
+# details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this library; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301 USA
+"""
+Regionation, split large datasets into a quadtree of KML files.
+
+Features are distributed over a quadtree of tiles.
+Each tile is written to its own KML or KMZ file, with a ``Region`` that limits
+its visibility to the area of the tile, and a ``NetworkLink`` for each child
+tile, that is only loaded when the region of the child becomes active
+(``viewRefreshMode`` ``onRegion``).
+A client therefore only loads the tiles that are visible at the current view.
+
+Tiles are filled top down, in the order in which the features are added:
+a tile keeps up to ``max_features`` features, further features are passed on to
+the child tile that contains their bounding box.
+Add the most important features first to make them visible when zoomed out.
+Features that straddle the boundary between child tiles, or that have no
+bounding box, stay in the tile even when it is full.
+
+``annotate_regions`` adds a ``Region`` with the aggregated bounds of their
+features to the Documents and Folders of an existing tree, so that clients can
+skip containers outside of the view.
+
+Example::
+
+    regionator = Regionator(max_features=100)
+    regionator.extend(placemarks)
+    root = regionator.write(Path("tiles"), kmz=True)
+"""
+
+from dataclasses import dataclass
+from dataclasses import field
+from functools import partial
+from pathlib import Path
+from typing import Any
+from typing import Callable
+from typing import Iterable
+from typing import Iterator
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+from fastkml.containers import Document
+from fastkml.containers import _Container
+from fastkml.enums import AltitudeMode
+from fastkml.enums import Verbosity
+from fastkml.enums import ViewRefreshMode
+from fastkml.features import NetworkLink
+from fastkml.features import Placemark
+from fastkml.features import _Feature
+from fastkml.kml import KML
+from fastkml.links import Link
+from fastkml.types import Bounds
+from fastkml.utils import feature_bounds
+from fastkml.views import LatLonAltBox
+from fastkml.views import Lod
+from fastkml.views import Region
+
+__all__ = ["Regionator", "Tile", "annotate_regions", "regionate"]
+
+WORLD: Bounds = (-180.0, -90.0, 180.0, 90.0)
+
+Extent = Tuple[float, float, float, float, Optional[float], Optional[float]]
+"""A bounding box with an optional altitude range."""
+
+
+def _contains(outer: Bounds, inner: Bounds) -> bool:
+    return (
+        outer[0] <= inner[0]
+        and outer[1] <= inner[1]
+        and inner[2] <= outer[2]
+        and inner[3] <= outer[3]
+    )
+
+
+@dataclass
+class Tile:
+    """
+    A tile of the quadtree.
+
+    The tile at ``level`` 0 covers the whole bounds of the regionator, ``x`` and
+    ``y`` count the tiles of a level from west to east and from south to north.
+    """
+
+    level: int
+    x: int
+    y: int
+    bounds: Bounds
+    features: List[_Feature] = field(default_factory=list)
+    children: List["Tile"] = field(default_factory=list)
+
+    @property
+    def name(self) -> str:
+        """Get the name of the tile, which is also the name of its file."""
+        return f"{self.level}-{self.x}-{self.y}"
+
+    def _quadrant(self, bounds: Bounds) -> Tuple[int, int, Bounds]:
+        """Return the column, row and bounds of the quadrant of ``bounds``."""
+        west, south, east, north = self.bounds
+        middle_x, middle_y = (west + east) / 2, (south + north) / 2
+        column = int(bounds[0] >= middle_x)
+        row = int(bounds[1] >= middle_y)
+        return (
+            column,
+            row,
+            (
+                middle_x if column else west,
+                middle_y if row else south,
+                east if column else middle_x,
+                north if row else middle_y,
+            ),
+        )
+
+    def child_for(self, bounds: Bounds) -> Optional["Tile"]:
+        """Return the child tile that contains ``bounds``, create it if needed."""
+        column, row, child_bounds = self._quadrant(bounds)
+        if not _contains(child_bounds, bounds):
+            return None
+        x, y = 2 * self.x + column, 2 * self.y + row
+        child = next((c for c in self.children if (c.x, c.y) == (x, y)), None)
+        if child is None:
+            child = Tile(level=self.level + 1, x=x, y=y, bounds=child_bounds)
+            self.children.append(child)
+        return child
+
+    def region(self, min_lod_pixels: int, max_lod_pixels: int) -> Region:
+        """Create the Region of the tile."""
+        west, south, east, north = self.bounds
+        return Region(
+            lat_lon_alt_box=LatLonAltBox(
+                north=north,
+                south=south,
+                east=east,
+                west=west,
+            ),
+            lod=Lod(min_lod_pixels=min_lod_pixels, max_lod_pixels=max_lod_pixels),
+        )
+
+    def walk(self) -> Iterator["Tile"]:
+        """Iterate depth first over this tile and all its descendants."""
+        yield self
+        for child in self.children:
+            yield from child.walk()
+
+
+class Regionator:
+    """Distribute features over a quadtree of tiles and write them to files."""
+
+    def __init__(
+        self,
+        bounds: Bounds = WORLD,
+        max_features: int = 100,
+        max_depth: int = 20,
+        min_lod_pixels: int = 128,
+        max_lod_pixels: int = -1,
+    ) -> None:
+        """
+        Create a regionator.
+
+        Args:
+        ----
+            bounds: The area covered by the root tile, ``(west, south, east, north)``.
+            max_features: The maximum number of features per tile, tiles at
+                ``max_depth`` and features that do not fit into a child tile
+                may exceed it.
+            max_depth: The maximum depth of the quadtree.
+            min_lod_pixels: The ``minLodPixels`` of the child tile regions.
+            max_lod_pixels: The ``maxLodPixels`` of all regions, the default
+                of ``-1`` keeps the features of a tile visible when zoomed in.
+
+        """
+        if max_features < 1:
+            msg = "max_features must be at least 1"
+            raise ValueError(msg)
+        self.root = Tile(level=0, x=0, y=0, bounds=bounds)
+        self.max_features = max_features
+        self.max_depth = max_depth
+        self.min_lod_pixels = min_lod_pixels
+        self.max_lod_pixels = max_lod_pixels
+
+    def __repr__(self) -> str:
+        """Create a string (c)representation for Regionator."""
+        return (
+            f"{self.__class__.__module__}.{self.__class__.__name__}("
+            f"bounds={self.root.bounds!r}, "
+            f"max_features={self.max_features!r}, "
+            f"max_depth={self.max_depth!r}, "
+            f"min_lod_pixels={self.min_lod_pixels!r}, "
+            f"max_lod_pixels={self.max_lod_pixels!r}"
+            ")"
+        )
+
+    def add(self, feature: _Feature) -> Tile:
+        """
+        Add a feature to the first tile with room for it.
+
+        Returns
+        -------
+            The tile the feature was added to.
+
+        """
+        bounds = feature_bounds(feature)
+        tile = self.root if bounds is None else self._tile_for(bounds)
+        tile.features.append(feature)
+        return tile
+
+    def _tile_for(self, bounds: Bounds) -> Tile:
+        """Return the first tile from the root down with room for ``bounds``."""
+        tile = self.root
+        if not _contains(tile.bounds, bounds):
+            return tile
+        while self._is_full(tile):
+            child = tile.child_for(bounds)
+            if child is None:
+                return tile
+            tile = child
+        return tile
+
+    def _is_full(self, tile: Tile) -> bool:
+        return len(tile.features) >= self.max_features and tile.level < self.max_depth
+
+    def extend(self, features: Iterable[_Feature]) -> None:
+        """Add all features of an iterable."""
+        for feature in features:
+            self.add(feature)
+
+    @property
+    def tiles(self) -> Iterator[Tile]:
+        """Iterate depth first over all tiles."""
+        return self.root.walk()
+
+    def tile_kml(self, tile: Tile, suffix: str = ".kml") -> KML:
+        """
+        Create the KML document of a tile.
+
+        The document contains the features of the tile, and a NetworkLink to the
+        file of each child tile.
+        """
+        links = [
+            NetworkLink(
+                name=child.name,
+                region=child.region(self.min_lod_pixels, self.max_lod_pixels),
+                link=Link(
+                    href=f"{child.name}{suffix}",
+                    view_refresh_mode=ViewRefreshMode.on_region,
+                ),
+            )
+            for child in tile.children
+        ]
+        return KML(
+            features=[
+                Document(
+                    name=tile.name,
+                    region=tile.region(
+                        self.min_lod_pixels if tile.level else 0,
+                        self.max_lod_pixels,
+                    ),
+                    features=[*tile.features, *links],
+                ),
+            ],
+        )
+
+    def write(
+        self,
+        directory: Path,
+        *,
+        kmz: bool = False,
+        prettyprint: bool = True,
+        precision: Optional[int] = None,
+        verbosity: Verbosity = Verbosity.normal,
+    ) -> Path:
+        """
+        Write a file for each tile into ``directory``.
+
+        Args:
+        ----
+            directory: The directory for the tiles, it is created if it does not
+                exist.
+            kmz: Write KMZ instead of KML files.
+            prettyprint: Whether to pretty print the XML.
+            precision: The precision used for floating-point values.
+            verbosity: The verbosity level for generating the KML elements.
+
+        Returns:
+        -------
+            The path of the root tile, open it in a client to load the tiles.
+
+        """
+        suffix = ".kmz" if kmz else ".kml"
+        directory.mkdir(parents=True, exist_ok=True)
+        for tile in self.tiles:
+            self.tile_kml(tile, suffix).write(
+                directory / f"{tile.name}{suffix}",
+                prettyprint=prettyprint,
+                precision=precision,
+                verbosity=verbosity,
+            )
+        return directory / f"{self.root.name}{suffix}"
+
+
+def regionate(
+    features: Iterable[_Feature],
+    directory: Path,
+    *,
+    bounds: Bounds = WORLD,
+    max_features: int = 100,
+    kmz: bool = False,
+) -> Path:
+    """
+    Regionate features into tile files with the default settings.
+
+    Returns
+    -------
+        The path of the root tile.
+
+    """
+    regionator = Regionator(bounds=bounds, max_features=max_features)
+    regionator.extend(features)
+    return regionator.write(directory, kmz=kmz)
+
+
+def _altitudes(coords: Any) -> Iterator[float]:
+    """Iterate over the altitudes of nested coordinate tuples."""
+    if coords and isinstance(coords[0], (int, float)):
+        yield from coords[2:3]
+        return
+    for coord in coords:
+        yield from _altitudes(coord)
+
+
+def _geometry_altitudes(geo_interface: Any) -> Iterator[float]:
+    if "geometries" in geo_interface:
+        for geometry in geo_interface["geometries"]:
+            yield from _geometry_altitudes(geometry)
+    else:
+        yield from _altitudes(geo_interface["coordinates"])
+
+
+def _region_extent(region: Optional[Region]) -> Optional[Extent]:
+    box = region.lat_lon_alt_box if region else None
+    if box is None or None in (box.west, box.south, box.east, box.north):
+        return None
+    return (
+        box.west,  # type: ignore[return-value]
+        box.south,
+        box.east,
+        box.north,
+        box.min_altitude,
+        box.max_altitude,
+    )
+
+
+def _feature_extent(feature: _Feature, *, altitude: bool) -> Optional[Extent]:
+    bounds = feature_bounds(feature)
+    if bounds is None:
+        return _region_extent(feature.region)
+    altitudes: List[float] = []
+    if altitude and isinstance(feature, Placemark) and feature.geometry:
+        altitudes = list(_geometry_altitudes(feature.geometry.__geo_interface__))
+    return (
+        *bounds,
+        min(altitudes, default=None),
+        max(altitudes, default=None),
+    )
+
+
+def _merge(extents: List[Extent]) -> Optional[Extent]:
+    if not extents:
+        return None
+    min_altitudes = [e[4] for e in extents if e[4] is not None]
+    max_altitudes = [e[5] for e in extents if e[5] is not None]
+    return (
+        min(e[0] for e in extents),
+        min(e[1] for e in extents),
+        max(e[2] for e in extents),
+        max(e[3] for e in extents),
+        min(min_altitudes, default=None),
+        max(max_altitudes, default=None),
+    )
+
+
+def _extent_region(extent: Extent, lod: Lod, *, altitude: bool) -> Region:
+    """Create a Region for an extent, with the altitude range when requested."""
+    west, south, east, north, min_altitude, max_altitude = extent
+    has_altitude = altitude and min_altitude is not None
+    return Region(
+        lat_lon_alt_box=LatLonAltBox(
+            north=north,
+            south=south,
+            east=east,
+            west=west,
+            min_altitude=min_altitude if has_altitude else None,
+            max_altitude=max_altitude if has_altitude else None,
+            altitude_mode=AltitudeMode.absolute if has_altitude else None,
+        ),
+        lod=lod,
+    )
+
+
+@dataclass(frozen=True)
+class _RegionAnnotator:
+    """Walk a tree of containers bottom up and add Regions to them."""
+
+    lod: Callable[[], Lod]
+    altitude: bool
+    overwrite: bool
+
+    def extent(self, feature: _Feature) -> Optional[Extent]:
+        if isinstance(feature, _Container):
+            return self.annotate(feature)
+        return _feature_extent(feature, altitude=self.altitude)
+
+    def annotate(self, container: object) -> Optional[Extent]:
+        extent = _merge(
+            [
+                feature_extent
+                for feature in getattr(container, "features", None) or ()
+                if (feature_extent := self.extent(feature)) is not None
+            ],
+        )
+        if not isinstance(container, _Container):
+            return extent
+        if extent is not None and (self.overwrite or container.region is None):
+            container.region = _extent_region(
+                extent,
+                self.lod(),
+                altitude=self.altitude,
+            )
+            return extent
+        return extent or _region_extent(container.region)
+
+
+def annotate_regions(
+    obj: object,
+    *,
+    min_lod_pixels: int = 0,
+    max_lod_pixels: int = -1,
+    min_fade_extent: Optional[int] = None,
+    max_fade_extent: Optional[int] = None,
+    altitude: bool = False,
+    overwrite: bool = False,
+) -> Optional[Bounds]:
+    """
+    Add a Region with the bounds of its features to each container.
+
+    The tree of Documents and Folders is walked once, bottom up, the bounds of
+    a container are the union of the bounds of its features.
+    Features without a geometry or a ``LatLonBox`` contribute the
+    ``LatLonAltBox`` of their Region, e.g. a regionated NetworkLink.
+    Containers without any bounded features do not get a Region.
+    The bounds passed on to the parent container are always computed from the
+    features, an existing Region that is kept does not change them, only a
+    container without bounded features contributes the extent of its Region.
+
+    Args:
+    ----
+        obj: A ``KML`` object or a container.
+        min_lod_pixels: The ``minLodPixels`` of the Regions, the default of 0
+            makes the Regions only cull containers that are outside the view.
+        max_lod_pixels: The ``maxLodPixels`` of the Regions.
+        min_fade_extent: The ``minFadeExtent`` of the Regions.
+        max_fade_extent: The ``maxFadeExtent`` of the Regions.
+        altitude: Include the altitude range of the geometries in the
+            ``LatLonAltBox``, with the altitude mode ``absolute``.
+        overwrite: Replace existing Regions of containers, by default existing
+            Regions are kept.
+
+    Returns:
+    -------
+        The ``(west, south, east, north)`` bounds of all features, or ``None``.
+
+    """
+    annotator = _RegionAnnotator(
+        lod=partial(
+            Lod,
+            min_lod_pixels=min_lod_pixels,
+            max_lod_pixels=max_lod_pixels,
+            min_fade_extent=min_fade_extent,
+            max_fade_extent=max_fade_extent,
+        ),
+        altitude=altitude,
+        overwrite=overwrite,
+    )
+    extent = annotator.annotate(obj)
+    return extent[:4] if extent else None
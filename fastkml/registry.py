@@ -22,7 +22,9 @@ with the registry acting as a central configuration for these mappings.
 
 """
 
+import hashlib
 from dataclasses import dataclass
+from operator import itemgetter
 from typing import TYPE_CHECKING
 from typing import Any
 from typing import Dict
@@ -178,6 +180,41 @@ class Registry:
             items.extend(self._registry.get(parent, []))
         return items
 
+    def fingerprint(self) -> str:
+        """
+        Get a hash of the registered mappings.
+
+        The fingerprint changes when a mapping is registered or when a class,
+        attribute, node name or function of a mapping changes, e.g. to
+        invalidate data that depends on how the XML was mapped to objects.
+        """
+        digest = hashlib.sha256()
+        for name, items in sorted(
+            ((_qualified_name(cls), items) for cls, items in self._registry.items()),
+            key=itemgetter(0),
+        ):
+            digest.update(name.encode())
+            for item in items:
+                digest.update(
+                    repr(
+                        (
+                            item.ns_ids,
+                            [_qualified_name(c) for c in item.classes],
+                            item.attr_name,
+                            _qualified_name(item.get_kwarg),
+                            _qualified_name(item.set_element),
+                            item.node_name,
+                            item.default,
+                        ),
+                    ).encode(),
+                )
+        return digest.hexdigest()
+
+
+def _qualified_name(obj: object) -> str:
+    """Get the module and qualified name of a class or function."""
+    return f"{getattr(obj, '__module__', '')}.{getattr(obj, '__qualname__', obj)}"
+
 
 registry = Registry()
 """
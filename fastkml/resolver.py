@@ -0,0 +1,483 @@
+# Copyright (C) 2024 Christian Ledermann
+#
+# This library is free software; you can redistribute it and/or modify it under
+# the terms of the GNU Lesser General Public License as published by the Free
+# Software Foundation; either version 2.1 of the License, or (at your option)
+# any later version.
+#
+# This library is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU Lesser General Public License for more
+# details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this library; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301 USA
+"""
+Resolve the documents linked by NetworkLinks.
+
+The :class:`NetworkLinkResolver` fetches the KML and KMZ documents that the
+``NetworkLink`` elements of a document link to with ``asyncio``, parses them
+and follows their NetworkLinks in turn.
+The number of concurrent fetches is bounded, every URL is fetched once per
+resolution, so cycles of links end.
+
+The parsed documents are cached by their URL.
+A cached document is used again while it is fresh according to the
+``refreshMode`` and ``refreshInterval`` of the link and the ``expires`` and
+``minRefreshPeriod`` of the ``NetworkLinkControl`` of the linked document.
+A stale document is fetched again with the ``ETag`` and ``Last-Modified``
+of the previous response, a document that has not been modified is not parsed
+again.
+
+The default fetcher reads ``file`` URLs and fetches ``http`` and ``https`` URLs
+with ``urllib`` in the default executor of the event loop.
+Any coroutine function with the signature of :func:`fetch_url` can be used
+instead, to use another HTTP client or to test against a stand-in server.
+
+Example::
+
+    resolver = NetworkLinkResolver(max_concurrency=4)
+    resolution = asyncio.run(resolver.resolve(Path("regions.kml")))
+    for url, document in resolution.documents.items():
+        ...
+"""
+
+import asyncio
+import functools
+import io
+import time
+import urllib.error
+import urllib.request
+import zipfile
+from dataclasses import dataclass
+from dataclasses import field
+from email.utils import formatdate
+from pathlib import Path
+from typing import Awaitable
+from typing import Callable
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Set
+from typing import Tuple
+from typing import Union
+from urllib.parse import urljoin
+from urllib.parse import urlsplit
+from urllib.request import url2pathname
+
+from fastkml.enums import RefreshMode
+from fastkml.features import NetworkLink
+from fastkml.kml import KML
+from fastkml.links import Link
+from fastkml.network_link_control import NetworkLinkControl
+from fastkml.temporal import time_interval
+from fastkml.utils import find_all
+
+__all__ = [
+    "CacheEntry",
+    "Fetcher",
+    "NetworkLinkResolver",
+    "Resolution",
+    "Response",
+    "fetch_url",
+]
+
+TIMEOUT = 60.0
+"""The timeout of the default fetcher in seconds."""
+
+
+@dataclass(frozen=True)
+class Response:
+    """The response to a fetch, without content when it was not modified."""
+
+    url: str
+    content: Optional[bytes]
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+
+    @property
+    def not_modified(self) -> bool:
+        """Whether the document has not been modified since the last fetch."""
+        return self.content is None
+
+
+Fetcher = Callable[[str, Optional[str], Optional[str]], Awaitable[Response]]
+"""
+A coroutine function fetching a URL.
+
+It is called with the URL, the ``ETag`` and the ``Last-Modified`` value of the
+cached response, or ``None``.
+"""
+
+
+def _read_file(url: str, etag: Optional[str], last_modified: Optional[str]) -> Response:
+    """Read a file URL, its ETag is derived from its modification time and size."""
+    path = Path(url2pathname(urlsplit(url).path))
+    stat = path.stat()
+    current_etag = f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+    current_last_modified = formatdate(stat.st_mtime, usegmt=True)
+    if etag == current_etag or (not etag and last_modified == current_last_modified):
+        return Response(url, None, current_etag, current_last_modified)
+    return Response(url, path.read_bytes(), current_etag, current_last_modified)
+
+
+def _fetch(url: str, etag: Optional[str], last_modified: Optional[str]) -> Response:
+    scheme = urlsplit(url).scheme
+    if scheme == "file":
+        return _read_file(url, etag, last_modified)
+    if scheme not in {"http", "https"}:
+        msg = f"Cannot fetch {url!r}, only file, http and https URLs are supported"
+        raise ValueError(msg)
+    headers = {}
+    if etag:
+        headers["If-None-Match"] = etag
+    if last_modified:
+        headers["If-Modified-Since"] = last_modified
+    request = urllib.request.Request(url, headers=headers)  # noqa: S310
+    try:
+        with urllib.request.urlopen(request, timeout=TIMEOUT) as response:  # noqa: S310
+            return Response(
+                url,
+                response.read(),
+                response.headers.get("ETag"),
+                response.headers.get("Last-Modified"),
+            )
+    except urllib.error.HTTPError as error:
+        if error.code == 304:  # noqa: PLR2004
+            return Response(
+                url,
+                None,
+                error.headers.get("ETag", etag),
+                error.headers.get("Last-Modified", last_modified),
+            )
+        raise
+
+
+async def fetch_url(
+    url: str,
+    etag: Optional[str] = None,
+    last_modified: Optional[str] = None,
+) -> Response:
+    """
+    Fetch a ``file``, ``http`` or ``https`` URL.
+
+    Args:
+    ----
+        url: The URL to fetch.
+        etag: The ``ETag`` of the cached response.
+        last_modified: The ``Last-Modified`` value of the cached response.
+
+    Returns:
+    -------
+        The response, without content when the document has not been modified.
+
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        None,
+        functools.partial(_fetch, url, etag, last_modified),
+    )
+
+
+def _parse(content: bytes, *, strict: bool) -> KML:
+    """Parse a KML document or the KML document of a KMZ archive."""
+    if zipfile.is_zipfile(io.BytesIO(content)):
+        with zipfile.ZipFile(io.BytesIO(content)) as kmz:
+            names = [name for name in kmz.namelist() if name.lower().endswith(".kml")]
+            if not names:
+                msg = "The KMZ archive does not contain a KML document"
+                raise ValueError(msg)
+            content = kmz.read("doc.kml" if "doc.kml" in names else names[0])
+    return KML.parse(io.BytesIO(content), strict=strict)
+
+
+def _seconds(value: Optional[float]) -> float:
+    return value if value and value > 0 else 0.0
+
+
+@dataclass
+class CacheEntry:
+    """A parsed document with the validators and refresh times of its response."""
+
+    kml: KML
+    fetched: float
+    """The time of the last fetch, in seconds since the epoch."""
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    expires: Optional[float] = None
+    """The ``expires`` of the ``NetworkLinkControl``, in seconds since the epoch."""
+    min_refresh_period: float = 0.0
+    """The ``minRefreshPeriod`` of the ``NetworkLinkControl`` in seconds."""
+
+    @classmethod
+    def from_response(
+        cls,
+        kml: KML,
+        response: Response,
+        fetched: float,
+    ) -> "CacheEntry":
+        """Create an entry with the refresh times of the document."""
+        expires = None
+        min_refresh_period = 0.0
+        for control in find_all(kml, of_type=NetworkLinkControl):
+            assert isinstance(control, NetworkLinkControl)  # noqa: S101
+            if control.expires:
+                expires = time_interval(control.expires)[0] / 1_000_000
+            min_refresh_period = _seconds(control.min_refresh_period)
+        return cls(
+            kml=kml,
+            fetched=fetched,
+            etag=response.etag,
+            last_modified=response.last_modified,
+            expires=expires,
+            min_refresh_period=min_refresh_period,
+        )
+
+    def is_fresh(self, link: Optional[Link], now: float) -> bool:
+        """
+        Check whether the document can be used for a link without a fetch.
+
+        A document is fresh within its ``minRefreshPeriod``, within the
+        ``refreshInterval`` of an ``onInterval`` link and until it expires for
+        an ``onExpire`` link.
+        The documents of ``onChange`` links, the default, stay fresh.
+        """
+        if now < self.fetched + self.min_refresh_period:
+            return True
+        mode = link.refresh_mode if link else None
+        if mode == RefreshMode.on_interval:
+            assert link is not None  # noqa: S101
+            return now < self.fetched + _seconds(link.refresh_interval)
+        if mode == RefreshMode.on_expire:
+            return self.expires is None or now < self.expires
+        return True
+
+
+@dataclass
+class Resolution:
+    """The documents linked from a document."""
+
+    documents: Dict[str, KML] = field(default_factory=dict)
+    """The documents by their URL, including the resolved document."""
+    links: Dict[str, List[str]] = field(default_factory=dict)
+    """The URLs linked from each document."""
+    errors: Dict[str, Exception] = field(default_factory=dict)
+    """The errors fetching or parsing a URL."""
+
+
+def _file_url(path: Path) -> str:
+    return path.resolve().as_uri()
+
+
+def _links(url: str, kml: KML) -> List[Tuple[str, Link]]:
+    """Get the absolute URLs and the links of the NetworkLinks of a document."""
+    links = []
+    for network_link in find_all(kml, of_type=NetworkLink):
+        assert isinstance(network_link, NetworkLink)  # noqa: S101
+        link = network_link.link
+        if link is not None and link.href:
+            links.append((urljoin(url, link.href), link))
+    return links
+
+
+def _not_modified(
+    url: str,
+    entry: Optional[CacheEntry],
+    response: Response,
+    now: float,
+) -> KML:
+    """Refresh the cache entry of a document that has not been modified."""
+    if entry is None:
+        msg = f"{url} was not modified, but it is not cached"
+        raise ValueError(msg)
+    entry.fetched = now
+    entry.etag = response.etag or entry.etag
+    entry.last_modified = response.last_modified or entry.last_modified
+    return entry.kml
+
+
+class NetworkLinkResolver:
+    """Fetch, parse and cache the documents linked by NetworkLinks."""
+
+    def __init__(
+        self,
+        fetcher: Fetcher = fetch_url,
+        *,
+        max_concurrency: int = 8,
+        max_depth: Optional[int] = None,
+        strict: bool = False,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        """
+        Create a resolver.
+
+        Args:
+        ----
+            fetcher: The coroutine function fetching a URL.
+            max_concurrency: The maximal number of concurrent fetches.
+            max_depth: The maximal number of links to follow from the resolved
+                document, or ``None`` to follow all links.
+            strict: Whether to enforce strict parsing rules.
+            clock: The function returning the current time in seconds since
+                the epoch.
+
+        Raises:
+        ------
+            ValueError: If ``max_concurrency`` is smaller than 1.
+
+        """
+        if max_concurrency < 1:
+            msg = f"max_concurrency must be at least 1, not {max_concurrency!r}"
+            raise ValueError(msg)
+        self.fetcher = fetcher
+        self.max_concurrency = max_concurrency
+        self.max_depth = max_depth
+        self.strict = strict
+        self.clock = clock
+        self.cache: Dict[str, CacheEntry] = {}
+        self._pending: Dict[str, asyncio.Future[KML]] = {}
+
+    def __repr__(self) -> str:
+        """Create a string (c)representation for NetworkLinkResolver."""
+        return (
+            f"{self.__class__.__module__}.{self.__class__.__name__}("
+            f"max_concurrency={self.max_concurrency!r}, "
+            f"max_depth={self.max_depth!r}, "
+            f"cached={len(self.cache)!r}"
+            ")"
+        )
+
+    async def _get(
+        self,
+        url: str,
+        link: Optional[Link],
+        semaphore: asyncio.Semaphore,
+    ) -> KML:
+        entry = self.cache.get(url)
+        if entry and entry.is_fresh(link, self.clock()):
+            return entry.kml
+        async with semaphore:
+            response = await self.fetcher(
+                url,
+                entry.etag if entry else None,
+                entry.last_modified if entry else None,
+            )
+        now = self.clock()
+        if response.not_modified:
+            return _not_modified(url, entry, response, now)
+        assert response.content is not None  # noqa: S101
+        loop = asyncio.get_running_loop()
+        kml = await loop.run_in_executor(
+            None,
+            functools.partial(_parse, response.content, strict=self.strict),
+        )
+        self.cache[url] = CacheEntry.from_response(kml, response, now)
+        return kml
+
+    async def _get_shared(
+        self,
+        url: str,
+        link: Optional[Link],
+        semaphore: asyncio.Semaphore,
+    ) -> KML:
+        pending = self._pending.get(url)
+        if pending is None:
+            pending = asyncio.ensure_future(self._get(url, link, semaphore))
+            self._pending[url] = pending
+            pending.add_done_callback(lambda _: self._pending.pop(url, None))
+        return await pending
+
+    async def get(self, url: str, link: Optional[Link] = None) -> KML:
+        """
+        Get the document of a URL, from the cache while it is fresh.
+
+        Concurrent calls for the same URL share one fetch.
+
+        Args:
+        ----
+            url: The URL of the document.
+            link: The link to the document, for its refresh mode and interval.
+
+        Returns:
+        -------
+            The parsed document.
+
+        """
+        return await self._get_shared(
+            url,
+            link,
+            asyncio.Semaphore(self.max_concurrency),
+        )
+
+    async def resolve(
+        self,
+        source: Union[KML, Path, str],
+        *,
+        base_url: str = "",
+    ) -> Resolution:
+        """
+        Resolve the documents linked from a document.
+
+        Each URL is fetched at most once, links to a URL that has already been
+        visited are recorded in the links of the resolution but not followed
+        again.
+
+        Args:
+        ----
+            source: The document, its path or its URL.
+            base_url: The URL of a document to resolve relative links against.
+
+        Returns:
+        -------
+            The linked documents, the links and the errors.
+
+        """
+        # The semaphore is bound to the event loop of the resolution.
+        get = functools.partial(
+            self._get_shared,
+            semaphore=asyncio.Semaphore(self.max_concurrency),
+        )
+        walk = _Walk(get, self.max_depth)
+        if isinstance(source, KML):
+            url, kml = base_url, source
+        else:
+            url = _file_url(source) if isinstance(source, Path) else source
+            kml = await get(url, None)
+        walk.resolution.documents[url] = kml
+        walk.seen.add(url)
+        await walk.visit(url, kml, 0)
+        return walk.resolution
+
+
+@dataclass
+class _Walk:
+    """Follow the links of one resolution."""
+
+    get: Callable[[str, Optional[Link]], Awaitable[KML]]
+    max_depth: Optional[int]
+    resolution: Resolution = field(default_factory=Resolution)
+    seen: Set[str] = field(default_factory=set)
+
+    async def visit(self, url: str, kml: KML, depth: int) -> None:
+        links = _links(url, kml)
+        self.resolution.links[url] = [child for child, _ in links]
+        if self.max_depth is not None and depth >= self.max_depth:
+            return
+        new = []
+        for child, link in links:
+            if child not in self.seen:
+                self.seen.add(child)
+                new.append((child, link))
+        await asyncio.gather(
+            *(self.follow(child, link, depth) for child, link in new),
+        )
+
+    async def follow(self, url: str, link: Link, depth: int) -> None:
+        try:
+            kml = await self.get(url, link)
+        except Exception as error:  # noqa: BLE001
+            self.resolution.errors[url] = error
+            return
+        self.resolution.documents[url] = kml
+        await self.visit(url, kml, depth + 1)
@@ -0,0 +1,169 @@
+# Copyright (C) 2024 Christian Ledermann
+#
+# This library is free software; you can redistribute it and/or modify it under
+# the terms of the GNU Lesser General Public License as published by the Free
+# Software Foundation; either version 2.1 of the License, or (at your option)
+# any later version.
+#
+# This library is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU Lesser General Public License for more
+# details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this library; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301 USA
+"""
+Vectorized conversion between shapely 2 geometry arrays and KML geometries.
+
+Going through ``__geo_interface__``, ``pygeoif.shape`` and
+``create_kml_geometry`` creates several Python objects per vertex for each
+geometry.
+This bridge uses the vectorized ``shapely.to_ragged_array`` and
+``shapely.from_ragged_array`` and converts the ragged arrays with
+:mod:`fastkml.ragged`, no ``pygeoif`` geometries are created.
+
+Install shapely with ``pip install fastkml[shapely]``.
+
+Example::
+
+    placemarks = placemarks_from_shapely(geodataframe.geometry.values)
+    geometries = to_shapely(k)
+"""
+
+from typing import List
+from typing import Optional
+from typing import Sequence
+
+import numpy as np
+import numpy.typing as npt
+import shapely
+
+from fastkml.features import Placemark
+from fastkml.geometry import KMLGeometryType
+from fastkml.ragged import RaggedArray
+from fastkml.ragged import from_ragged
+from fastkml.ragged import placemarks_from_geometries
+from fastkml.ragged import to_ragged
+
+__all__ = [
+    "from_shapely",
+    "placemarks_from_shapely",
+    "ragged_from_shapely",
+    "ragged_to_shapely",
+    "to_shapely",
+]
+
+GeometryArray = npt.NDArray[np.object_]
+
+
+def ragged_from_shapely(geometries: GeometryArray) -> RaggedArray:
+    """
+    Convert an array of shapely geometries into a ragged array.
+
+    Args:
+    ----
+        geometries: The shapely geometries, all points, lines or polygons.
+            Single and multi geometries of the same type may be mixed.
+
+    Returns:
+    -------
+        The geometries in the GeoArrow layout.
+
+    """
+    geometry_type, coords, offsets = shapely.to_ragged_array(geometries)
+    return RaggedArray(
+        geometry_type=geometry_type.name.lower(),
+        coords=coords,
+        offsets=tuple(np.asarray(o, dtype=np.int64) for o in reversed(offsets)),
+    )
+
+
+def ragged_to_shapely(ragged: RaggedArray) -> GeometryArray:
+    """
+    Convert a ragged array into an array of shapely geometries.
+
+    Args:
+    ----
+        ragged: The geometries in the GeoArrow layout.
+
+    Returns:
+    -------
+        The shapely geometries.
+
+    """
+    return shapely.from_ragged_array(  # type: ignore[no-any-return]
+        shapely.GeometryType[ragged.geometry_type.upper()],
+        ragged.coords,
+        tuple(reversed(ragged.offsets)) or None,
+    )
+
+
+def from_shapely(geometries: GeometryArray) -> List[Optional[KMLGeometryType]]:
+    """
+    Convert an array of shapely geometries into KML geometries.
+
+    Args:
+    ----
+        geometries: The shapely geometries, all points, lines or polygons.
+            Single and multi geometries of the same type may be mixed.
+
+    Returns:
+    -------
+        A ``Point``, ``LineString``, ``Polygon`` or ``MultiGeometry`` for each
+        geometry, ``None`` for missing and empty geometries.
+
+    """
+    geometries = np.asarray(geometries, dtype=object)
+    kml_geometries: List[Optional[KMLGeometryType]] = [None] * len(geometries)
+    # Missing and empty geometries have no place in the offsets of the others.
+    present = np.flatnonzero(
+        ~(shapely.is_missing(geometries) | shapely.is_empty(geometries)),
+    )
+    if not len(present):
+        return kml_geometries
+    ragged = ragged_from_shapely(geometries[present])
+    for i, kml_geometry in zip(present.tolist(), from_ragged(ragged)):
+        kml_geometries[i] = kml_geometry
+    return kml_geometries
+
+
+def placemarks_from_shapely(
+    geometries: GeometryArray,
+    ids: Optional[Sequence[str]] = None,
+    names: Optional[Sequence[str]] = None,
+) -> List[Placemark]:
+    """
+    Create a Placemark for each shapely geometry.
+
+    Args:
+    ----
+        geometries: The shapely geometries, all points, lines or polygons.
+        ids: The ids of the placemarks.
+        names: The names of the placemarks.
+
+    Returns:
+    -------
+        The placemarks, in the order of the geometries.
+
+    """
+    return placemarks_from_geometries(from_shapely(geometries), ids, names)
+
+
+def to_shapely(obj: object) -> GeometryArray:
+    """
+    Convert the geometries of Placemarks into an array of shapely geometries.
+
+    Args:
+    ----
+        obj: A ``KML`` document, a container, or a sequence of Placemarks or KML
+            geometries, see :func:`fastkml.ragged.to_ragged`.
+
+    Returns:
+    -------
+        The shapely geometries, Placemarks without a geometry are skipped.
+        When 2D and 3D geometries are mixed, all geometries are 3D and the
+        missing altitudes are ``NaN``.
+
+    """
+    return ragged_to_shapely(to_ragged(obj))
@@ -0,0 +1,544 @@
+# Copyright (C) 2024 Christian Ledermann
+#
+# This library is free software; you can redistribute it and/or modify it under
+# the terms of the GNU Lesser General Public License as published by the Free
+# Software Foundation; either version 2.1 of the License, or (at your option)
+# any later version.
+#
+# This library is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU Lesser General Public License for more
+# details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this library; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301 USA
+"""
+A memory mappable columnar file of the geometries of a document.
+
+:func:`write_sidecar` exports the geometries of the Placemarks of a document
+into a sidecar file with flat coordinate arrays, offsets and the ids of the
+Placemarks.
+:class:`GeometrySidecar` maps the file into memory with ``mmap``, the arrays are
+read only views of the mapping, nothing is copied when the file is opened.
+Several processes that open the same file share its memory through the page
+cache of the operating system.
+
+The KML geometries created from a sidecar hold :class:`MappedCoordinates`, which
+reference their slice of the coordinate array, the coordinate tuples are only
+created when the coordinates are accessed.
+
+The file is little endian and starts with a 64 byte header, followed by the
+arrays, each starting at a multiple of 8 bytes:
+
+================  ========  ====================================================
+section           type      content
+================  ========  ====================================================
+header            struct    ``FKMLGEO`` and a null byte, format version and
+                            number of dimensions (uint32 each), number of
+                            geometries, parts, rings, coordinates and id bytes
+                            (uint64 each)
+coords            float64   coordinates, ``(coordinates, dimensions)``, missing
+                            altitudes are ``NaN``
+geometry_parts    int64     geometries into parts, ``geometries + 1``
+part_rings        int64     parts into rings, ``parts + 1``
+ring_coords       int64     rings into coordinates, ``rings + 1``
+features          int64     position of the Placemark of each geometry
+id_offsets        int64     geometries into id bytes, ``geometries + 1``
+multi             uint8     1 for a ``MultiGeometry``, 0 for a single geometry
+part_types        uint8     the geometry type of each part, see ``PART_TYPES``
+ids               bytes     the UTF-8 encoded ids of the Placemarks
+================  ========  ====================================================
+
+A ``Point``, ``LineString`` or ``LinearRing`` is a part with one ring, a
+``Polygon`` is a part with its outer and inner boundaries as rings, the parts
+of nested ``MultiGeometry`` elements are flattened.
+Placemarks without a geometry or with tracks or models are not exported.
+
+Install numpy with ``pip install fastkml[numpy]``.
+
+Example::
+
+    write_sidecar(boundaries_kml, Path("boundaries.geo"))
+
+    # in each worker
+    sidecar = GeometrySidecar(Path("boundaries.geo"))
+    sidecar.attach(boundaries_without_geometries)
+"""
+
+import contextlib
+import mmap
+import struct
+from dataclasses import dataclass
+from dataclasses import field
+from pathlib import Path
+from types import TracebackType
+from typing import Any
+from typing import BinaryIO
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Sequence
+from typing import Set
+from typing import Tuple
+from typing import Type
+from typing import Union
+
+import numpy as np
+import numpy.typing as npt
+from pygeoif.types import LineType
+from pygeoif.types import PointType
+from typing_extensions import Self
+
+from fastkml.features import Placemark
+from fastkml.geometry import Coordinates
+from fastkml.geometry import InnerBoundaryIs
+from fastkml.geometry import LinearRing
+from fastkml.geometry import LineString
+from fastkml.geometry import MultiGeometry
+from fastkml.geometry import OuterBoundaryIs
+from fastkml.geometry import Point
+from fastkml.geometry import Polygon
+from fastkml.ragged import geometry_coords
+from fastkml.utils import iter_features
+
+__all__ = [
+    "PART_TYPES",
+    "GeometrySidecar",
+    "MappedCoordinates",
+    "write_sidecar",
+]
+
+FloatArray = npt.NDArray[np.float64]
+IntArray = npt.NDArray[np.int64]
+
+MAGIC = b"FKMLGEO\0"
+VERSION = 1
+HEADER = struct.Struct("<8sII5Q")
+HEADER_SIZE = 64
+ALIGNMENT = 8
+
+PART_TYPES: Dict[type, int] = {
+    Point: 1,
+    LineString: 2,
+    LinearRing: 3,
+    Polygon: 4,
+}
+"""The type codes of the parts."""
+
+SECTIONS: Tuple[Tuple[str, str], ...] = (
+    ("coords", "<f8"),
+    ("geometry_parts", "<i8"),
+    ("part_rings", "<i8"),
+    ("ring_coords", "<i8"),
+    ("features", "<i8"),
+    ("id_offsets", "<i8"),
+    ("multi", "u1"),
+    ("part_types", "u1"),
+)
+"""The names and the dtypes of the arrays of a sidecar file, in file order."""
+
+SidecarGeometry = Union[Point, LineString, LinearRing, Polygon, MultiGeometry]
+_Part = Tuple[int, List[Sequence[PointType]]]
+
+
+class MappedCoordinates(Coordinates):
+    """
+    Coordinates that reference a slice of a coordinate array.
+
+    The coordinate tuples are created from the array each time ``coords`` is
+    read, assigning ``coords`` replaces the reference with the given tuples.
+    """
+
+    def __init__(
+        self,
+        *,
+        array: FloatArray,
+        ns: Optional[str] = None,
+        name_spaces: Optional[Dict[str, str]] = None,
+        **kwargs: Any,
+    ) -> None:
+        """
+        Create coordinates referencing an array.
+
+        Args:
+        ----
+            array: The ``(n, 2)`` or ``(n, 3)`` coordinates, altitudes that are
+                all ``NaN`` are left out.
+            ns: The namespace of the element.
+            name_spaces: The name spaces of the element.
+            **kwargs: Additional keyword arguments.
+
+        """
+        self._array: Optional[FloatArray] = array
+        super().__init__(ns=ns, name_spaces=name_spaces, **kwargs)
+
+    @property
+    def coords(self) -> LineType:
+        """Get the coordinates as tuples, created from the array."""
+        if self._array is None:
+            return self._coords
+        array = self._array
+        if array.shape[1] == 3 and np.isnan(array[:, 2]).all():  # noqa: PLR2004
+            array = array[:, :2]
+        return list(map(tuple, array.tolist()))
+
+    @coords.setter
+    def coords(self, value: LineType) -> None:
+        if self._array is not None and not value:
+            return
+        self._array = None
+        self._coords = value
+
+    def __bool__(self) -> bool:
+        """Check if there are any coordinates, without creating the tuples."""
+        if self._array is None:
+            return bool(self._coords)
+        return len(self._array) > 0
+
+    def __eq__(self, other: object) -> bool:
+        """Compare the coordinates with other coordinates."""
+        if not isinstance(other, Coordinates):
+            return False
+        return (
+            self.ns == other.ns
+            and self.name_spaces == other.name_spaces
+            and self.coords == other.coords
+        )
+
+    @classmethod
+    def get_tag_name(cls) -> str:
+        """Return the tag name."""
+        return Coordinates.get_tag_name()
+
+
+def _geometry_parts(geometry: object) -> Optional[List[_Part]]:
+    """Get the type code and the rings of each part of a geometry."""
+    if isinstance(geometry, (Point, LineString)):
+        return [(PART_TYPES[type(geometry)], [geometry_coords(geometry)])]
+    if isinstance(geometry, Polygon):
+        return [(PART_TYPES[Polygon], _polygon_rings(geometry))]
+    if isinstance(geometry, MultiGeometry):
+        return _multi_parts(geometry)
+    return None
+
+
+def _polygon_rings(polygon: Polygon) -> List[Sequence[PointType]]:
+    """Get the rings of a polygon, none without an outer boundary."""
+    outer = polygon.outer_boundary
+    if outer is None or outer.kml_geometry is None:
+        return []
+    exterior = geometry_coords(outer.kml_geometry)
+    if not exterior:
+        return []
+    interiors = (
+        geometry_coords(boundary.kml_geometry)
+        for boundary in polygon.inner_boundaries
+        if boundary.kml_geometry is not None
+    )
+    return [exterior, *(ring for ring in interiors if ring)]
+
+
+def _multi_parts(geometry: MultiGeometry) -> Optional[List[_Part]]:
+    """Flatten the parts, ``None`` when a geometry cannot be exported."""
+    parts: List[_Part] = []
+    for kml_geometry in geometry.kml_geometries:
+        geometry_parts = _geometry_parts(kml_geometry)
+        if geometry_parts is None:
+            return None
+        parts.extend(geometry_parts)
+    return parts
+
+
+def _write_array(file: BinaryIO, array: npt.NDArray[Any]) -> None:
+    data = array.tobytes()
+    file.write(data)
+    file.write(b"\0" * (-len(data) % ALIGNMENT))
+
+
+@dataclass
+class _Columns:
+    """Collect the columns of the geometries of the Placemarks."""
+
+    geometry_parts: List[int] = field(default_factory=lambda: [0])
+    part_rings: List[int] = field(default_factory=lambda: [0])
+    ring_coords: List[int] = field(default_factory=lambda: [0])
+    features: List[int] = field(default_factory=list)
+    multi: List[int] = field(default_factory=list)
+    part_types: List[int] = field(default_factory=list)
+    ids: List[bytes] = field(default_factory=list)
+    flat: List[PointType] = field(default_factory=list)
+    dims: Set[int] = field(default_factory=set)
+
+    def add(self, position: int, placemark: Placemark) -> None:
+        # Empty points, lines and polygons have no coordinates to map.
+        parts = [
+            (part_type, rings)
+            for part_type, rings in _geometry_parts(placemark.kml_geometry) or ()
+            if rings and rings[0]
+        ]
+        if not parts:
+            return
+        self.features.append(position)
+        self.multi.append(isinstance(placemark.kml_geometry, MultiGeometry))
+        self.ids.append((placemark.id or "").encode())
+        self.geometry_parts.append(self.geometry_parts[-1] + len(parts))
+        for part_type, rings in parts:
+            self.part_types.append(part_type)
+            self.part_rings.append(self.part_rings[-1] + len(rings))
+            for ring in rings:
+                self.ring_coords.append(self.ring_coords[-1] + len(ring))
+                self.dims.update(map(len, ring))
+                self.flat.extend(ring)
+
+    def coords(self) -> FloatArray:
+        """Get the coordinates, 2D coordinates mixed with 3D ones get a NaN."""
+        flat = self.flat
+        if len(self.dims) > 1:
+            flat = [(*coord, np.nan)[:3] for coord in flat]
+        return np.array(flat, dtype="<f8").reshape(-1, max(self.dims, default=2))
+
+
+def write_sidecar(obj: object, path: Path) -> int:
+    """
+    Export the geometries of the Placemarks of a document into a sidecar file.
+
+    Args:
+    ----
+        obj: A ``KML`` object, a container or a single feature.
+        path: The path of the sidecar file.
+
+    Returns:
+    -------
+        The number of exported geometries.
+
+    """
+    columns = _Columns()
+    placemarks = (
+        feature for feature in iter_features(obj) if isinstance(feature, Placemark)
+    )
+    for position, placemark in enumerate(placemarks):
+        columns.add(position, placemark)
+    coords = columns.coords()
+    id_offsets = np.cumsum([0, *map(len, columns.ids)], dtype="<i8")
+    header = HEADER.pack(
+        MAGIC,
+        VERSION,
+        coords.shape[1],
+        len(columns.features),
+        len(columns.part_types),
+        len(columns.ring_coords) - 1,
+        len(coords),
+        int(id_offsets[-1]),
+    )
+    with path.open("wb") as file:
+        file.write(header.ljust(HEADER_SIZE, b"\0"))
+        for array in (
+            coords,
+            np.array(columns.geometry_parts, dtype="<i8"),
+            np.array(columns.part_rings, dtype="<i8"),
+            np.array(columns.ring_coords, dtype="<i8"),
+            np.array(columns.features, dtype="<i8"),
+            id_offsets,
+            np.array(columns.multi, dtype=np.uint8),
+            np.array(columns.part_types, dtype=np.uint8),
+        ):
+            _write_array(file, array)
+        file.write(b"".join(columns.ids))
+    return len(columns.features)
+
+
+class GeometrySidecar:
+    """
+    The geometries of a sidecar file, mapped into memory.
+
+    The arrays are read only views of the mapped file.
+    """
+
+    coords: FloatArray
+    geometry_parts: IntArray
+    part_rings: IntArray
+    ring_coords: IntArray
+    features: IntArray
+    id_offsets: IntArray
+    multi: npt.NDArray[np.uint8]
+    part_types: npt.NDArray[np.uint8]
+
+    def __init__(self, path: Path) -> None:
+        """
+        Map a sidecar file into memory.
+
+        Args:
+        ----
+            path: The path of the sidecar file.
+
+        Raises:
+        ------
+            ValueError: When the file is not a sidecar file of a known version.
+
+        """
+        self.path = path
+        if path.stat().st_size < HEADER_SIZE:
+            msg = f"{path} is not a geometry sidecar file"
+            raise ValueError(msg)
+        with path.open("rb") as file:
+            self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, dims, n_geometries, n_parts, n_rings, n_coords, n_bytes = (
+            HEADER.unpack_from(self._mmap)
+        )
+        if magic != MAGIC or version != VERSION:
+            self._mmap.close()
+            msg = f"{path} is not a geometry sidecar file of version {VERSION}"
+            raise ValueError(msg)
+        offset = self._map_sections(
+            (
+                n_coords * dims,
+                n_geometries + 1,
+                n_parts + 1,
+                n_rings + 1,
+                n_geometries,
+                n_geometries + 1,
+                n_geometries,
+                n_parts,
+            ),
+        )
+        self.coords = self.coords.reshape(n_coords, dims)
+        self._ids = memoryview(self._mmap)[slice(offset, offset + n_bytes)]
+        self._positions: Optional[Dict[str, int]] = None
+
+    def _map_sections(self, counts: Sequence[int]) -> int:
+        """Create the arrays of the sections, return the offset of the ids."""
+        offset = HEADER_SIZE
+        for (name, dtype), count in zip(SECTIONS, counts):
+            array = np.frombuffer(self._mmap, dtype=dtype, count=count, offset=offset)
+            setattr(self, name, array)
+            offset += array.nbytes + (-array.nbytes % ALIGNMENT)
+        return offset
+
+    def __enter__(self) -> Self:
+        """Enter the context."""
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        """Close the sidecar when leaving the context."""
+        self.close()
+
+    def close(self) -> None:
+        """
+        Release the arrays and unmap the file, the sidecar is empty afterwards.
+
+        Geometries created from the sidecar reference the mapping, it is
+        unmapped once they are garbage collected.
+        """
+        for name, dtype in SECTIONS:
+            setattr(self, name, np.empty(0, dtype=dtype))
+        self.coords = self.coords.reshape(0, 2)
+        self._ids.release()
+        self._ids = memoryview(b"")
+        self._positions = None
+        with contextlib.suppress(BufferError):
+            self._mmap.close()
+
+    def __repr__(self) -> str:
+        """Create a string (c)representation for GeometrySidecar."""
+        return f"{self.__class__.__module__}.{self.__class__.__name__}(<{len(self)}>)"
+
+    def __len__(self) -> int:
+        """Return the number of geometries."""
+        return len(self.features)
+
+    def id(self, index: int) -> str:
+        """Get the id of the Placemark of a geometry."""
+        start, end = self.id_offsets[[index, index + 1]].tolist()
+        return bytes(self._ids[start:end]).decode()
+
+    @property
+    def ids(self) -> List[str]:
+        """Get the ids of the Placemarks of the geometries."""
+        return [self.id(index) for index in range(len(self))]
+
+    def index(self, id_: str) -> Optional[int]:
+        """Get the position of the geometry of the Placemark with an id."""
+        if self._positions is None:
+            self._positions = {
+                placemark_id: index
+                for index, placemark_id in reversed(list(enumerate(self.ids)))
+                if placemark_id
+            }
+        return self._positions.get(id_)
+
+    def _part(self, part: int) -> Union[Point, LineString, LinearRing, Polygon]:
+        start, end = self.part_rings[[part, part + 1]].tolist()
+        stop = end + 1
+        bounds = self.ring_coords[start:stop].tolist()
+        rings = [
+            MappedCoordinates(array=self.coords[first:last])
+            for first, last in zip(bounds, bounds[1:])
+        ]
+        part_type = int(self.part_types[part])
+        if part_type == PART_TYPES[Point]:
+            return Point(kml_coordinates=rings[0])
+        if part_type == PART_TYPES[LineString]:
+            return LineString(kml_coordinates=rings[0])
+        if part_type == PART_TYPES[LinearRing]:
+            return LinearRing(kml_coordinates=rings[0])
+        return Polygon(
+            outer_boundary=OuterBoundaryIs(
+                kml_geometry=LinearRing(kml_coordinates=rings[0]),
+            ),
+            inner_boundaries=[
+                InnerBoundaryIs(kml_geometry=LinearRing(kml_coordinates=ring))
+                for ring in rings[1:]
+            ],
+        )
+
+    def geometry(self, index: int) -> SidecarGeometry:
+        """
+        Create the KML geometry at a position, referencing the mapped coordinates.
+
+        Args:
+        ----
+            index: The position of the geometry in the sidecar.
+
+        Returns:
+        -------
+            A ``Point``, ``LineString``, ``LinearRing``, ``Polygon`` or
+            ``MultiGeometry``.
+
+        """
+        start, end = self.geometry_parts[[index, index + 1]].tolist()
+        parts = [self._part(part) for part in range(start, end)]
+        if self.multi[index]:
+            return MultiGeometry(kml_geometries=parts)
+        return parts[0]
+
+    def attach(self, obj: object) -> int:
+        """
+        Set the geometries of the Placemarks of a document from the sidecar.
+
+        The Placemarks are matched by their id, Placemarks without an id or
+        without a geometry in the sidecar are left unchanged.
+
+        Args:
+        ----
+            obj: A ``KML`` object, a container or a single feature.
+
+        Returns:
+        -------
+            The number of Placemarks a geometry was set for.
+
+        """
+        count = 0
+        for feature in iter_features(obj):
+            if not isinstance(feature, Placemark) or not feature.id:
+                continue
+            index = self.index(feature.id)
+            if index is not None:
+                feature.kml_geometry = self.geometry(index)
+                count += 1
+        return count
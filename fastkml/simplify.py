@@ -0,0 +1,359 @@
+# Copyright (C) 2024 Christian Ledermann
+#
+# This library is free software; you can redistribute it and/or modify it under
+# the terms of the GNU Lesser General Public License as published by the Free
+# Software Foundation; either version 2.1 of the License, or (at your option)
+# any later version.
+#
+# This library is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU Lesser General Public License for more
+# details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this library; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301 USA
+"""
+Simplification of LineString, LinearRing, Polygon and MultiGeometry coordinates.
+
+Two algorithms are provided, both compute a weight for each vertex of a line:
+
+- ``douglas_peucker_weights``, the distance at which the Douglas-Peucker
+  algorithm keeps the vertex, in the units of the coordinates (degrees).
+- ``visvalingam_whyatt_weights``, the effective area of the triangle a vertex
+  forms with its neighbours when it is removed, in square units.
+
+A line is simplified by keeping the vertices with a weight above a tolerance, or
+the vertices with the highest weights for a target vertex count.
+The first and last vertex are always kept, so rings stay closed, and a ring
+keeps at least 4 coordinates.
+Only longitude and latitude are used for the weights, altitudes of the kept
+vertices are preserved.
+
+A simplified ring does not intersect itself: when the selected vertices form
+a ring that crosses or touches itself, more vertices are kept in the order of
+their weights, up to the original ring.
+Each ring is simplified on its own, the rings of a Polygon may still cross each
+other at high tolerances.
+
+The coordinates are processed as numpy arrays, install numpy with
+``pip install fastkml[numpy]``.
+
+Example::
+
+    removed = simplify(k, 0.001)
+    k.write(Path("simplified.kml"))
+"""
+
+import heapq
+from typing import Callable
+from typing import List
+from typing import Optional
+from typing import Sequence
+from typing import Tuple
+
+import numpy as np
+import numpy.typing as npt
+
+from fastkml.geometry import LinearRing
+from fastkml.geometry import LineString
+from fastkml.utils import find_all
+
+__all__ = [
+    "douglas_peucker_weights",
+    "simplify",
+    "simplify_coords",
+    "visvalingam_whyatt_weights",
+]
+
+FloatArray = npt.NDArray[np.float64]
+BoolArray = npt.NDArray[np.bool_]
+WeightFunction = Callable[[FloatArray], FloatArray]
+
+MIN_LINE = 2
+MIN_RING = 4
+_BLOCK_SIZE = 256
+
+
+def _segment_distances(
+    points: FloatArray,
+    start: FloatArray,
+    end: FloatArray,
+) -> FloatArray:
+    """Calculate the distances of points to the segment from start to end."""
+    direction = end - start
+    length_sq = direction @ direction
+    offsets = points - start
+    if length_sq != 0:
+        t = np.clip(offsets @ direction / length_sq, 0, 1)
+        offsets = offsets - t[:, np.newaxis] * direction
+    distances: FloatArray = np.hypot(offsets[:, 0], offsets[:, 1])
+    return distances
+
+
+def douglas_peucker_weights(xy: FloatArray) -> FloatArray:
+    """
+    Calculate the Douglas-Peucker weight of each vertex.
+
+    A vertex is kept by the Douglas-Peucker algorithm for all tolerances below
+    its weight.
+    The weight of a vertex is capped by the weight of the vertex that split its
+    segment, so that the selected vertices are nested for decreasing tolerances.
+    The distances of all vertices of a segment are calculated at once.
+
+    Args:
+    ----
+        xy: The coordinates with the shape ``(n, 2)``.
+
+    Returns:
+    -------
+        The weights, ``inf`` for the first and last vertex.
+
+    """
+    size = len(xy)
+    weights = np.zeros(size)
+    if size == 0:
+        return weights
+    weights[0] = weights[-1] = np.inf
+    stack: List[Tuple[int, int, float]] = [(0, size - 1, np.inf)]
+    while stack:
+        first, last, cap = stack.pop()
+        if last - first < 2:  # noqa: PLR2004
+            continue
+        inner = slice(first + 1, last)
+        distances = _segment_distances(xy[inner], xy[first], xy[last])
+        index = int(np.argmax(distances))
+        weight = min(float(distances[index]), cap)
+        split = first + 1 + index
+        weights[split] = weight
+        stack.append((first, split, weight))
+        stack.append((split, last, weight))
+    return weights
+
+
+def _triangle_areas(a: FloatArray, b: FloatArray, c: FloatArray) -> FloatArray:
+    """Calculate the areas of the triangles with the corners a, b and c."""
+    ab = b - a
+    ac = c - a
+    areas: FloatArray = np.abs(ab[..., 0] * ac[..., 1] - ac[..., 0] * ab[..., 1]) / 2
+    return areas
+
+
+def visvalingam_whyatt_weights(xy: FloatArray) -> FloatArray:
+    """
+    Calculate the Visvalingam-Whyatt effective area of each vertex.
+
+    The initial areas are calculated for all vertices at once, then the vertex
+    with the smallest area is removed repeatedly and the areas of its
+    neighbours are updated.
+    The effective area of a vertex is never smaller than the area of a vertex
+    removed before it.
+
+    Args:
+    ----
+        xy: The coordinates with the shape ``(n, 2)``.
+
+    Returns:
+    -------
+        The effective areas, ``inf`` for the first and last vertex.
+
+    """
+    size = len(xy)
+    weights = np.full(size, np.inf)
+    if size < 3:  # noqa: PLR2004
+        return weights
+    areas = np.full(size, np.inf)
+    areas[1:-1] = _triangle_areas(xy[:-2], xy[1:-1], xy[2:])
+    previous = list(range(-1, size - 1))
+    following = list(range(1, size + 1))
+    heap = [(area, i) for i, area in enumerate(areas[1:-1].tolist(), start=1)]
+    heapq.heapify(heap)
+    largest = 0.0
+    while heap:
+        area, i = heapq.heappop(heap)
+        if area != areas[i] or weights[i] != np.inf:
+            continue
+        largest = max(largest, area)
+        weights[i] = largest
+        before, after = previous[i], following[i]
+        following[before], previous[after] = after, before
+        for neighbour in (n for n in (before, after) if 0 < n < size - 1):
+            areas[neighbour] = _triangle_areas(
+                xy[previous[neighbour]],
+                xy[neighbour],
+                xy[following[neighbour]],
+            )
+            heapq.heappush(heap, (float(areas[neighbour]), neighbour))
+    return weights
+
+
+def _select(
+    weights: FloatArray,
+    tolerance: Optional[float],
+    target: Optional[int],
+    minimum: int,
+) -> BoolArray:
+    """Select the vertices to keep."""
+    if target is None:
+        keep = weights > (tolerance or 0.0)
+        if np.count_nonzero(keep) >= minimum:
+            return keep
+        target = minimum
+    keep = np.zeros(len(weights), dtype=bool)
+    keep[np.argsort(-weights, kind="stable")[: max(target, minimum)]] = True
+    return keep
+
+
+def _cross(o: FloatArray, a: FloatArray, b: FloatArray) -> FloatArray:
+    """Calculate the z component of the cross product of o->a and o->b."""
+    oa = a - o
+    ob = b - o
+    product: FloatArray = oa[..., 0] * ob[..., 1] - oa[..., 1] * ob[..., 0]
+    return product
+
+
+def _segments_intersect(
+    a: FloatArray,
+    b: FloatArray,
+    c: FloatArray,
+    d: FloatArray,
+) -> BoolArray:
+    """Check which segments from a to b intersect or touch those from c to d."""
+    straddle = (_cross(a, b, c) * _cross(a, b, d) <= 0) & (
+        _cross(c, d, a) * _cross(c, d, b) <= 0
+    )
+    overlap = (
+        (np.minimum(a, b) <= np.maximum(c, d)) & (np.minimum(c, d) <= np.maximum(a, b))
+    ).all(axis=-1)
+    result: BoolArray = straddle & overlap
+    return result
+
+
+def _ring_intersects_itself(xy: FloatArray) -> bool:
+    """
+    Check whether a closed ring crosses or touches itself.
+
+    Each segment is compared with the segments that do not share a vertex with
+    it, in blocks of rows to bound the memory use.
+    """
+    starts, ends = xy[:-1], xy[1:]
+    size = len(starts)
+    columns = np.arange(size)
+    for first in range(0, size, _BLOCK_SIZE):
+        rows = np.arange(first, min(first + _BLOCK_SIZE, size))[:, np.newaxis]
+        # Neighbouring segments share a vertex, the last one with the first.
+        candidates = (columns > rows + 1) & ~((rows == 0) & (columns == size - 1))
+        hits = _segments_intersect(
+            starts[rows],
+            ends[rows],
+            starts[np.newaxis, :],
+            ends[np.newaxis, :],
+        )
+        if (hits & candidates).any():
+            return True
+    return False
+
+
+def _simple_ring(xy: FloatArray, weights: FloatArray, keep: BoolArray) -> BoolArray:
+    """
+    Keep more vertices until the simplified ring does not intersect itself.
+
+    The number of kept vertices is doubled in the order of their weights, all
+    vertices are kept when the original ring intersects itself.
+    """
+    order = np.argsort(-weights, kind="stable")
+    count = int(np.count_nonzero(keep))
+    while count < len(xy) and _ring_intersects_itself(xy[keep]):
+        count = min(2 * count, len(xy))
+        keep = np.zeros(len(xy), dtype=bool)
+        keep[order[:count]] = True
+    return keep
+
+
+def simplify_coords(
+    coords: Sequence[Sequence[float]],
+    tolerance: Optional[float] = None,
+    *,
+    target: Optional[int] = None,
+    method: WeightFunction = douglas_peucker_weights,
+    closed: bool = False,
+) -> List[Tuple[float, ...]]:
+    """
+    Simplify a sequence of coordinates.
+
+    Args:
+    ----
+        coords: The coordinates, 2D or 3D.
+        tolerance: Keep the vertices with a weight above the tolerance.
+        target: Keep this number of vertices with the highest weights.
+        method: The weight function, ``douglas_peucker_weights`` or
+            ``visvalingam_whyatt_weights``.
+        closed: Whether the coordinates are a ring, rings keep at least 4
+            coordinates and more when the simplified ring would intersect
+            itself.
+
+    Returns:
+    -------
+        The kept coordinates, in their original order.
+
+    """
+    if (tolerance is None) == (target is None):
+        msg = "Specify either a tolerance or a target vertex count"
+        raise ValueError(msg)
+    minimum = MIN_RING if closed else MIN_LINE
+    if len(coords) <= max(minimum, target or 0):
+        return [tuple(c) for c in coords]
+    xy = np.array([c[:2] for c in coords], dtype=np.float64)
+    weights = method(xy)
+    keep = _select(weights, tolerance, target, minimum)
+    if closed:
+        keep = _simple_ring(xy, weights, keep)
+    return [tuple(coords[int(i)]) for i in np.flatnonzero(keep)]
+
+
+def simplify(
+    obj: object,
+    tolerance: Optional[float] = None,
+    *,
+    target: Optional[int] = None,
+    method: WeightFunction = douglas_peucker_weights,
+) -> int:
+    """
+    Simplify all lines and rings of an object in place.
+
+    The object can be a geometry, a Placemark, a container or a whole ``KML``
+    document.
+    LineStrings and the LinearRings, including the boundaries of Polygons and
+    the geometries inside of MultiGeometries, are simplified.
+    Simplified rings do not intersect themselves, see the module documentation.
+
+    Args:
+    ----
+        obj: The object to simplify.
+        tolerance: Keep the vertices with a weight above the tolerance.
+        target: Keep at most this number of vertices for each line, and for
+            each ring that does not intersect itself with them.
+        method: The weight function, ``douglas_peucker_weights`` or
+            ``visvalingam_whyatt_weights``.
+
+    Returns:
+    -------
+        The number of removed coordinates.
+
+    """
+    removed = 0
+    for line in find_all(obj, of_type=LineString):
+        assert isinstance(line, LineString)  # noqa: S101
+        if not line.kml_coordinates:
+            continue
+        coords = line.kml_coordinates.coords
+        simplified = simplify_coords(
+            coords,
+            tolerance,
+            target=target,
+            method=method,
+            closed=isinstance(line, LinearRing),
+        )
+        removed += len(coords) - len(simplified)
+        line.kml_coordinates.coords = simplified  # type: ignore[assignment]
+    return removed
@@ -0,0 +1,364 @@
+# Copyright (C) 2024 Christian Ledermann
+#
+# This library is free software; you can redistribute it and/or modify it under
+# the terms of the GNU Lesser General Public License as published by the Free
+# Software Foundation; either version 2.1 of the License, or (at your option)
+# any later version.
+#
+# This library is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU Lesser General Public License for more
+# details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this library; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301 USA
+"""
+Point in polygon spatial join between layers of Placemarks.
+
+The rings of the polygon Placemarks are converted once into an array of edges
+with :func:`fastkml.ragged.to_ragged`, no ``pygeoif`` geometries are created.
+For each polygon the points within its bounding box are found by bisecting the
+points sorted by longitude, and the candidates are tested against all edges of
+the polygon at once with the even-odd ray casting rule.
+Holes are excluded, a point is within a multi polygon when it is within any of
+its polygons.
+Points on the boundary of a polygon may or may not be within it.
+
+The polygons can be tested in several threads, numpy releases the GIL for the
+array operations.
+Install numpy with ``pip install fastkml[numpy]``.
+
+Example::
+
+    districts = PolygonIndex.from_kml(districts_kml)
+    pairs = districts.join(points)
+    districts.annotate(points, name="district")
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
+from typing import List
+from typing import Optional
+from typing import Sequence
+from typing import Tuple
+
+import numpy as np
+import numpy.typing as npt
+
+from fastkml.data import Data
+from fastkml.data import ExtendedData
+from fastkml.features import Placemark
+from fastkml.geometry import MultiGeometry
+from fastkml.geometry import Polygon
+from fastkml.ragged import RaggedArray
+from fastkml.ragged import to_ragged
+from fastkml.utils import iter_features
+
+__all__ = ["PolygonIndex", "point_array", "spatial_join"]
+
+FloatArray = npt.NDArray[np.float64]
+IntArray = npt.NDArray[np.int64]
+
+CHUNK_SIZE = 1 << 20
+"""The maximum number of point and edge pairs tested at once."""
+
+
+def point_array(points: Sequence[Placemark]) -> FloatArray:
+    """
+    Get the coordinates of point Placemarks as an array.
+
+    Args:
+    ----
+        points: The point Placemarks.
+
+    Returns:
+    -------
+        The longitude and latitude of each placemark, with the shape ``(n, 2)``.
+
+    Raises:
+    ------
+        ValueError: When a placemark does not have a Point geometry.
+
+    """
+    ragged = to_ragged(points)
+    if ragged.geometry_type != "point" or len(ragged) != len(points):
+        msg = "Only Placemarks with a Point geometry can be joined"
+        raise ValueError(msg)
+    return ragged.coords[:, :2]
+
+
+def _is_polygonal(placemark: Placemark) -> bool:
+    geometry = placemark.kml_geometry
+    if isinstance(geometry, Polygon):
+        return True
+    return (
+        isinstance(geometry, MultiGeometry)
+        and bool(geometry.kml_geometries)
+        and all(isinstance(g, Polygon) for g in geometry.kml_geometries)
+    )
+
+
+class PolygonIndex:
+    """
+    An index over the rings of polygon Placemarks for point in polygon tests.
+
+    Build the index once and join any number of point layers against it.
+    """
+
+    def __init__(self, polygons: Sequence[Placemark]) -> None:
+        """
+        Build the index.
+
+        Args:
+        ----
+            polygons: Placemarks with a Polygon or a MultiGeometry of Polygons.
+
+        Raises:
+        ------
+            ValueError: When a placemark does not have a polygon geometry.
+
+        """
+        self.placemarks = list(polygons)
+        ragged = to_ragged(self.placemarks)
+        if not self.placemarks:
+            ragged = RaggedArray(
+                "multipolygon",
+                np.zeros((0, 2)),
+                (np.zeros(1, dtype=np.int64),) * 3,
+            )
+        if ragged.geometry_type not in {"polygon", "multipolygon"} or len(
+            ragged,
+        ) != len(self.placemarks):
+            msg = "Only Placemarks with a polygon geometry can be indexed"
+            raise ValueError(msg)
+        offsets = ragged.offsets
+        if ragged.geometry_type == "polygon":
+            offsets = (np.arange(len(ragged) + 1, dtype=np.int64), *offsets)
+        geometry_parts, part_rings, ring_coords = offsets
+        coords = ragged.coords[:, :2]
+        following = np.arange(1, len(coords) + 1)
+        closed = np.diff(ring_coords) > 0
+        following[ring_coords[1:][closed] - 1] = ring_coords[:-1][closed]
+        self._edges = np.column_stack([coords, coords[following]])
+        self._part_starts = ring_coords[part_rings]
+        self._geometry_parts = geometry_parts
+        starts = ring_coords[part_rings[geometry_parts]]
+        bounds = []
+        for start, end in zip(starts[:-1], starts[1:]):
+            ring = coords[start:end] if end > start else np.full((1, 2), np.nan)
+            bounds.append((*ring.min(axis=0), *ring.max(axis=0)))
+        self._bounds = np.array(bounds, dtype=np.float64).reshape(-1, 4)
+
+    def __repr__(self) -> str:
+        """Create a string (c)representation for PolygonIndex."""
+        return f"{self.__class__.__module__}.{self.__class__.__name__}(<{len(self)}>)"
+
+    def __len__(self) -> int:
+        """Return the number of polygons in the index."""
+        return len(self.placemarks)
+
+    @classmethod
+    def from_kml(cls, obj: object) -> "PolygonIndex":
+        """
+        Build an index over all polygon Placemarks of a KML object.
+
+        Placemarks with other or without geometries are ignored.
+
+        Args:
+        ----
+            obj: A ``KML`` object, a container or a single feature.
+
+        Returns:
+        -------
+            The polygon index.
+
+        """
+        return cls(
+            [
+                feature
+                for feature in iter_features(obj)
+                if isinstance(feature, Placemark) and _is_polygonal(feature)
+            ],
+        )
+
+    def _within(
+        self,
+        polygon: int,
+        coords: FloatArray,
+        order: IntArray,
+        longitudes: FloatArray,
+    ) -> IntArray:
+        """Return the positions of the points within a polygon."""
+        west, south, east, north = self._bounds[polygon]
+        low = np.searchsorted(longitudes, west, side="left")
+        high = np.searchsorted(longitudes, east, side="right")
+        candidates = order[low:high]
+        y = coords[candidates, 1]
+        candidates = candidates[(y >= south) & (y <= north)]
+        first_part = self._geometry_parts[polygon]
+        part_stop = self._geometry_parts[polygon + 1] + 1
+        part_starts = self._part_starts[first_part:part_stop]
+        first_edge, edge_stop = part_starts[[0, -1]]
+        edges = self._edges[first_edge:edge_stop]
+        x1, y1, x2, y2 = (edges[:, i] for i in range(4))
+        reduce_at = part_starts[:-1] - part_starts[0]
+        chunk = max(1, CHUNK_SIZE // max(len(edges), 1))
+        inside = []
+        for start in range(0, len(candidates), chunk):
+            stop = start + chunk
+            points = coords[candidates[start:stop]]
+            px, py = points[:, :1], points[:, 1:]
+            with np.errstate(divide="ignore", invalid="ignore"):
+                crossing = ((y1 > py) != (y2 > py)) & (
+                    px < (x2 - x1) * (py - y1) / (y2 - y1) + x1
+                )
+            parity = np.logical_xor.reduceat(crossing, reduce_at, axis=1)
+            inside.append(parity.any(axis=1))
+        if not inside:
+            return np.zeros(0, dtype=np.int64)
+        return candidates[np.concatenate(inside)]  # type: ignore[no-any-return]
+
+    def contains(
+        self,
+        coords: FloatArray,
+        *,
+        workers: Optional[int] = None,
+    ) -> Tuple[IntArray, IntArray]:
+        """
+        Find the polygons containing each point.
+
+        Args:
+        ----
+            coords: The longitude and latitude of the points, ``(n, 2)``.
+            workers: The number of threads testing polygons in parallel, by
+                default the polygons are tested in the calling thread.
+
+        Returns:
+        -------
+            The positions of the points and of the polygons containing them,
+            sorted by point and polygon.
+
+        """
+        coords = np.asarray(coords, dtype=np.float64).reshape(-1, 2)
+        order = np.argsort(coords[:, 0], kind="stable")
+        longitudes = coords[order, 0]
+
+        def within(polygon: int) -> IntArray:
+            return self._within(polygon, coords, order, longitudes)
+
+        if workers and workers > 1:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                found = list(executor.map(within, range(len(self))))
+        else:
+            found = [within(polygon) for polygon in range(len(self))]
+        points = np.concatenate([np.zeros(0, dtype=np.int64), *found])
+        polygons = np.repeat(
+            np.arange(len(self), dtype=np.int64),
+            [len(f) for f in found],
+        )
+        pairs = np.lexsort((polygons, points))
+        return points[pairs], polygons[pairs]
+
+    def join(
+        self,
+        points: Sequence[Placemark],
+        *,
+        workers: Optional[int] = None,
+    ) -> List[Tuple[Placemark, Placemark]]:
+        """
+        Pair point Placemarks with the polygon Placemarks containing them.
+
+        Args:
+        ----
+            points: The point Placemarks.
+            workers: The number of threads testing polygons in parallel.
+
+        Returns:
+        -------
+            ``(point, polygon)`` pairs in the order of the points.
+            Points outside of all polygons are left out, points within several
+            polygons are paired with each of them.
+
+        """
+        point_positions, polygons = self.contains(
+            point_array(points),
+            workers=workers,
+        )
+        return [
+            (points[point], self.placemarks[polygon])
+            for point, polygon in zip(point_positions.tolist(), polygons.tolist())
+        ]
+
+    def annotate(
+        self,
+        points: Sequence[Placemark],
+        *,
+        name: str = "polygon",
+        value: Callable[[Placemark], Optional[str]] = lambda p: p.id or p.name,
+        workers: Optional[int] = None,
+    ) -> int:
+        """
+        Add the polygon containing each point to its ``ExtendedData``.
+
+        A ``Data`` element is appended to the ``ExtendedData`` of each point that
+        is within a polygon, for points within several polygons the first
+        polygon is used.
+
+        Args:
+        ----
+            points: The point Placemarks.
+            name: The name of the ``Data`` element.
+            value: A function returning the value for a polygon Placemark, by
+                default its ``id`` or ``name``.
+            workers: The number of threads testing polygons in parallel.
+
+        Returns:
+        -------
+            The number of annotated points.
+
+        """
+        point_positions, polygons = self.contains(
+            point_array(points),
+            workers=workers,
+        )
+        first = np.flatnonzero(
+            np.diff(point_positions, prepend=-1) != 0,
+        )
+        values = [value(placemark) for placemark in self.placemarks]
+        for point, polygon in zip(
+            point_positions[first].tolist(),
+            polygons[first].tolist(),
+        ):
+            placemark = points[point]
+            if placemark.extended_data is None:
+                placemark.extended_data = ExtendedData()
+            placemark.extended_data.elements.append(
+                Data(name=name, value=values[polygon]),
+            )
+        return len(first)
+
+
+def spatial_join(
+    points: Sequence[Placemark],
+    polygons: Sequence[Placemark],
+    *,
+    workers: Optional[int] = None,
+) -> List[Tuple[Placemark, Placemark]]:
+    """
+    Pair point Placemarks with the polygon Placemarks containing them.
+
+    Shortcut for ``PolygonIndex(polygons).join(points)``.
+
+    Args:
+    ----
+        points: The point Placemarks.
+        polygons: Placemarks with a Polygon or a MultiGeometry of Polygons.
+        workers: The number of threads testing polygons in parallel.
+
+    Returns:
+    -------
+        ``(point, polygon)`` pairs in the order of the points.
+
+    """
+    return PolygonIndex(polygons).join(points, workers=workers)
@@ -0,0 +1,267 @@
+# Copyright (C) 2024 Christian Ledermann
+#
+# This library is free software; you can redistribute it and/or modify it under
+# the terms of the GNU Lesser General Public License as published by the Free
+# Software Foundation; either version 2.1 of the License, or (at your option)
+# any later version.
+#
+# This library is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU Lesser General Public License for more
+# details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this library; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301 USA
+"""
+Statistics of a KML document without building its objects.
+
+The scanner reads the XML event stream with ``iterparse`` and only looks at the
+tags, the coordinates and the time elements, no fastkml objects are created
+and every element is removed from its parent once it has been read.
+The memory use does not depend on the size of the document, so the statistics
+of a file can be known before deciding how to process it.
+
+Example::
+
+    stats = scan(Path("upload.kmz"))
+    if stats.vertices > 10_000_000:
+        ...
+"""
+
+import re
+import time
+from collections import Counter
+from dataclasses import dataclass
+from dataclasses import field
+from pathlib import Path
+from typing import IO
+from typing import Dict
+from typing import Iterator
+from typing import List
+from typing import Optional
+from typing import Tuple
+from typing import Union
+
+from fastkml import config
+from fastkml.temporal import time_interval
+from fastkml.times import KmlDateTime
+from fastkml.types import Bounds
+from fastkml.types import Element
+from fastkml.utils import open_kml
+
+__all__ = ["DocumentStats", "scan"]
+
+FEATURES = frozenset(
+    (
+        "Document",
+        "Folder",
+        "Placemark",
+        "NetworkLink",
+        "GroundOverlay",
+        "ScreenOverlay",
+        "PhotoOverlay",
+        "Tour",
+    ),
+)
+CONTAINERS = frozenset(("Document", "Folder"))
+GEOMETRIES = frozenset(
+    (
+        "Point",
+        "LineString",
+        "LinearRing",
+        "Polygon",
+        "MultiGeometry",
+        "Model",
+        "Track",
+        "MultiTrack",
+    ),
+)
+STYLES = frozenset(("Style", "StyleMap"))
+TIMES = frozenset(("when", "begin", "end"))
+
+
+@dataclass
+class DocumentStats:
+    """The statistics of a KML document."""
+
+    features: Dict[str, int] = field(default_factory=dict)
+    """The number of features for each element name, e.g. ``Placemark``."""
+    geometries: Dict[str, int] = field(default_factory=dict)
+    """The number of geometries for each element name, e.g. ``Polygon``."""
+    vertices: int = 0
+    """The number of coordinate tuples, including ``gx:coord`` elements."""
+    bbox: Optional[Bounds] = None
+    """The ``west, south, east, north`` bounds of all coordinates."""
+    time_range: Optional[Tuple[KmlDateTime, KmlDateTime]] = None
+    """The earliest and the latest ``when``, ``begin`` or ``end`` value."""
+    styles: int = 0
+    """The number of ``Style`` and ``StyleMap`` elements."""
+    depth: int = 0
+    """The maximum nesting depth of the features, top level features are 1."""
+    size: int = 0
+    """The number of bytes of the KML document."""
+    elapsed: float = 0.0
+    """The time the scan took in seconds."""
+
+    @property
+    def throughput(self) -> float:
+        """Get the number of bytes scanned per second."""
+        return self.size / self.elapsed if self.elapsed else 0.0
+
+
+class _CountingReader:
+    """A binary file wrapper counting the bytes that were read."""
+
+    def __init__(self, source: IO[bytes]) -> None:
+        self.source = source
+        self.size = 0
+
+    def read(self, size: int = -1) -> bytes:
+        data = self.source.read(size)
+        self.size += len(data)
+        return data
+
+
+def _coordinates(text: str, separator: Optional[str]) -> Iterator[Tuple[float, float]]:
+    """
+    Parse the longitudes and latitudes of a coordinates string.
+
+    Spaces after the separator are removed first, like the coordinates of the
+    geometries.
+    """
+    if separator:
+        text = re.sub(f"{re.escape(separator)} +", separator, text)
+    for value in text.split() if separator else (text,):
+        parts = value.split(separator, 2)
+        try:
+            yield float(parts[0]), float(parts[1])
+        except (IndexError, ValueError):
+            continue
+
+
+class _Scanner:
+    """Accumulate the statistics of the elements of a document."""
+
+    def __init__(self) -> None:
+        self.features: Counter[str] = Counter()
+        self.geometries: Counter[str] = Counter()
+        self.styles = 0
+        self.depth = 0
+        self.max_depth = 0
+        self.vertices = 0
+        self.bounds: List[float] = [
+            float("inf"),
+            float("inf"),
+            -float("inf"),
+            -float("inf"),
+        ]
+        self.earliest: Optional[Tuple[int, KmlDateTime]] = None
+        self.latest: Optional[Tuple[int, KmlDateTime]] = None
+
+    def start(self, name: str) -> None:
+        if name in FEATURES:
+            self.features[name] += 1
+            self.depth += 1
+            self.max_depth = max(self.max_depth, self.depth)
+        elif name in GEOMETRIES:
+            self.geometries[name] += 1
+        elif name in STYLES:
+            self.styles += 1
+
+    def end(self, name: str, text: Optional[str]) -> None:
+        if name in FEATURES:
+            self.depth -= 1
+        elif name == "coordinates" and text:
+            self.coordinates(text, ",")
+        elif name == "coord" and text:
+            self.coordinates(text, None)
+        elif name in TIMES and text:
+            self.time(text.strip())
+
+    def coordinates(self, text: str, separator: Optional[str]) -> None:
+        points = list(_coordinates(text, separator))
+        if not points:
+            return
+        longitudes, latitudes = zip(*points)
+        self.vertices += len(points)
+        west, south, east, north = self.bounds
+        low_longitude, high_longitude = min(longitudes), max(longitudes)
+        low_latitude, high_latitude = min(latitudes), max(latitudes)
+        self.bounds = [
+            min(west, low_longitude),
+            min(south, low_latitude),
+            max(east, high_longitude),
+            max(north, high_latitude),
+        ]
+
+    def time(self, text: str) -> None:
+        try:
+            value = KmlDateTime.parse(text)
+        except ValueError:
+            return
+        if value is None:
+            return
+        begin, end = time_interval(value)
+        if self.earliest is None or begin < self.earliest[0]:
+            self.earliest = (begin, value)
+        if self.latest is None or end > self.latest[0]:
+            self.latest = (end, value)
+
+    def stats(self) -> DocumentStats:
+        west, south, east, north = self.bounds
+        return DocumentStats(
+            features=dict(self.features),
+            geometries=dict(self.geometries),
+            vertices=self.vertices,
+            bbox=(west, south, east, north) if self.vertices else None,
+            time_range=(
+                (self.earliest[1], self.latest[1])
+                if self.earliest and self.latest
+                else None
+            ),
+            styles=self.styles,
+            depth=self.max_depth,
+        )
+
+
+def scan(source: Union[Path, IO[bytes]]) -> DocumentStats:
+    """
+    Scan a KML document for its statistics.
+
+    Args:
+    ----
+        source: The path of a KML or KMZ file, or a binary file object with
+            the KML document.
+
+    Returns:
+    -------
+        The statistics of the document.
+
+    """
+    started = time.perf_counter()
+    stream = open_kml(source) if isinstance(source, Path) else source
+    reader = _CountingReader(stream)
+    scanner = _Scanner()
+    parents: List[Element] = []
+    try:
+        for event, element in config.etree.iterparse(
+            reader,
+            events=("start", "end"),
+        ):
+            name = element.tag.rpartition("}")[2]
+            if event == "start":
+                scanner.start(name)
+                parents.append(element)
+                continue
+            parents.pop()
+            scanner.end(name, element.text)
+            if parents:
+                parents[-1].remove(element)
+    finally:
+        if stream is not source:
+            stream.close()
+    stats = scanner.stats()
+    stats.size = reader.size
+    stats.elapsed = time.perf_counter() - started
+    return stats
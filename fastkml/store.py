@@ -0,0 +1,485 @@
+# Copyright (C) 2024 Christian Ledermann
+#
+# This library is free software; you can redistribute it and/or modify it under
+# the terms of the GNU Lesser General Public License as published by the Free
+# Software Foundation; either version 2.1 of the License, or (at your option)
+# any later version.
+#
+# This library is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU Lesser General Public License for more
+# details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this library; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301 USA
+"""
+A feature store for collections of KML and KMZ files in a SQLite database.
+
+The Placemarks of each file are streamed into the database, without building
+the whole document in memory.
+For each Placemark the store records its ``id``, ``name`` and geometry type,
+the bounding box of its geometry in an R*Tree, its time span, the values of its
+``ExtendedData`` and the XML of the ``Placemark`` element.
+Queries select Placemarks by bounding box, time and data values, and rebuild
+them from their XML with ``Placemark.class_from_element``.
+
+Files are re-ingested only when they changed: a file with the same modification
+time is skipped, a file with a new modification time is only re-ingested when
+the SHA-256 hash of its content changed.
+
+Only the standard library ``sqlite3`` module is used, the SQLite library must be
+compiled with the R*Tree module, which is the default.
+
+Example::
+
+    with FeatureStore(Path("features.sqlite")) as store:
+        for path in Path("kml").glob("*.km[lz]"):
+            store.add(path)
+        placemarks = list(
+            store.query(bbox=(5.9, 45.8, 10.5, 47.8), data={"status": "active"}),
+        )
+"""
+
+import hashlib
+import io
+import sqlite3
+from pathlib import Path
+from types import TracebackType
+from typing import IO
+from typing import Any
+from typing import Dict
+from typing import Iterable
+from typing import Iterator
+from typing import List
+from typing import Mapping
+from typing import Optional
+from typing import Tuple
+from typing import Type
+from typing import Union
+from typing import cast
+
+from typing_extensions import Self
+
+from fastkml import config
+from fastkml.data import PARSERS
+from fastkml.data import Data
+from fastkml.data import Schema
+from fastkml.data import SchemaData
+from fastkml.enums import DataType
+from fastkml.features import Placemark
+from fastkml.temporal import TimeValue
+from fastkml.temporal import feature_intervals
+from fastkml.temporal import time_interval
+from fastkml.types import Bounds
+from fastkml.types import Element
+from fastkml.utils import feature_bounds
+from fastkml.utils import iter_elements
+from fastkml.utils import open_kml
+
+__all__ = ["FeatureStore"]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    mtime REAL NOT NULL,
+    sha256 TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS features (
+    id INTEGER PRIMARY KEY,
+    file_id INTEGER NOT NULL REFERENCES files (id),
+    position INTEGER NOT NULL,
+    kml_id TEXT,
+    name TEXT,
+    geometry_type TEXT,
+    begin INTEGER,
+    end INTEGER,
+    ns TEXT NOT NULL,
+    xml TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS features_file_id ON features (file_id);
+CREATE INDEX IF NOT EXISTS features_begin_end ON features (begin, end);
+CREATE VIRTUAL TABLE IF NOT EXISTS feature_bounds
+    USING rtree (id, west, east, south, north);
+CREATE TABLE IF NOT EXISTS feature_data (
+    feature_id INTEGER NOT NULL REFERENCES features (id),
+    name TEXT NOT NULL,
+    value
+);
+CREATE INDEX IF NOT EXISTS feature_data_name_value ON feature_data (name, value);
+CREATE INDEX IF NOT EXISTS feature_data_feature_id ON feature_data (feature_id);
+"""
+
+FieldTypes = Dict[Optional[str], Dict[Optional[str], Optional[DataType]]]
+
+
+def _iter_placemarks(
+    source: IO[bytes],
+    field_types: FieldTypes,
+) -> Iterator[Tuple[Placemark, str, Element]]:
+    """
+    Stream the Placemarks of a KML document.
+
+    Only the Placemarks in the root element or in its containers are read, not
+    those of a ``NetworkLinkControl`` or its ``Update``.
+    The field types of the ``Schema`` elements are collected into
+    ``field_types``.
+    """
+    for element, is_feature in iter_elements(source):
+        ns, _, name = element.tag.rpartition("}")
+        ns = f"{ns}}}" if ns else ""
+        name_spaces = {**config.NAME_SPACES, "kml": ns}
+        if name == "Schema":
+            schema = Schema.class_from_element(
+                ns=ns,
+                name_spaces=name_spaces,
+                element=element,
+                strict=False,
+            )
+            field_types.setdefault(
+                schema.id,
+                {field.name: field.type_ for field in schema.fields},
+            )
+        elif is_feature and name == "Placemark":
+            placemark = Placemark.class_from_element(
+                ns=ns,
+                name_spaces=name_spaces,
+                element=element,
+                strict=False,
+            )
+            yield placemark, ns, element
+
+
+def _data_rows(
+    feature_id: int,
+    placemark: Placemark,
+) -> Iterator[Tuple[int, str, Optional[str], Optional[str]]]:
+    """Iterate over the data of a Placemark with the id of its ``Schema``."""
+    if not placemark.extended_data:
+        return
+    for element in placemark.extended_data.elements:
+        for name, value, schema_id in _element_data(element):
+            yield feature_id, name, value, schema_id
+
+
+def _element_data(
+    element: Union[Data, SchemaData],
+) -> List[Tuple[str, Optional[str], Optional[str]]]:
+    """Get the named values of a data element with the id of its ``Schema``."""
+    if isinstance(element, Data):
+        return [(element.name, element.value, None)] if element.name else []
+    schema_id = (element.schema_url or "").rpartition("#")[2]
+    return [(data.name, data.value, schema_id) for data in element.data if data.name]
+
+
+def _typed(value: Optional[str], type_: Optional[DataType]) -> Any:
+    """Convert a data value to its type, keep values that do not match as text."""
+    if value is None or type_ is None:
+        return value
+    try:
+        return PARSERS[type_](value)
+    except ValueError:
+        return value
+
+
+def _conditions(
+    *,
+    bbox: Optional[Bounds],
+    begin: Optional[TimeValue],
+    end: Optional[TimeValue],
+    data: Optional[Mapping[str, Any]],
+    name: Optional[str],
+) -> Tuple[List[str], List[Any]]:
+    """Build the SQL conditions of a query and their parameters."""
+    conditions: List[str] = []
+    parameters: List[Any] = []
+    if bbox is not None:
+        west, south, east, north = bbox
+        conditions.append(
+            "features.id IN (SELECT id FROM feature_bounds "
+            "WHERE west <= ? AND east >= ? AND south <= ? AND north >= ?)",
+        )
+        parameters.extend((east, west, north, south))
+    if begin is not None:
+        conditions.append("features.end >= ?")
+        parameters.append(time_interval(begin)[0])
+    if end is not None:
+        conditions.append("features.begin <= ?")
+        parameters.append(time_interval(end)[1])
+    for field, value in (data or {}).items():
+        conditions.append(
+            "features.id IN "
+            "(SELECT feature_id FROM feature_data WHERE name = ? AND value = ?)",
+        )
+        parameters.extend((field, value))
+    if name is not None:
+        conditions.append("features.name = ?")
+        parameters.append(name)
+    return conditions, parameters
+
+
+class FeatureStore:
+    """
+    A SQLite database of the Placemarks of KML and KMZ files.
+
+    The store can be used as a context manager, which closes the connection.
+    """
+
+    def __init__(self, database: Union[Path, str]) -> None:
+        """
+        Open or create a feature store.
+
+        Args:
+        ----
+            database: The path of the SQLite database, ``":memory:"`` for a
+                store in memory.
+
+        """
+        self._connection = sqlite3.connect(str(database))
+        self._connection.executescript(SCHEMA)
+
+    def __repr__(self) -> str:
+        """Create a string (c)representation for FeatureStore."""
+        return f"{self.__class__.__module__}.{self.__class__.__name__}(<{len(self)}>)"
+
+    def __len__(self) -> int:
+        """Return the number of Placemarks in the store."""
+        return int(
+            self._connection.execute("SELECT count(*) FROM features").fetchone()[0],
+        )
+
+    def __enter__(self) -> Self:
+        """Enter the context."""
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        """Close the store when leaving the context."""
+        self.close()
+
+    def close(self) -> None:
+        """Close the database connection."""
+        self._connection.close()
+
+    def _delete_features(self, file_id: int) -> None:
+        selection = "SELECT id FROM features WHERE file_id = ?"
+        self._connection.execute(
+            f"DELETE FROM feature_data WHERE feature_id IN ({selection})",  # noqa: S608
+            (file_id,),
+        )
+        self._connection.execute(
+            f"DELETE FROM feature_bounds WHERE id IN ({selection})",  # noqa: S608
+            (file_id,),
+        )
+        self._connection.execute("DELETE FROM features WHERE file_id = ?", (file_id,))
+
+    def _insert(
+        self,
+        file_id: int,
+        position: int,
+        placemark: Placemark,
+        ns: str,
+        element: Element,
+    ) -> int:
+        intervals = list(feature_intervals(placemark))
+        geometry = placemark.kml_geometry
+        cursor = self._connection.execute(
+            "INSERT INTO features "
+            "(file_id, position, kml_id, name, geometry_type, begin, end, ns, xml) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                file_id,
+                position,
+                placemark.id or None,
+                placemark.name,
+                type(geometry).__name__ if geometry else None,
+                min((begin for begin, _ in intervals), default=None),
+                max((end for _, end in intervals), default=None),
+                ns,
+                config.etree.tostring(element, encoding="unicode"),
+            ),
+        )
+        feature_id = cast("int", cursor.lastrowid)
+        bounds = feature_bounds(placemark)
+        if bounds:
+            west, south, east, north = bounds
+            self._connection.execute(
+                "INSERT INTO feature_bounds VALUES (?, ?, ?, ?, ?)",
+                (feature_id, west, east, south, north),
+            )
+        return feature_id
+
+    def add(self, path: Path) -> Optional[int]:
+        """
+        Ingest the Placemarks of a KML or KMZ file.
+
+        A file that is already in the store is skipped when its modification time
+        or the hash of its content did not change, otherwise its Placemarks are
+        replaced.
+
+        Args:
+        ----
+            path: The path of the KML or KMZ file.
+
+        Returns:
+        -------
+            The number of ingested Placemarks, ``None`` when the file did not
+            change.
+
+        """
+        key = str(path.resolve())
+        mtime = path.stat().st_mtime
+        row = self._connection.execute(
+            "SELECT id, mtime, sha256 FROM files WHERE path = ?",
+            (key,),
+        ).fetchone()
+        if row and row[1] == mtime:
+            return None
+        content = path.read_bytes()
+        sha256 = hashlib.sha256(content).hexdigest()
+        with self._connection:
+            if row and row[2] == sha256:
+                self._connection.execute(
+                    "UPDATE files SET mtime = ? WHERE id = ?",
+                    (mtime, row[0]),
+                )
+                return None
+            if row:
+                file_id = row[0]
+                self._delete_features(file_id)
+                self._connection.execute(
+                    "UPDATE files SET mtime = ?, sha256 = ? WHERE id = ?",
+                    (mtime, sha256, file_id),
+                )
+            else:
+                file_id = self._connection.execute(
+                    "INSERT INTO files (path, mtime, sha256) VALUES (?, ?, ?)",
+                    (key, mtime, sha256),
+                ).lastrowid
+            field_types: FieldTypes = {}
+            data: List[Tuple[int, str, Optional[str], Optional[str]]] = []
+            count = 0
+            for count, (placemark, ns, element) in enumerate(
+                _iter_placemarks(open_kml(io.BytesIO(content)), field_types),
+                start=1,
+            ):
+                feature_id = self._insert(file_id, count, placemark, ns, element)
+                data.extend(_data_rows(feature_id, placemark))
+            # A Schema may follow the Placemarks using it, the data is typed last.
+            self._connection.executemany(
+                "INSERT INTO feature_data VALUES (?, ?, ?)",
+                [
+                    (
+                        feature_id,
+                        name,
+                        _typed(value, field_types.get(schema, {}).get(name)),
+                    )
+                    for feature_id, name, value, schema in data
+                ],
+            )
+        return count
+
+    def update(self, paths: Iterable[Path]) -> Dict[Path, Optional[int]]:
+        """
+        Ingest the Placemarks of several KML or KMZ files.
+
+        Args:
+        ----
+            paths: The paths of the KML or KMZ files.
+
+        Returns:
+        -------
+            The number of ingested Placemarks for each path, ``None`` for the
+            files that did not change.
+
+        """
+        return {path: self.add(path) for path in paths}
+
+    def remove(self, path: Path) -> bool:
+        """
+        Remove the Placemarks of a file from the store.
+
+        Args:
+        ----
+            path: The path of the KML or KMZ file.
+
+        Returns:
+        -------
+            ``True`` when the file was in the store.
+
+        """
+        with self._connection:
+            row = self._connection.execute(
+                "SELECT id FROM files WHERE path = ?",
+                (str(path.resolve()),),
+            ).fetchone()
+            if not row:
+                return False
+            self._delete_features(row[0])
+            self._connection.execute("DELETE FROM files WHERE id = ?", row)
+        return True
+
+    def paths(self) -> List[Path]:
+        """Return the paths of the files in the store."""
+        rows = self._connection.execute("SELECT path FROM files ORDER BY id")
+        return [Path(path) for (path,) in rows]
+
+    def query(
+        self,
+        *,
+        bbox: Optional[Bounds] = None,
+        begin: Optional[TimeValue] = None,
+        end: Optional[TimeValue] = None,
+        data: Optional[Mapping[str, Any]] = None,
+        name: Optional[str] = None,
+        limit: Optional[int] = None,
+    ) -> Iterator[Placemark]:
+        """
+        Find Placemarks and rebuild them from their XML.
+
+        All given conditions must match.
+
+        Args:
+        ----
+            bbox: The ``west, south, east, north`` bounds the geometry of the
+                Placemarks must intersect.
+            begin: The start of the period the time span of the Placemarks must
+                overlap, Placemarks without a time span never match.
+            end: The end of the period the time span of the Placemarks must
+                overlap.
+            data: The values of ``ExtendedData`` fields, typed ``SimpleData``
+                values are compared with their type, e.g. ``{"population": 100}``.
+            name: The name of the Placemarks.
+            limit: The maximum number of Placemarks.
+
+        Returns:
+        -------
+            The matching Placemarks in the order of their files and position.
+
+        """
+        conditions, parameters = _conditions(
+            bbox=bbox,
+            begin=begin,
+            end=end,
+            data=data,
+            name=name,
+        )
+        sql = "SELECT ns, xml FROM features"
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        sql += " ORDER BY file_id, position"
+        if limit is not None:
+            sql += " LIMIT ?"
+            parameters.append(limit)
+        for ns, xml in self._connection.execute(sql, parameters):
+            yield Placemark.class_from_element(
+                ns=ns,
+                name_spaces={**config.NAME_SPACES, "kml": ns},
+                element=config.etree.fromstring(xml),
+                strict=False,
+            )
@@ -0,0 +1,458 @@
+# Copyright (C) 2024 Christian Ledermann
+#
+# This library is free software; you can redistribute it and/or modify it under
+# the terms of the GNU Lesser General Public License as published by the Free
+# Software Foundation; either version 2.1 of the License, or (at your option)
+# any later version.
+#
+# This library is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU Lesser General Public License for more
+# details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this library; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301 USA
+"""
+Resumable streaming of the features of large KML files.
+
+:class:`FeatureStream` reads a KML file with the ``expat`` parser through
+``mmap`` and yields the features that are not containers one by one, each
+parsed with ``class_from_element`` from its byte range.
+Every ``interval`` features it emits a :class:`Checkpoint` with the byte offset
+after the last feature, the start tags of the open ``Document`` and ``Folder``
+elements, which carry the namespace declarations, and the shared ``Style``,
+``StyleMap`` and ``Schema`` elements of these containers.
+
+A stream created from a checkpoint replays the start tags and the shared
+elements before it continues to read the file at the offset of the checkpoint,
+the features are parsed with the same ``ns`` and ``name_spaces`` and the same
+in scope styles and schemas as in an uninterrupted run.
+
+Example::
+
+    def save(checkpoint: Checkpoint) -> None:
+        Path("ingest.checkpoint").write_text(checkpoint.to_json())
+
+    checkpoint = None
+    if Path("ingest.checkpoint").exists():
+        checkpoint = Checkpoint.from_json(Path("ingest.checkpoint").read_text())
+    stream = FeatureStream(
+        Path("huge.kml"),
+        interval=10_000,
+        checkpoint=checkpoint,
+        on_checkpoint=save,
+    )
+    for feature in stream:
+        ingest(feature, stream.styles)
+"""
+
+import contextlib
+import json
+import mmap
+import os
+import re
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+from typing import BinaryIO
+from typing import Callable
+from typing import ContextManager
+from typing import Dict
+from typing import Iterator
+from typing import List
+from typing import Optional
+from typing import Tuple
+from typing import Type
+from typing import Union
+from xml.parsers import expat
+
+from fastkml import config
+from fastkml.base import _XMLObject
+from fastkml.data import Schema
+from fastkml.features import _Feature
+from fastkml.offset_index import CONTAINERS
+from fastkml.offset_index import FEATURES
+from fastkml.styles import Style
+from fastkml.styles import StyleMap
+
+__all__ = ["Checkpoint", "FeatureStream"]
+
+SHARED: Dict[str, Type[_XMLObject]] = {
+    "Style": Style,
+    "StyleMap": StyleMap,
+    "Schema": Schema,
+}
+"""The elements of the containers that are kept in scope."""
+
+_CHUNK_SIZE = 1 << 20
+_QNAME = re.compile(rb"<([^\s/>]+)")
+_START_TAG = re.compile(
+    rb"""<[^\s/>]+(?:\s+[^\s=/>]+\s*=\s*(?:"[^"]*"|'[^']*'))*\s*>""",
+)
+_XMLNS = re.compile(r"""\sxmlns(?::([^\s=]+))?\s*=\s*(?:"([^"]*)"|'([^']*)')""")
+
+# The events of the parser: the start tag of a container, the byte range of a
+# shared element or a feature, or the end of a container.
+_Event = Tuple[str, Any, int]
+
+
+@dataclass(frozen=True)
+class Checkpoint:
+    """The state of a stream after a feature, to resume the stream from."""
+
+    offset: int
+    """The byte offset in the file after the last feature."""
+    position: int
+    """The number of features before the checkpoint."""
+    encoding: str
+    """The encoding of the file."""
+    containers: Tuple[Tuple[str, Tuple[str, ...]], ...]
+    """The start tag and the shared elements of each open container."""
+
+    @property
+    def namespaces(self) -> Dict[str, str]:
+        """Get the namespace declarations of the open containers."""
+        namespaces: Dict[str, str] = {}
+        for start_tag, _ in self.containers:
+            for prefix, double, single in _XMLNS.findall(start_tag):
+                namespaces[prefix] = double or single
+        return namespaces
+
+    def to_json(self) -> str:
+        """Serialize the checkpoint to JSON."""
+        return json.dumps(
+            {
+                "offset": self.offset,
+                "position": self.position,
+                "encoding": self.encoding,
+                "containers": self.containers,
+            },
+        )
+
+    @classmethod
+    def from_json(cls, data: str) -> "Checkpoint":
+        """Create a checkpoint from its JSON serialization."""
+        values = json.loads(data)
+        return cls(
+            offset=values["offset"],
+            position=values["position"],
+            encoding=values["encoding"],
+            containers=tuple(
+                (start_tag, tuple(shared)) for start_tag, shared in values["containers"]
+            ),
+        )
+
+
+def _map(file: BinaryIO) -> ContextManager[Union[bytes, mmap.mmap]]:
+    """Map a file into memory, an empty file cannot be mapped."""
+    if not os.fstat(file.fileno()).st_size:
+        return contextlib.nullcontext(b"")
+    return mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+class _Source:
+    """A replayed prefix followed by the rest of the file."""
+
+    def __init__(
+        self,
+        prefix: bytes,
+        data: Union[bytes, "mmap.mmap"],
+        base: int,
+    ) -> None:
+        self.prefix = prefix
+        self.data = data
+        self.base = base
+
+    def __getitem__(self, key: slice) -> bytes:
+        start, stop = key.start, key.stop
+        length = len(self.prefix)
+        head = self.prefix[start:stop] if start < length else b""
+        if stop <= length:
+            return head
+        return (
+            head + self.data[slice(self.offset(max(start, length)), self.offset(stop))]
+        )
+
+    def find(self, sub: bytes, start: int) -> int:
+        length = len(self.prefix)
+        if start < length:
+            found = self.prefix.find(sub, start)
+            if found >= 0:
+                return found
+            start = length
+        found = self.data.find(sub, start - length + self.base)
+        return found - self.base + length if found >= 0 else -1
+
+    def offset(self, index: int) -> int:
+        """Get the offset in the file of an index after the prefix."""
+        return index - len(self.prefix) + self.base
+
+    def start_tag(self, index: int) -> bytes:
+        window = 1024
+        while True:
+            chunk = self[slice(index, index + window)]
+            match = _START_TAG.match(chunk)
+            if match or len(chunk) < window:
+                break
+            window *= 4
+        if not match:
+            msg = f"Cannot read the start tag at byte {self.offset(index)}"
+            raise ValueError(msg)
+        return match.group(0)
+
+    def end_of_element(self, start: int, end: int) -> int:
+        """
+        Find the end of an element from the byte index of its end event.
+
+        The end event of an element is reported at the start of its end tag, the
+        end event of an empty element after the element.
+        """
+        match = _QNAME.match(self[slice(start, start + 256)])
+        end_tag = b"</" + match.group(1) if match else b"</"
+        if self[slice(end, end + len(end_tag))] == end_tag:
+            return self.find(b">", end) + 1
+        return end
+
+
+class _Handler:
+    """The expat handlers collecting the events of the stream."""
+
+    def __init__(self, parser: Any, source: _Source) -> None:
+        self.parser = parser
+        self.source = source
+        self.events: List[_Event] = []
+        self.encoding = "utf-8"
+        self.depths: List[int] = []
+        self.depth = 0
+        self.capture: Optional[Tuple[str, int, int]] = None
+
+    def xml_declaration(
+        self,
+        version: Optional[str],  # noqa: ARG002
+        encoding: Optional[str],
+        standalone: int,  # noqa: ARG002
+    ) -> None:
+        if encoding:
+            self.encoding = encoding
+
+    def start(self, tag: str, attributes: Dict[str, str]) -> None:  # noqa: ARG002
+        """
+        Collect the children of the root and of the open containers.
+
+        Other elements, like the features in the ``Update`` of a
+        ``NetworkLinkControl``, are skipped with their content.
+        """
+        self.depth += 1
+        if self.capture or (self.depths and self.depth != self.depths[-1] + 1):
+            return
+        name = tag.rpartition(" ")[2]
+        index = self.parser.CurrentByteIndex
+        if self.depth == 1 or name in CONTAINERS:
+            self.depths.append(self.depth)
+            self.events.append(("open", self.source.start_tag(index), index))
+        elif name in FEATURES:
+            self.capture = ("feature", index, self.depth)
+        elif name in SHARED:
+            self.capture = ("shared", index, self.depth)
+
+    def end(self, tag: str) -> None:  # noqa: ARG002
+        if self.capture and self.capture[2] == self.depth:
+            kind, start, _ = self.capture
+            end = self.source.end_of_element(start, self.parser.CurrentByteIndex)
+            self.events.append((kind, start, end))
+            self.capture = None
+        elif not self.capture and self.depths and self.depths[-1] == self.depth:
+            self.depths.pop()
+            self.events.append(("close", None, self.parser.CurrentByteIndex))
+        self.depth -= 1
+
+
+class _Level:
+    """An open container of the stream."""
+
+    def __init__(self, start_tag: bytes) -> None:
+        self.start_tag = start_tag
+        match = _QNAME.match(start_tag)
+        self.end_tag = b"</" + (match.group(1) if match else b"") + b">"
+        self.shared: List[bytes] = []
+        self.objects: Dict[str, _XMLObject] = {}
+
+
+class FeatureStream:
+    """
+    The features of a KML file, read as a stream with checkpoints.
+
+    Iterate over the stream to get the features.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        *,
+        interval: int = 1000,
+        checkpoint: Optional[Checkpoint] = None,
+        on_checkpoint: Optional[Callable[[Checkpoint], None]] = None,
+        strict: bool = True,
+    ) -> None:
+        """
+        Create a stream.
+
+        Args:
+        ----
+            path: The path of the KML file.
+            interval: The number of features between checkpoints.
+            checkpoint: A checkpoint of a previous stream of the file to resume.
+            on_checkpoint: Called with each checkpoint, after the last feature
+                before the checkpoint was processed.
+            strict: Whether to enforce strict parsing rules.
+
+        """
+        self.path = path
+        self.interval = interval
+        self.strict = strict
+        self.on_checkpoint = on_checkpoint
+        self.checkpoint = checkpoint
+        self.position = checkpoint.position if checkpoint else 0
+        self._levels: List[_Level] = []
+        self._ns = ""
+
+    def __repr__(self) -> str:
+        """Create a string (c)representation for FeatureStream."""
+        return (
+            f"{self.__class__.__module__}.{self.__class__.__name__}("
+            f"path={self.path!r}, "
+            f"interval={self.interval!r}, "
+            f"position={self.position!r}"
+            ")"
+        )
+
+    @property
+    def styles(self) -> Dict[str, Union[Style, StyleMap]]:
+        """Get the shared styles of the open containers by their id."""
+        return {
+            key: value
+            for level in self._levels
+            for key, value in level.objects.items()
+            if isinstance(value, (Style, StyleMap))
+        }
+
+    @property
+    def schemas(self) -> Dict[str, Schema]:
+        """Get the schemas of the open containers by their id."""
+        return {
+            key: value
+            for level in self._levels
+            for key, value in level.objects.items()
+            if isinstance(value, Schema)
+        }
+
+    def _parse(self, fragment: bytes, encoding: str) -> _XMLObject:
+        """Parse an element within the start tags of the open containers."""
+        document = b"".join(
+            (
+                f'<?xml version="1.0" encoding="{encoding}"?>'.encode(encoding),
+                *(level.start_tag for level in self._levels),
+                fragment,
+                *(level.end_tag for level in reversed(self._levels)),
+            ),
+        )
+        element = config.etree.fromstring(document)
+        if not self._ns:
+            self._ns = element.tag[:-3] if element.tag.endswith("kml") else ""
+        for _ in self._levels:
+            element = element[-1]
+        name = element.tag.rpartition("}")[2]
+        cls = FEATURES.get(name) or SHARED[name]
+        return cls.class_from_element(
+            ns=self._ns,
+            name_spaces={**config.NAME_SPACES, "kml": self._ns},
+            element=element,
+            strict=self.strict,
+        )
+
+    def _emit_checkpoint(self, offset: int, encoding: str) -> None:
+        self.checkpoint = Checkpoint(
+            offset=offset,
+            position=self.position,
+            encoding=encoding,
+            containers=tuple(
+                (
+                    level.start_tag.decode(encoding),
+                    tuple(shared.decode(encoding) for shared in level.shared),
+                )
+                for level in self._levels
+            ),
+        )
+        if self.on_checkpoint:
+            self.on_checkpoint(self.checkpoint)
+
+    def _process(
+        self,
+        handler: _Handler,
+        source: _Source,
+        replaying: int,
+    ) -> Iterator[_Feature]:
+        for event in handler.events:
+            kind, value, end = event
+            if kind != "feature":
+                self._update_levels(event, source, handler.encoding)
+                continue
+            feature = self._parse(source[value:end], handler.encoding)
+            self.position += 1
+            yield feature  # type: ignore[misc]
+            if end > replaying and self.position % self.interval == 0:
+                self._emit_checkpoint(source.offset(end), handler.encoding)
+        handler.events.clear()
+
+    def _update_levels(self, event: _Event, source: _Source, encoding: str) -> None:
+        """Open or close a container or add a shared element to it."""
+        kind, value, end = event
+        if kind == "open":
+            self._levels.append(_Level(value))
+            self._ns = ""
+        elif kind == "close":
+            self._levels.pop()
+        else:
+            fragment = source[value:end]
+            level = self._levels[-1]
+            level.shared.append(fragment)
+            obj = self._parse(fragment, encoding)
+            if getattr(obj, "id", ""):
+                level.objects[obj.id] = obj  # type: ignore[attr-defined]
+
+    def __iter__(self) -> Iterator[_Feature]:
+        """Parse the features, emitting checkpoints."""
+        self._levels = []
+        self.position = self.checkpoint.position if self.checkpoint else 0
+        checkpoint = self.checkpoint
+        with self.path.open("rb") as file, _map(file) as data:
+            prefix = b""
+            base = 0
+            if checkpoint:
+                prefix = b"".join(
+                    (
+                        f'<?xml version="1.0" encoding="{checkpoint.encoding}"?>'
+                        "".encode(checkpoint.encoding),
+                        *(
+                            "".join((start_tag, *shared)).encode(checkpoint.encoding)
+                            for start_tag, shared in checkpoint.containers
+                        ),
+                    ),
+                )
+                base = checkpoint.offset
+            source = _Source(prefix, data, base)
+            parser = expat.ParserCreate(namespace_separator=" ")
+            handler = _Handler(parser, source)
+            parser.XmlDeclHandler = handler.xml_declaration
+            parser.StartElementHandler = handler.start
+            parser.EndElementHandler = handler.end
+            if prefix:
+                parser.Parse(prefix, False)  # noqa: FBT003
+                yield from self._process(handler, source, len(prefix))
+            for start in range(base, len(data), _CHUNK_SIZE):
+                stop = start + _CHUNK_SIZE
+                parser.Parse(data[start:stop], False)  # noqa: FBT003
+                yield from self._process(handler, source, len(prefix))
+            parser.Parse(b"", True)  # noqa: FBT003
+            yield from self._process(handler, source, len(prefix))
@@ -0,0 +1,668 @@
+# Copyright (C) 2024 Christian Ledermann
+#
+# This library is free software; you can redistribute it and/or modify it under
+# the terms of the GNU Lesser General Public License as published by the Free
+# Software Foundation; either version 2.1 of the License, or (at your option)
+# any later version.
+#
+# This library is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU Lesser General Public License for more
+# details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this library; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301 USA
+"""
+Build Placemarks with typed ``SchemaData`` from tabular rows.
+
+The ``PlacemarkBuilder`` compiles the access to the columns of the rows and the
+conversion of the values to the ``SimpleField`` types of a ``Schema`` once.
+The Placemarks and their ``ExtendedData`` are created from prototypes, by
+copying the attributes of a prepared instance, which skips the keyword
+processing, the string cleaning and the creation of the namespace dictionaries
+of ``__init__`` for every object.
+
+The Placemarks can be collected, or streamed into a KML or KMZ file without
+keeping them in memory.
+When streaming, the rows are serialized with text templates, without building
+the Placemarks at all.
+
+``to_columns`` is the inverse, it exports the ``ExtendedData`` of the Placemarks
+of a document into typed columns.
+
+Example::
+
+    schema = Schema(
+        id="cities",
+        fields=[
+            SimpleField(name="population", type_=DataType.int_),
+            SimpleField(name="capital", type_=DataType.bool_),
+        ],
+    )
+    builder = PlacemarkBuilder(schema, name="name", geometry=("lon", "lat"))
+    builder.write(Path("cities.kml"), csv.DictReader(csvfile))
+"""
+
+import io
+import zipfile
+from operator import itemgetter
+from pathlib import Path
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import Iterable
+from typing import Iterator
+from typing import List
+from typing import Mapping
+from typing import Optional
+from typing import Sequence
+from typing import TextIO
+from typing import Tuple
+from typing import Type
+from typing import Union
+from xml.sax.saxutils import escape
+from xml.sax.saxutils import quoteattr
+
+try:  # pragma: no cover
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None  # type: ignore[assignment]
+
+from fastkml import config
+from fastkml.base import _XMLObject
+from fastkml.containers import Document
+from fastkml.data import PARSERS
+from fastkml.data import ExtendedData
+from fastkml.data import Schema
+from fastkml.data import SchemaData
+from fastkml.data import SimpleData
+from fastkml.data import extended_data_values
+from fastkml.enums import DataType
+from fastkml.features import Placemark
+from fastkml.geometry import Coordinates
+from fastkml.geometry import LineString
+from fastkml.geometry import MultiGeometry
+from fastkml.geometry import Point
+from fastkml.geometry import Polygon
+from fastkml.geometry import create_kml_geometry
+from fastkml.kml import KML
+
+__all__ = ["PlacemarkBuilder", "to_columns"]
+
+Row = Union[Mapping[str, Any], Sequence[Any]]
+Converter = Callable[[Any], Optional[str]]
+Getter = Callable[[Row], Any]
+Column = Union[List[Any], "np.ndarray"]
+
+
+def _to_string(value: Any) -> Optional[str]:
+    return str(value).strip() or None
+
+
+def _to_int(value: Any) -> Optional[str]:
+    if value == "":
+        return None
+    try:
+        return str(int(value))
+    except ValueError:
+        number = float(value)
+    if not number.is_integer():
+        msg = f"Invalid integer value {value!r}"
+        raise ValueError(msg)
+    return str(int(number))
+
+
+def _to_float(value: Any) -> Optional[str]:
+    return str(float(value)) if value != "" else None
+
+
+_BOOLEANS = {"1": "1", "true": "1", "0": "0", "false": "0"}
+
+
+def _to_bool(value: Any) -> Optional[str]:
+    if isinstance(value, str):
+        text = value.strip().lower()
+        if not text:
+            return None
+        if text in _BOOLEANS:
+            return _BOOLEANS[text]
+    elif value in (0, 1):
+        return "1" if value else "0"
+    msg = f"Invalid boolean value {value!r}"
+    raise ValueError(msg)
+
+
+CONVERTERS: Dict[Optional[DataType], Converter] = {
+    None: _to_string,
+    DataType.string: _to_string,
+    DataType.int_: _to_int,
+    DataType.uint: _to_int,
+    DataType.short: _to_int,
+    DataType.ushort: _to_int,
+    DataType.float_: _to_float,
+    DataType.double: _to_float,
+    DataType.bool_: _to_bool,
+}
+"""The conversion of a value to the text of a ``SimpleData`` for each type."""
+
+
+class _Prototype:
+    """
+    Create instances of a class by copying the attributes of a prototype.
+
+    Lists are created empty for each instance and dictionaries, like the
+    namespaces, are copied, other attributes are shared with the prototype.
+    """
+
+    def __init__(self, cls: Type[_XMLObject], **kwargs: Any) -> None:
+        self.cls = cls
+        self.attrs = dict(cls(**kwargs).__dict__)
+        self.lists = [
+            name for name, value in self.attrs.items() if isinstance(value, list)
+        ]
+        self.dicts = [
+            name for name, value in self.attrs.items() if isinstance(value, dict)
+        ]
+
+    def __call__(self, **attrs: Any) -> Any:
+        obj = self.cls.__new__(self.cls)
+        obj_attrs = obj.__dict__
+        obj_attrs.update(self.attrs)
+        for name in self.lists:
+            obj_attrs[name] = []
+        for name in self.dicts:
+            obj_attrs[name] = dict(self.attrs[name])
+        obj_attrs.update(attrs)
+        return obj
+
+
+def _point_xml(coords: Sequence[Any], precision: Optional[int]) -> str:
+    if any(c is None or c == "" for c in coords):
+        return ""
+    if precision is None:
+        text = ",".join(str(float(c)) for c in coords)
+    else:
+        text = ",".join(f"{float(c):.{precision}f}" for c in coords)
+    return f"<Point><coordinates>{text}</coordinates></Point>"
+
+
+def _getter(column: Union[str, int], columns: Optional[Sequence[str]]) -> Getter:
+    if columns is not None and isinstance(column, str):
+        return itemgetter(columns.index(column))
+    return itemgetter(column)
+
+
+class PlacemarkBuilder:
+    """
+    Build Placemarks with typed ``SchemaData`` from rows.
+
+    The rows are mappings of column names to values, or sequences of values when
+    the names of the ``columns`` are given.
+    The values of the ``SimpleField`` columns of the schema are converted to
+    text according to the type of the field, missing values (``None`` or an
+    empty string) are left out.
+    """
+
+    def __init__(
+        self,
+        schema: Schema,
+        *,
+        columns: Optional[Sequence[str]] = None,
+        geometry: Optional[Union[str, Sequence[str]]] = None,
+        name: Optional[str] = None,
+        description: Optional[str] = None,
+        id: Optional[str] = None,
+        schema_url: Optional[str] = None,
+    ) -> None:
+        """
+        Compile the conversion of the rows.
+
+        Args:
+        ----
+            schema: The schema of the typed data, it must have an id.
+            columns: The names of the columns of sequence rows, ``None`` when the
+                rows are mappings.
+            geometry: The column with the geometry, a KML geometry or an object
+                with a ``__geo_interface__``, or the names of the longitude,
+                latitude and optional altitude columns of a point.
+            name: The column with the name of the Placemarks.
+            description: The column with the description of the Placemarks.
+            id: The column with the id of the Placemarks.
+            schema_url: The URL of the schema, defaults to ``#`` and the id of the
+                schema.
+
+        """
+        self.schema = schema
+        self.schema_url = schema_url or f"#{schema.id}"
+        self._fields: List[Tuple[str, Getter, Converter]] = [
+            (
+                field.name,
+                _getter(field.name, columns),
+                CONVERTERS.get(field.type_, _to_string),
+            )
+            for field in schema.fields
+            if field.name
+        ]
+        self._attributes = [
+            (attr_name, _getter(column, columns))
+            for attr_name, column in (
+                ("name", name),
+                ("description", description),
+                ("id", id),
+            )
+            if column is not None
+        ]
+        self._geometry: Optional[Getter] = None
+        self._point: Optional[Getter] = None
+        if isinstance(geometry, str):
+            self._geometry = _getter(geometry, columns)
+        elif geometry is not None:
+            self._point = itemgetter(
+                *(columns.index(c) if columns is not None else c for c in geometry),
+            )
+        self._data_tags = {
+            field_name: (
+                f"<SimpleData name={quoteattr(field_name)}>",
+                convert is _to_string,
+            )
+            for field_name, _, convert in self._fields
+        }
+        self._schema_data_tag = (
+            f"<ExtendedData><SchemaData schemaUrl={quoteattr(self.schema_url)}>"
+        )
+        self._placemark_tag = f'<Placemark xmlns="{config.KMLNS[1:-1]}"'
+        self._placemark = _Prototype(Placemark)
+        self._extended_data = _Prototype(ExtendedData)
+        self._schema_data = _Prototype(SchemaData, schema_url=self.schema_url)
+        self._simple_data = _Prototype(SimpleData)
+        self._point_geometry = _Prototype(Point)
+        self._coordinates = _Prototype(Coordinates)
+
+    def _kml_geometry(self, row: Row) -> Any:
+        if self._point is not None:
+            coords = self._point(row)
+            if any(c is None or c == "" for c in coords):
+                return None
+            return self._point_geometry(
+                kml_coordinates=self._coordinates(
+                    coords=[tuple(float(c) for c in coords)],
+                ),
+            )
+        if self._geometry is None:
+            return None
+        geometry = self._geometry(row)
+        if geometry is None or isinstance(
+            geometry,
+            (Point, LineString, Polygon, MultiGeometry),
+        ):
+            return geometry
+        return create_kml_geometry(geometry)
+
+    def _data(self, row: Row) -> Iterator[Tuple[str, str]]:
+        """Iterate over the names and the texts of the typed data of a row."""
+        for field_name, get, convert in self._fields:
+            value = get(row)
+            if value is None:
+                continue
+            try:
+                text = convert(value)
+            except ValueError as exc:
+                msg = f"Invalid value {value!r} in the column {field_name!r}"
+                raise ValueError(msg) from exc
+            if text is not None:
+                yield field_name, text
+
+    def _attribute_values(self, row: Row) -> Dict[str, Optional[str]]:
+        values = {}
+        for attr_name, get in self._attributes:
+            value = get(row)
+            values[attr_name] = _to_string(value) if value is not None else None
+        return values
+
+    def build(self, row: Row) -> Placemark:
+        """
+        Build the Placemark of a row.
+
+        Args:
+        ----
+            row: A mapping or sequence of values.
+
+        Returns:
+        -------
+            The Placemark.
+
+        Raises:
+        ------
+            ValueError: When a value does not match the type of its column.
+
+        """
+        simple_data = self._simple_data
+        data = [
+            simple_data(name=field_name, value=text)
+            for field_name, text in self._data(row)
+        ]
+        attrs = self._attribute_values(row)
+        if "id" in attrs:
+            attrs["id"] = attrs["id"] or ""
+        return self._placemark(  # type: ignore[no-any-return]
+            kml_geometry=self._kml_geometry(row),
+            extended_data=(
+                self._extended_data(
+                    elements=[self._schema_data(data=data)],
+                )
+                if data
+                else None
+            ),
+            **attrs,
+        )
+
+    def build_all(self, rows: Iterable[Row]) -> Iterator[Placemark]:
+        """
+        Build the Placemarks of the rows.
+
+        Args:
+        ----
+            rows: An iterable of mappings or sequences of values.
+
+        Returns:
+        -------
+            An iterator over the Placemarks, built as the rows are consumed.
+
+        """
+        return map(self.build, rows)
+
+    def _geometry_xml(self, row: Row, precision: Optional[int]) -> str:
+        if self._point is not None:
+            return _point_xml(self._point(row), precision)
+        geometry = self._kml_geometry(row)
+        if geometry is None:
+            return ""
+        return config.etree.tostring(  # type: ignore[no-any-return]
+            geometry.etree_element(precision=precision),
+            encoding="unicode",
+        )
+
+    def to_xml(self, row: Row, precision: Optional[int] = None) -> str:
+        """
+        Serialize the Placemark of a row without building it.
+
+        The XML is assembled from text templates that are compiled once, the
+        elements are in the default namespace, only geometries from a geometry
+        column are serialized as KML geometry objects.
+        The placemark declares the KML namespace, so it can be embedded into
+        documents with any namespace prefix.
+
+        Args:
+        ----
+            row: A mapping or sequence of values.
+            precision: The precision used for the coordinates of points.
+
+        Returns:
+        -------
+            The ``<Placemark>`` element.
+
+        Raises:
+        ------
+            ValueError: When a value does not match the type of its column.
+
+        """
+        parts = [self._placemark_tag]
+        values = self._attribute_values(row)
+        if values.get("id"):
+            parts.append(f" id={quoteattr(values['id'])}")  # type: ignore[arg-type]
+        parts.append(">")
+        for attr_name in ("name", "description"):
+            value = values.get(attr_name)
+            if value:
+                parts.append(f"<{attr_name}>{escape(value)}</{attr_name}>")
+        data = [self._simple_data_xml(name, text) for name, text in self._data(row)]
+        if data:
+            parts.append(self._schema_data_tag)
+            parts.extend(data)
+            parts.append("</SchemaData></ExtendedData>")
+        parts.append(self._geometry_xml(row, precision))
+        parts.append("</Placemark>")
+        return "".join(parts)
+
+    def _simple_data_xml(self, field_name: str, text: str) -> str:
+        open_tag, is_text = self._data_tags[field_name]
+        return f"{open_tag}{escape(text) if is_text else text}</SimpleData>"
+
+    def _write(
+        self,
+        file: TextIO,
+        rows: Iterable[Row],
+        document: Document,
+        precision: Optional[int],
+    ) -> int:
+        head, _, kml_tail = (
+            KML(features=[document])
+            .to_string(
+                prettyprint=False,
+                precision=precision,
+            )
+            .rpartition("</")
+        )
+        head, _, document_tail = head.rpartition("</")
+        file.write(head)
+        count = 0
+        for row in rows:
+            file.write("\n")
+            file.write(self.to_xml(row, precision))
+            count += 1
+        file.write(f"\n</{document_tail}</{kml_tail}\n")
+        return count
+
+    def write(
+        self,
+        file_path: Path,
+        rows: Iterable[Row],
+        *,
+        document: Optional[Document] = None,
+        precision: Optional[int] = None,
+    ) -> int:
+        """
+        Stream the Placemarks of the rows into a KML or KMZ file.
+
+        The file contains a ``Document`` with the schema, followed by a Placemark
+        for each row.
+        The Placemarks are serialized with ``to_xml`` and written row by row, the
+        rows are consumed lazily.
+
+        Args:
+        ----
+            file_path: The path of the file, a ``.kmz`` suffix writes a KMZ file.
+            rows: An iterable of mappings or sequences of values.
+            document: The Document to write the Placemarks into, after its own
+                features, the schema is added to its schemata.
+            precision: The precision used for floating-point values.
+
+        Returns:
+        -------
+            The number of written Placemarks.
+
+        """
+        document = document or Document()
+        if self.schema not in document.schemata:
+            document.schemata.append(self.schema)
+        if file_path.suffix == ".kmz":
+            with zipfile.ZipFile(
+                file_path,
+                "w",
+                zipfile.ZIP_DEFLATED,
+            ) as kmz, io.TextIOWrapper(kmz.open("doc.kml", "w"), "UTF-8") as file:
+                return self._write(file, rows, document, precision)
+        with file_path.open("w", encoding="UTF-8") as file:
+            return self._write(file, rows, document, precision)
+
+
+DTYPES: Dict[Optional[DataType], str] = {
+    DataType.int_: "int32",
+    DataType.uint: "uint32",
+    DataType.short: "int16",
+    DataType.ushort: "uint16",
+    DataType.float_: "float32",
+    DataType.double: "float64",
+    DataType.bool_: "bool",
+}
+"""The numpy dtypes of the typed columns, other columns are object arrays."""
+
+
+def _walk(
+    obj: object,
+    schemata: List[Schema],
+    placemarks: List[Placemark],
+) -> None:
+    """Collect the schemata and the Placemarks of a document."""
+    if isinstance(obj, Placemark):
+        placemarks.append(obj)
+        return
+    schemata.extend(getattr(obj, "schemata", None) or ())
+    for feature in getattr(obj, "features", None) or ():
+        _walk(feature, schemata, placemarks)
+
+
+def _parse(parse: Callable[[str], Any], value: Optional[str]) -> Any:
+    try:
+        return None if value is None else parse(value)
+    except ValueError:
+        return None
+
+
+def _typed_values(
+    values: List[Optional[str]],
+    type_: Optional[DataType],
+) -> List[Any]:
+    """Parse the values of a column, invalid values are missing."""
+    parse = PARSERS.get(type_, str)
+    return [_parse(parse, value) for value in values]
+
+
+def _array(values: List[Any], type_: Optional[DataType]) -> "np.ndarray":
+    """Convert a column to a numpy array, with a mask for missing values."""
+    dtype = DTYPES.get(type_)
+    if dtype is None:
+        return _object_array(values)
+    if dtype.startswith("float"):
+        return _float_array(values, dtype)
+    return _masked_array(values, dtype)
+
+
+def _object_array(values: List[Any]) -> "np.ndarray":
+    array = np.empty(len(values), dtype=object)
+    array[:] = values
+    return array
+
+
+def _float_array(values: List[Any], dtype: str) -> "np.ndarray":
+    return np.array(
+        [np.nan if value is None else value for value in values],
+        dtype=dtype,
+    )
+
+
+def _masked_array(values: List[Any], dtype: str) -> "np.ndarray":
+    missing = [value is None for value in values]
+    filled = np.array(
+        [False if value is None else value for value in values],
+        dtype=dtype,
+    )
+    if any(missing):
+        return np.ma.masked_array(filled, mask=missing)
+    return filled
+
+
+def _column_texts(
+    placemarks: List[Placemark],
+    field_types: Dict[Optional[str], Dict[Optional[str], Optional[DataType]]],
+) -> Tuple[Dict[str, List[Optional[str]]], Dict[str, Optional[DataType]]]:
+    """Collect the texts and the types of the columns, one row per Placemark."""
+    values: Dict[str, List[Optional[str]]] = {}
+    types: Dict[str, Optional[DataType]] = {}
+    for row, placemark in enumerate(placemarks):
+        for column in values.values():
+            column.append(None)
+        for name, value, type_ in extended_data_values(
+            placemark.extended_data,
+            field_types,
+        ):
+            _set_text(values, types, row, (name, value, type_))
+    return values, types
+
+
+def _set_text(
+    values: Dict[str, List[Optional[str]]],
+    types: Dict[str, Optional[DataType]],
+    row: int,
+    item: Tuple[str, Optional[str], Optional[DataType]],
+) -> None:
+    name, value, type_ = item
+    if name not in values:
+        values[name] = [None] * (row + 1)
+        types[name] = type_
+    values[name][row] = value
+
+
+def _column(
+    texts: List[Optional[str]],
+    type_: Optional[DataType],
+    *,
+    arrays: bool,
+) -> Column:
+    typed = _typed_values(texts, type_)
+    return _array(typed, type_) if arrays else typed
+
+
+def to_columns(
+    obj: object,
+    *,
+    geometry: Optional[str] = "geometry",
+    arrays: Optional[bool] = None,
+) -> Dict[str, Column]:
+    """
+    Export the ``ExtendedData`` of the Placemarks of a document into columns.
+
+    The document is walked once, each Placemark is a row.
+    The ``schemaUrl`` of ``SchemaData`` is resolved by its fragment against the
+    ``Schema`` elements of the document, and the values of a column are
+    converted according to the type of its ``SimpleField``.
+    The type of a column is taken from its first occurrence, untyped ``Data``
+    values and fields of unknown schemas are strings.
+    Values that do not match the type of their column are missing.
+
+    With numpy, the columns are arrays with the dtype of the field type:
+    float columns use ``NaN`` for missing values, integer and boolean columns
+    with missing values are masked arrays, and string and geometry columns are
+    object arrays with ``None`` for missing values.
+    Without numpy, the columns are lists with ``None`` for missing values.
+
+    Args:
+    ----
+        obj: A ``KML`` document, a container or a Placemark.
+        geometry: The name of the column with the ``pygeoif`` geometries of the
+            Placemarks, ``None`` to leave it out.
+        arrays: Return numpy arrays, by default when numpy is installed.
+
+    Returns:
+    -------
+        The columns keyed by field name, in the order of their first occurrence.
+
+    """
+    schemata: List[Schema] = []
+    placemarks: List[Placemark] = []
+    _walk(obj, schemata, placemarks)
+    field_types = {
+        schema.id: {field.name: field.type_ for field in schema.fields}
+        for schema in reversed(schemata)
+    }
+    values, types = _column_texts(placemarks, field_types)
+    use_arrays = np is not None if arrays is None else arrays
+    columns: Dict[str, Column] = {
+        name: _column(column, types[name], arrays=use_arrays)
+        for name, column in values.items()
+    }
+    if geometry is not None:
+        geometries = [placemark.geometry for placemark in placemarks]
+        columns[geometry] = _array(geometries, None) if use_arrays else geometries
+    return columns
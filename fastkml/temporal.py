@@ -0,0 +1,321 @@
+# Copyright (C) 2024 Christian Ledermann
+#
+# This library is free software; you can redistribute it and/or modify it under
+# the terms of the GNU Lesser General Public License as published by the Free
+# Software Foundation; either version 2.1 of the License, or (at your option)
+# any later version.
+#
+# This library is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU Lesser General Public License for more
+# details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this library; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301 USA
+"""
+Temporal index over the time primitives of a KML document.
+
+The index answers time slider queries, i.e. "which features are visible between
+``t0`` and ``t1``?" or "which features are visible at ``t``?", without walking
+every feature of the document.
+
+All ``TimeStamp``, ``TimeSpan`` and ``gx:Track`` ``<when>`` values are converted
+into closed intervals of integer microseconds since the epoch (UTC).
+Values with a coarser resolution than ``dateTime`` cover the whole period they
+describe, e.g. a ``TimeStamp`` of ``2020-03`` spans the entire month of March 2020.
+Naive datetimes and dates are interpreted as UTC.
+
+The intervals are sorted by their start, and a segment tree holding the maximum
+end of each subtree is built on top of them.
+An overlap query first bisects the sorted starts and then only descends into
+subtrees that may contain a matching interval, which makes a query
+``O(log n + m)`` where ``m`` is the number of matches.
+"""
+
+import bisect
+from datetime import date
+from datetime import datetime
+from datetime import timezone
+from typing import Iterable
+from typing import Iterator
+from typing import List
+from typing import Optional
+from typing import Tuple
+from typing import Union
+
+from fastkml.enums import DateTimeResolution
+from fastkml.features import Placemark
+from fastkml.features import _Feature
+from fastkml.gx import MultiTrack
+from fastkml.gx import Track
+from fastkml.times import KmlDateTime
+from fastkml.times import TimeSpan
+from fastkml.times import TimeStamp
+from fastkml.utils import iter_features
+
+__all__ = ["TemporalIndex", "feature_intervals", "time_interval"]
+
+TimeValue = Union[KmlDateTime, datetime, date]
+
+MIN_TIME = -(2**63)
+MAX_TIME = 2**63 - 1
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def _micros(dt: Union[date, datetime]) -> int:
+    """Return the microseconds since the epoch of a date or datetime."""
+    if not isinstance(dt, datetime):
+        dt = datetime(dt.year, dt.month, dt.day, tzinfo=timezone.utc)
+    elif dt.tzinfo is None or dt.utcoffset() is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    delta = dt - _EPOCH
+    return (delta.days * 86_400 + delta.seconds) * 1_000_000 + delta.microseconds
+
+
+def _period_end(dt: date, resolution: DateTimeResolution) -> date:
+    """Return the first day after the period described by ``dt``."""
+    if resolution == DateTimeResolution.year:
+        return date(dt.year + 1, 1, 1)
+    if resolution == DateTimeResolution.year_month:
+        return (
+            date(dt.year + 1, 1, 1)
+            if dt.month == 12  # noqa: PLR2004
+            else date(dt.year, dt.month + 1, 1)
+        )
+    return date.fromordinal(dt.toordinal() + 1)
+
+
+def time_interval(value: TimeValue) -> Tuple[int, int]:
+    """
+    Convert a time value into a closed interval of microseconds since the epoch.
+
+    A datetime is an instant, a date covers the whole day, and a ``KmlDateTime``
+    covers the period given by its resolution.
+
+    Args:
+    ----
+        value: The KmlDateTime, datetime or date to convert.
+
+    Returns:
+    -------
+        A ``(start, end)`` tuple of microseconds since the epoch.
+
+    """
+    if isinstance(value, KmlDateTime):
+        resolution = value.resolution
+        value = value.dt
+    elif isinstance(value, datetime):
+        resolution = DateTimeResolution.datetime
+    else:
+        resolution = DateTimeResolution.date
+    start = _micros(value)
+    if resolution == DateTimeResolution.datetime and isinstance(value, datetime):
+        return start, start
+    return start, _micros(_period_end(value, resolution)) - 1
+
+
+def _optional_interval(value: Optional[KmlDateTime]) -> Optional[Tuple[int, int]]:
+    return time_interval(value) if value else None
+
+
+def _track_interval(tracks: Iterable[Track]) -> Optional[Tuple[int, int]]:
+    """Return the interval covered by the ``<when>`` values of the tracks."""
+    intervals = [
+        time_interval(when) for track in tracks for when in track.whens if when
+    ]
+    if not intervals:
+        return None
+    return min(i[0] for i in intervals), max(i[1] for i in intervals)
+
+
+def _span_interval(span: TimeSpan) -> Optional[Tuple[int, int]]:
+    """Return the interval of a TimeSpan, open ends extend to the limits."""
+    begin = _optional_interval(span.begin)
+    end = _optional_interval(span.end)
+    if not (begin or end):
+        return None
+    return (begin[0] if begin else MIN_TIME, end[1] if end else MAX_TIME)
+
+
+def _times_interval(
+    times: Union[TimeStamp, TimeSpan, None],
+) -> Optional[Tuple[int, int]]:
+    """Return the interval of a TimeStamp or TimeSpan."""
+    if isinstance(times, TimeStamp):
+        return _optional_interval(times.timestamp)
+    if isinstance(times, TimeSpan):
+        return _span_interval(times)
+    return None
+
+
+def _geometry_tracks(feature: _Feature) -> Iterable[Track]:
+    """Return the tracks of a Placemark with a gx:Track or gx:MultiTrack."""
+    geometry = feature.kml_geometry if isinstance(feature, Placemark) else None
+    if isinstance(geometry, Track):
+        return (geometry,)
+    if isinstance(geometry, MultiTrack):
+        return geometry.tracks
+    return ()
+
+
+def feature_intervals(feature: _Feature) -> Iterator[Tuple[int, int]]:
+    """
+    Get the time intervals of a single feature.
+
+    A feature contributes the interval of its ``TimeStamp`` or ``TimeSpan``
+    and, for a Placemark with a ``gx:Track`` or ``gx:MultiTrack`` geometry, the
+    interval between the first and the last ``<when>`` of the track.
+    Open ended time spans extend to the minimum or maximum representable time.
+    """
+    if interval := _times_interval(feature.times):
+        yield interval
+    if interval := _track_interval(_geometry_tracks(feature)):
+        yield interval
+
+
+class TemporalIndex:
+    """
+    An interval index over the time primitives of KML features.
+
+    Build the index once for a parsed document with :meth:`from_kml`, or add
+    ``(begin, end, feature)`` entries directly.
+    Queries return the matching features in the order they were added, without
+    duplicates.
+
+    Example::
+
+        index = TemporalIndex.from_kml(k)
+        visible = index.overlapping(
+            KmlDateTime.parse("2020-01-01"),
+            KmlDateTime.parse("2020-02-01T12:00:00Z"),
+        )
+        now = index.at(datetime.now(timezone.utc))
+
+    """
+
+    def __init__(
+        self,
+        entries: Optional[Iterable[Tuple[int, int, _Feature]]] = None,
+    ) -> None:
+        """
+        Build the index.
+
+        Args:
+        ----
+            entries: An iterable of ``(begin, end, feature)`` tuples.
+                ``begin`` and ``end`` are microseconds since the epoch and
+                form a closed interval.
+
+        """
+        ordered = sorted(
+            (begin, end, position, feature)
+            for position, (begin, end, feature) in enumerate(entries or ())
+        )
+        self._begins = [entry[0] for entry in ordered]
+        self._ends = [entry[1] for entry in ordered]
+        self._positions = [entry[2] for entry in ordered]
+        self._features = [entry[3] for entry in ordered]
+        self._size = 1
+        while self._size < len(ordered):
+            self._size *= 2
+        self._max_end = [MIN_TIME] * (2 * self._size)
+        first, last = self._size, self._size + len(ordered)
+        self._max_end[first:last] = self._ends
+        for node in range(self._size - 1, 0, -1):
+            self._max_end[node] = max(
+                self._max_end[2 * node],
+                self._max_end[2 * node + 1],
+            )
+
+    def __repr__(self) -> str:
+        """Create a string (c)representation for TemporalIndex."""
+        return f"{self.__class__.__module__}.{self.__class__.__name__}(<{len(self)}>)"
+
+    def __len__(self) -> int:
+        """Return the number of intervals in the index."""
+        return len(self._begins)
+
+    @classmethod
+    def from_kml(cls, obj: object) -> "TemporalIndex":
+        """
+        Build an index over all features of a KML object in a single pass.
+
+        Args:
+        ----
+            obj: A ``KML`` object, a container or a single feature.
+
+        Returns:
+        -------
+            The temporal index.
+
+        """
+        return cls(
+            (begin, end, feature)
+            for feature in iter_features(obj)
+            for begin, end in feature_intervals(feature)
+        )
+
+    @property
+    def bounds(self) -> Optional[Tuple[int, int]]:
+        """Return the earliest start and latest end in the index."""
+        if not self._begins:
+            return None
+        return self._begins[0], self._max_end[1]
+
+    def _search(self, begin: int, end: int) -> List[int]:
+        """Return the sorted positions of the intervals overlapping begin-end."""
+        limit = bisect.bisect_right(self._begins, end)
+        found: List[int] = []
+        stack = [(1, 0, self._size)]
+        while stack:
+            node, low, high = stack.pop()
+            if low >= limit or self._max_end[node] < begin:
+                continue
+            if high - low == 1:
+                found.append(low)
+                continue
+            middle = (low + high) // 2
+            stack.append((2 * node + 1, middle, high))
+            stack.append((2 * node, low, middle))
+        return found
+
+    def overlapping(self, begin: TimeValue, end: TimeValue) -> List[_Feature]:
+        """
+        Get the features that are visible at any time between begin and end.
+
+        Args:
+        ----
+            begin: The start of the query period.
+            end: The end of the query period, for coarse resolutions the whole
+                period is included, e.g. ``KmlDateTime.parse("2020")`` as ``end``
+                includes all of 2020.
+
+        Returns:
+        -------
+            The features overlapping the query period.
+
+        """
+        return self._features_at(
+            self._search(time_interval(begin)[0], time_interval(end)[1]),
+        )
+
+    def at(self, when: TimeValue) -> List[_Feature]:
+        """
+        Get the features that are visible at a point in time.
+
+        For a ``KmlDateTime`` with a coarse resolution the whole period is
+        queried.
+        """
+        return self._features_at(self._search(*time_interval(when)))
+
+    def _features_at(self, found: List[int]) -> List[_Feature]:
+        seen = set()
+        features = []
+        for i in sorted(found, key=self._positions.__getitem__):
+            feature = self._features[i]
+            if id(feature) not in seen:
+                seen.add(id(feature))
+                features.append(feature)
+        return features
@@ -26,13 +26,15 @@ https://developers.google.com/kml/documentation/time
 import re
 from datetime import date
 from datetime import datetime
+from datetime import timedelta
+from datetime import timezone
+from functools import lru_cache
 from typing import Any
 from typing import Dict
 from typing import Optional
+from typing import Tuple
 from typing import Union
 
-import arrow
-
 from fastkml import config
 from fastkml.enums import DateTimeResolution
 from fastkml.helpers import datetime_subelement
@@ -45,6 +47,7 @@ __all__ = [
     "KmlDateTime",
     "TimeSpan",
     "TimeStamp",
+    "parse_datetime",
 ]
 
 # regular expression to parse a gYearMonth string
@@ -54,6 +57,18 @@ year_month_day = re.compile(
     r"^(?P<year>\d{4})(?:-)?(?P<month>\d{2})?(?:-)?(?P<day>\d{2})?$",
 )
 
+# regular expression to parse a xsd:dateTime string
+# date and time may be in the basic or extended ISO 8601 format,
+# seconds may have a fraction, the time zone is either Z or ±hh:mm or ±hhmm
+xsd_datetime = re.compile(
+    r"^(?P<year>\d{4})-?(?P<month>\d{2})-?(?P<day>\d{2})"
+    r"T(?P<hour>\d{2}):?(?P<minute>\d{2}):?(?P<second>\d{2})"
+    r"(?:[.,](?P<fraction>\d+))?"
+    r"(?:(?P<utc>Z)|(?P<sign>[+-])(?P<tz_hour>\d{2}):?(?P<tz_minute>\d{2}))?$",
+)
+
+PARSE_CACHE_SIZE = 4096
+
 
 def adjust_date_to_resolution(
     dt: Union[date, datetime],
@@ -94,6 +109,73 @@ def adjust_date_to_resolution(
     )
 
 
+def _datetime_from_match(match: "re.Match[str]") -> datetime:
+    """Create a datetime from a match of the ``xsd_datetime`` expression."""
+    tz = timezone.utc
+    if sign := match.group("sign"):
+        offset = timedelta(
+            hours=int(match.group("tz_hour")),
+            minutes=int(match.group("tz_minute")),
+        )
+        tz = timezone(-offset if sign == "-" else offset)
+    fraction = match.group("fraction") or "0"
+    return datetime(
+        int(match.group("year")),
+        int(match.group("month")),
+        int(match.group("day")),
+        int(match.group("hour")),
+        int(match.group("minute")),
+        int(match.group("second")),
+        int(fraction[:6].ljust(6, "0")),
+        tzinfo=tz,
+    )
+
+
+def parse_datetime(datestr: str) -> datetime:
+    """
+    Parse a xsd:dateTime string into a timezone aware datetime.
+
+    ``datetime.fromisoformat`` is tried first, when it cannot handle the string,
+    e.g. the ``Z`` suffix or the basic format before Python 3.11, it is matched
+    against a compiled regular expression.
+    Strings in other ISO 8601 flavours are passed on to ``arrow`` as a last resort.
+    Values without a time zone are interpreted as UTC.
+
+    Raises
+    ------
+    ValueError
+        If the string cannot be parsed.
+
+    """
+    try:
+        dt = datetime.fromisoformat(datestr)
+    except ValueError:
+        if match := xsd_datetime.match(datestr):
+            return _datetime_from_match(match)
+        import arrow
+
+        return arrow.get(datestr).datetime
+    return dt if dt.tzinfo else dt.replace(tzinfo=timezone.utc)
+
+
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def _parse_kml_datetime(
+    datestr: str,
+) -> Tuple[Union[date, datetime], DateTimeResolution]:
+    """Parse and memoize a KML DateTime string."""
+    if year_month_day_match := year_month_day.match(datestr):
+        year = int(year_month_day_match.group("year"))
+        month = int(year_month_day_match.group("month") or 1)
+        day = int(year_month_day_match.group("day") or 1)
+        resolution = DateTimeResolution.date
+        if year_month_day_match.group("day") is None:
+            resolution = DateTimeResolution.year_month
+        if year_month_day_match.group("month") is None:
+            resolution = DateTimeResolution.year
+        return date(year, month, day), resolution
+    return parse_datetime(datestr), DateTimeResolution.datetime
+
+
 class KmlDateTime:
     """
     A KML DateTime object.
@@ -196,21 +278,13 @@ class KmlDateTime:
 
     @classmethod
     def parse(cls, datestr: str) -> Optional["KmlDateTime"]:
-        """Parse a KML DateTime string into a KmlDateTime object."""
-        resolution = None
-        dt = None
-        if year_month_day_match := year_month_day.match(datestr):
-            year = int(year_month_day_match.group("year"))
-            month = int(year_month_day_match.group("month") or 1)
-            day = int(year_month_day_match.group("day") or 1)
-            dt = date(year, month, day)
-            resolution = DateTimeResolution.date
-            if year_month_day_match.group("day") is None:
-                resolution = DateTimeResolution.year_month
-            if year_month_day_match.group("month") is None:
-                resolution = DateTimeResolution.year
-            return cls(dt, resolution)
-        return cls(arrow.get(datestr).datetime, DateTimeResolution.datetime)
+        """
+        Parse a KML DateTime string into a KmlDateTime object.
+
+        The results of the most recently parsed strings are cached, repeated
+        timestamps, e.g. in ``gx:Track`` elements, are only parsed once.
+        """
+        return cls(*_parse_kml_datetime(datestr))
 
     @classmethod
     def get_ns_id(cls) -> str:
@@ -0,0 +1,291 @@
+# Copyright (C) 2024 Christian Ledermann
+#
+# This library is free software; you can redistribute it and/or modify it under
+# the terms of the GNU Lesser General Public License as published by the Free
+# Software Foundation; either version 2.1 of the License, or (at your option)
+# any later version.
+#
+# This library is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU Lesser General Public License for more
+# details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this library; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301 USA
+"""
+Registry aware traversal of KML object trees.
+
+The registry knows for every attribute of a KML class which classes it may hold.
+From this the traversal derives, for each class and each requested type, the
+attributes that can lead to an instance of the requested type and only descends
+into those.
+Attributes holding plain values, like the coordinates of a geometry, strings or
+the ``name_spaces`` dictionaries, are never visited.
+
+The plans are computed on first use and cached, call :func:`clear_cache` after
+registering new classes.
+
+Example::
+
+    placemarks = list(walk(k, of_type=Placemark))
+
+
+    class Counter(Visitor):
+        def __init__(self) -> None:
+            self.vertices = 0
+
+        def visit_Coordinates(self, coordinates: Coordinates) -> None:
+            self.vertices += len(coordinates.coords)
+
+
+    counter = Counter()
+    counter.visit(k)
+"""
+
+from typing import Any
+from typing import Callable
+from typing import ClassVar
+from typing import Dict
+from typing import FrozenSet
+from typing import Iterable
+from typing import Iterator
+from typing import List
+from typing import Optional
+from typing import Set
+from typing import Tuple
+from typing import Type
+from typing import Union
+
+from fastkml.base import _XMLObject
+from fastkml.registry import registry
+
+__all__ = ["Transformer", "Visitor", "clear_cache", "walk"]
+
+Types = Tuple[Type[object], ...]
+Children = Dict[str, FrozenSet[Type[_XMLObject]]]
+
+_children: Dict[Type[_XMLObject], Children] = {}
+_reachable: Dict[Type[_XMLObject], FrozenSet[Type[_XMLObject]]] = {}
+_plans: Dict[Tuple[Type[_XMLObject], Types], FrozenSet[str]] = {}
+
+
+def clear_cache() -> None:
+    """Clear the cached traversal plans, e.g. after registering new classes."""
+    _children.clear()
+    _reachable.clear()
+    _plans.clear()
+
+
+def _subclasses(cls: Type[_XMLObject]) -> Set[Type[_XMLObject]]:
+    """Return a class and all its subclasses."""
+    classes = {cls}
+    for subclass in cls.__subclasses__():
+        classes |= _subclasses(subclass)
+    return classes
+
+
+def _kml_classes(classes: Iterable[object]) -> Set[Type[_XMLObject]]:
+    """Return the KML classes of a registry item and all their subclasses."""
+    kml_classes: Set[Type[_XMLObject]] = set()
+    for item_class in classes:
+        if isinstance(item_class, type) and issubclass(item_class, _XMLObject):
+            kml_classes |= _subclasses(item_class)
+    return kml_classes
+
+
+def _child_classes(cls: Type[_XMLObject]) -> Children:
+    """Map the attributes of a class that hold KML objects to their classes."""
+    if cls not in _children:
+        children: Dict[str, Set[Type[_XMLObject]]] = {}
+        for item in registry.get(cls):
+            classes = _kml_classes(item.classes)
+            if classes:
+                children.setdefault(item.attr_name, set()).update(classes)
+        _children[cls] = {name: frozenset(c) for name, c in children.items()}
+    return _children[cls]
+
+
+def _reachable_classes(cls: Type[_XMLObject]) -> FrozenSet[Type[_XMLObject]]:
+    """Return all classes that may occur anywhere below an instance of cls."""
+    if cls not in _reachable:
+        seen: Set[Type[_XMLObject]] = set()
+        stack = [cls]
+        while stack:
+            for classes in _child_classes(stack.pop()).values():
+                new = classes - seen
+                seen |= new
+                stack.extend(new)
+        _reachable[cls] = frozenset(seen)
+    return _reachable[cls]
+
+
+def _plan(cls: Type[_XMLObject], of_type: Types) -> FrozenSet[str]:
+    """Return the attributes of cls that may lead to an instance of of_type."""
+    key = (cls, of_type)
+    if key not in _plans:
+        _plans[key] = frozenset(
+            name
+            for name, classes in _child_classes(cls).items()
+            if any(
+                issubclass(child, of_type)
+                or any(issubclass(c, of_type) for c in _reachable_classes(child))
+                for child in classes
+            )
+        )
+    return _plans[key]
+
+
+def _children_of(obj: _XMLObject, of_type: Types) -> Iterator[Tuple[str, Any]]:
+    """Iterate over the attributes of obj that may lead to of_type, in order."""
+    plan = _plan(type(obj), of_type)
+    if not plan:
+        return
+    for name, value in obj.__dict__.items():
+        if name in plan and value is not None:
+            yield name, value
+
+
+def _objects(value: Any) -> Iterator[_XMLObject]:
+    """Iterate over the KML objects of an attribute, a single object or a list."""
+    if isinstance(value, _XMLObject):
+        yield value
+        return
+    for child in value:
+        if isinstance(child, _XMLObject):
+            yield child
+
+
+def _walk(obj: _XMLObject, of_type: Types) -> Iterator[_XMLObject]:
+    if isinstance(obj, of_type):
+        yield obj
+    for _, value in _children_of(obj, of_type):
+        for child in _objects(value):
+            yield from _walk(child, of_type)
+
+
+def walk(
+    obj: _XMLObject,
+    *,
+    of_type: Union[Type[object], Types],
+) -> Iterator[_XMLObject]:
+    """
+    Find all KML objects of a given type.
+
+    The objects are found in the same order as :func:`fastkml.utils.find_all`,
+    but only attributes that may hold an instance of ``of_type`` are visited.
+
+    Args:
+    ----
+        obj: The KML object to search.
+        of_type: The KML class(es) to search for.
+
+    Returns:
+    -------
+        An iterable of all instances of the given type in the given object.
+
+    """
+    return _walk(obj, of_type if isinstance(of_type, tuple) else (of_type,))
+
+
+class Visitor:
+    """
+    Walk a KML object tree and call a ``visit_<ClassName>`` method per object.
+
+    The method is looked up along the MRO of the class of each object, e.g.
+    ``visit__Feature`` is called for all features without a more specific
+    method, and the lookup is cached per class.
+    Objects without a method are passed to :meth:`generic_visit`, which visits
+    their children.
+    A ``visit_`` method has to call :meth:`generic_visit` itself to continue
+    into the children of its object.
+    Branches that cannot contain an object with a ``visit_`` method are skipped.
+    """
+
+    _dispatch: ClassVar[Dict[Type[object], Optional[Callable[..., Any]]]] = {}
+    _types: ClassVar[Optional[Types]] = None
+
+    def __init_subclass__(cls, **kwargs: Any) -> None:
+        """Create the dispatch cache of a visitor class."""
+        super().__init_subclass__(**kwargs)
+        cls._dispatch = {}
+        cls._types = None
+
+    @classmethod
+    def _method(cls, obj_type: Type[object]) -> Optional[Callable[..., Any]]:
+        if obj_type not in cls._dispatch:
+            cls._dispatch[obj_type] = next(
+                (
+                    getattr(cls, f"visit_{base.__name__}")
+                    for base in obj_type.__mro__
+                    if hasattr(cls, f"visit_{base.__name__}")
+                ),
+                None,
+            )
+        return cls._dispatch[obj_type]
+
+    @classmethod
+    def _visited_types(cls) -> Types:
+        """Return the KML classes with a ``visit_`` method."""
+        if cls._types is None:
+            cls._types = tuple(
+                subclass
+                for subclass in _subclasses(_XMLObject)
+                if cls._method(subclass) is not None
+            )
+        return cls._types
+
+    def visit(self, obj: _XMLObject) -> Any:
+        """Visit an object with its ``visit_`` method or :meth:`generic_visit`."""
+        method = self._method(type(obj))
+        if method is None:
+            return self.generic_visit(obj)
+        return method(self, obj)
+
+    def generic_visit(self, obj: _XMLObject) -> Any:
+        """Visit the children of an object."""
+        for _, value in _children_of(obj, self._visited_types()):
+            for child in _objects(value):
+                self.visit(child)
+
+
+class Transformer(Visitor):
+    """
+    A visitor that replaces the objects it visits.
+
+    The return value of a ``visit_`` method replaces the visited object,
+    returning ``None`` removes the object from its list or tuple or unsets the
+    attribute.
+    :meth:`generic_visit` transforms the children of an object in place and
+    returns the object.
+
+    Example::
+
+        class RemoveTracks(Transformer):
+            def visit_Track(self, track: Track) -> None:
+                return None
+
+
+        RemoveTracks().visit(k)
+
+    """
+
+    def generic_visit(self, obj: _XMLObject) -> Any:
+        """Transform the children of an object and return it."""
+        for name, value in list(_children_of(obj, self._visited_types())):
+            if isinstance(value, _XMLObject):
+                setattr(obj, name, self.visit(value))
+            elif isinstance(value, list):
+                value[:] = self._transform_items(value)
+            elif isinstance(value, tuple):
+                setattr(obj, name, tuple(self._transform_items(value)))
+        return obj
+
+    def _transform_items(self, items: Iterable[Any]) -> List[Any]:
+        """Transform the KML objects of a sequence and drop the removed ones."""
+        transformed: List[Any] = []
+        for child in items:
+            new = self.visit(child) if isinstance(child, _XMLObject) else child
+            if new is not None:
+                transformed.append(new)
+        return transformed
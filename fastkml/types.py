@@ -33,10 +33,17 @@
 
 from typing import Iterable
 from typing import Optional
+from typing import Tuple
 
 from typing_extensions import Protocol
 
-__all__ = ["Element"]
+__all__ = ["EARTH_RADIUS", "Bounds", "Element"]
+
+Bounds = Tuple[float, float, float, float]
+"""A bounding box as ``(west, south, east, north)``."""
+
+EARTH_RADIUS = 6_371_008.8
+"""The mean earth radius in meters."""
 
 
 class Element(Protocol):
@@ -1,13 +1,38 @@
 """Fastkml utility functions."""
 
+import zipfile
+from dataclasses import dataclass
+from pathlib import Path
+from typing import IO
 from typing import Any
 from typing import Generator
+from typing import Iterator
+from typing import List
 from typing import Optional
 from typing import Tuple
 from typing import Type
 from typing import Union
 
-__all__ = ["find", "find_all", "has_attribute_values"]
+from fastkml import config
+from fastkml.base import _XMLObject
+from fastkml.features import Placemark
+from fastkml.features import _Feature
+from fastkml.overlays import GroundOverlay
+from fastkml.traversal import walk
+from fastkml.types import Bounds
+from fastkml.types import Element
+
+__all__ = [
+    "feature_bounds",
+    "find",
+    "find_all",
+    "has_attribute_values",
+    "iter_elements",
+    "iter_features",
+    "open_kml",
+]
+
+_CONTAINERS = frozenset(("Document", "Folder"))
 
 
 def has_attribute_values(obj: object, **kwargs: Any) -> bool:
@@ -58,6 +83,30 @@ def get_all_attrs(obj: object) -> Generator[object, None, None]:
             yield attr
 
 
+def _is_kml_type(
+    of_type: Optional[Union[Type[object], Tuple[Type[object], ...]]],
+) -> bool:
+    """Check if the types to search for are all KML classes."""
+    types = of_type if isinstance(of_type, tuple) else (of_type,)
+    return all(
+        isinstance(type_, type) and issubclass(type_, _XMLObject) for type_ in types
+    )
+
+
+def _find_all_of_type(
+    obj: object,
+    of_type: Optional[Union[Type[object], Tuple[Type[object], ...]]],
+) -> Generator[object, None, None]:
+    """Find all instances of a given type, walking KML objects by their plan."""
+    if isinstance(obj, _XMLObject) and _is_kml_type(of_type):
+        yield from walk(obj, of_type=of_type)  # type: ignore[arg-type]
+        return
+    if of_type is None or isinstance(obj, of_type):
+        yield obj
+    for attr in get_all_attrs(obj):
+        yield from _find_all_of_type(attr, of_type)
+
+
 def find_all(
     obj: object,
     *,
@@ -67,6 +116,10 @@ def find_all(
     """
     Find all instances of a given type with attributes matching the kwargs.
 
+    When searching a KML object for KML classes, only the attributes that may
+    contain an instance of the requested classes are searched, see
+    :func:`fastkml.traversal.walk`.
+
     Args:
     ----
         obj: The object to search.
@@ -78,14 +131,9 @@ def find_all(
         An iterable of all instances of the given type in the given object.
 
     """
-    if (of_type is None or isinstance(obj, of_type)) and has_attribute_values(
-        obj,
-        **kwargs,
-    ):
-        yield obj
-
-    for attr in get_all_attrs(obj):
-        yield from find_all(attr, of_type=of_type, **kwargs)
+    for found in _find_all_of_type(obj, of_type):
+        if has_attribute_values(found, **kwargs):
+            yield found
 
 
 def find(
@@ -109,3 +157,118 @@ def find(
 
     """
     return next(find_all(obj, of_type=of_type, **kwargs), None)
+
+
+def open_kml(source: Union[Path, IO[bytes]]) -> IO[bytes]:
+    """
+    Open the KML document of a KML or KMZ file.
+
+    Args:
+    ----
+        source: The path of a KML or KMZ file, or a seekable binary file object
+            with its content.
+
+    Returns:
+    -------
+        A binary file object with the KML document, the file object itself when
+        it does not contain a KMZ archive.
+
+    Raises:
+    ------
+        ValueError: If a KMZ archive does not contain a KML document.
+
+    """
+    if not zipfile.is_zipfile(source):
+        if isinstance(source, Path):
+            return source.open("rb")
+        source.seek(0)
+        return source
+    with zipfile.ZipFile(source) as kmz:
+        names = [name for name in kmz.namelist() if name.lower().endswith(".kml")]
+        if not names:
+            archive = source if isinstance(source, Path) else "The KMZ archive"
+            msg = f"{archive} does not contain a KML document"
+            raise ValueError(msg)
+        return kmz.open("doc.kml" if "doc.kml" in names else names[0])
+
+
+@dataclass(frozen=True)
+class _Level:
+    """An open element of a streamed document."""
+
+    element: Element
+    is_feature: bool
+    """Whether the element is in the place of a feature."""
+    has_features: bool
+    """Whether the children of the element are in the place of features."""
+
+    @classmethod
+    def open(cls, element: Element, levels: List["_Level"]) -> "_Level":
+        if not levels:
+            return cls(element, is_feature=True, has_features=True)
+        is_feature = levels[-1].has_features
+        name = element.tag.rpartition("}")[2]
+        return cls(element, is_feature, is_feature and name in _CONTAINERS)
+
+
+def iter_elements(stream: IO[bytes]) -> Iterator[Tuple[Element, bool]]:
+    """
+    Stream the elements of a KML document once they have been parsed.
+
+    The children of the root element and of the ``Document`` and ``Folder``
+    elements among them are in the place of a feature, the content of other
+    elements, like the ``Update`` of a ``NetworkLinkControl``, is not.
+    When the iteration resumes, the element that was yielded is removed from
+    its parent if it is in the place of a feature and not a container, so the
+    memory use does not grow with the number of features.
+
+    Args:
+    ----
+        stream: The binary file object with the KML document.
+
+    Yields:
+    ------
+        Each element with whether it is in the place of a feature.
+
+    """
+    levels: List[_Level] = []
+    for event, element in config.etree.iterparse(stream, events=("start", "end")):
+        if event == "start":
+            levels.append(_Level.open(element, levels))
+            continue
+        level = levels.pop()
+        yield element, level.is_feature
+        name = element.tag.rpartition("}")[2]
+        if level.is_feature and levels and name not in _CONTAINERS:
+            levels[-1].element.remove(element)
+
+
+def iter_features(obj: object) -> Iterator[_Feature]:
+    """Iterate depth first over a KML object and all features it contains."""
+    if isinstance(obj, _Feature):
+        yield obj
+    for feature in getattr(obj, "features", None) or ():
+        yield from iter_features(feature)
+
+
+def feature_bounds(feature: _Feature) -> Optional[Bounds]:
+    """
+    Get the bounding box of a feature.
+
+    The bounding box of a Placemark is the bounds of its geometry, the bounding
+    box of a GroundOverlay is its ``LatLonBox``.
+
+    Returns
+    -------
+        ``(west, south, east, north)`` or ``None`` when the feature has no
+        bounding box.
+
+    """
+    if isinstance(feature, Placemark) and feature.geometry:
+        return feature.geometry.bounds  # type: ignore[return-value]
+    if isinstance(feature, GroundOverlay) and feature.lat_lon_box:
+        box = feature.lat_lon_box
+        bounds = (box.west, box.south, box.east, box.north)
+        if None not in bounds:
+            return bounds  # type: ignore[return-value]
+    return None
@@ -0,0 +1,132 @@
+# Copyright (C) 2024 Christian Ledermann
+#
+# This library is free software; you can redistribute it and/or modify it under
+# the terms of the GNU Lesser General Public License as published by the Free
+# Software Foundation; either version 2.1 of the License, or (at your option)
+# any later version.
+#
+# This library is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU Lesser General Public License for more
+# details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this library; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301 USA
+"""Test the track analytics."""
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from fastkml.analytics import gap_indices  # noqa: E402
+from fastkml.analytics import haversine  # noqa: E402
+from fastkml.analytics import initial_bearing  # noqa: E402
+from fastkml.analytics import split_on_gaps  # noqa: E402
+from fastkml.analytics import stops  # noqa: E402
+from fastkml.analytics import track_arrays  # noqa: E402
+from fastkml.analytics import track_metrics  # noqa: E402
+from fastkml.analytics import vincenty  # noqa: E402
+from fastkml.gx import MultiTrack  # noqa: E402
+from fastkml.gx import Track  # noqa: E402
+from tests.base import Lxml  # noqa: E402
+from tests.base import StdLibrary  # noqa: E402
+
+TRACK = """<gx:Track xmlns:gx="http://www.google.com/kml/ext/2.2"
+  xmlns="http://www.opengis.net/kml/2.2">
+  <when>2020-01-01T00:00:00Z</when>
+  <when>2020-01-01T00:01:40Z</when>
+  <when>2020-01-01T00:06:40Z</when>
+  <when>2020-01-01T00:11:40Z</when>
+  <when>2020-01-01T00:20:00Z</when>
+  <gx:coord>0 0</gx:coord>
+  <gx:coord>0 0.01</gx:coord>
+  <gx:coord>0 0.01</gx:coord>
+  <gx:coord>0 0.01 100</gx:coord>
+  <gx:coord>0.01 0.01</gx:coord>
+</gx:Track>
+"""
+
+
+class TestStdLibrary(StdLibrary):
+    def test_haversine_and_vincenty(self) -> None:
+        lon1 = np.array([0.0, 144 + 25 / 60 + 29.5244 / 3600])
+        lat1 = np.array([0.0, -(37 + 57 / 60 + 3.7203 / 3600)])
+        lon2 = np.array([0.0, 143 + 55 / 60 + 35.3839 / 3600])
+        lat2 = np.array([1.0, -(37 + 39 / 60 + 10.1561 / 3600)])
+
+        spherical = haversine(lon1, lat1, lon2, lat2)
+        ellipsoidal = vincenty(lon1, lat1, lon2, lat2)
+
+        assert spherical[0] == pytest.approx(111_195, rel=1e-4)
+        assert ellipsoidal[0] == pytest.approx(110_574.389, rel=1e-6)
+        assert ellipsoidal[1] == pytest.approx(54_972.271, abs=1e-3)
+        assert vincenty(lon1[:1], lat1[:1], lon1[:1], lat1[:1])[0] == 0
+
+    def test_initial_bearing(self) -> None:
+        bearings = initial_bearing(
+            np.zeros(4),
+            np.zeros(4),
+            np.array([0.0, 1.0, 0.0, -1.0]),
+            np.array([1.0, 0.0, -1.0, 0.0]),
+        )
+
+        assert bearings == pytest.approx([0, 90, 180, 270])
+
+    def test_track_arrays(self) -> None:
+        track = Track.from_string(TRACK)
+
+        times, coords = track_arrays(track)
+
+        assert times.tolist()[:2] == [1_577_836_800_000_000, 1_577_836_900_000_000]
+        assert coords.shape == (5, 3)
+        assert np.isnan(coords[0, 2])
+        assert coords[3, 2] == 100
+        assert not coords.flags.writeable
+
+    def test_track_metrics(self) -> None:
+        track = Track.from_string(TRACK)
+
+        metrics = track_metrics(track)
+
+        assert metrics.durations.tolist() == [100, 300, 300, 500]
+        assert metrics.distances[0] == pytest.approx(1111.95, rel=1e-4)
+        assert metrics.distances[1] == 0
+        assert metrics.speeds[0] == pytest.approx(11.1195, rel=1e-4)
+        assert metrics.bearings[0] == 0
+        assert metrics.bearings[3] == pytest.approx(90)
+        assert metrics.length == pytest.approx(2 * 1111.95, rel=1e-3)
+        assert metrics.duration == 1200
+        assert metrics.offsets.tolist() == [0, 4]
+
+    def test_multitrack_metrics(self) -> None:
+        track = Track.from_string(TRACK)
+        multi_track = MultiTrack(tracks=[track, track])
+
+        metrics = track_metrics(multi_track, distance=vincenty)
+
+        assert metrics.offsets.tolist() == [0, 4, 8]
+        assert len(metrics.distances) == 8
+        assert metrics.distances[0] == pytest.approx(1105.75, rel=1e-4)
+
+    def test_stops(self) -> None:
+        track = Track.from_string(TRACK)
+
+        assert stops(track).tolist() == [[1, 3]]
+        assert stops(track, min_duration=601).tolist() == []
+
+    def test_split_on_gaps(self) -> None:
+        track = Track.from_string(TRACK)
+
+        assert gap_indices(track, max_time_gap=400).tolist() == [4]
+        assert gap_indices(track, max_distance_gap=1000).tolist() == [1, 4]
+
+        multi_track = split_on_gaps(track, max_time_gap=400)
+
+        assert [len(t.track_items) for t in multi_track.tracks] == [4, 1]
+        assert multi_track.tracks[0].coords == track.coords[:4]
+        assert len(split_on_gaps(MultiTrack(tracks=[track, track])).tracks) == 2
+
+
+class TestLxml(Lxml, TestStdLibrary):
+    pass
@@ -0,0 +1,178 @@
+# Copyright (C) 2024 Christian Ledermann
+#
+# This library is free software; you can redistribute it and/or modify it under
+# the terms of the GNU Lesser General Public License as published by the Free
+# Software Foundation; either version 2.1 of the License, or (at your option)
+# any later version.
+#
+# This library is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU Lesser General Public License for more
+# details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this library; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301 USA
+"""Test the persistent parse cache."""
+
+import os
+import pickle
+import zlib
+from pathlib import Path
+from typing import List
+from typing import Tuple
+
+import pygeoif.geometry as geo
+import pytest
+
+from fastkml import cache
+from fastkml import kml
+from fastkml.cache import ParseCache
+from fastkml.containers import Document
+from fastkml.features import Placemark
+from tests.base import Lxml
+from tests.base import StdLibrary
+
+
+def write(path: Path, name: str, points: int = 1) -> Path:
+    document = kml.KML(
+        features=[
+            Document(
+                name=name,
+                features=[
+                    Placemark(id=f"p{i}", geometry=geo.Point(i, i))
+                    for i in range(points)
+                ],
+            ),
+        ],
+    )
+    path.write_text(document.to_string(), encoding="utf-8")
+    return path
+
+
+def count_parses(monkeypatch: pytest.MonkeyPatch) -> List[Tuple[object, ...]]:
+    calls: List[Tuple[object, ...]] = []
+    parse = kml.KML.parse
+
+    def counting_parse(*args: object, **kwargs: object) -> kml.KML:
+        calls.append(args)
+        return parse(*args, **kwargs)  # type: ignore[arg-type]
+
+    monkeypatch.setattr(kml.KML, "parse", counting_parse)
+    return calls
+
+
+class TestStdLibrary(StdLibrary):
+    def test_parse_and_load(
+        self,
+        tmp_path: Path,
+        monkeypatch: pytest.MonkeyPatch,
+    ) -> None:
+        path = write(tmp_path / "doc.kml", "first", points=3)
+        parse_cache = ParseCache(tmp_path / "cache")
+        calls = count_parses(monkeypatch)
+
+        parsed = parse_cache.parse(path)
+        loaded = parse_cache.parse(str(path))
+
+        assert len(calls) == 1
+        assert loaded == parsed
+        assert loaded.to_string() == kml.KML.parse(path).to_string()
+        assert len(parse_cache) == 1
+        assert parse_cache.size > 0
+
+    def test_changed_content(
+        self,
+        tmp_path: Path,
+        monkeypatch: pytest.MonkeyPatch,
+    ) -> None:
+        path = write(tmp_path / "doc.kml", "first")
+        parse_cache = ParseCache(tmp_path / "cache")
+        calls = count_parses(monkeypatch)
+
+        parse_cache.parse(path)
+        write(path, "second")
+        changed = parse_cache.parse(path)
+        parse_cache.parse(path, strict=False)
+
+        assert len(calls) == 3
+        assert changed.features[0].name == "second"
+        assert len(parse_cache) == 3
+
+    def test_use_mtime(self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+        path = write(tmp_path / "doc.kml", "first")
+        parse_cache = ParseCache(tmp_path / "cache", use_mtime=True)
+        calls = count_parses(monkeypatch)
+        os.utime(path, (1, 1))
+
+        parse_cache.parse(path)
+        parse_cache.parse(path)
+        os.utime(path, (2, 2))
+        parse_cache.parse(path)
+
+        assert len(calls) == 2
+
+    def test_key(self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+        path = write(tmp_path / "doc.kml", "first")
+        parse_cache = ParseCache(tmp_path / "cache")
+        key = parse_cache.key(path)
+
+        assert parse_cache.key(write(tmp_path / "copy.kml", "first")) == key
+        assert parse_cache.key(path, strict=False) != key
+        monkeypatch.setattr(cache, "__version__", "0.0")
+        assert parse_cache.key(path) != key
+
+    def test_lru_eviction(self, tmp_path: Path) -> None:
+        paths = [write(tmp_path / f"{i}.kml", str(i), points=50) for i in range(3)]
+        parse_cache = ParseCache(tmp_path / "cache")
+        for i, path in enumerate(paths):
+            parse_cache.parse(path)
+            entry = parse_cache._entry(parse_cache.key(path))
+            os.utime(entry, (i, i))
+        entry_size = parse_cache.size // 3
+        parse_cache.parse(paths[0])
+
+        parse_cache.max_size = entry_size * 2 + entry_size // 2
+        assert parse_cache.evict() == 1
+
+        assert len(parse_cache) == 2
+        assert not parse_cache._entry(parse_cache.key(paths[1])).exists()
+
+    def test_entry_larger_than_cache(self, tmp_path: Path) -> None:
+        path = write(tmp_path / "doc.kml", "first", points=50)
+        parse_cache = ParseCache(tmp_path / "cache", max_size=10)
+
+        assert parse_cache.parse(path).features[0].name == "first"
+        assert len(parse_cache) == 0
+
+    def test_corrupt_entry(self, tmp_path: Path) -> None:
+        path = write(tmp_path / "doc.kml", "first")
+        parse_cache = ParseCache(tmp_path / "cache")
+        parse_cache._entry(parse_cache.key(path)).write_bytes(b"not a pickle")
+
+        assert parse_cache.parse(path).features[0].name == "first"
+        assert parse_cache.parse(path).features[0].name == "first"
+
+    def test_unloadable_entries_are_removed(self, tmp_path: Path) -> None:
+        path = write(tmp_path / "doc.kml", "first")
+        parse_cache = ParseCache(tmp_path / "cache")
+        entry = parse_cache._entry(parse_cache.key(path))
+
+        for data in (b"cmissing_fastkml_module\nThing\n.", pickle.dumps({})):
+            entry.write_bytes(zlib.compress(data))
+
+            assert parse_cache._load(entry) is None
+            assert not entry.exists()
+
+    def test_clear(self, tmp_path: Path) -> None:
+        parse_cache = ParseCache(tmp_path / "cache")
+        parse_cache.parse(write(tmp_path / "doc.kml", "first"))
+
+        parse_cache.clear()
+
+        assert len(parse_cache) == 0
+        assert repr(parse_cache).startswith("fastkml.cache.ParseCache(directory=")
+
+
+class TestLxml(Lxml, TestStdLibrary):
+    pass
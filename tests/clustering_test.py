@@ -0,0 +1,108 @@
+# Copyright (C) 2024 Christian Ledermann
+#
+# This library is free software; you can redistribute it and/or modify it under
+# the terms of the GNU Lesser General Public License as published by the Free
+# Software Foundation; either version 2.1 of the License, or (at your option)
+# any later version.
+#
+# This library is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU Lesser General Public License for more
+# details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this library; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301 USA
+"""Test the point clustering."""
+
+from typing import List
+
+import pygeoif.geometry as geo
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from fastkml.clustering import cluster_placemarks  # noqa: E402
+from fastkml.clustering import grid_clusters  # noqa: E402
+from fastkml.clustering import point_coordinates  # noqa: E402
+from fastkml.containers import Document  # noqa: E402
+from fastkml.containers import Folder  # noqa: E402
+from fastkml.features import Placemark  # noqa: E402
+from tests.base import Lxml  # noqa: E402
+from tests.base import StdLibrary  # noqa: E402
+
+POINTS = [(1, 1), (2, 3), (-1, 1), (12, 1), (12.5, 1.5), (1, -80)]
+
+
+def placemarks() -> List[Placemark]:
+    return [Placemark(id=f"p{i}", geometry=geo.Point(*p)) for i, p in enumerate(POINTS)]
+
+
+class TestStdLibrary(StdLibrary):
+    def test_point_coordinates(self) -> None:
+        assert point_coordinates(placemarks()).tolist() == [
+            [float(c) for c in p] for p in POINTS
+        ]
+
+        with pytest.raises(ValueError, match="Only point Placemarks"):
+            point_coordinates([Placemark(geometry=geo.LineString([(0, 0), (1, 1)]))])
+
+    def test_grid_clusters(self) -> None:
+        clusters = grid_clusters(np.array(POINTS, dtype=float), 10)
+
+        assert len(clusters) == 4
+        assert clusters.counts.tolist() == [1, 1, 2, 2]
+        assert clusters.labels.tolist() == [2, 2, 0, 3, 3, 1]
+        assert clusters.cells.tolist() == [[17, 9], [18, 1], [18, 9], [19, 9]]
+        assert clusters.centroids[2].tolist() == [1.5, 2]
+        assert clusters.extents[3].tolist() == [12, 1, 12.5, 1.5]
+        assert clusters.cell_bounds()[0].tolist() == [-10, 0, 0, 10]
+
+    def test_grid_clusters_empty(self) -> None:
+        clusters = grid_clusters(np.empty((0, 2)), 1)
+
+        assert len(clusters) == 0
+        assert clusters.cell_bounds().shape == (0, 4)
+
+    def test_cluster_placemarks(self) -> None:
+        features = placemarks()
+
+        document = cluster_placemarks(features, levels=2, cell_size=20)
+
+        assert isinstance(document, Document)
+        level0, level1, points = document.features
+        assert isinstance(level0, Folder)
+        assert isinstance(level1, Folder)
+        assert isinstance(points, Folder)
+        assert [p.name for p in level0.features] == ["1", "1", "4"]
+        assert [p.name for p in level1.features] == ["1", "1", "2", "2"]
+        cluster = level1.features[3]
+        assert isinstance(cluster, Placemark)
+        assert cluster.geometry == geo.Point(12.25, 1.25)
+        assert cluster.extended_data.elements[0].value == "2"
+        assert cluster.region.lod.min_lod_pixels == 128
+        assert cluster.region.lod.max_lod_pixels == 256
+        assert cluster.region.lat_lon_alt_box.west == 10
+        assert level0.features[0].region.lod.min_lod_pixels == 0
+        folders = [f for f in points.features if isinstance(f, Folder)]
+        assert folders == points.features
+        assert [[p.id for p in f.features] for f in folders] == [
+            ["p2"],
+            ["p5"],
+            ["p0", "p1"],
+            ["p3", "p4"],
+        ]
+        assert points.features[0].region.lod.min_lod_pixels == 256
+        assert features[0].region is None
+        assert "cluster-1-3" in document.to_string()
+
+    def test_cluster_placemarks_without_levels(self) -> None:
+        document = cluster_placemarks(placemarks(), levels=0)
+
+        points = document.features[0]
+        assert isinstance(points, Folder)
+        assert len(points.features) == len(POINTS)
+
+
+class TestLxml(Lxml, TestStdLibrary):
+    pass
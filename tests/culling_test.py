@@ -0,0 +1,226 @@
+# Copyright (C) 2024 Christian Ledermann
+#
+# This library is free software; you can redistribute it and/or modify it under
+# the terms of the GNU Lesser General Public License as published by the Free
+# Software Foundation; either version 2.1 of the License, or (at your option)
+# any later version.
+#
+# This library is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU Lesser General Public License for more
+# details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this library; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301 USA
+"""Test the Region culling."""
+
+import math
+from typing import List
+from typing import Optional
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from fastkml import kml  # noqa: E402
+from fastkml.containers import Document  # noqa: E402
+from fastkml.containers import Folder  # noqa: E402
+from fastkml.culling import METERS_PER_DEGREE  # noqa: E402
+from fastkml.culling import RegionIndex  # noqa: E402
+from fastkml.culling import Viewport  # noqa: E402
+from fastkml.enums import AltitudeMode  # noqa: E402
+from fastkml.features import Placemark  # noqa: E402
+from fastkml.features import _Feature  # noqa: E402
+from fastkml.views import Camera  # noqa: E402
+from fastkml.views import LatLonAltBox  # noqa: E402
+from fastkml.views import Lod  # noqa: E402
+from fastkml.views import LookAt  # noqa: E402
+from fastkml.views import Region  # noqa: E402
+from tests.base import Lxml  # noqa: E402
+from tests.base import StdLibrary  # noqa: E402
+
+
+def region(
+    west: float,
+    south: float,
+    east: float,
+    north: float,
+    *,
+    min_lod_pixels: int = 128,
+    max_lod_pixels: int = -1,
+) -> Region:
+    return Region(
+        lat_lon_alt_box=LatLonAltBox(north=north, south=south, east=east, west=west),
+        lod=Lod(min_lod_pixels=min_lod_pixels, max_lod_pixels=max_lod_pixels),
+    )
+
+
+def document() -> kml.KML:
+    return kml.KML(
+        features=[
+            Document(
+                id="doc",
+                features=[
+                    Folder(
+                        id="a",
+                        region=region(0, 0, 10, 10, max_lod_pixels=2000),
+                        features=[
+                            Placemark(id="b", region=region(0, 0, 1, 1)),
+                            Placemark(id="no region"),
+                        ],
+                    ),
+                    Placemark(id="c", region=region(100, 0, 110, 10)),
+                    Placemark(id="dateline", region=region(179, -1, -179, 1)),
+                    Placemark(id="incomplete", region=Region(lod=Lod())),
+                ],
+            ),
+        ],
+    )
+
+
+def ids(features: List[_Feature]) -> List[Optional[str]]:
+    return [f.id for f in features]
+
+
+class TestStdLibrary(StdLibrary):
+    def test_from_kml(self) -> None:
+        index = RegionIndex.from_kml(document())
+
+        assert len(index) == 4
+        assert ids(index.features) == ["a", "b", "c", "dateline"]
+        assert repr(index) == "fastkml.culling.RegionIndex(<4>)"
+
+    def test_bbox_viewport(self) -> None:
+        index = RegionIndex.from_kml(document())
+
+        overview = Viewport(bbox=(0, 0, 10, 10), width=1000, height=1000)
+        zoomed = Viewport(bbox=(0, 0, 5, 5), width=1000, height=1000)
+        closer = Viewport(bbox=(0, 0, 2, 2), width=1000, height=1000)
+
+        assert index.pixel_sizes(overview)[:2].tolist() == [1000, 100]
+        assert ids(index.active(overview)) == ["a"]
+        assert ids(index.active(zoomed)) == ["a", "b"]
+        assert index.active(closer) == []
+
+    def test_antimeridian(self) -> None:
+        index = RegionIndex.from_kml(document())
+
+        east = Viewport(bbox=(-180, -1, -178, 1), width=500, height=500)
+        across = Viewport(bbox=(178, -2, -178, 2), width=500, height=500)
+
+        assert ids(index.active(east)) == ["dateline"]
+        assert ids(index.active(across)) == ["dateline"]
+        assert index.pixel_sizes(across)[3] == pytest.approx(250)
+
+    def test_camera(self) -> None:
+        index = RegionIndex.from_kml(document())
+        camera = Camera(longitude=0.5, latitude=0.5, altitude=100_000)
+
+        viewport = Viewport.from_view(camera, width=1000, height=500)
+
+        assert viewport.eye == (0.5, 0.5, 100_000.0)
+        west, south, east, north = viewport.bbox
+        assert west < 0
+        assert east > 1
+        assert south < 0
+        assert north > 1
+        expected = (
+            METERS_PER_DEGREE
+            * math.sqrt(math.cos(math.radians(0.5)))
+            * 1000
+            / (2 * 100_000 * math.tan(math.radians(30)))
+        )
+        assert index.pixel_sizes(viewport)[1] == pytest.approx(expected)
+        assert index.active(viewport) == []
+        camera.altitude = 1_000_000
+        assert ids(index.active(Viewport.from_view(camera, 1000, 500))) == ["a"]
+
+    def test_look_at(self) -> None:
+        look_at = LookAt(
+            longitude=5,
+            latitude=5,
+            altitude=0,
+            heading=0,
+            tilt=60,
+            range=1_000_000,
+        )
+
+        viewport = Viewport.from_view(look_at, width=800, height=600, fov=45)
+
+        assert viewport.eye is not None
+        eye_longitude, eye_latitude, eye_altitude = viewport.eye
+        assert eye_longitude == pytest.approx(5)
+        assert eye_latitude == pytest.approx(
+            5 - 1_000_000 * math.sin(math.radians(60)) / METERS_PER_DEGREE,
+        )
+        assert eye_altitude == pytest.approx(500_000)
+        west, south, east, north = viewport.bbox
+        assert west < 5 < east
+        assert south < eye_latitude < 5 < north
+
+    def test_altitude(self) -> None:
+        box = LatLonAltBox(
+            north=1,
+            south=0,
+            east=1,
+            west=0,
+            min_altitude=90_000,
+            max_altitude=100_000,
+            altitude_mode=AltitudeMode.absolute,
+        )
+        index = RegionIndex.from_kml(Placemark(region=Region(lat_lon_alt_box=box)))
+        viewport = Viewport(
+            bbox=(0, 0, 1, 1),
+            width=1000,
+            height=1000,
+            eye=(0.5, 0.5, 100_000),
+        )
+
+        assert index.pixel_sizes(viewport)[0] == pytest.approx(
+            METERS_PER_DEGREE
+            * math.sqrt(math.cos(math.radians(0.5)))
+            * 1000
+            / (2 * math.tan(math.radians(30))),
+        )
+
+    def test_index_matches_brute_force(self) -> None:
+        rng = np.random.default_rng(42)
+        west = rng.uniform(-180, 170, 2000)
+        south = rng.uniform(-90, 80, 2000)
+        size = rng.uniform(0.01, 10, 2000)
+        placemarks = [
+            Placemark(
+                id=str(i),
+                region=region(w, s, w + d, min(s + d, 90), min_lod_pixels=64),
+            )
+            for i, (w, s, d) in enumerate(zip(west, south, size))
+        ]
+        index = RegionIndex.from_kml(Document(features=placemarks))
+        viewport = Viewport(bbox=(-20, -10, 30, 40), width=1000, height=1000)
+
+        active = index.active_mask(viewport)
+
+        boxes = np.column_stack(
+            [west, south, west + size, np.minimum(south + size, 90)],
+        )
+        visible = (
+            (boxes[:, 0] <= 30)
+            & (boxes[:, 2] >= -20)
+            & (boxes[:, 1] <= 40)
+            & (boxes[:, 3] >= -10)
+        )
+        assert (active == (visible & (index.pixel_sizes(viewport) >= 64))).all()
+        assert active.any()
+
+    def test_empty(self) -> None:
+        index = RegionIndex.from_kml(Document())
+
+        assert index.active(Viewport(bbox=(0, 0, 1, 1), width=1, height=1)) == []
+        assert (
+            len(index.pixel_sizes(Viewport(bbox=(0, 0, 1, 1), width=1, height=1))) == 0
+        )
+
+
+class TestLxml(Lxml, TestStdLibrary):
+    pass
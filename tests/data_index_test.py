@@ -0,0 +1,190 @@
+# Copyright (C) 2024 Christian Ledermann
+#
+# This library is free software; you can redistribute it and/or modify it under
+# the terms of the GNU Lesser General Public License as published by the Free
+# Software Foundation; either version 2.1 of the License, or (at your option)
+# any later version.
+#
+# This library is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU Lesser General Public License for more
+# details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this library; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301 USA
+"""Test the ExtendedData indexes."""
+
+from typing import Dict
+from typing import Iterable
+from typing import List
+from typing import Optional
+
+import pytest
+
+from fastkml import kml
+from fastkml.containers import Document
+from fastkml.containers import Folder
+from fastkml.data import Data
+from fastkml.data import ExtendedData
+from fastkml.data import Schema
+from fastkml.data import SchemaData
+from fastkml.data import SimpleData
+from fastkml.data import SimpleField
+from fastkml.data_index import DataIndex
+from fastkml.enums import DataType
+from fastkml.features import Placemark
+from fastkml.features import _Feature
+from tests.base import Lxml
+from tests.base import StdLibrary
+
+SCHEMA = Schema(
+    id="cities",
+    fields=[
+        SimpleField(name="population", type_=DataType.int_),
+        SimpleField(name="status", type_=DataType.string),
+    ],
+)
+
+
+def city(name: str, **data: str) -> Placemark:
+    return Placemark(
+        name=name,
+        extended_data=ExtendedData(
+            elements=[
+                SchemaData(
+                    schema_url="#cities",
+                    data=[SimpleData(name=k, value=v) for k, v in data.items()],
+                ),
+            ],
+        ),
+    )
+
+
+def names(features: Iterable[_Feature]) -> List[Optional[str]]:
+    return [feature.name for feature in features]
+
+
+class TestStdLibrary(StdLibrary):
+    def document(self) -> Document:
+        return Document(
+            schemata=[SCHEMA],
+            features=[
+                city("Paris", population="2100000", status="active"),
+                Folder(
+                    features=[
+                        city("Lyon", population="513000", status="inactive"),
+                        city("Nice", population="340000", status="active"),
+                        city("Nowhere", population="many"),
+                    ],
+                ),
+                city("Marseille", population="870000", status="active"),
+            ],
+        )
+
+    def test_equal(self) -> None:
+        index = DataIndex.from_kml(
+            kml.KML(features=[self.document()]),
+            hashed=["status", "population"],
+        )
+
+        assert len(index) == 4
+        assert names(index.equal("status", "active")) == ["Paris", "Nice", "Marseille"]
+        assert names(index.equal("population", "513000")) == ["Lyon"]
+        assert names(index.equal("population", 340000)) == ["Nice"]
+        assert index.equal("population", "many") == []
+        assert index.equal("status", "unknown") == []
+
+    def test_range(self) -> None:
+        index = DataIndex.from_kml(self.document(), ordered=["population"])
+
+        assert names(index.range("population", minimum=1e6)) == ["Paris"]
+        assert names(index.range("population", 340000, "870000")) == [
+            "Lyon",
+            "Nice",
+            "Marseille",
+        ]
+        assert names(
+            index.range(
+                "population",
+                340000,
+                870000,
+                include_minimum=False,
+                include_maximum=False,
+            ),
+        ) == ["Lyon"]
+        assert names(index.range("population", maximum=513000)) == ["Lyon", "Nice"]
+        assert len(index.range("population")) == 4
+
+    def test_append_maintains_the_index(self) -> None:
+        document = self.document()
+        index = DataIndex.from_kml(
+            document,
+            hashed=["status"],
+            ordered=["population"],
+        )
+
+        assert names(index.range("population", 200000, 520000)) == ["Lyon", "Nice"]
+        index.append(document, city("Toulouse", population="500000", status="active"))
+        folder = document.features[1]
+        assert isinstance(folder, Folder)
+        index.append(folder, city("Lille", population="235000"))
+
+        assert names(folder.features)[-1] == "Lille"
+        assert names(index.equal("status", "active")) == [
+            "Paris",
+            "Nice",
+            "Marseille",
+            "Toulouse",
+        ]
+        assert names(index.range("population", 200000, 520000)) == [
+            "Lyon",
+            "Nice",
+            "Toulouse",
+            "Lille",
+        ]
+        index.add(document)
+        assert len(index) == 6
+
+    def test_untyped_data_and_explicit_types(self) -> None:
+        placemarks = [
+            Placemark(
+                name=str(rank),
+                extended_data=ExtendedData(
+                    elements=[
+                        Data(name="rank", value=str(rank)),
+                        Data(name="rank", value=str(rank)),
+                    ],
+                ),
+            )
+            for rank in (10, 9, 100)
+        ]
+        types: Dict[str, type] = {"rank": int}
+
+        untyped = DataIndex.from_kml(placemarks[0], ordered=["rank"])
+        for placemark in placemarks[1:]:
+            untyped.add(placemark)
+        typed = DataIndex(hashed=["rank"], ordered=["rank"], types=types)
+        for placemark in placemarks:
+            typed.add(placemark)
+
+        assert names(untyped.range("rank", maximum="5")) == ["10", "100"]
+        assert names(typed.range("rank", maximum="50")) == ["10", "9"]
+        assert names(typed.equal("rank", "9")) == ["9"]
+
+    def test_missing_index(self) -> None:
+        index = DataIndex.from_kml(self.document(), hashed=["status"])
+
+        with pytest.raises(KeyError):
+            index.range("status", "a", "b")
+        with pytest.raises(KeyError):
+            index.equal("population", 1)
+
+    def test_repr(self) -> None:
+        index = DataIndex.from_kml(self.document(), hashed=["status"])
+
+        assert repr(index) == "fastkml.data_index.DataIndex(<4>)"
+
+
+class TestLxml(Lxml, TestStdLibrary):
+    pass
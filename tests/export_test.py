@@ -0,0 +1,323 @@
+# Copyright (C) 2024 Christian Ledermann
+#
+# This library is free software; you can redistribute it and/or modify it under
+# the terms of the GNU Lesser General Public License as published by the Free
+# Software Foundation; either version 2.1 of the License, or (at your option)
+# any later version.
+#
+# This library is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU Lesser General Public License for more
+# details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this library; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301 USA
+"""Test the streaming export."""
+
+import csv
+import io
+import json
+import re
+import zipfile
+from pathlib import Path
+from typing import TYPE_CHECKING
+from typing import cast
+
+import pygeoif.geometry as geo
+from pygeoif.factories import shape
+
+from fastkml import kml
+from fastkml.containers import Document
+from fastkml.containers import Folder
+from fastkml.data import Data
+from fastkml.data import ExtendedData
+from fastkml.data import Schema
+from fastkml.data import SchemaData
+from fastkml.data import SimpleData
+from fastkml.data import SimpleField
+from fastkml.enums import DataType
+from fastkml.export import PROPERTIES
+from fastkml.export import Record
+from fastkml.export import iter_records
+from fastkml.export import write_csv
+from fastkml.export import write_geojson_seq
+from fastkml.features import Placemark
+from fastkml.times import KmlDateTime
+from fastkml.times import TimeSpan
+from fastkml.times import TimeStamp
+from tests.base import Lxml
+from tests.base import StdLibrary
+
+if TYPE_CHECKING:
+    from pygeoif.types import GeoType
+
+
+def document() -> kml.KML:
+    return kml.KML(
+        features=[
+            Document(
+                schemata=[
+                    Schema(
+                        id="schema",
+                        fields=[
+                            SimpleField(name="count", type_=DataType.int_),
+                            SimpleField(name="ok", type_=DataType.bool_),
+                        ],
+                    ),
+                ],
+                features=[
+                    Folder(
+                        features=[
+                            Placemark(
+                                id="a",
+                                name="Zürich",
+                                description="<b>city</b>",
+                                geometry=geo.Point(8.5, 47.3),
+                                times=TimeStamp(
+                                    timestamp=KmlDateTime.parse("2020-01"),
+                                ),
+                                extended_data=ExtendedData(
+                                    elements=[
+                                        Data(name="kind", value="city"),
+                                        SchemaData(
+                                            schema_url="#schema",
+                                            data=[
+                                                SimpleData(name="count", value="3"),
+                                                SimpleData(name="ok", value="1"),
+                                            ],
+                                        ),
+                                    ],
+                                ),
+                            ),
+                        ],
+                    ),
+                    Placemark(
+                        geometry=geo.LineString([(0, 0), (1, 1)]),
+                        times=TimeSpan(begin=KmlDateTime.parse("2020-01-01")),
+                        extended_data=ExtendedData(
+                            elements=[Data(name="other", value="x")],
+                        ),
+                    ),
+                    Placemark(id="empty"),
+                ],
+            ),
+        ],
+    )
+
+
+def raw() -> str:
+    """Serialize the document with the schema before the features."""
+    text = document().to_string()
+    schema = re.search("<(kml:)?Schema .*</(kml:)?Schema>", text, re.DOTALL)
+    assert schema
+    text = text.replace(schema.group(0), "")
+    return re.sub(
+        "(<(kml:)?Document>)",
+        lambda match: match.group(0) + schema.group(0),
+        text,
+        count=1,
+    )
+
+
+def source() -> io.BytesIO:
+    return io.BytesIO(raw().encode("utf-8"))
+
+
+class TestStdLibrary(StdLibrary):
+    def test_iter_records(self) -> None:
+        records = list(iter_records(source()))
+
+        assert records[0] == Record(
+            id="a",
+            geometry={"type": "Point", "coordinates": (8.5, 47.3)},
+            properties={
+                "name": "Zürich",
+                "description": "<b>city</b>",
+                "when": "2020-01",
+                "begin": None,
+                "end": None,
+                "kind": "city",
+                "count": 3,
+                "ok": True,
+            },
+        )
+        assert records[1].properties["begin"] == "2020-01-01"
+        assert records[1].properties["other"] == "x"
+        assert records[2].geometry is None
+        assert list(records[2].properties) == list(PROPERTIES)
+
+    def test_geo_interface(self) -> None:
+        records = list(iter_records(source()))
+
+        assert records[1].__geo_interface__ == {
+            "type": "Feature",
+            "geometry": {"type": "LineString", "coordinates": [(0, 0), (1, 1)]},
+            "properties": {
+                "name": None,
+                "description": None,
+                "when": None,
+                "begin": "2020-01-01",
+                "end": None,
+                "other": "x",
+            },
+        }
+        assert records[2].__geo_interface__["id"] == "empty"
+        assert records[2].__geo_interface__["geometry"] is None
+
+    def test_write_geojson_seq(self) -> None:
+        target = io.StringIO()
+
+        assert write_geojson_seq(source(), target) == 3
+
+        lines = target.getvalue().splitlines()
+        assert len(lines) == 3
+        feature = json.loads(lines[0])
+        assert feature["id"] == "a"
+        assert feature["geometry"]["coordinates"] == [8.5, 47.3]
+        assert feature["properties"]["name"] == "Zürich"
+        assert feature["properties"]["count"] == 3
+
+    def test_write_geojson_text_sequence(self) -> None:
+        target = io.StringIO()
+
+        write_geojson_seq(source(), target, record_separator=True)
+
+        assert target.getvalue().count("\x1e{") == 3
+
+    def test_write_csv(self) -> None:
+        target = io.StringIO(newline="")
+
+        assert write_csv(source(), target) == 3
+
+        rows = list(csv.reader(io.StringIO(target.getvalue())))
+        assert rows[0] == ["id", *PROPERTIES, "count", "ok", "kind", "wkt"]
+        assert rows[1] == [
+            "a",
+            "Zürich",
+            "<b>city</b>",
+            "2020-01",
+            "",
+            "",
+            "3",
+            "True",
+            "city",
+            "POINT (8.5 47.3)",
+        ]
+        assert rows[2][-1] == "LINESTRING (0.0 0.0, 1.0 1.0)"
+        assert rows[3] == ["empty", "", "", "", "", "", "", "", "", ""]
+
+    def test_write_csv_columns(self) -> None:
+        target = io.StringIO(newline="")
+
+        write_csv(source(), target, columns=["other"])
+
+        rows = list(csv.reader(io.StringIO(target.getvalue())))
+        assert rows[0] == ["id", *PROPERTIES, "other", "wkt"]
+        assert [row[-2] for row in rows[1:]] == ["", "x", ""]
+
+    def test_write_csv_empty(self) -> None:
+        target = io.StringIO()
+
+        assert write_csv(io.BytesIO(b"<kml/>"), target) == 0
+        assert target.getvalue() == "id,name,description,when,begin,end,wkt\r\n"
+
+    def test_geometries(self) -> None:
+        polygon = geo.Polygon(
+            [(0, 0), (0, 2), (2, 2), (0, 0)],
+            [[(0.5, 0.5), (1, 1), (1, 0.5), (0.5, 0.5)]],
+        )
+        geometries = [
+            geo.Point(1, 2, 3),
+            geo.LinearRing([(0, 0), (1, 1), (1, 0), (0, 0)]),
+            polygon,
+            geo.MultiPoint([(0, 0), (1, 1)]),
+            geo.MultiLineString([[(0, 0), (1, 1)], [(2, 2), (3, 3)]]),
+            geo.MultiPolygon.from_polygons(polygon, polygon),
+            geo.GeometryCollection([geo.Point(0, 0), geo.LineString([(0, 0), (1, 1)])]),
+        ]
+        text = kml.KML(
+            features=[
+                Document(
+                    features=[
+                        Placemark(id=f"p{i}", geometry=geometry)
+                        for i, geometry in enumerate(geometries)
+                    ],
+                ),
+            ],
+        ).to_string()
+
+        records = list(iter_records(io.BytesIO(text.encode("utf-8"))))
+
+        assert [record.wkt for record in records] == [
+            "POINT (1.0 2.0 3.0)",
+            "LINESTRING (0.0 0.0, 1.0 1.0, 1.0 0.0, 0.0 0.0)",
+            (
+                "POLYGON ((0.0 0.0, 0.0 2.0, 2.0 2.0, 0.0 0.0), "
+                "(0.5 0.5, 1.0 1.0, 1.0 0.5, 0.5 0.5))"
+            ),
+            "MULTIPOINT (0.0 0.0, 1.0 1.0)",
+            "MULTILINESTRING ((0.0 0.0, 1.0 1.0), (2.0 2.0, 3.0 3.0))",
+            (
+                "MULTIPOLYGON (((0.0 0.0, 0.0 2.0, 2.0 2.0, 0.0 0.0), "
+                "(0.5 0.5, 1.0 1.0, 1.0 0.5, 0.5 0.5)), "
+                "((0.0 0.0, 0.0 2.0, 2.0 2.0, 0.0 0.0), "
+                "(0.5 0.5, 1.0 1.0, 1.0 0.5, 0.5 0.5)))"
+            ),
+            "GEOMETRYCOLLECTION (POINT (0.0 0.0), LINESTRING (0.0 0.0, 1.0 1.0))",
+        ]
+        for record, geometry in zip(records[2:], geometries[2:]):
+            assert shape(cast("GeoType", record.geometry)) == geometry
+
+    def test_schema_after_placemarks(self) -> None:
+        text = document().to_string().encode("utf-8")
+
+        records = list(iter_records(io.BytesIO(text)))
+
+        assert records[0].properties["count"] == "3"
+
+    def test_data_named_as_properties(self) -> None:
+        placemark = Placemark(
+            name="Zürich",
+            extended_data=ExtendedData(
+                elements=[
+                    Data(name="name", value="other"),
+                    Data(name="when", value="now"),
+                ],
+            ),
+        )
+        text = kml.KML(features=[placemark]).to_string().encode("utf-8")
+        target = io.StringIO()
+
+        records = list(iter_records(io.BytesIO(text)))
+        write_csv(io.BytesIO(text), target)
+
+        assert records[0].properties["name"] == "Zürich"
+        assert records[0].properties["when"] is None
+        assert records[0].properties["data_name"] == "other"
+        assert records[0].properties["data_when"] == "now"
+        header = next(csv.reader(io.StringIO(target.getvalue())))
+        assert header[-3:] == ["data_name", "data_when", "wkt"]
+
+    def test_network_link_control(self) -> None:
+        text = raw().replace(
+            "</kml>",
+            "<NetworkLinkControl><Update><Create><Document>"
+            "<Placemark id='update'><name>update</name></Placemark>"
+            "</Document></Create></Update></NetworkLinkControl></kml>",
+        )
+
+        records = list(iter_records(io.BytesIO(text.encode("utf-8"))))
+
+        assert [record.id for record in records] == ["a", "", "empty"]
+
+    def test_kmz(self, tmp_path: Path) -> None:
+        path = tmp_path / "doc.kmz"
+        with zipfile.ZipFile(path, "w") as kmz:
+            kmz.writestr("doc.kml", raw())
+
+        assert [record.id for record in iter_records(path)] == ["a", "", "empty"]
+
+
+class TestLxml(Lxml, TestStdLibrary):
+    pass
@@ -23,6 +23,10 @@ import pytest
 from dateutil.tz import tzoffset
 from dateutil.tz import tzutc
 
+from fastkml import gx
+from fastkml.data import Data
+from fastkml.data import ExtendedData
+from fastkml.enums import AltitudeMode
 from fastkml.gx import Angle
 from fastkml.gx import MultiTrack
 from fastkml.gx import Track
@@ -196,6 +200,21 @@ class TestTrack(StdLibrary):
         assert ">1 2</" in track.to_string()
         assert track.coords == ((1, 2),)
 
+    def test_track_keeps_int_and_float_values(self) -> None:
+        whens = [
+            KmlDateTime(
+                datetime.datetime(2023, 1, 1, 0, 0, 0, tzinfo=datetime.timezone.utc),
+            ),
+        ]
+
+        track = Track(whens=whens, coords=[(1, 2.5, 3)], angles=[(90, 0.5)])
+
+        assert ">1 2.5 3</" in track.to_string()
+        assert ">90 0.5 0.0</" in track.to_string()
+        assert type(track.coords[0][0]) is int
+        assert Track.from_string(track.to_string()).coords == ((1.0, 2.5, 3.0),)
+        assert ">1.0 2.5 3.0</" in Track.from_string(track.to_string()).to_string()
+
     def test_track_from_whens_and_coords_and_track_items(self) -> None:
         whens = [
             KmlDateTime(
@@ -393,6 +412,197 @@ class TestTrack(StdLibrary):
 
         assert track.track_items == []
 
+    def test_track_columns(self) -> None:
+        doc = """
+            <gx:Track xmlns:gx="http://www.google.com/kml/ext/2.2"
+              xmlns:kml="http://www.opengis.net/kml/2.2">
+            <kml:when>1970-01-01T00:00:01Z</kml:when>
+            <kml:when>1970-01-01T01:00:02+01:00</kml:when>
+            <kml:when>1970-01-02</kml:when>
+            <gx:coord>1 2</gx:coord>
+            <gx:coord>3 4 5</gx:coord>
+            <gx:coord>6 7</gx:coord>
+            <gx:angles>10 20 30</gx:angles>
+            </gx:Track>
+        """
+
+        track = Track.from_string(doc)
+
+        assert list(track.epoch_micros) == [1_000_000, 2_000_000, 86_400_000_000]
+        assert track.coord_array.tolist()[3:6] == [3.0, 4.0, 5.0]
+        assert track.coord_array.readonly
+        assert track.angle_array.tolist() == [10, 20, 30, 0, 0, 0, 0, 0, 0]
+        assert list(track.coords) == [(1, 2), (3, 4, 5), (6, 7)]
+        assert track.whens[1].dt == datetime.datetime(
+            1970,
+            1,
+            1,
+            1,
+            0,
+            2,
+            tzinfo=datetime.timezone(datetime.timedelta(hours=1)),
+        )
+        assert track.whens[2] == KmlDateTime(datetime.date(1970, 1, 2))
+
+    def test_track_items_view(self) -> None:
+        time1 = KmlDateTime(
+            datetime.datetime(2023, 1, 1, 0, 0, 0, tzinfo=datetime.timezone.utc),
+        )
+        time2 = KmlDateTime(
+            datetime.datetime(2023, 1, 1, 0, 0, 1, tzinfo=datetime.timezone.utc),
+        )
+        items = [
+            TrackItem(when=time1, coord=geo.Point(1, 2), angle=Angle(1, 2, 3)),
+            TrackItem(when=time2, coord=geo.Point(3, 4, 5)),
+        ]
+
+        track = Track(track_items=items)
+
+        assert len(track.track_items) == 2
+        assert track.track_items == items
+        assert track.track_items[-1] == items[1]
+        assert track.track_items[:1] == items[:1]
+        assert list(track.angles) == [(1, 2, 3)]
+        with pytest.raises(IndexError):
+            track.track_items[2]
+
+    def test_track_append(self) -> None:
+        time1 = KmlDateTime(
+            datetime.datetime(2023, 1, 1, 0, 0, 0, tzinfo=datetime.timezone.utc),
+        )
+        track = Track()
+
+        track.append(TrackItem(when=time1, coord=geo.Point(1, 2)))
+
+        assert track
+        assert track.track_items == [TrackItem(when=time1, coord=geo.Point(1, 2))]
+        assert track != Track(whens=[time1], coords=[(1, 2)])
+        assert Track(whens=[time1], coords=[(1, 2)]).track_items[0].angle == Angle()
+
+    def test_track_truncates_mismatched_columns(
+        self,
+        caplog: pytest.LogCaptureFixture,
+    ) -> None:
+        time1 = KmlDateTime(
+            datetime.datetime(2023, 1, 1, 0, 0, 0, tzinfo=datetime.timezone.utc),
+        )
+
+        track = Track(whens=[time1], coords=[(1, 2), (3, 4)])
+
+        assert list(track.coords) == [(1, 2)]
+        assert "1 whens but 2 coords" in caplog.text
+
+    def test_track_position_at(self) -> None:
+        utc = datetime.timezone.utc
+        track = Track(
+            whens=[
+                KmlDateTime(datetime.datetime(2020, 1, 1, 0, 0, 10, tzinfo=utc)),
+                KmlDateTime(datetime.datetime(2020, 1, 1, 0, 0, 0, tzinfo=utc)),
+                KmlDateTime(datetime.datetime(2020, 1, 1, 0, 0, 20, tzinfo=utc)),
+            ],
+            coords=[(10, 10, 100), (0, 0, 0), (20, 30)],
+            angles=[(10, 0, 0), (350, 10, 20)],
+        )
+
+        before, start, quarter, later, after = track.position_at(
+            [
+                datetime.datetime(2019, 12, 31, tzinfo=utc),
+                datetime.datetime(2020, 1, 1, tzinfo=utc),
+                datetime.datetime(2020, 1, 1, 0, 0, 2, 500_000, tzinfo=utc),
+                datetime.datetime(
+                    2020,
+                    1,
+                    1,
+                    1,
+                    0,
+                    15,
+                    tzinfo=datetime.timezone(
+                        datetime.timedelta(hours=1),
+                    ),
+                ),
+                datetime.datetime(2020, 1, 1, 0, 1, 0, tzinfo=utc),
+            ],
+        )
+
+        assert before is None
+        assert after is None
+        assert start == track.track_items[1]
+        assert quarter
+        assert quarter.coord == geo.Point(2.5, 2.5, 25)
+        assert quarter.angle
+        assert quarter.angle.heading == pytest.approx(355)
+        assert quarter.angle.tilt == pytest.approx(7.5)
+        assert later
+        assert later.coord == geo.Point(15, 20)
+        assert later.angle == Angle(5, 0, 0)
+
+    def test_track_slice(self) -> None:
+        utc = datetime.timezone.utc
+        whens = [
+            KmlDateTime(datetime.datetime(2020, 1, 1, 0, 0, i, tzinfo=utc))
+            for i in (3, 0, 2, 1)
+        ]
+        track = Track(
+            id="track",
+            altitude_mode=AltitudeMode.absolute,
+            whens=whens,
+            coords=[(3, 3), (0, 0), (2, 2), (1, 1)],
+        )
+
+        part = track.slice(whens[3], whens[2])
+
+        assert list(part.coords) == [(1, 1), (2, 2)]
+        assert part.whens == (whens[3], whens[2])
+        assert part.altitude_mode == AltitudeMode.absolute
+        assert part.id == ""
+        assert track.slice(end=whens[3]).coords == ((0, 0), (1, 1))
+        assert track.slice(begin=whens[0]).coords == ((3, 3),)
+        assert not track.slice(datetime.datetime(2021, 1, 1, tzinfo=utc))
+
+    def test_track_slice_copies_extended_data(self) -> None:
+        utc = datetime.timezone.utc
+        track = Track(
+            whens=[KmlDateTime(datetime.datetime(2020, 1, 1, tzinfo=utc))],
+            coords=[(1, 2)],
+            extended_data=ExtendedData(elements=[Data(name="a", value="1")]),
+        )
+
+        part = track.slice()
+
+        assert part == track
+        assert part.extended_data == track.extended_data
+        assert part.extended_data is not track.extended_data
+
+    def test_track_position_at_without_numpy(
+        self,
+        monkeypatch: pytest.MonkeyPatch,
+    ) -> None:
+        utc = datetime.timezone.utc
+        track = Track(
+            whens=[
+                KmlDateTime(datetime.datetime(2020, 1, 1, 0, 0, i, tzinfo=utc))
+                for i in (4, 0, 2)
+            ],
+            coords=[(4, 4), (0, 0), (2, 2)],
+        )
+        start = datetime.datetime(2020, 1, 1, tzinfo=utc)
+        times = [start + datetime.timedelta(seconds=i) for i in range(-1, 6)]
+        expected = track.position_at(times)
+
+        monkeypatch.setattr(gx, "_HAS_NUMPY", False)
+
+        assert track.position_at(times) == expected
+        assert [p.coord.x if p else None for p in expected] == [
+            None,
+            0,
+            1,
+            2,
+            3,
+            4,
+            None,
+        ]
+        assert list(track.slice(times[2], times[4]).coords) == [(2, 2)]
+
 
 class TestMultiTrack(StdLibrary):
     """Test gx.MultiTrack."""
@@ -521,6 +731,40 @@ class TestMultiTrack(StdLibrary):
         assert "angles>" in track.to_string()
         assert "when>" in track.to_string()
 
+    def test_multitrack_position_at_and_slice(self) -> None:
+        utc = datetime.timezone.utc
+        whens = [
+            KmlDateTime(datetime.datetime(2020, 1, 1, 0, 0, i, tzinfo=utc))
+            for i in range(6)
+        ]
+        track = MultiTrack(
+            interpolate=False,
+            tracks=[
+                Track(whens=whens[:2], coords=[(0, 0), (1, 1)]),
+                Track(whens=whens[4:], coords=[(4, 4), (5, 5)]),
+            ],
+        )
+
+        positions = track.position_at(
+            [
+                datetime.datetime(2020, 1, 1, 0, 0, 0, 500_000, tzinfo=utc),
+                whens[3],
+                datetime.datetime(2020, 1, 1, 0, 0, 4, 500_000, tzinfo=utc),
+            ],
+        )
+        part = track.slice(whens[1], whens[4])
+
+        assert [p.coord if p else None for p in positions] == [
+            geo.Point(0.5, 0.5),
+            None,
+            geo.Point(4.5, 4.5),
+        ]
+        assert [t.coords for t in part.tracks] == [((1, 1),), ((4, 4),)]
+        assert part.interpolate is False
+        assert part.name_spaces == track.name_spaces
+        assert part.name_spaces is not track.name_spaces
+        assert not track.slice(end=whens[0].dt - datetime.timedelta(seconds=1))
+
 
 class TestLxml(Lxml, TestStdLibrary):
     """Test with lxml."""
@@ -0,0 +1,175 @@
+# Copyright (C) 2024 Christian Ledermann
+#
+# This library is free software; you can redistribute it and/or modify it under
+# the terms of the GNU Lesser General Public License as published by the Free
+# Software Foundation; either version 2.1 of the License, or (at your option)
+# any later version.
+#
+# This library is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU Lesser General Public License for more
+# details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this library; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301 USA
+"""Test the feature offset index."""
+
+import os
+from pathlib import Path
+
+import pygeoif.geometry as geo
+import pytest
+
+from fastkml import atom
+from fastkml import kml
+from fastkml.containers import Document
+from fastkml.containers import Folder
+from fastkml.features import Placemark
+from fastkml.offset_index import OffsetIndex
+from fastkml.overlays import GroundOverlay
+from fastkml.overlays import LatLonBox
+from fastkml.utils import iter_features
+from tests.base import Lxml
+from tests.base import StdLibrary
+
+RAW = """<?xml version="1.0" encoding="ISO-8859-1"?>
+<kml xmlns="http://www.opengis.net/kml/2.2" xmlns:gx="http://www.google.com/kml/ext/2.2">
+<Document><name>Zürich</name>
+  <Placemark/>
+  <Placemark id="track"><name>Straße</name>
+    <gx:Track><when>2020-01-01</when><gx:coord>8.5 47.3 0</gx:coord></gx:Track>
+  </Placemark>
+</Document>
+</kml>
+"""
+
+
+def document() -> kml.KML:
+    return kml.KML(
+        features=[
+            Document(
+                id="doc",
+                name="Root",
+                atom_author=atom.Author(name="Author"),
+                features=[
+                    Folder(
+                        name="Outer",
+                        features=[
+                            Folder(
+                                id="inner",
+                                features=[
+                                    Placemark(id="a", geometry=geo.Point(1, 2)),
+                                ],
+                            ),
+                            Placemark(id="b", name="<b>"),
+                        ],
+                    ),
+                    GroundOverlay(
+                        id="overlay",
+                        lat_lon_box=LatLonBox(north=1, south=0, east=1, west=0),
+                    ),
+                    *(
+                        Placemark(id=f"p{i}", geometry=geo.Point(i, i))
+                        for i in range(5)
+                    ),
+                ],
+            ),
+        ],
+    )
+
+
+def write(path: Path) -> Path:
+    path.write_text(document().to_string(prettyprint=True), encoding="utf-8")
+    return path
+
+
+class TestStdLibrary(StdLibrary):
+    def test_build(self, tmp_path: Path) -> None:
+        path = write(tmp_path / "doc.kml")
+
+        index = OffsetIndex.build(path)
+
+        assert len(index) == 8
+        assert repr(index) == "fastkml.offset_index.OffsetIndex(<8>)"
+        assert index.ids == ["a", "b", "overlay", "p0", "p1", "p2", "p3", "p4"]
+        entry = index[0]
+        assert entry.tag == "Placemark"
+        assert [(c.tag, c.id, c.name) for c in entry.path] == [
+            ("Document", "doc", "Root"),
+            ("Folder", "", "Outer"),
+            ("Folder", "inner", None),
+        ]
+        assert [c.name for c in index[1].path] == ["Root", "Outer"]
+        assert index[2].tag == "GroundOverlay"
+        raw = index.raw(0)
+        assert raw.startswith((b"<Placemark", b"<kml:Placemark"))
+        assert raw.endswith(b"Placemark>")
+        start, stop = entry.offset, entry.offset + entry.length
+        assert path.read_bytes()[start:stop] == raw
+
+    def test_page(self, tmp_path: Path) -> None:
+        path = write(tmp_path / "doc.kml")
+        index = OffsetIndex.build(path)
+        features = {
+            feature.id: feature for feature in iter_features(kml.KML.parse(path))
+        }
+        expected = [features[feature_id] for feature_id in index.ids]
+
+        assert index.page(0, 100) == expected
+        assert index.page(3, 2) == expected[3:5]
+        assert index.page(8, 2) == []
+        assert index.feature(2) == expected[2]
+        assert index.feature(1).name == "<b>"
+
+    def test_encoding_and_empty_elements(self, tmp_path: Path) -> None:
+        path = tmp_path / "latin.kml"
+        path.write_bytes(RAW.encode("iso-8859-1"))
+
+        index = OffsetIndex.build(path)
+
+        assert len(index) == 2
+        assert index.raw(0) == b"<Placemark/>"
+        assert index[0].path[0].name == "Z\xfcrich"
+        track = index.feature(1)
+        assert isinstance(track, Placemark)
+        assert track.name == "Stra\xdfe"
+        assert track.kml_geometry.geometry == geo.LineString([(8.5, 47.3, 0)])
+
+    def test_network_link_control(self, tmp_path: Path) -> None:
+        path = tmp_path / "update.kml"
+        path.write_text(
+            '<kml xmlns="http://www.opengis.net/kml/2.2">'
+            "<NetworkLinkControl><Update><Create><Document>"
+            '<name>Update</name><Placemark id="upd"/>'
+            "</Document></Create></Update></NetworkLinkControl>"
+            '<Document><name>Root</name><Placemark id="a"/></Document></kml>',
+            encoding="utf-8",
+        )
+
+        index = OffsetIndex.build(path)
+
+        assert index.ids == ["a"]
+        assert [(c.tag, c.name) for c in index[0].path] == [("Document", "Root")]
+        assert len(index.containers) == 1
+
+    def test_save_and_load(self, tmp_path: Path) -> None:
+        path = write(tmp_path / "doc.kml")
+        index = OffsetIndex.build(path)
+        index.save(tmp_path / "doc.idx")
+
+        loaded = OffsetIndex.load(tmp_path / "doc.idx")
+
+        assert loaded.ids == index.ids
+        assert loaded.offsets == index.offsets
+        assert loaded[0] == index[0]
+        assert loaded.feature(4) == index.feature(4)
+        loaded.close()
+        index.close()
+        os.utime(path, ns=(0, 0))
+        with pytest.raises(ValueError, match="changed since the index was built"):
+            OffsetIndex.load(tmp_path / "doc.idx")
+
+
+class TestLxml(Lxml, TestStdLibrary):
+    pass
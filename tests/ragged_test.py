@@ -0,0 +1,210 @@
+# Copyright (C) 2024 Christian Ledermann
+#
+# This library is free software; you can redistribute it and/or modify it under
+# the terms of the GNU Lesser General Public License as published by the Free
+# Software Foundation; either version 2.1 of the License, or (at your option)
+# any later version.
+#
+# This library is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU Lesser General Public License for more
+# details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this library; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301 USA
+"""Test the ragged array geometry interchange."""
+
+import pygeoif.geometry as geo
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from fastkml import kml  # noqa: E402
+from fastkml.containers import Document  # noqa: E402
+from fastkml.containers import Folder  # noqa: E402
+from fastkml.features import Placemark  # noqa: E402
+from fastkml.geometry import MultiGeometry  # noqa: E402
+from fastkml.geometry import Polygon  # noqa: E402
+from fastkml.ragged import RaggedArray  # noqa: E402
+from fastkml.ragged import from_ragged  # noqa: E402
+from fastkml.ragged import placemarks_from_ragged  # noqa: E402
+from fastkml.ragged import to_ragged  # noqa: E402
+from tests.base import Lxml  # noqa: E402
+from tests.base import StdLibrary  # noqa: E402
+
+SQUARE = [(0, 0), (0, 4), (4, 4), (4, 0), (0, 0)]
+HOLE = [(1, 1), (2, 1), (2, 2), (1, 1)]
+
+
+class TestStdLibrary(StdLibrary):
+    def test_points(self) -> None:
+        ragged = RaggedArray("point", np.array([[1.0, 2.0], [3.0, 4.0]]))
+
+        placemarks = placemarks_from_ragged(ragged, ids=["a", "b"], names=["A", "B"])
+
+        assert len(ragged) == 2
+        assert [p.geometry for p in placemarks] == [geo.Point(1, 2), geo.Point(3, 4)]
+        assert [(p.id, p.name) for p in placemarks] == [("a", "A"), ("b", "B")]
+        exported = to_ragged(placemarks)
+        assert exported.geometry_type == "point"
+        assert exported.offsets == ()
+        assert exported.coords.tolist() == [[1, 2], [3, 4]]
+
+    def test_linestrings(self) -> None:
+        ragged = RaggedArray(
+            "linestring",
+            np.arange(10, dtype=float).reshape(5, 2),
+            (np.array([0, 2, 5]),),
+        )
+
+        geometries = [g.geometry for g in from_ragged(ragged)]
+
+        assert geometries == [
+            geo.LineString([(0, 1), (2, 3)]),
+            geo.LineString([(4, 5), (6, 7), (8, 9)]),
+        ]
+        exported = to_ragged(from_ragged(ragged))
+        assert exported.geometry_type == "linestring"
+        assert exported.offsets[0].tolist() == [0, 2, 5]
+        assert exported.coords.tolist() == ragged.coords.tolist()
+
+    def test_polygons_roundtrip(self) -> None:
+        polygons = [geo.Polygon(SQUARE, [HOLE]), geo.Polygon(HOLE)]
+        doc = Document(features=[Placemark(geometry=p) for p in polygons])
+
+        ragged = to_ragged(doc)
+
+        assert ragged.geometry_type == "polygon"
+        assert [o.tolist() for o in ragged.offsets] == [[0, 2, 3], [0, 5, 9, 13]]
+        assert ragged.coords.shape == (13, 2)
+        geometries = from_ragged(ragged)
+        assert all(isinstance(g, Polygon) for g in geometries)
+        assert [g.geometry for g in geometries] == polygons
+
+    def test_multipolygons(self) -> None:
+        multipolygon = geo.MultiPolygon.from_polygons(
+            geo.Polygon(SQUARE, [HOLE]),
+            geo.Polygon([(5, 5), (6, 5), (6, 6), (5, 5)]),
+        )
+        k = kml.KML(
+            features=[
+                Document(
+                    features=[
+                        Placemark(geometry=geo.Polygon(HOLE)),
+                        Folder(features=[Placemark(geometry=multipolygon)]),
+                        Placemark(name="no geometry"),
+                    ],
+                ),
+            ],
+        )
+
+        ragged = to_ragged(k)
+
+        assert ragged.geometry_type == "multipolygon"
+        assert [o.tolist() for o in ragged.offsets] == [
+            [0, 1, 3],
+            [0, 1, 3, 4],
+            [0, 4, 9, 13, 17],
+        ]
+        geometries = from_ragged(ragged)
+        assert all(isinstance(g, MultiGeometry) for g in geometries)
+        assert geometries[1].geometry == multipolygon
+        assert geometries[0].geometry == geo.MultiPolygon.from_polygons(
+            geo.Polygon(HOLE),
+        )
+
+    def test_multipoints_and_multilinestrings(self) -> None:
+        points = geo.MultiPoint([(0, 0), (1, 1)])
+        lines = geo.MultiLineString([[(0, 0), (1, 1)], [(2, 2), (3, 3), (4, 4)]])
+
+        ragged_points = to_ragged([Placemark(geometry=points), geo_placemark(2, 2)])
+        ragged_lines = to_ragged([Placemark(geometry=lines)])
+
+        assert ragged_points.geometry_type == "multipoint"
+        assert ragged_points.offsets[0].tolist() == [0, 2, 3]
+        assert [g.geometry for g in from_ragged(ragged_points)] == [
+            points,
+            geo.MultiPoint([(2, 2)]),
+        ]
+        assert ragged_lines.geometry_type == "multilinestring"
+        assert [o.tolist() for o in ragged_lines.offsets] == [[0, 2], [0, 2, 5]]
+        assert from_ragged(ragged_lines)[0].geometry == lines
+
+    def test_mixed_dimensions(self) -> None:
+        ragged = to_ragged(
+            [
+                Placemark(geometry=geo.LineString([(0, 0, 1), (1, 1, 2)])),
+                Placemark(geometry=geo.LineString([(2, 2), (3, 3)])),
+            ],
+        )
+
+        assert ragged.coords.shape == (4, 3)
+        assert np.isnan(ragged.coords[2:, 2]).all()
+        assert [g.geometry for g in from_ragged(ragged)] == [
+            geo.LineString([(0, 0, 1), (1, 1, 2)]),
+            geo.LineString([(2, 2), (3, 3)]),
+        ]
+
+    def test_mixed_dimensions_in_one_ring(self) -> None:
+        doc = (
+            '<kml xmlns="http://www.opengis.net/kml/2.2"><Placemark>'
+            "<LineString><coordinates>0,0 1,1,5 2,2</coordinates></LineString>"
+            "</Placemark></kml>"
+        )
+        placemark = kml.KML.from_string(doc).features[0]
+
+        ragged = to_ragged(placemark)
+
+        assert ragged.coords.shape == (3, 3)
+        assert np.isnan(ragged.coords[[0, 2], 2]).all()
+        assert ragged.coords[1].tolist() == [1.0, 1.0, 5.0]
+
+    def test_mixed_geometry_types(self) -> None:
+        placemarks = [
+            Placemark(geometry=geo.Point(0, 0)),
+            Placemark(geometry=geo.LineString([(0, 0), (1, 1)])),
+        ]
+
+        with pytest.raises(ValueError, match="point"):
+            to_ragged(placemarks)
+        with pytest.raises(ValueError, match="MultiGeometry"):
+            to_ragged(
+                Placemark(
+                    geometry=geo.GeometryCollection(
+                        [geo.Point(0, 0), geo.LineString([(0, 0), (1, 1)])],
+                    ),
+                ),
+            )
+
+    def test_invalid_offsets(self) -> None:
+        with pytest.raises(ValueError, match="offset arrays"):
+            RaggedArray("polygon", np.zeros((4, 2)), (np.array([0, 4]),))
+        with pytest.raises(ValueError, match="offset arrays"):
+            RaggedArray("circle", np.zeros((4, 2)))
+
+    def test_offsets_past_the_coordinates(self) -> None:
+        ragged = RaggedArray(
+            "multipoint",
+            np.zeros((3, 2)),
+            (np.array([0, 1, 1, 2, 4]),),
+        )
+
+        with pytest.raises(ValueError, match="last offset must be 3"):
+            from_ragged(ragged)
+
+    def test_empty(self) -> None:
+        ragged = to_ragged(Document())
+
+        assert ragged.geometry_type == "point"
+        assert ragged.coords.shape == (0, 2)
+        assert len(ragged) == 0
+        assert from_ragged(ragged) == []
+
+
+def geo_placemark(x: float, y: float) -> Placemark:
+    return Placemark(geometry=geo.Point(x, y))
+
+
+class TestLxml(Lxml, TestStdLibrary):
+    pass
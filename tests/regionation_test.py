@@ -0,0 +1,216 @@
+# Copyright (C) 2024 Christian Ledermann
+#
+# This library is free software; you can redistribute it and/or modify it under
+# the terms of the GNU Lesser General Public License as published by the Free
+# Software Foundation; either version 2.1 of the License, or (at your option)
+# any later version.
+#
+# This library is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU Lesser General Public License for more
+# details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this library; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301 USA
+"""Test the regionation."""
+
+import zipfile
+from pathlib import Path
+from typing import List
+
+import pygeoif.geometry as geo
+import pytest
+
+from fastkml import kml
+from fastkml.containers import Document
+from fastkml.containers import Folder
+from fastkml.enums import AltitudeMode
+from fastkml.enums import ViewRefreshMode
+from fastkml.features import NetworkLink
+from fastkml.features import Placemark
+from fastkml.overlays import GroundOverlay
+from fastkml.overlays import LatLonBox
+from fastkml.regionation import Regionator
+from fastkml.regionation import annotate_regions
+from fastkml.regionation import regionate
+from fastkml.utils import feature_bounds
+from fastkml.views import LatLonAltBox
+from fastkml.views import Lod
+from fastkml.views import Region
+from tests.base import Lxml
+from tests.base import StdLibrary
+
+
+def placemarks() -> List[Placemark]:
+    return [
+        Placemark(id=f"p{x}-{y}", kml_geometry=None, geometry=geo.Point(x, y))
+        for x in range(-170, 180, 20)
+        for y in range(-80, 90, 20)
+    ]
+
+
+class TestStdLibrary(StdLibrary):
+    def test_feature_bounds(self) -> None:
+        line = Placemark(geometry=geo.LineString([(0, 1), (2, 3)]))
+        overlay = GroundOverlay(
+            lat_lon_box=LatLonBox(north=4, south=3, east=2, west=1),
+        )
+
+        assert feature_bounds(line) == (0, 1, 2, 3)
+        assert feature_bounds(overlay) == (1, 3, 2, 4)
+        assert feature_bounds(Placemark()) is None
+
+    def test_add_fills_tiles_top_down(self) -> None:
+        regionator = Regionator(max_features=10)
+        features = placemarks()
+
+        regionator.extend(features)
+
+        tiles = list(regionator.tiles)
+        assert sorted(
+            (f for tile in tiles for f in tile.features),
+            key=lambda f: str(f.id),
+        ) == sorted(features, key=lambda f: str(f.id))
+        assert regionator.root.features == features[:10]
+        assert all(len(tile.features) <= 10 for tile in tiles)
+        for tile in tiles:
+            for feature in tile.features:
+                assert isinstance(feature, Placemark)
+                west, south, east, north = tile.bounds
+                assert west <= feature.geometry.x <= east
+                assert south <= feature.geometry.y <= north
+
+    def test_straddling_and_boundless_features_stay(self) -> None:
+        regionator = Regionator(max_features=1)
+        regionator.add(Placemark(geometry=geo.Point(1, 1)))
+
+        tile = regionator.add(Placemark(geometry=geo.LineString([(-1, -1), (1, 1)])))
+        boundless = regionator.add(Placemark())
+        child = regionator.add(Placemark(geometry=geo.Point(-100, -50)))
+
+        assert tile is regionator.root
+        assert boundless is regionator.root
+        assert child.name == "1-0-0"
+        assert child.bounds == (-180, -90, 0, 0)
+
+    def test_max_depth(self) -> None:
+        regionator = Regionator(max_features=1, max_depth=2)
+
+        regionator.extend(Placemark(geometry=geo.Point(1, 1)) for _ in range(5))
+
+        assert [(t.level, len(t.features)) for t in regionator.tiles] == [
+            (0, 1),
+            (1, 1),
+            (2, 3),
+        ]
+
+    def test_invalid_max_features(self) -> None:
+        with pytest.raises(ValueError, match="max_features"):
+            Regionator(max_features=0)
+
+    def test_write(self, tmp_path: Path) -> None:
+        root = regionate(placemarks(), tmp_path, max_features=10)
+
+        assert root == tmp_path / "0-0-0.kml"
+        document = kml.KML.parse(root).features[0]
+        assert isinstance(document, Document)
+        assert document.region.lod.min_lod_pixels == 0
+        links = [f for f in document.features if isinstance(f, NetworkLink)]
+        assert len(links) == 4
+        for link in links:
+            assert link.link.view_refresh_mode == ViewRefreshMode.on_region
+            assert link.region.lod.min_lod_pixels == 128
+            assert link.link.href
+            child = kml.KML.parse(tmp_path / link.link.href).features[0]
+            assert child.name == link.name
+            assert child.region.lat_lon_alt_box == link.region.lat_lon_alt_box
+        placemark_ids = [
+            str(f.id)
+            for path in tmp_path.glob("*.kml")
+            for f in kml.KML.parse(path).features[0].features
+            if isinstance(f, Placemark)
+        ]
+        assert sorted(placemark_ids) == sorted(str(p.id) for p in placemarks())
+
+    def test_write_kmz(self, tmp_path: Path) -> None:
+        regionator = Regionator(max_features=50)
+        regionator.extend(placemarks())
+
+        root = regionator.write(tmp_path, kmz=True)
+
+        assert root.suffix == ".kmz"
+        with zipfile.ZipFile(root) as kmz:
+            assert ".kmz</" in kmz.read("doc.kml").decode()
+        assert len(list(tmp_path.glob("*.kmz"))) == len(list(regionator.tiles))
+
+    def test_annotate_regions(self) -> None:
+        inner = Folder(
+            features=[
+                Placemark(geometry=geo.Point(1, 2, 30)),
+                Placemark(geometry=geo.LineString([(3, 4, 10), (5, 6, 50)])),
+            ],
+        )
+        link = NetworkLink(
+            region=Region(
+                lat_lon_alt_box=LatLonAltBox(north=1, south=-1, east=1, west=-1),
+            ),
+        )
+        document = Document(features=[inner, link, Placemark(name="no geometry")])
+        k = kml.KML(features=[document])
+
+        bounds = annotate_regions(k, min_lod_pixels=64, altitude=True)
+
+        assert bounds == (-1.0, -1.0, 5.0, 6.0)
+        box = inner.region.lat_lon_alt_box
+        assert (box.west, box.south, box.east, box.north) == (1, 2, 5, 6)
+        assert (box.min_altitude, box.max_altitude) == (10, 50)
+        assert box.altitude_mode == AltitudeMode.absolute
+        assert inner.region.lod.min_lod_pixels == 64
+        assert inner.region.lod.max_lod_pixels == -1
+        box = document.region.lat_lon_alt_box
+        assert (box.west, box.south, box.east, box.north) == (-1, -1, 5, 6)
+        assert (box.min_altitude, box.max_altitude) == (10, 50)
+        assert k.to_string().count("Region>") == 4
+
+    def test_annotate_regions_keeps_existing_regions(self) -> None:
+        region = Region(
+            lat_lon_alt_box=LatLonAltBox(north=10, south=-10, east=10, west=-10),
+            lod=Lod(min_lod_pixels=256),
+        )
+        inner = Folder(features=[Placemark(geometry=geo.Point(1, 2))], region=region)
+        empty = Folder(features=[Placemark(name="no geometry")])
+        document = Document(features=[inner, empty])
+
+        assert annotate_regions(document) == (1, 2, 1, 2)
+        assert inner.region is region
+        assert empty.region is None
+        box = document.region.lat_lon_alt_box
+        assert (box.west, box.south, box.east, box.north) == (1, 2, 1, 2)
+        assert box.min_altitude is None
+        assert box.altitude_mode is None
+
+        assert annotate_regions(document, overwrite=True) == (1, 2, 1, 2)
+        assert inner.region is not region
+        assert inner.region.lat_lon_alt_box.north == 2
+
+    def test_annotate_regions_kept_region_without_features(self) -> None:
+        region = Region(
+            lat_lon_alt_box=LatLonAltBox(north=10, south=-10, east=10, west=-10),
+        )
+        inner = Folder(features=[Placemark(name="no geometry")], region=region)
+        document = Document(features=[inner])
+
+        assert annotate_regions(document) == (-10, -10, 10, 10)
+        assert inner.region is region
+
+    def test_annotate_regions_without_features(self) -> None:
+        document = Document()
+
+        assert annotate_regions(document) is None
+        assert document.region is None
+        assert annotate_regions(Placemark(geometry=geo.Point(1, 2))) is None
+
+
+class TestLxml(Lxml, TestStdLibrary):
+    pass
@@ -262,3 +262,26 @@ def test_registry_repr() -> None:
     registry = Registry()
 
     assert repr(registry) == "fastkml.registry.Registry({})"
+
+
+def test_registry_fingerprint() -> None:
+    registry = Registry()
+    empty = registry.fingerprint()
+    item = RegistryItem(
+        ns_ids=("kml",),
+        classes=(A,),
+        attr_name="a",
+        get_kwarg=get_kwarg,
+        set_element=set_element,
+        node_name="a",
+    )
+
+    registry.register(A, item)
+    fingerprint = registry.fingerprint()
+    other = Registry()
+    other.register(A, item)
+
+    assert fingerprint != empty
+    assert other.fingerprint() == fingerprint
+    other.register(B, item)
+    assert other.fingerprint() != fingerprint
@@ -0,0 +1,381 @@
+# Copyright (C) 2024 Christian Ledermann
+#
+# This library is free software; you can redistribute it and/or modify it under
+# the terms of the GNU Lesser General Public License as published by the Free
+# Software Foundation; either version 2.1 of the License, or (at your option)
+# any later version.
+#
+# This library is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU Lesser General Public License for more
+# details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this library; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301 USA
+"""Test the NetworkLink resolver."""
+
+import asyncio
+import functools
+import io
+import threading
+import zipfile
+from http.server import SimpleHTTPRequestHandler
+from http.server import ThreadingHTTPServer
+from pathlib import Path
+from typing import Any
+from typing import Coroutine
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import TypeVar
+
+import pytest
+
+from fastkml.enums import RefreshMode
+from fastkml.features import NetworkLink
+from fastkml.kml import KML
+from fastkml.links import Link
+from fastkml.resolver import CacheEntry
+from fastkml.resolver import NetworkLinkResolver
+from fastkml.resolver import Response
+from fastkml.resolver import fetch_url
+from tests.base import Lxml
+from tests.base import StdLibrary
+
+BASE = "http://example.com/kml/"
+
+T = TypeVar("T")
+
+
+def document(
+    *hrefs: str,
+    refresh: str = "",
+    control: str = "",
+) -> bytes:
+    links = "".join(
+        f"<NetworkLink><Link><href>{href}</href>{refresh}</Link></NetworkLink>"
+        for href in hrefs
+    )
+    return (
+        '<kml xmlns="http://www.opengis.net/kml/2.2">'
+        f"{control}<Document>{links}</Document></kml>"
+    ).encode()
+
+
+def kmz(content: bytes) -> bytes:
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, "w") as kmz_file:
+        kmz_file.writestr("doc.kml", content)
+    return archive.getvalue()
+
+
+class Server:
+    """A stand-in server with ETags, counting the requests."""
+
+    def __init__(self, documents: Dict[str, bytes]) -> None:
+        """Serve the documents by their URL."""
+        self.documents = documents
+        self.versions: Dict[str, int] = dict.fromkeys(documents, 1)
+        self.requests: List[str] = []
+        self.not_modified = 0
+        self.active = 0
+        self.max_active = 0
+
+    async def fetch(
+        self,
+        url: str,
+        etag: Optional[str],
+        last_modified: Optional[str],  # noqa: ARG002
+    ) -> Response:
+        self.requests.append(url)
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        await asyncio.sleep(0.01)
+        self.active -= 1
+        if url not in self.documents:
+            msg = f"404 {url}"
+            raise OSError(msg)
+        current = f'"{self.versions[url]}"'
+        if etag == current:
+            self.not_modified += 1
+            return Response(url, None, current)
+        return Response(url, self.documents[url], current)
+
+
+class Clock:
+    """A clock that only moves when it is told to."""
+
+    def __init__(self) -> None:
+        """Start the clock at an arbitrary time."""
+        self.now = 1_000_000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def run(coroutine: Coroutine[Any, Any, T]) -> T:
+    return asyncio.run(coroutine)
+
+
+class TestStdLibrary(StdLibrary):
+    def test_resolve(self) -> None:
+        server = Server(
+            {
+                f"{BASE}root.kml": document("a.kml", "b.kmz", "/missing.kml"),
+                f"{BASE}a.kml": document("root.kml", "sub/c.kml"),
+                f"{BASE}b.kmz": kmz(document("a.kml")),
+                f"{BASE}sub/c.kml": document(),
+            },
+        )
+        resolver = NetworkLinkResolver(server.fetch)
+
+        resolution = run(resolver.resolve(f"{BASE}root.kml"))
+
+        assert set(resolution.documents) == {
+            f"{BASE}root.kml",
+            f"{BASE}a.kml",
+            f"{BASE}b.kmz",
+            f"{BASE}sub/c.kml",
+        }
+        assert all(isinstance(kml, KML) for kml in resolution.documents.values())
+        assert resolution.links[f"{BASE}root.kml"] == [
+            f"{BASE}a.kml",
+            f"{BASE}b.kmz",
+            "http://example.com/missing.kml",
+        ]
+        assert resolution.links[f"{BASE}a.kml"] == [
+            f"{BASE}root.kml",
+            f"{BASE}sub/c.kml",
+        ]
+        assert resolution.links[f"{BASE}b.kmz"] == [f"{BASE}a.kml"]
+        assert list(resolution.errors) == ["http://example.com/missing.kml"]
+        assert sorted(server.requests) == sorted({*server.requests})
+        assert len(server.requests) == 5
+        assert server.max_active == 3
+        assert repr(resolver) == (
+            "fastkml.resolver.NetworkLinkResolver("
+            "max_concurrency=8, max_depth=None, cached=4)"
+        )
+
+    def test_bounded_concurrency(self) -> None:
+        hrefs = [f"{i}.kml" for i in range(10)]
+        server = Server(
+            {
+                f"{BASE}root.kml": document(*hrefs),
+                **{f"{BASE}{href}": document() for href in hrefs},
+            },
+        )
+        resolver = NetworkLinkResolver(server.fetch, max_concurrency=2)
+
+        resolution = run(resolver.resolve(f"{BASE}root.kml"))
+
+        assert len(resolution.documents) == 11
+        assert server.max_active == 2
+
+    def test_resolve_in_new_event_loops(self) -> None:
+        server = Server(
+            {
+                f"{BASE}root.kml": document(
+                    "a.kml",
+                    "b.kml",
+                    refresh="<refreshMode>onInterval</refreshMode>",
+                ),
+                f"{BASE}a.kml": document(),
+                f"{BASE}b.kml": document(),
+            },
+        )
+        resolver = NetworkLinkResolver(server.fetch, max_concurrency=1)
+
+        first = run(resolver.resolve(f"{BASE}root.kml"))
+        second = run(resolver.resolve(f"{BASE}root.kml"))
+
+        assert len(first.documents) == len(second.documents) == 3
+        assert server.not_modified == 2
+        assert server.max_active == 1
+
+    def test_invalid_max_concurrency(self) -> None:
+        with pytest.raises(ValueError, match="at least 1, not 0"):
+            NetworkLinkResolver(max_concurrency=0)
+
+    def test_max_depth(self) -> None:
+        server = Server(
+            {
+                f"{BASE}root.kml": document("a.kml"),
+                f"{BASE}a.kml": document("b.kml"),
+                f"{BASE}b.kml": document(),
+            },
+        )
+        resolver = NetworkLinkResolver(server.fetch, max_depth=1)
+
+        resolution = run(resolver.resolve(f"{BASE}root.kml"))
+
+        assert list(resolution.documents) == [f"{BASE}root.kml", f"{BASE}a.kml"]
+        assert resolution.links[f"{BASE}a.kml"] == [f"{BASE}b.kml"]
+
+    def test_resolve_kml_object(self) -> None:
+        server = Server({f"{BASE}a.kml": document()})
+        resolver = NetworkLinkResolver(server.fetch)
+        kml = KML.from_string(document("a.kml").decode("UTF-8"))
+
+        resolution = run(resolver.resolve(kml, base_url=BASE))
+
+        assert resolution.documents[BASE] is kml
+        assert f"{BASE}a.kml" in resolution.documents
+
+    def test_on_change_links_stay_cached(self) -> None:
+        server = Server(
+            {f"{BASE}root.kml": document("a.kml"), f"{BASE}a.kml": document()},
+        )
+        clock = Clock()
+        resolver = NetworkLinkResolver(server.fetch, clock=clock)
+        first = run(resolver.resolve(f"{BASE}root.kml"))
+        clock.now += 1_000_000
+
+        second = run(resolver.resolve(f"{BASE}root.kml"))
+
+        assert len(server.requests) == 2
+        assert second.documents == first.documents
+
+    def test_refresh_interval(self) -> None:
+        refresh = (
+            "<refreshMode>onInterval</refreshMode>"
+            "<refreshInterval>60</refreshInterval>"
+        )
+        server = Server(
+            {
+                f"{BASE}root.kml": document("a.kml", refresh=refresh),
+                f"{BASE}a.kml": document(),
+            },
+        )
+        clock = Clock()
+        resolver = NetworkLinkResolver(server.fetch, clock=clock)
+        a = run(resolver.resolve(f"{BASE}root.kml")).documents[f"{BASE}a.kml"]
+
+        clock.now += 30
+        run(resolver.resolve(f"{BASE}root.kml"))
+        assert len(server.requests) == 2
+
+        clock.now += 31
+        resolution = run(resolver.resolve(f"{BASE}root.kml"))
+        assert len(server.requests) == 3
+        assert server.not_modified == 1
+        assert resolution.documents[f"{BASE}a.kml"] is a
+
+        server.versions[f"{BASE}a.kml"] += 1
+        clock.now += 61
+        resolution = run(resolver.resolve(f"{BASE}root.kml"))
+        assert resolution.documents[f"{BASE}a.kml"] is not a
+        assert resolver.cache[f"{BASE}a.kml"].etag == '"2"'
+
+    def test_min_refresh_period_and_expires(self) -> None:
+        refresh = "<refreshMode>onInterval</refreshMode>"
+        control = (
+            "<NetworkLinkControl><minRefreshPeriod>120</minRefreshPeriod>"
+            "<expires>2001-09-09T01:50:00Z</expires></NetworkLinkControl>"
+        )
+        server = Server(
+            {
+                f"{BASE}root.kml": document("a.kml", refresh=refresh),
+                f"{BASE}a.kml": document(control=control),
+            },
+        )
+        clock = Clock()
+        resolver = NetworkLinkResolver(server.fetch, clock=clock)
+        clock.now = 1_000_000_000.0
+        run(resolver.resolve(f"{BASE}root.kml"))
+        entry = resolver.cache[f"{BASE}a.kml"]
+
+        assert entry.min_refresh_period == 120
+        assert entry.expires == 1_000_000_000 + 200
+        clock.now += 119
+        run(resolver.resolve(f"{BASE}root.kml"))
+        assert len(server.requests) == 2
+        clock.now += 2
+        run(resolver.resolve(f"{BASE}root.kml"))
+        assert len(server.requests) == 3
+
+    def test_on_expire(self) -> None:
+        entry = CacheEntry(kml=KML(), fetched=100, expires=200)
+        link = Link(href="a.kml", refresh_mode=RefreshMode.on_expire)
+
+        assert entry.is_fresh(link, 199)
+        assert not entry.is_fresh(link, 200)
+        assert CacheEntry(kml=KML(), fetched=100).is_fresh(link, 1e10)
+        assert entry.is_fresh(None, 1e10)
+
+    def test_concurrent_gets_share_a_fetch(self) -> None:
+        server = Server({f"{BASE}a.kml": document()})
+        resolver = NetworkLinkResolver(server.fetch)
+
+        async def get_twice() -> List[KML]:
+            return list(
+                await asyncio.gather(
+                    resolver.get(f"{BASE}a.kml"),
+                    resolver.get(f"{BASE}a.kml"),
+                ),
+            )
+
+        first, second = run(get_twice())
+
+        assert first is second
+        assert server.requests == [f"{BASE}a.kml"]
+
+    def test_file_urls(self, tmp_path: Path) -> None:
+        (tmp_path / "root.kml").write_bytes(document("sub/a.kmz"))
+        (tmp_path / "sub").mkdir()
+        (tmp_path / "sub" / "a.kmz").write_bytes(kmz(document("../root.kml")))
+        resolver = NetworkLinkResolver()
+
+        resolution = run(resolver.resolve(tmp_path / "root.kml"))
+
+        root = (tmp_path / "root.kml").resolve().as_uri()
+        assert list(resolution.documents) == [
+            root,
+            (tmp_path / "sub" / "a.kmz").resolve().as_uri(),
+        ]
+        assert not resolution.errors
+        network_link = next(iter(resolution.documents[root].features[0].features))
+        assert isinstance(network_link, NetworkLink)
+        entry = resolver.cache[root]
+        response = run(fetch_url(root, entry.etag))
+        assert response.not_modified
+        response = run(fetch_url(root, None, entry.last_modified))
+        assert response.not_modified
+        assert run(fetch_url(root)).content == document("sub/a.kmz")
+
+    def test_http(self, tmp_path: Path) -> None:
+        (tmp_path / "root.kml").write_bytes(document("a.kml"))
+        (tmp_path / "a.kml").write_bytes(document())
+        handler = functools.partial(SimpleHTTPRequestHandler, directory=tmp_path)
+        server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        url = f"http://127.0.0.1:{server.server_address[1]}/root.kml"
+        try:
+            resolution = run(NetworkLinkResolver().resolve(url))
+            response = run(fetch_url(url))
+            not_modified = run(fetch_url(url, None, response.last_modified))
+        finally:
+            server.shutdown()
+            server.server_close()
+
+        assert len(resolution.documents) == 2
+        assert response.content == document("a.kml")
+        assert response.last_modified
+        assert not_modified.not_modified
+
+    def test_unsupported_scheme(self) -> None:
+        with pytest.raises(ValueError, match="only file, http and https"):
+            run(fetch_url("ftp://example.com/a.kml"))
+
+    def test_not_modified_without_cache(self) -> None:
+        async def fetch(url: str, etag: Optional[str], _: Optional[str]) -> Response:
+            return Response(url, None, etag)
+
+        with pytest.raises(ValueError, match="not cached"):
+            run(NetworkLinkResolver(fetch).get(f"{BASE}a.kml"))
+
+
+class TestLxml(Lxml, TestStdLibrary):
+    pass
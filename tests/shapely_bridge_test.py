@@ -0,0 +1,129 @@
+# Copyright (C) 2024 Christian Ledermann
+#
+# This library is free software; you can redistribute it and/or modify it under
+# the terms of the GNU Lesser General Public License as published by the Free
+# Software Foundation; either version 2.1 of the License, or (at your option)
+# any later version.
+#
+# This library is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU Lesser General Public License for more
+# details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this library; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301 USA
+"""Test the shapely bridge."""
+
+from typing import TYPE_CHECKING
+
+import pygeoif.geometry as geo
+import pytest
+
+np = pytest.importorskip("numpy")
+shapely = pytest.importorskip("shapely")
+
+from fastkml import kml  # noqa: E402
+from fastkml.containers import Document  # noqa: E402
+from fastkml.features import Placemark  # noqa: E402
+from fastkml.geometry import LineString  # noqa: E402
+from fastkml.geometry import MultiGeometry  # noqa: E402
+from fastkml.geometry import Polygon  # noqa: E402
+from fastkml.shapely_bridge import from_shapely  # noqa: E402
+from fastkml.shapely_bridge import placemarks_from_shapely  # noqa: E402
+from fastkml.shapely_bridge import ragged_from_shapely  # noqa: E402
+from fastkml.shapely_bridge import to_shapely  # noqa: E402
+from tests.base import Lxml  # noqa: E402
+from tests.base import StdLibrary  # noqa: E402
+
+if TYPE_CHECKING:
+    from fastkml.shapely_bridge import GeometryArray
+
+SQUARE = [(0, 0), (0, 4), (4, 4), (4, 0), (0, 0)]
+HOLE = [(1, 1), (2, 1), (2, 2), (1, 1)]
+
+
+def array(*geometries: object) -> "GeometryArray":
+    result: GeometryArray = np.array(geometries, dtype=object)
+    return result
+
+
+class TestStdLibrary(StdLibrary):
+    def test_from_shapely(self) -> None:
+        polygon = shapely.Polygon(SQUARE, [HOLE])
+        multipolygon = shapely.MultiPolygon([shapely.Polygon(HOLE)])
+
+        geometries = from_shapely(array(polygon, None, multipolygon))
+
+        assert all(isinstance(g, MultiGeometry) for g in geometries[::2])
+        assert geometries[1] is None
+        assert geometries[0].geometry == geo.MultiPolygon.from_polygons(
+            geo.Polygon(SQUARE, [HOLE]),
+        )
+        assert geometries[2].geometry == geo.MultiPolygon.from_polygons(
+            geo.Polygon(HOLE),
+        )
+
+    def test_from_shapely_missing_and_empty(self) -> None:
+        geometries = from_shapely(
+            array(
+                shapely.Point(1, 2),
+                None,
+                shapely.Point(),
+                shapely.MultiPoint([(1, 2), (3, 4)]),
+            ),
+        )
+
+        assert geometries[1] is None
+        assert geometries[2] is None
+        assert isinstance(geometries[0], MultiGeometry)
+        assert geometries[0].geometry == geo.MultiPoint([(1, 2)])
+        assert isinstance(geometries[3], MultiGeometry)
+        assert geometries[3].geometry == geo.MultiPoint([(1, 2), (3, 4)])
+        assert from_shapely(array(None, shapely.Point())) == [None, None]
+
+    def test_ragged_from_shapely(self) -> None:
+        ragged = ragged_from_shapely(
+            array(shapely.Polygon(SQUARE, [HOLE]), shapely.Polygon(HOLE)),
+        )
+
+        assert ragged.geometry_type == "polygon"
+        assert [o.tolist() for o in ragged.offsets] == [[0, 2, 3], [0, 5, 9, 13]]
+        assert isinstance(from_shapely(array(shapely.Polygon(HOLE)))[0], Polygon)
+
+    def test_placemarks_roundtrip(self) -> None:
+        lines = array(
+            shapely.LineString([(0, 0, 1), (1, 1, 2)]),
+            shapely.LineString([(2, 2, 3), (3, 3, 4), (4, 4, 5)]),
+        )
+
+        placemarks = placemarks_from_shapely(lines, ids=["a", "b"])
+        k = kml.KML.from_string(
+            kml.KML(features=[Document(features=placemarks)]).to_string(),
+        )
+
+        assert [p.id for p in placemarks] == ["a", "b"]
+        assert isinstance(placemarks[0].kml_geometry, LineString)
+        assert list(shapely.equals(to_shapely(k), lines)) == [True, True]
+
+    def test_to_shapely_points(self) -> None:
+        placemarks = [
+            Placemark(geometry=geo.Point(1, 2)),
+            Placemark(name="no geometry"),
+            Placemark(geometry=geo.Point(3, 4)),
+        ]
+
+        points = to_shapely(placemarks)
+
+        assert [p.wkt for p in points] == ["POINT (1 2)", "POINT (3 4)"]
+        assert placemarks_from_shapely(array(shapely.Point()))[0].kml_geometry is None
+
+    def test_mixed_geometry_types(self) -> None:
+        with pytest.raises(ValueError, match=r"[Gg]eometry type"):
+            from_shapely(
+                array(shapely.Point(0, 0), shapely.LineString([(0, 0), (1, 1)])),
+            )
+
+
+class TestLxml(Lxml, TestStdLibrary):
+    pass
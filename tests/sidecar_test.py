@@ -0,0 +1,210 @@
+# Copyright (C) 2024 Christian Ledermann
+#
+# This library is free software; you can redistribute it and/or modify it under
+# the terms of the GNU Lesser General Public License as published by the Free
+# Software Foundation; either version 2.1 of the License, or (at your option)
+# any later version.
+#
+# This library is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU Lesser General Public License for more
+# details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this library; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301 USA
+"""Test the memory mappable geometry sidecar."""
+
+from pathlib import Path
+from typing import List
+
+import pygeoif.geometry as geo
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from fastkml import kml  # noqa: E402
+from fastkml.containers import Document  # noqa: E402
+from fastkml.containers import Folder  # noqa: E402
+from fastkml.features import Placemark  # noqa: E402
+from fastkml.geometry import Coordinates  # noqa: E402
+from fastkml.geometry import LinearRing  # noqa: E402
+from fastkml.geometry import MultiGeometry  # noqa: E402
+from fastkml.geometry import Point  # noqa: E402
+from fastkml.geometry import Polygon  # noqa: E402
+from fastkml.sidecar import GeometrySidecar  # noqa: E402
+from fastkml.sidecar import MappedCoordinates  # noqa: E402
+from fastkml.sidecar import write_sidecar  # noqa: E402
+from tests.base import Lxml  # noqa: E402
+from tests.base import StdLibrary  # noqa: E402
+
+
+def placemarks() -> List[Placemark]:
+    return [
+        Placemark(id="point", geometry=geo.Point(1, 2, 3)),
+        Placemark(name="no geometry"),
+        Placemark(
+            id="polygon",
+            geometry=geo.Polygon(
+                [(0, 0), (0, 4), (4, 4), (4, 0), (0, 0)],
+                [[(1, 1), (2, 1), (2, 2), (1, 1)]],
+            ),
+        ),
+        Placemark(
+            id="mixed",
+            geometry=geo.GeometryCollection(
+                [geo.Point(5, 5), geo.LineString([(6, 6), (7, 7)])],
+            ),
+        ),
+        Placemark(
+            id="ring",
+            kml_geometry=LinearRing(geometry=geo.LinearRing([(0, 0), (1, 1), (1, 0)])),
+        ),
+        Placemark(geometry=geo.LineString([(8, 8), (9, 9)])),
+    ]
+
+
+def document() -> kml.KML:
+    features = placemarks()
+    return kml.KML(
+        features=[Document(features=[Folder(features=features[:3]), *features[3:]])],
+    )
+
+
+class TestStdLibrary(StdLibrary):
+    def test_roundtrip(self, tmp_path: Path) -> None:
+        path = tmp_path / "doc.geo"
+
+        assert write_sidecar(document(), path) == 5
+
+        sidecar = GeometrySidecar(path)
+        assert len(sidecar) == 5
+        assert repr(sidecar) == "fastkml.sidecar.GeometrySidecar(<5>)"
+        assert sidecar.ids == ["point", "polygon", "mixed", "ring", ""]
+        assert sidecar.features.tolist() == [0, 2, 3, 4, 5]
+        expected = [p.geometry for p in placemarks() if p.geometry]
+        assert [sidecar.geometry(i).geometry for i in range(5)] == expected
+
+    def test_layout(self, tmp_path: Path) -> None:
+        path = tmp_path / "doc.geo"
+        write_sidecar(document(), path)
+
+        sidecar = GeometrySidecar(path)
+
+        assert sidecar.coords.shape == (19, 3)
+        assert not sidecar.coords.flags.writeable
+        assert not sidecar.coords.flags.owndata
+        assert np.isnan(sidecar.coords[1:, 2]).all()
+        assert sidecar.geometry_parts.tolist() == [0, 1, 2, 4, 5, 6]
+        assert sidecar.part_rings.tolist() == [0, 1, 3, 4, 5, 6, 7]
+        assert sidecar.multi.tolist() == [0, 0, 1, 0, 0]
+        assert sidecar.part_types.tolist() == [1, 4, 1, 2, 3, 2]
+
+    def test_lazy_coordinates(self, tmp_path: Path) -> None:
+        path = tmp_path / "doc.geo"
+        write_sidecar(document(), path)
+        sidecar = GeometrySidecar(path)
+
+        line = sidecar.geometry(4)
+        coordinates = line.kml_coordinates
+
+        assert isinstance(coordinates, MappedCoordinates)
+        assert np.shares_memory(coordinates._array, sidecar.coords)
+        assert coordinates.coords == [(8.0, 8.0), (9.0, 9.0)]
+        assert coordinates == Coordinates(coords=[(8, 8), (9, 9)])
+        assert sidecar.geometry(0).kml_coordinates.coords == [(1.0, 2.0, 3.0)]
+        assert "<kml:coordinates>8.0,8.0 9.0,9.0</kml:coordinates>" in line.to_string()
+
+        coordinates.coords = [(0, 0), (1, 1)]
+
+        assert coordinates._array is None
+        assert line.geometry == geo.LineString([(0, 0), (1, 1)])
+
+    def test_attach(self, tmp_path: Path) -> None:
+        path = tmp_path / "doc.geo"
+        write_sidecar(document(), path)
+        target = document()
+        for feature in target.features[0].features[0].features:
+            feature.kml_geometry = None
+
+        count = GeometrySidecar(path).attach(target)
+
+        assert count == 4
+        assert target.features[0].features[0].features[0].geometry == geo.Point(
+            1,
+            2,
+            3,
+        )
+
+    def test_empty(self, tmp_path: Path) -> None:
+        path = tmp_path / "empty.geo"
+
+        assert write_sidecar(Document(), path) == 0
+
+        sidecar = GeometrySidecar(path)
+        assert len(sidecar) == 0
+        assert sidecar.coords.shape == (0, 2)
+        assert sidecar.index("point") is None
+
+    def test_empty_geometries(self, tmp_path: Path) -> None:
+        path = tmp_path / "doc.geo"
+        target = kml.KML(
+            features=[
+                Document(
+                    features=[
+                        Placemark(id="point", kml_geometry=Point()),
+                        Placemark(id="polygon", kml_geometry=Polygon()),
+                        Placemark(id="multi", kml_geometry=MultiGeometry()),
+                        Placemark(
+                            id="parts",
+                            kml_geometry=MultiGeometry(
+                                kml_geometries=[
+                                    Polygon(),
+                                    Point(geometry=geo.Point(1, 2)),
+                                ],
+                            ),
+                        ),
+                    ],
+                ),
+            ],
+        )
+
+        assert write_sidecar(target, path) == 1
+
+        sidecar = GeometrySidecar(path)
+        assert sidecar.ids == ["parts"]
+        assert sidecar.geometry(0).geometry == geo.MultiPoint([(1, 2)])
+        assert sidecar.attach(target) == 1
+
+    def test_invalid_file(self, tmp_path: Path) -> None:
+        path = tmp_path / "invalid.geo"
+        path.write_bytes(b"\1" * 100)
+        empty = tmp_path / "empty.geo"
+        empty.write_bytes(b"")
+
+        with pytest.raises(ValueError, match="not a geometry sidecar file"):
+            GeometrySidecar(path)
+        with pytest.raises(ValueError, match="not a geometry sidecar file"):
+            GeometrySidecar(empty)
+
+    def test_close(self, tmp_path: Path) -> None:
+        path = tmp_path / "doc.geo"
+        write_sidecar(document(), path)
+
+        with GeometrySidecar(path) as sidecar:
+            line = sidecar.geometry(4)
+            assert sidecar.index("point") == 0
+
+        assert len(sidecar) == 0
+        assert sidecar.index("point") is None
+        assert line.geometry == geo.LineString([(8, 8), (9, 9)])
+        del line
+
+        with GeometrySidecar(path) as sidecar:
+            pass
+
+        assert sidecar._mmap.closed
+
+
+class TestLxml(Lxml, TestStdLibrary):
+    pass
@@ -0,0 +1,150 @@
+# Copyright (C) 2024 Christian Ledermann
+#
+# This library is free software; you can redistribute it and/or modify it under
+# the terms of the GNU Lesser General Public License as published by the Free
+# Software Foundation; either version 2.1 of the License, or (at your option)
+# any later version.
+#
+# This library is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU Lesser General Public License for more
+# details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this library; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301 USA
+"""Test the line and polygon simplification."""
+
+import math
+from typing import List
+from typing import Tuple
+
+import pygeoif.geometry as geo
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from fastkml import kml  # noqa: E402
+from fastkml.geometry import LineString  # noqa: E402
+from fastkml.geometry import MultiGeometry  # noqa: E402
+from fastkml.geometry import Polygon  # noqa: E402
+from fastkml.simplify import _ring_intersects_itself  # noqa: E402
+from fastkml.simplify import douglas_peucker_weights  # noqa: E402
+from fastkml.simplify import simplify  # noqa: E402
+from fastkml.simplify import simplify_coords  # noqa: E402
+from fastkml.simplify import visvalingam_whyatt_weights  # noqa: E402
+from tests.base import Lxml  # noqa: E402
+from tests.base import StdLibrary  # noqa: E402
+
+LINE = [(0, 0), (1, 0.1), (2, -0.1), (3, 5), (4, 6), (5, 7), (6, 8.1), (7, 9), (8, 9)]
+
+
+def circle(n: int) -> List[Tuple[float, float, float]]:
+    coords = [
+        (math.cos(2 * math.pi * i / n), math.sin(2 * math.pi * i / n), 10.0)
+        for i in range(n)
+    ]
+    return [*coords, coords[0]]
+
+
+class TestStdLibrary(StdLibrary):
+    def test_douglas_peucker_weights(self) -> None:
+        weights = douglas_peucker_weights(np.array(LINE, dtype=float))
+
+        assert weights[0] == weights[-1] == np.inf
+        assert np.argmax(weights[1:-1]) + 1 == 2
+        assert all(weights[1:-1] <= weights[2])
+
+    def test_douglas_peucker(self) -> None:
+        assert simplify_coords(LINE, 0.5) == [(0, 0), (2, -0.1), (3, 5), (7, 9), (8, 9)]
+        assert simplify_coords(LINE, 100) == [(0, 0), (8, 9)]
+        assert simplify_coords(LINE, target=3) == [(0, 0), (2, -0.1), (8, 9)]
+
+    def test_visvalingam_whyatt(self) -> None:
+        weights = visvalingam_whyatt_weights(np.array(LINE, dtype=float))
+
+        assert weights[0] == weights[-1] == np.inf
+        assert simplify_coords(
+            LINE,
+            target=4,
+            method=visvalingam_whyatt_weights,
+        ) == [(0, 0), (2, -0.1), (3, 5), (8, 9)]
+        kept = simplify_coords(LINE, 0.05, method=visvalingam_whyatt_weights)
+        assert 2 < len(kept) < len(LINE)
+        assert kept == simplify_coords(
+            LINE,
+            target=len(kept),
+            method=visvalingam_whyatt_weights,
+        )
+
+    def test_visvalingam_whyatt_effective_area_is_monotonic(self) -> None:
+        xy = np.array(circle(50), dtype=float)[:, :2]
+
+        weights = visvalingam_whyatt_weights(xy)
+
+        assert len(set(weights[1:-1].tolist())) < len(weights) - 2
+
+    def test_rings_stay_closed(self) -> None:
+        ring = circle(100)
+
+        for method in (douglas_peucker_weights, visvalingam_whyatt_weights):
+            simplified = simplify_coords(ring, 10, method=method, closed=True)
+            assert len(simplified) == 4
+            assert simplified[0] == simplified[-1] == (1.0, 0.0, 10.0)
+
+    def test_rings_do_not_intersect_themselves(self) -> None:
+        ring = [(6, 4), (0, 0), (5, 5), (6, 5), (8, 3), (9, 0), (6, 4)]
+        kept = [ring[i] for i in (0, 1, 2, 5, 6)]
+
+        assert _ring_intersects_itself(np.array(kept, dtype=float))
+        assert not _ring_intersects_itself(np.array(ring, dtype=float))
+        assert simplify_coords(ring, 2, closed=True) == ring
+        assert simplify_coords(ring[:-1], 2) == [(6, 4), (0, 0), (5, 5), (9, 0)]
+
+    def test_ring_intersects_itself(self) -> None:
+        square = np.array([(0, 0), (0, 1), (1, 1), (1, 0), (0, 0)], dtype=float)
+        bowtie = np.array([(0, 0), (1, 1), (1, 0), (0, 1), (0, 0)], dtype=float)
+        touching = np.array(
+            [(0, 0), (2, 0), (2, 2), (1, 0), (0, 2), (0, 0)],
+            dtype=float,
+        )
+
+        assert not _ring_intersects_itself(square)
+        assert _ring_intersects_itself(bowtie)
+        assert _ring_intersects_itself(touching)
+
+    def test_invalid_arguments(self) -> None:
+        with pytest.raises(ValueError, match="either a tolerance or a target"):
+            simplify_coords(LINE)
+        with pytest.raises(ValueError, match="either a tolerance or a target"):
+            simplify_coords(LINE, 1, target=3)
+
+    def test_short_lines_are_unchanged(self) -> None:
+        assert simplify_coords([(0, 0), (1, 1)], 10) == [(0, 0), (1, 1)]
+        assert simplify_coords(LINE, target=20) == LINE
+
+    def test_simplify_document(self) -> None:
+        polygon = geo.Polygon(circle(64), [circle(16)[::-1]])
+        doc = kml.KML.from_string(
+            '<kml xmlns="http://www.opengis.net/kml/2.2"><Document>'
+            f"<Placemark>{LineString(geometry=geo.LineString(LINE)).to_string()}"
+            "</Placemark><Folder><Placemark>"
+            f"{MultiGeometry(geometry=geo.MultiPolygon.from_polygons(polygon)).to_string()}"
+            "</Placemark></Folder></Document></kml>",
+        )
+
+        removed = simplify(doc, target=8)
+
+        assert removed == 1 + 65 - 8 + 17 - 8
+        line = doc.features[0].features[1].kml_geometry
+        assert len(line.geometry.coords) == 8
+        polygon = doc.features[0].features[0].features[0].kml_geometry.kml_geometries[0]
+        assert isinstance(polygon, Polygon)
+        assert len(polygon.geometry.exterior.coords) == 8
+        assert polygon.geometry.exterior.coords[0] == (1, 0, 10)
+        assert [len(i.coords) for i in polygon.geometry.interiors] == [8]
+        assert simplify(doc, target=8) == 0
+
+
+class TestLxml(Lxml, TestStdLibrary):
+    pass
@@ -0,0 +1,155 @@
+# Copyright (C) 2024 Christian Ledermann
+#
+# This library is free software; you can redistribute it and/or modify it under
+# the terms of the GNU Lesser General Public License as published by the Free
+# Software Foundation; either version 2.1 of the License, or (at your option)
+# any later version.
+#
+# This library is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU Lesser General Public License for more
+# details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this library; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301 USA
+"""Test the point in polygon spatial join."""
+
+from typing import List
+
+import pygeoif.geometry as geo
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from fastkml import kml  # noqa: E402
+from fastkml.containers import Document  # noqa: E402
+from fastkml.containers import Folder  # noqa: E402
+from fastkml.data import Data  # noqa: E402
+from fastkml.data import ExtendedData  # noqa: E402
+from fastkml.features import Placemark  # noqa: E402
+from fastkml.spatial_join import PolygonIndex  # noqa: E402
+from fastkml.spatial_join import point_array  # noqa: E402
+from fastkml.spatial_join import spatial_join  # noqa: E402
+from tests.base import Lxml  # noqa: E402
+from tests.base import StdLibrary  # noqa: E402
+
+SQUARE = [(0, 0), (0, 4), (4, 4), (4, 0), (0, 0)]
+HOLE = [(1, 1), (2, 1), (2, 2), (1, 2), (1, 1)]
+
+
+def polygons() -> List[Placemark]:
+    return [
+        Placemark(id="square", geometry=geo.Polygon(SQUARE, [HOLE])),
+        Placemark(
+            name="islands",
+            geometry=geo.MultiPolygon.from_polygons(
+                geo.Polygon([(10, 0), (12, 0), (11, 2), (10, 0)]),
+                geo.Polygon([(3, 3), (6, 3), (6, 6), (3, 6), (3, 3)]),
+            ),
+        ),
+    ]
+
+
+def points() -> List[Placemark]:
+    return [
+        Placemark(id=str(i), geometry=geo.Point(*p))
+        for i, p in enumerate([(0.5, 0.5), (1.5, 1.5), (11, 1), (3.5, 3.5), (20, 0)])
+    ]
+
+
+class TestStdLibrary(StdLibrary):
+    def test_contains(self) -> None:
+        index = PolygonIndex(polygons())
+
+        point_positions, polygon_positions = index.contains(point_array(points()))
+
+        assert point_positions.tolist() == [0, 2, 3, 3]
+        assert polygon_positions.tolist() == [0, 1, 0, 1]
+
+    def test_join(self) -> None:
+        pairs = spatial_join(points(), polygons(), workers=2)
+
+        assert [(p.id, q.id or q.name) for p, q in pairs] == [
+            ("0", "square"),
+            ("2", "islands"),
+            ("3", "square"),
+            ("3", "islands"),
+        ]
+
+    def test_annotate(self) -> None:
+        index = PolygonIndex(polygons())
+        placemarks = points()
+        placemarks[0].extended_data = ExtendedData(
+            elements=[Data(name="kind", value="tree")],
+        )
+
+        count = index.annotate(placemarks, name="district")
+
+        assert count == 3
+        assert placemarks[0].extended_data.elements == [
+            Data(name="kind", value="tree"),
+            Data(name="district", value="square"),
+        ]
+        assert placemarks[1].extended_data is None
+        assert placemarks[2].extended_data.elements == [
+            Data(name="district", value="islands"),
+        ]
+        assert placemarks[3].extended_data.elements[0].value == "square"
+
+    def test_from_kml(self) -> None:
+        k = kml.KML(
+            features=[
+                Document(
+                    features=[
+                        Folder(features=polygons()),
+                        *points(),
+                        Placemark(geometry=geo.LineString([(0, 0), (1, 1)])),
+                        Placemark(name="no geometry"),
+                    ],
+                ),
+            ],
+        )
+
+        index = PolygonIndex.from_kml(k)
+
+        assert len(index) == 2
+        assert repr(index) == "fastkml.spatial_join.PolygonIndex(<2>)"
+
+    def test_matches_brute_force(self) -> None:
+        rng = np.random.default_rng(7)
+        angles = np.sort(rng.uniform(0, 2 * np.pi, 40))
+        radii = rng.uniform(1, 3, 40)
+        ring = [(r * np.cos(a), r * np.sin(a)) for r, a in zip(radii, angles)]
+        index = PolygonIndex(
+            [Placemark(geometry=geo.Polygon([*ring, ring[0]]))],
+        )
+        coords = rng.uniform(-3, 3, (5000, 2))
+
+        inside = np.zeros(len(coords), dtype=bool)
+        inside[index.contains(coords)[0]] = True
+
+        expected = np.zeros(len(coords), dtype=bool)
+        for (x1, y1), (x2, y2) in zip(ring, [*ring[1:], ring[0]]):
+            crosses = (y1 > coords[:, 1]) != (y2 > coords[:, 1])
+            expected ^= crosses & (
+                coords[:, 0] < (x2 - x1) * (coords[:, 1] - y1) / (y2 - y1) + x1
+            )
+        assert (inside == expected).all()
+        assert inside.any()
+
+    def test_invalid_geometries(self) -> None:
+        with pytest.raises(ValueError, match="polygon geometry"):
+            PolygonIndex([Placemark(geometry=geo.Point(0, 0))])
+        with pytest.raises(ValueError, match="Point geometry"):
+            spatial_join([Placemark(name="no geometry")], polygons())
+
+    def test_empty(self) -> None:
+        index = PolygonIndex([])
+
+        assert index.join(points()) == []
+        assert spatial_join([], polygons()) == []
+
+
+class TestLxml(Lxml, TestStdLibrary):
+    pass
@@ -0,0 +1,168 @@
+# Copyright (C) 2024 Christian Ledermann
+#
+# This library is free software; you can redistribute it and/or modify it under
+# the terms of the GNU Lesser General Public License as published by the Free
+# Software Foundation; either version 2.1 of the License, or (at your option)
+# any later version.
+#
+# This library is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU Lesser General Public License for more
+# details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this library; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301 USA
+"""Test the document statistics scanner."""
+
+import io
+import zipfile
+from datetime import date
+from pathlib import Path
+
+import pygeoif.geometry as geo
+
+from fastkml import kml
+from fastkml.containers import Document
+from fastkml.containers import Folder
+from fastkml.enums import PairKey
+from fastkml.features import Placemark
+from fastkml.stats import DocumentStats
+from fastkml.stats import scan
+from fastkml.styles import LineStyle
+from fastkml.styles import Pair
+from fastkml.styles import Style
+from fastkml.styles import StyleMap
+from fastkml.styles import StyleUrl
+from fastkml.times import KmlDateTime
+from fastkml.times import TimeSpan
+from fastkml.times import TimeStamp
+from tests.base import Lxml
+from tests.base import StdLibrary
+
+KML = b"""<kml xmlns="http://www.opengis.net/kml/2.2"
+     xmlns:gx="http://www.google.com/kml/ext/2.2">
+  <Placemark>
+    <gx:Track>
+      <when>2021-03-04T10:00:00Z</when>
+      <when>2021-03-04T11:00:00Z</when>
+      <gx:coord>-1.5 2.5 10</gx:coord>
+      <gx:coord>-1.0 3.0 12</gx:coord>
+    </gx:Track>
+  </Placemark>
+</kml>
+"""
+
+
+def document() -> kml.KML:
+    return kml.KML(
+        features=[
+            Document(
+                styles=[
+                    Style(id="red", styles=[LineStyle(color="ff0000ff")]),
+                    StyleMap(
+                        id="map",
+                        pairs=[Pair(key=PairKey.normal, style=StyleUrl(url="#red"))],
+                    ),
+                ],
+                features=[
+                    Folder(
+                        features=[
+                            Folder(
+                                features=[
+                                    Placemark(
+                                        geometry=geo.Polygon(
+                                            [(0, 0), (4, 0), (4, 3), (0, 0)],
+                                        ),
+                                        times=TimeSpan(
+                                            begin=KmlDateTime(date(2020, 1, 1)),
+                                            end=KmlDateTime(date(2020, 6, 30)),
+                                        ),
+                                    ),
+                                ],
+                            ),
+                            Placemark(
+                                geometry=geo.MultiPoint([(-10, 5), (20, -7.5)]),
+                            ),
+                        ],
+                    ),
+                    Placemark(
+                        geometry=geo.Point(1, 2, 3),
+                        times=TimeStamp(timestamp=KmlDateTime(date(2019, 7, 1))),
+                    ),
+                    Placemark(name="no geometry"),
+                ],
+            ),
+        ],
+    )
+
+
+class TestStdLibrary(StdLibrary):
+    def test_scan(self, tmp_path: Path) -> None:
+        path = tmp_path / "doc.kml"
+        path.write_text(document().to_string(), encoding="utf-8")
+
+        stats = scan(path)
+
+        assert stats.features == {"Document": 1, "Folder": 2, "Placemark": 4}
+        assert stats.geometries == {
+            "Polygon": 1,
+            "LinearRing": 1,
+            "MultiGeometry": 1,
+            "Point": 3,
+        }
+        assert stats.vertices == 7
+        assert stats.bbox == (-10.0, -7.5, 20.0, 5.0)
+        assert stats.time_range == (
+            KmlDateTime(date(2019, 7, 1)),
+            KmlDateTime(date(2020, 6, 30)),
+        )
+        assert stats.styles == 2
+        assert stats.depth == 4
+        assert stats.size == path.stat().st_size
+        assert stats.elapsed > 0
+        assert stats.throughput > 0
+
+    def test_track(self) -> None:
+        stats = scan(io.BytesIO(KML))
+
+        assert stats.features == {"Placemark": 1}
+        assert stats.geometries == {"Track": 1}
+        assert stats.vertices == 2
+        assert stats.bbox == (-1.5, 2.5, -1.0, 3.0)
+        assert stats.time_range == (
+            KmlDateTime.parse("2021-03-04T10:00:00Z"),
+            KmlDateTime.parse("2021-03-04T11:00:00Z"),
+        )
+        assert stats.depth == 1
+        assert stats.size == len(KML)
+
+    def test_kmz(self, tmp_path: Path) -> None:
+        path = tmp_path / "doc.kmz"
+        with zipfile.ZipFile(path, "w") as kmz:
+            kmz.writestr("doc.kml", KML)
+
+        assert scan(path).vertices == 2
+
+    def test_spaces_after_separators(self) -> None:
+        stats = scan(
+            io.BytesIO(
+                b'<kml xmlns="http://www.opengis.net/kml/2.2"><Placemark><LineString>'
+                b"<coordinates>1, 2 3,  4,5</coordinates>"
+                b"</LineString></Placemark></kml>",
+            ),
+        )
+
+        assert stats.vertices == 2
+        assert stats.bbox == (1, 2, 3, 4)
+
+    def test_empty(self) -> None:
+        stats = scan(io.BytesIO(b'<kml xmlns="http://www.opengis.net/kml/2.2"/>'))
+
+        assert stats == DocumentStats(size=stats.size, elapsed=stats.elapsed)
+        assert stats.bbox is None
+        assert stats.time_range is None
+
+
+class TestLxml(Lxml, TestStdLibrary):
+    pass
@@ -0,0 +1,214 @@
+# Copyright (C) 2024 Christian Ledermann
+#
+# This library is free software; you can redistribute it and/or modify it under
+# the terms of the GNU Lesser General Public License as published by the Free
+# Software Foundation; either version 2.1 of the License, or (at your option)
+# any later version.
+#
+# This library is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU Lesser General Public License for more
+# details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this library; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301 USA
+"""Test the SQLite feature store."""
+
+import os
+import zipfile
+from datetime import date
+from pathlib import Path
+from typing import Iterable
+from typing import List
+from typing import Optional
+
+import pygeoif.geometry as geo
+
+from fastkml import kml
+from fastkml.containers import Document
+from fastkml.containers import Folder
+from fastkml.data import Data
+from fastkml.data import ExtendedData
+from fastkml.data import Schema
+from fastkml.data import SchemaData
+from fastkml.data import SimpleData
+from fastkml.data import SimpleField
+from fastkml.enums import DataType
+from fastkml.features import Placemark
+from fastkml.store import FeatureStore
+from fastkml.times import KmlDateTime
+from fastkml.times import TimeSpan
+from fastkml.times import TimeStamp
+from tests.base import Lxml
+from tests.base import StdLibrary
+
+
+def placemarks() -> List[Placemark]:
+    return [
+        Placemark(
+            id="zurich",
+            name="Zurich",
+            geometry=geo.Point(8.54, 47.37),
+            times=TimeStamp(timestamp=KmlDateTime(date(2020, 5, 1))),
+            extended_data=ExtendedData(
+                elements=[
+                    SchemaData(
+                        schema_url="#city",
+                        data=[SimpleData(name="population", value="421878")],
+                    ),
+                    Data(name="status", value="active"),
+                ],
+            ),
+        ),
+        Placemark(
+            id="lake",
+            name="Lake",
+            geometry=geo.Polygon([(8.5, 47.2), (8.8, 47.2), (8.8, 47.4), (8.5, 47.2)]),
+            times=TimeSpan(
+                begin=KmlDateTime(date(2019, 1, 1)),
+                end=KmlDateTime(date(2019, 12, 31)),
+            ),
+        ),
+        Placemark(
+            id="paris",
+            name="Paris",
+            geometry=geo.Point(2.35, 48.86),
+            extended_data=ExtendedData(
+                elements=[
+                    SchemaData(
+                        schema_url="#city",
+                        data=[SimpleData(name="population", value="2102650")],
+                    ),
+                    Data(name="status", value="inactive"),
+                ],
+            ),
+        ),
+        Placemark(name="nowhere"),
+    ]
+
+
+def document(features: List[Placemark]) -> kml.KML:
+    return kml.KML(
+        features=[
+            Document(
+                schemata=[
+                    Schema(
+                        id="city",
+                        fields=[SimpleField(name="population", type_=DataType.int_)],
+                    ),
+                ],
+                features=[Folder(features=features[:2]), *features[2:]],
+            ),
+        ],
+    )
+
+
+def write(path: Path, features: List[Placemark]) -> Path:
+    path.write_text(document(features).to_string(), encoding="utf-8")
+    return path
+
+
+def ids(features: Iterable[Placemark]) -> List[Optional[str]]:
+    return [f.id or f.name for f in features]
+
+
+class TestStdLibrary(StdLibrary):
+    def test_add_and_query(self, tmp_path: Path) -> None:
+        path = write(tmp_path / "places.kml", placemarks())
+
+        with FeatureStore(tmp_path / "store.sqlite") as store:
+            assert store.add(path) == 4
+            assert len(store) == 4
+            assert repr(store) == "fastkml.store.FeatureStore(<4>)"
+            assert store.paths() == [path.resolve()]
+
+            found = list(store.query())
+
+        assert ids(found) == ["zurich", "lake", "paris", "nowhere"]
+        assert found[0] == Placemark.from_string(placemarks()[0].to_string())
+        assert found[1].geometry == placemarks()[1].geometry
+
+    def test_query_conditions(self, tmp_path: Path) -> None:
+        path = write(tmp_path / "places.kml", placemarks())
+
+        with FeatureStore(":memory:") as store:
+            store.add(path)
+
+            assert ids(store.query(bbox=(8, 47, 9, 48))) == ["zurich", "lake"]
+            assert ids(store.query(bbox=(8.6, 47.1, 8.7, 47.25))) == ["lake"]
+            assert ids(store.query(data={"population": 2102650})) == ["paris"]
+            assert ids(store.query(data={"population": "2102650"})) == []
+            assert ids(store.query(data={"status": "active"})) == ["zurich"]
+            assert ids(
+                store.query(bbox=(0, 40, 10, 50), data={"status": "inactive"}),
+            ) == ["paris"]
+            assert ids(store.query(begin=date(2019, 6, 1))) == ["zurich", "lake"]
+            assert ids(
+                store.query(begin=date(2019, 6, 1), end=date(2019, 7, 1)),
+            ) == ["lake"]
+            assert ids(store.query(end=date(2018, 1, 1))) == []
+            assert ids(store.query(name="nowhere")) == ["nowhere"]
+            assert ids(store.query(limit=2)) == ["zurich", "lake"]
+
+    def test_incremental_update(self, tmp_path: Path) -> None:
+        path = write(tmp_path / "places.kml", placemarks())
+
+        with FeatureStore(tmp_path / "store.sqlite") as store:
+            store.add(path)
+
+            assert store.add(path) is None
+            os.utime(path, (0, 0))
+            assert store.add(path) is None
+
+            write(path, placemarks()[2:])
+            os.utime(path, (1, 1))
+            assert store.add(path) == 2
+            assert ids(store.query()) == ["paris", "nowhere"]
+            assert ids(store.query(bbox=(8, 47, 9, 48))) == []
+            assert ids(store.query(data={"status": "active"})) == []
+
+        with FeatureStore(tmp_path / "store.sqlite") as store:
+            assert len(store) == 2
+            assert store.add(path) is None
+
+    def test_kmz(self, tmp_path: Path) -> None:
+        path = tmp_path / "places.kmz"
+        with zipfile.ZipFile(path, "w") as kmz:
+            kmz.writestr("doc.kml", document(placemarks()).to_string())
+            kmz.writestr("files/readme.txt", "not kml")
+
+        with FeatureStore(":memory:") as store:
+            assert store.add(path) == 4
+            assert ids(store.query(data={"population": 421878})) == ["zurich"]
+
+    def test_network_link_control(self, tmp_path: Path) -> None:
+        path = tmp_path / "update.kml"
+        path.write_text(
+            '<kml xmlns="http://www.opengis.net/kml/2.2">'
+            "<NetworkLinkControl><Update><Create><Document>"
+            '<Placemark id="update"/></Document></Create></Update>'
+            '</NetworkLinkControl><Document><Placemark id="a"/></Document></kml>',
+            encoding="utf-8",
+        )
+
+        with FeatureStore(":memory:") as store:
+            assert store.add(path) == 1
+            assert ids(store.query()) == ["a"]
+
+    def test_remove(self, tmp_path: Path) -> None:
+        first = write(tmp_path / "first.kml", placemarks()[:2])
+        second = write(tmp_path / "second.kml", placemarks()[2:])
+
+        with FeatureStore(":memory:") as store:
+            store.update([first, second])
+
+            assert store.remove(first)
+            assert not store.remove(first)
+            assert len(store) == 2
+            assert ids(store.query(bbox=(-180, -90, 180, 90))) == ["paris"]
+            assert store.paths() == [second.resolve()]
+
+
+class TestLxml(Lxml, TestStdLibrary):
+    pass
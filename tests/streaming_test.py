@@ -0,0 +1,218 @@
+# Copyright (C) 2024 Christian Ledermann
+#
+# This library is free software; you can redistribute it and/or modify it under
+# the terms of the GNU Lesser General Public License as published by the Free
+# Software Foundation; either version 2.1 of the License, or (at your option)
+# any later version.
+#
+# This library is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU Lesser General Public License for more
+# details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this library; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301 USA
+"""Test the resumable feature stream."""
+
+from pathlib import Path
+from typing import List
+from xml.parsers.expat import ExpatError
+
+import pygeoif.geometry as geo
+import pytest
+
+from fastkml import kml
+from fastkml.containers import Document
+from fastkml.containers import Folder
+from fastkml.data import Schema
+from fastkml.data import SimpleField
+from fastkml.enums import DataType
+from fastkml.features import Placemark
+from fastkml.streaming import Checkpoint
+from fastkml.streaming import FeatureStream
+from fastkml.styles import LineStyle
+from fastkml.styles import Style
+from fastkml.utils import iter_features
+from tests.base import Lxml
+from tests.base import StdLibrary
+
+RAW = """<?xml version="1.0" encoding="ISO-8859-1"?>
+<k:kml xmlns:k="http://www.opengis.net/kml/2.2">
+<k:Document><k:name>Zürich</k:name>
+  <k:Schema id="t"><k:SimpleField name="n" type="int"/></k:Schema>
+  <k:Style id="s"><k:LineStyle><k:width>2</k:width></k:LineStyle></k:Style>
+  <k:Placemark id="a"><k:name>Straße</k:name></k:Placemark>
+  <k:Placemark id="b"/>
+  <k:Folder><k:Placemark id="c"><k:styleUrl>#s</k:styleUrl></k:Placemark></k:Folder>
+</k:Document>
+</k:kml>
+"""
+
+
+def document() -> kml.KML:
+    return kml.KML(
+        features=[
+            Document(
+                id="doc",
+                styles=[Style(id="line", styles=[LineStyle(width=3)])],
+                schemata=[
+                    Schema(
+                        id="schema",
+                        fields=[SimpleField(name="n", type_=DataType.int_)],
+                    ),
+                ],
+                features=[
+                    Folder(
+                        id="outer",
+                        features=[
+                            Placemark(id=f"p{i}", geometry=geo.Point(i, i))
+                            for i in range(5)
+                        ],
+                    ),
+                    *(
+                        Placemark(id=f"q{i}", geometry=geo.Point(i, -i))
+                        for i in range(4)
+                    ),
+                ],
+            ),
+        ],
+    )
+
+
+def write(path: Path) -> Path:
+    path.write_text(document().to_string(prettyprint=True), encoding="utf-8")
+    return path
+
+
+class TestStdLibrary(StdLibrary):
+    def test_stream(self, tmp_path: Path) -> None:
+        path = write(tmp_path / "doc.kml")
+        expected = {
+            feature.id: feature for feature in iter_features(kml.KML.parse(path))
+        }
+        checkpoints: List[Checkpoint] = []
+        stream = FeatureStream(path, interval=4, on_checkpoint=checkpoints.append)
+
+        features = list(stream)
+
+        assert [feature.id for feature in features] == [
+            *(f"p{i}" for i in range(5)),
+            *(f"q{i}" for i in range(4)),
+        ]
+        assert features == [expected[feature.id] for feature in features]
+        assert [checkpoint.position for checkpoint in checkpoints] == [4, 8]
+        assert stream.position == 9
+        assert stream.checkpoint == checkpoints[-1]
+        assert repr(stream) == (
+            f"fastkml.streaming.FeatureStream(path={path!r}, interval=4, position=9)"
+        )
+
+    def test_checkpoint(self, tmp_path: Path) -> None:
+        path = write(tmp_path / "doc.kml")
+        checkpoints: List[Checkpoint] = []
+        stream = FeatureStream(path, interval=4, on_checkpoint=checkpoints.append)
+        styles = []
+        for feature in stream:
+            if feature.id == "p3":
+                styles = list(stream.styles)
+                schemas = list(stream.schemas)
+
+        checkpoint = checkpoints[0]
+        assert styles == ["line"]
+        assert schemas == []
+        assert len(checkpoint.containers) == 3
+        assert checkpoint.containers[0][1] == ()
+        assert len(checkpoint.containers[1][1]) == 1
+        assert checkpoint.containers[2][0].endswith('id="outer">')
+        assert "http://www.opengis.net/kml/2.2" in checkpoint.namespaces.values()
+        assert path.read_bytes()[: checkpoint.offset].endswith(b"Placemark>")
+        assert Checkpoint.from_json(checkpoint.to_json()) == checkpoint
+
+    def test_resume(self, tmp_path: Path) -> None:
+        path = write(tmp_path / "doc.kml")
+        checkpoints: List[Checkpoint] = []
+        features = list(
+            FeatureStream(path, interval=4, on_checkpoint=checkpoints.append),
+        )
+        resumed: List[Checkpoint] = []
+
+        stream = FeatureStream(
+            path,
+            interval=4,
+            checkpoint=Checkpoint.from_json(checkpoints[0].to_json()),
+            on_checkpoint=resumed.append,
+        )
+        rest = []
+        for feature in stream:
+            rest.append(feature)
+            assert list(stream.styles) == ["line"]
+
+        assert rest == features[4:]
+        assert resumed == checkpoints[1:]
+        assert stream.position == 9
+
+    def test_resume_prefixed_namespace_and_encoding(self, tmp_path: Path) -> None:
+        path = tmp_path / "latin.kml"
+        path.write_bytes(RAW.encode("iso-8859-1"))
+        checkpoints: List[Checkpoint] = []
+
+        features = list(
+            FeatureStream(path, interval=1, on_checkpoint=checkpoints.append),
+        )
+        stream = FeatureStream(path, checkpoint=checkpoints[1])
+        rest = []
+        for feature in stream:
+            rest.append(feature)
+            assert stream.styles["s"].styles[0].width == 2
+            assert stream.schemas["t"].fields[0].type_ == DataType.int_
+
+        assert [feature.id for feature in features] == ["a", "b", "c"]
+        assert features[0].name == "Stra\xdfe"
+        assert checkpoints[0].encoding == "ISO-8859-1"
+        assert checkpoints[0].namespaces == {"k": "http://www.opengis.net/kml/2.2"}
+        assert rest == features[2:]
+        assert rest[0].style_url.url == "#s"
+        assert stream.styles == {}
+
+    def test_resume_at_end(self, tmp_path: Path) -> None:
+        path = write(tmp_path / "doc.kml")
+        stream = FeatureStream(path, interval=9)
+        list(stream)
+
+        assert stream.checkpoint
+        assert list(FeatureStream(path, checkpoint=stream.checkpoint)) == []
+
+    def test_resume_after_network_link_control(self, tmp_path: Path) -> None:
+        path = tmp_path / "update.kml"
+        path.write_text(
+            '<kml xmlns="http://www.opengis.net/kml/2.2">'
+            "<NetworkLinkControl><Update><Create><Document>"
+            '<Placemark id="created"/>'
+            "</Document></Create></Update></NetworkLinkControl>"
+            '<Document><Placemark id="a"/><Folder><Placemark id="b"/></Folder>'
+            '<Placemark id="c"/></Document></kml>',
+            encoding="utf-8",
+        )
+        checkpoints: List[Checkpoint] = []
+
+        features = list(
+            FeatureStream(path, interval=1, on_checkpoint=checkpoints.append),
+        )
+        rest = list(FeatureStream(path, checkpoint=checkpoints[0]))
+
+        assert [feature.id for feature in features] == ["a", "b", "c"]
+        assert checkpoints[0].position == 1
+        assert len(checkpoints[0].containers) == 2
+        assert rest == features[1:]
+
+    def test_empty_file(self, tmp_path: Path) -> None:
+        path = tmp_path / "empty.kml"
+        path.write_bytes(b"")
+
+        with pytest.raises(ExpatError, match="no element found"):
+            list(FeatureStream(path))
+
+
+class TestLxml(Lxml, TestStdLibrary):
+    pass
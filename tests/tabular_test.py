@@ -0,0 +1,346 @@
+# Copyright (C) 2024 Christian Ledermann
+#
+# This library is free software; you can redistribute it and/or modify it under
+# the terms of the GNU Lesser General Public License as published by the Free
+# Software Foundation; either version 2.1 of the License, or (at your option)
+# any later version.
+#
+# This library is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU Lesser General Public License for more
+# details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this library; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301 USA
+"""Test the Placemark builder for tabular rows."""
+
+import zipfile
+from pathlib import Path
+from typing import Dict
+
+import pygeoif.geometry as geo
+import pytest
+
+from fastkml import kml
+from fastkml.containers import Document
+from fastkml.data import Data
+from fastkml.data import ExtendedData
+from fastkml.data import Schema
+from fastkml.data import SchemaData
+from fastkml.data import SimpleData
+from fastkml.data import SimpleField
+from fastkml.enums import DataType
+from fastkml.features import Placemark
+from fastkml.geometry import LineString
+from fastkml.styles import Style
+from fastkml.tabular import PlacemarkBuilder
+from fastkml.tabular import to_columns
+from tests.base import Lxml
+from tests.base import StdLibrary
+
+SCHEMA = Schema(
+    id="cities",
+    fields=[
+        SimpleField(name="population", type_=DataType.int_),
+        SimpleField(name="capital", type_=DataType.bool_),
+        SimpleField(name="area", type_=DataType.double),
+        SimpleField(name="note", type_=DataType.string),
+    ],
+)
+COLUMNS = ["id", "name", "lon", "lat", "population", "capital", "area", "note"]
+ROWS = [
+    ("paris", "Paris", "2.35", "48.85", "2100000", "true", 105.4, "Ville & <lumière>"),
+    ("lyon", " Lyon ", 4.83, 45.76, 513000, False, "", None),
+    ("", "Nowhere", None, None, None, "0", None, " "),
+]
+
+
+def expected_placemark(
+    id: str,
+    name: str,
+    point: geo.Point,
+    data: Dict[str, str],
+) -> Placemark:
+    return Placemark(
+        id=id,
+        name=name,
+        geometry=point,
+        extended_data=ExtendedData(
+            elements=[
+                SchemaData(
+                    schema_url="#cities",
+                    data=[SimpleData(name=k, value=v) for k, v in data.items()],
+                ),
+            ],
+        ),
+    )
+
+
+class TestStdLibrary(StdLibrary):
+    def test_build_from_tuples(self) -> None:
+        builder = PlacemarkBuilder(
+            SCHEMA,
+            columns=COLUMNS,
+            id="id",
+            name="name",
+            geometry=("lon", "lat"),
+        )
+
+        placemarks = list(builder.build_all(ROWS))
+
+        assert placemarks[0] == expected_placemark(
+            "paris",
+            "Paris",
+            geo.Point(2.35, 48.85),
+            {
+                "population": "2100000",
+                "capital": "1",
+                "area": "105.4",
+                "note": "Ville & <lumière>",
+            },
+        )
+        assert placemarks[1] == expected_placemark(
+            "lyon",
+            "Lyon",
+            geo.Point(4.83, 45.76),
+            {"population": "513000", "capital": "0"},
+        )
+        assert placemarks[2].geometry is None
+        assert placemarks[2].id == ""
+        assert placemarks[2].extended_data.elements[0].data == [
+            SimpleData(name="capital", value="0"),
+        ]
+
+    def test_build_from_mappings(self) -> None:
+        builder = PlacemarkBuilder(
+            SCHEMA,
+            description="note",
+            geometry="shape",
+            schema_url="schema.kml#cities",
+        )
+        line = geo.LineString([(0, 0), (1, 1)])
+
+        placemark = builder.build(
+            {"shape": line, "population": 3, "capital": 1, "area": 2, "note": "a"},
+        )
+        no_data = builder.build(
+            {
+                "shape": None,
+                "population": None,
+                "capital": "",
+                "area": None,
+                "note": "",
+            },
+        )
+
+        assert placemark.name is None
+        assert placemark.description == "a"
+        assert isinstance(placemark.kml_geometry, LineString)
+        assert placemark.geometry == line
+        schema_data = placemark.extended_data.elements[0]
+        assert schema_data.schema_url == "schema.kml#cities"
+        assert [d.value for d in schema_data.data] == ["3", "1", "2.0", "a"]
+        assert no_data.extended_data is None
+        assert no_data.kml_geometry is None
+
+    def test_built_placemarks_are_independent(self) -> None:
+        builder = PlacemarkBuilder(SCHEMA, columns=COLUMNS, name="name")
+
+        first, second = builder.build_all(ROWS[:2])
+        first.styles.append(Style(id="style"))
+
+        assert second.styles == []
+
+    def test_built_placemarks_do_not_share_namespaces(self) -> None:
+        builder = PlacemarkBuilder(SCHEMA, columns=COLUMNS, name="name")
+
+        first, second = builder.build_all(ROWS[:2])
+        first.name_spaces["extra"] = "urn:extra"
+
+        assert "extra" not in second.name_spaces
+        assert "extra" not in Placemark().name_spaces
+
+    def test_integral_float_text(self) -> None:
+        builder = PlacemarkBuilder(
+            Schema(id="counts", fields=[SCHEMA.fields[0]]),
+            columns=["population"],
+        )
+
+        placemark = builder.build(["3.0"])
+
+        assert placemark.extended_data.elements[0].data == [
+            SimpleData(name="population", value="3"),
+        ]
+        assert 'name="population">3<' in builder.to_xml([3.0])
+
+    def test_invalid_integer_names_the_column(self) -> None:
+        builder = PlacemarkBuilder(
+            Schema(id="counts", fields=[SCHEMA.fields[0]]),
+            columns=["population"],
+        )
+
+        with pytest.raises(ValueError, match="'population'"):
+            builder.build(["3.5"])
+        with pytest.raises(ValueError, match="'population'"):
+            builder.to_xml(["many"])
+
+    def test_boolean_values(self) -> None:
+        builder = PlacemarkBuilder(
+            Schema(id="capitals", fields=[SCHEMA.fields[1]]),
+            columns=["capital"],
+        )
+
+        for value, text in (("TRUE", "1"), (" false ", "0"), (1, "1"), (False, "0")):
+            assert f'name="capital">{text}<' in builder.to_xml([value])
+        for invalid in ("yes", "abc", "2", 2):
+            with pytest.raises(ValueError, match="'capital'"):
+                builder.build([invalid])
+
+    def test_to_xml_matches_built_placemarks(self) -> None:
+        builder = PlacemarkBuilder(
+            SCHEMA,
+            columns=COLUMNS,
+            id="id",
+            name="name",
+            description="note",
+            geometry=("lon", "lat"),
+        )
+
+        for row in ROWS:
+            assert Placemark.from_string(builder.to_xml(row)) == builder.build(row)
+
+    def test_write(self, tmp_path: Path) -> None:
+        builder = PlacemarkBuilder(
+            SCHEMA,
+            columns=COLUMNS,
+            id="id",
+            name="name",
+            geometry=("lon", "lat"),
+        )
+        path = tmp_path / "cities.kml"
+
+        count = builder.write(
+            path,
+            iter(ROWS),
+            document=Document(name="Cities", features=[Placemark(name="first")]),
+            precision=3,
+        )
+
+        assert count == 3
+        document = kml.KML.parse(path).features[0]
+        assert document.name == "Cities"
+        assert document.schemata == [SCHEMA]
+        assert [p.name for p in document.features] == [
+            "first",
+            "Paris",
+            "Lyon",
+            "Nowhere",
+        ]
+        assert document.features[1] == builder.build(ROWS[0])
+        assert "<coordinates>2.350,48.850</coordinates>" in path.read_text(
+            encoding="UTF-8",
+        )
+
+    def test_write_kmz(self, tmp_path: Path) -> None:
+        builder = PlacemarkBuilder(SCHEMA, columns=COLUMNS, name="name")
+        path = tmp_path / "cities.kmz"
+
+        assert builder.write(path, ROWS) == 3
+
+        with zipfile.ZipFile(path) as kmz:
+            document = kml.KML.from_string(
+                kmz.read("doc.kml").decode("UTF-8"),
+            ).features[0]
+        assert [p.name for p in document.features] == ["Paris", "Lyon", "Nowhere"]
+
+    def columns_document(self) -> kml.KML:
+        builder = PlacemarkBuilder(
+            SCHEMA,
+            columns=COLUMNS,
+            name="name",
+            geometry=("lon", "lat"),
+            schema_url="http://example.com/cities.kml#cities",
+        )
+        placemarks = list(builder.build_all(ROWS))
+        placemarks[1].extended_data.elements.append(Data(name="rank", value="2"))
+        placemarks[2].extended_data.elements[0].data.append(
+            SimpleData(name="population", value="many"),
+        )
+        untyped = Placemark(
+            extended_data=ExtendedData(
+                elements=[
+                    SchemaData(
+                        schema_url="#unknown",
+                        data=[SimpleData(name="area", value="12.5")],
+                    ),
+                ],
+            ),
+        )
+        document = Document(schemata=[SCHEMA], features=placemarks[:1])
+        return kml.KML(
+            features=[
+                Document(
+                    features=[document, Placemark(name="empty"), *placemarks[1:]],
+                ),
+                untyped,
+            ],
+        )
+
+    def test_to_columns_lists(self) -> None:
+        columns = to_columns(self.columns_document(), arrays=False)
+
+        assert list(columns) == [
+            "population",
+            "capital",
+            "area",
+            "note",
+            "rank",
+            "geometry",
+        ]
+        assert columns["population"] == [2100000, None, 513000, None, None]
+        assert columns["capital"] == [True, None, False, False, None]
+        assert columns["area"] == [105.4, None, None, None, 12.5]
+        assert columns["note"] == ["Ville & <lumière>", None, None, None, None]
+        assert columns["rank"] == [None, None, "2", None, None]
+        assert columns["geometry"] == [
+            geo.Point(2.35, 48.85),
+            None,
+            geo.Point(4.83, 45.76),
+            None,
+            None,
+        ]
+
+    def test_to_columns_arrays(self) -> None:
+        np = pytest.importorskip("numpy")
+
+        columns = to_columns(self.columns_document(), geometry="shape")
+
+        population = columns["population"]
+        assert population.dtype == np.int32
+        assert population.mask.tolist() == [False, True, False, True, True]
+        assert population.compressed().tolist() == [2100000, 513000]
+        assert columns["capital"].dtype == np.bool_
+        area = np.asarray(columns["area"])
+        assert area.dtype == np.float64
+        assert np.isnan(area[[1, 2, 3]]).all()
+        assert area[[0, 4]].tolist() == [105.4, 12.5]
+        assert columns["rank"].dtype == object
+        assert columns["shape"][0] == geo.Point(2.35, 48.85)
+
+    def test_to_columns_without_missing_values(self) -> None:
+        np = pytest.importorskip("numpy")
+        builder = PlacemarkBuilder(SCHEMA, columns=COLUMNS)
+
+        columns = to_columns(
+            Document(schemata=[SCHEMA], features=list(builder.build_all(ROWS[:2]))),
+            geometry=None,
+        )
+
+        assert not isinstance(columns["capital"], np.ma.MaskedArray)
+        assert columns["capital"].tolist() == [True, False]
+        assert "geometry" not in columns
+
+
+class TestLxml(Lxml, TestStdLibrary):
+    pass
@@ -0,0 +1,160 @@
+# Copyright (C) 2024 Christian Ledermann
+#
+# This library is free software; you can redistribute it and/or modify it under
+# the terms of the GNU Lesser General Public License as published by the Free
+# Software Foundation; either version 2.1 of the License, or (at your option)
+# any later version.
+#
+# This library is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU Lesser General Public License for more
+# details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this library; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301 USA
+"""Test the temporal index."""
+
+import datetime
+from typing import List
+from typing import Optional
+
+from fastkml import kml
+from fastkml.enums import DateTimeResolution
+from fastkml.features import _Feature
+from fastkml.temporal import TemporalIndex
+from fastkml.temporal import time_interval
+from fastkml.times import KmlDateTime
+from tests.base import Lxml
+from tests.base import StdLibrary
+
+DOC = """<kml xmlns="http://www.opengis.net/kml/2.2"
+  xmlns:gx="http://www.google.com/kml/ext/2.2">
+  <Document>
+    <Placemark id="year">
+      <TimeStamp><when>2019</when></TimeStamp>
+    </Placemark>
+    <Folder id="folder">
+      <TimeSpan><begin>2020-03</begin><end>2020-04-15</end></TimeSpan>
+      <Placemark id="open-end">
+        <TimeSpan><begin>2020-04-10T12:00:00Z</begin></TimeSpan>
+      </Placemark>
+    </Folder>
+    <Placemark id="track">
+      <gx:Track>
+        <when>2021-01-01T00:00:00Z</when>
+        <when>2021-01-01T01:00:00+01:00</when>
+        <when>2021-01-01T02:00:00Z</when>
+        <gx:coord>0 0</gx:coord>
+        <gx:coord>1 1</gx:coord>
+        <gx:coord>2 2</gx:coord>
+      </gx:Track>
+    </Placemark>
+    <Placemark id="timeless"/>
+  </Document>
+</kml>
+"""
+
+
+def ids(features: List[_Feature]) -> List[Optional[str]]:
+    return [f.id for f in features]
+
+
+def parse(datestr: str) -> KmlDateTime:
+    dt = KmlDateTime.parse(datestr)
+    assert dt
+    return dt
+
+
+class TestStdLibrary(StdLibrary):
+    def test_time_interval_resolutions(self) -> None:
+        year = time_interval(parse("2020"))
+        month = time_interval(parse("2020-02"))
+        day = time_interval(datetime.date(2020, 2, 29))
+        instant = time_interval(
+            datetime.datetime(2020, 2, 29, 12, tzinfo=datetime.timezone.utc),
+        )
+
+        assert year[0] == month[0] - 31 * 86_400_000_000
+        assert year[1] - year[0] + 1 == 366 * 86_400_000_000
+        assert month[1] - month[0] + 1 == 29 * 86_400_000_000
+        assert day[1] == month[1]
+        assert day[0] < instant[0] == instant[1] < day[1]
+
+    def test_time_interval_naive_is_utc(self) -> None:
+        naive = datetime.datetime(2020, 1, 1, 1)  # noqa: DTZ001
+        aware = datetime.datetime(
+            2020,
+            1,
+            1,
+            2,
+            tzinfo=datetime.timezone(datetime.timedelta(hours=1)),
+        )
+
+        assert time_interval(naive) == time_interval(aware)
+
+    def test_index_from_kml(self) -> None:
+        k = kml.KML.from_string(DOC)
+
+        index = TemporalIndex.from_kml(k)
+
+        assert len(index) == 4
+        assert repr(index) == "fastkml.temporal.TemporalIndex(<4>)"
+
+    def test_at(self) -> None:
+        index = TemporalIndex.from_kml(kml.KML.from_string(DOC))
+
+        assert ids(index.at(datetime.date(2019, 7, 1))) == ["year"]
+        assert ids(index.at(parse("2020-04-12"))) == ["folder", "open-end"]
+        assert ids(index.at(parse("2030"))) == ["open-end"]
+        assert ids(
+            index.at(parse("2021-01-01T00:30:00Z")),
+        ) == ["open-end", "track"]
+        assert index.at(parse("2018")) == []
+
+    def test_overlapping(self) -> None:
+        index = TemporalIndex.from_kml(kml.KML.from_string(DOC))
+
+        assert ids(
+            index.overlapping(
+                parse("2019-12-31"),
+                KmlDateTime(datetime.date(2020, 3, 1), DateTimeResolution.year_month),
+            ),
+        ) == ["folder", "year"]
+        assert ids(
+            index.overlapping(
+                datetime.datetime(2021, 1, 1, 2, tzinfo=datetime.timezone.utc),
+                datetime.datetime(2022, 1, 1, tzinfo=datetime.timezone.utc),
+            ),
+        ) == ["open-end", "track"]
+
+    def test_bounds(self) -> None:
+        index = TemporalIndex.from_kml(kml.KML.from_string(DOC))
+
+        assert index.bounds == (
+            time_interval(parse("2019"))[0],
+            2**63 - 1,
+        )
+        assert TemporalIndex().bounds is None
+
+    def test_matches_linear_scan(self) -> None:
+        base = datetime.datetime(2020, 1, 1, tzinfo=datetime.timezone.utc)
+        entries = []
+        for i in range(200):
+            start = base + datetime.timedelta(hours=(i * 7) % 97)
+            end = start + datetime.timedelta(hours=i % 5)
+            entries.append((time_interval(start)[0], time_interval(end)[1], i))
+        index = TemporalIndex(entries)  # type: ignore[arg-type]
+
+        for hours in range(0, 110, 3):
+            query = time_interval(base + datetime.timedelta(hours=hours))
+            expected = [
+                feature
+                for begin, end, feature in entries
+                if begin <= query[1] and end >= query[0]
+            ]
+            assert index._features_at(index._search(*query)) == expected
+
+
+class TestLxml(Lxml, TestStdLibrary):
+    pass
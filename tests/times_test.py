@@ -25,6 +25,8 @@ from dateutil.tz import tzutc
 import fastkml as kml
 from fastkml.enums import DateTimeResolution
 from fastkml.times import KmlDateTime
+from fastkml.times import parse_datetime
+from fastkml.times import xsd_datetime
 from tests.base import Lxml
 from tests.base import StdLibrary
 
@@ -214,6 +216,63 @@ class TestDateTime(StdLibrary):
         ):
             KmlDateTime.parse("19973")
 
+    def test_parse_datetime_fraction(self) -> None:
+        dt = KmlDateTime.parse("1997-07-16T07:30:15.1234567-05:30")
+
+        assert dt
+        assert dt.resolution == DateTimeResolution.datetime
+        assert dt.dt == datetime.datetime(
+            1997,
+            7,
+            16,
+            13,
+            0,
+            15,
+            123456,
+            tzinfo=tzutc(),
+        )
+
+    def test_parse_datetime_basic_format(self) -> None:
+        dt = KmlDateTime.parse("19970716T073015Z")
+
+        assert dt
+        assert dt.dt == datetime.datetime(1997, 7, 16, 7, 30, 15, tzinfo=tzutc())
+
+    def test_parse_datetime_without_seconds(self) -> None:
+        dt = KmlDateTime.parse("1997-07-16T07:30")
+
+        assert dt
+        assert dt.resolution == DateTimeResolution.datetime
+        assert dt.dt == datetime.datetime(1997, 7, 16, 7, 30, tzinfo=tzutc())
+
+    def test_xsd_datetime_regex(self) -> None:
+        assert xsd_datetime.match("2024-02-29T23:59:59.5+0100")
+        assert parse_datetime("2024-02-29T23:59:59.5+0100") == datetime.datetime(
+            2024,
+            2,
+            29,
+            22,
+            59,
+            59,
+            500000,
+            tzinfo=tzutc(),
+        )
+        assert not xsd_datetime.match("2024-02-29T23:59")
+        assert not xsd_datetime.match("2024-02-29 23:59:59")
+
+    def test_parse_datetime_is_aware(self) -> None:
+        assert parse_datetime("2024-01-01T00:00:00").tzinfo is not None
+        assert parse_datetime("2024-01-01T00:00:00Z").utcoffset() == datetime.timedelta(
+            0,
+        )
+
+    def test_parse_returns_new_instances(self) -> None:
+        dt1 = KmlDateTime.parse("2024-01-01T00:00:00Z")
+        dt2 = KmlDateTime.parse("2024-01-01T00:00:00Z")
+
+        assert dt1 == dt2
+        assert dt1 is not dt2
+
 
 class TestStdLibrary(StdLibrary):
     """Test with the standard library."""
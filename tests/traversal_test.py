@@ -0,0 +1,214 @@
+# Copyright (C) 2024 Christian Ledermann
+#
+# This library is free software; you can redistribute it and/or modify it under
+# the terms of the GNU Lesser General Public License as published by the Free
+# Software Foundation; either version 2.1 of the License, or (at your option)
+# any later version.
+#
+# This library is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU Lesser General Public License for more
+# details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this library; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301 USA
+"""Test the registry aware traversal."""
+
+from typing import Any
+from typing import Iterable
+from typing import Iterator
+from typing import List
+from typing import Optional
+
+import pygeoif.geometry as geo
+
+from fastkml import kml
+from fastkml.containers import Document
+from fastkml.containers import Folder
+from fastkml.features import Placemark
+from fastkml.features import _Feature
+from fastkml.geometry import Coordinates
+from fastkml.geometry import LinearRing
+from fastkml.geometry import LineString
+from fastkml.geometry import Point
+from fastkml.styles import Style
+from fastkml.traversal import Transformer
+from fastkml.traversal import Visitor
+from fastkml.traversal import _plan
+from fastkml.traversal import clear_cache
+from fastkml.traversal import walk
+from fastkml.utils import find_all
+from tests.base import Lxml
+from tests.base import StdLibrary
+
+
+class UnexpectedIterationError(Exception):
+    pass
+
+
+class Untouchable(List[Any]):
+    def __iter__(self) -> Iterator[Any]:
+        """Fail when the traversal descends into the list."""
+        raise UnexpectedIterationError
+
+
+def ids(objects: Iterable[object]) -> List[Optional[str]]:
+    return [getattr(obj, "id", None) for obj in objects]
+
+
+def document() -> kml.KML:
+    return kml.KML(
+        features=[
+            Document(
+                id="doc",
+                styles=[Style(id="style")],
+                features=[
+                    Placemark(id="a", geometry=geo.Point(1, 2)),
+                    Folder(
+                        id="folder",
+                        features=[
+                            Placemark(
+                                id="b",
+                                geometry=geo.Polygon(
+                                    [(0, 0), (0, 1), (1, 1), (0, 0)],
+                                ),
+                            ),
+                            Placemark(
+                                id="c",
+                                geometry=geo.LineString([(0, 0), (1, 1)]),
+                            ),
+                        ],
+                    ),
+                ],
+            ),
+        ],
+    )
+
+
+class TestStdLibrary(StdLibrary):
+    def test_walk(self) -> None:
+        k = document()
+
+        assert ids(walk(k, of_type=Placemark)) == ["a", "b", "c"]
+        assert ids(walk(k, of_type=(Folder, Style))) == [
+            "style",
+            "folder",
+        ]
+        assert [type(g) for g in walk(k, of_type=LineString)] == [
+            LinearRing,
+            LineString,
+        ]
+        assert len(list(walk(k, of_type=Coordinates))) == 3
+
+    def test_walk_prunes_branches(self) -> None:
+        k = document()
+        for coordinates in walk(k, of_type=Coordinates):
+            assert isinstance(coordinates, Coordinates)
+            coordinates.coords = Untouchable(coordinates.coords)
+        k.features[0].name_spaces = Untouchable()  # type: ignore[assignment]
+
+        assert len(list(find_all(k, of_type=Placemark))) == 3
+        assert len(list(find_all(k, of_type=Point))) == 1
+        assert _plan(Point, (Placemark,)) == frozenset()
+        assert _plan(Placemark, (Placemark,)) == frozenset()
+
+    def test_find_all_matches_attributes(self) -> None:
+        k = document()
+
+        assert ids(find_all(k, of_type=Placemark, id="b")) == ["b"]
+        assert list(find_all(k, of_type=(Style, Folder), id="nope")) == []
+
+    def test_visitor_dispatch(self) -> None:
+        class Collect(Visitor):
+            def __init__(self) -> None:
+                self.seen: List[str] = []
+
+            def visit__Feature(self, feature: _Feature) -> None:  # noqa: N802
+                self.seen.append(f"feature {feature.id}")
+                self.generic_visit(feature)
+
+            def visit_Placemark(self, placemark: Placemark) -> None:  # noqa: N802
+                self.seen.append(f"placemark {placemark.id}")
+
+            def visit_Coordinates(self, coordinates: Coordinates) -> None:  # noqa: N802
+                self.seen.append(repr(coordinates))  # pragma: no cover
+
+        collect = Collect()
+        collect.visit(document())
+
+        assert collect.seen == [
+            "feature doc",
+            "placemark a",
+            "feature folder",
+            "placemark b",
+            "placemark c",
+        ]
+
+    def test_visitor_descends_into_geometries(self) -> None:
+        class CountVertices(Visitor):
+            def __init__(self) -> None:
+                self.vertices = 0
+
+            def visit_Coordinates(self, coordinates: Coordinates) -> None:  # noqa: N802
+                self.vertices += len(coordinates.coords)
+
+        counter = CountVertices()
+        counter.visit(document())
+
+        assert counter.vertices == 7
+
+    def test_transformer(self) -> None:
+        class Transform(Transformer):
+            def visit_Folder(self, folder: Folder) -> Folder:  # noqa: N802
+                self.generic_visit(folder)
+                folder.name = "transformed"
+                return folder
+
+            def visit_Placemark(  # noqa: N802
+                self,
+                placemark: Placemark,
+            ) -> Optional[Placemark]:
+                if placemark.id == "c":
+                    return None
+                return Placemark(id=placemark.id.upper())
+
+            def visit_Style(self, style: Style) -> None:  # noqa: N802, ARG002
+                return None
+
+        k = Transform().visit(document())
+
+        doc = k.features[0]
+        assert doc.styles == []
+        assert [f.id for f in doc.features] == ["A", "folder"]
+        assert doc.features[1].name == "transformed"
+        assert [p.id for p in doc.features[1].features] == ["B"]
+
+    def test_transformer_tuples(self) -> None:
+        class RemoveC(Transformer):
+            def visit_Placemark(  # noqa: N802
+                self,
+                placemark: Placemark,
+            ) -> Optional[Placemark]:
+                return None if placemark.id == "c" else placemark
+
+        k = document()
+        folder = k.features[0].features[1]
+        folder.features = tuple(folder.features)
+
+        RemoveC().visit(k)
+
+        assert isinstance(folder.features, tuple)
+        assert ids(folder.features) == ["b"]
+
+    def test_clear_cache(self) -> None:
+        plan = _plan(Folder, (Placemark,))
+
+        clear_cache()
+
+        assert _plan(Folder, (Placemark,)) == plan
+        assert "features" in plan
+
+
+class TestLxml(Lxml, TestStdLibrary):
+    pass
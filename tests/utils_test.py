@@ -15,13 +15,19 @@
 # 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301 USA
 """Test the utils module."""
 
+import io
+import zipfile
 from typing import List
 
+import pytest
+
 from fastkml import Schema
 from fastkml import SchemaData
 from fastkml import kml
 from fastkml.utils import find
 from fastkml.utils import find_all
+from fastkml.utils import iter_elements
+from fastkml.utils import open_kml
 from tests.base import Lxml
 from tests.base import StdLibrary
 
@@ -213,3 +219,53 @@ class TestFindAll(StdLibrary):
 
 class TestFindAllLxml(Lxml):
     """Run the tests using lxml."""
+
+
+UPDATE = (
+    b'<kml xmlns="http://www.opengis.net/kml/2.2"><Document><Folder>'
+    b'<Placemark id="a"/><Placemark id="b"/></Folder>'
+    b"<NetworkLinkControl><Update><Create><Document>"
+    b'<Placemark id="update"/></Document></Create></Update></NetworkLinkControl>'
+    b"</Document></kml>"
+)
+
+
+class TestStreaming(StdLibrary):
+    """Test the streaming helpers."""
+
+    def test_iter_elements(self) -> None:
+        features = []
+        last = None
+        for element, is_feature in iter_elements(io.BytesIO(UPDATE)):
+            name = element.tag.rpartition("}")[2]
+            if is_feature and name == "Placemark":
+                features.append(element.get("id"))
+            last = element
+
+        assert features == ["a", "b"]
+        assert last is not None
+        ns = "{http://www.opengis.net/kml/2.2}"
+        assert last.find(f"{ns}Document/{ns}Folder") is not None
+        assert last.find(f"{ns}Document/{ns}Folder/{ns}Placemark") is None
+        assert last.find(f"{ns}Document/{ns}NetworkLinkControl") is None
+
+    def test_open_kml(self) -> None:
+        archive = io.BytesIO()
+        with zipfile.ZipFile(archive, "w") as kmz:
+            kmz.writestr("files/other.kml", b"<kml/>")
+            kmz.writestr("doc.kml", UPDATE)
+
+        assert open_kml(archive).read() == UPDATE
+        assert open_kml(io.BytesIO(UPDATE)).read() == UPDATE
+
+    def test_open_kml_without_document(self) -> None:
+        archive = io.BytesIO()
+        with zipfile.ZipFile(archive, "w") as kmz:
+            kmz.writestr("readme.txt", b"")
+
+        with pytest.raises(ValueError, match="does not contain a KML document"):
+            open_kml(archive)
+
+
+class TestStreamingLxml(Lxml, TestStreaming):
+    """Run the streaming tests using lxml."""